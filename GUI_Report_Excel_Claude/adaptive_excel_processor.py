@@ -11,12 +11,16 @@ import re
 from datetime import datetime, date
 from typing import Dict, List, Any, Optional, Tuple, Set
 from pathlib import Path
+from collections.abc import Mapping
 from openpyxl import load_workbook, Workbook
 from openpyxl.styles import PatternFill, Font, Alignment, Border, Side
 from openpyxl.utils import get_column_letter, column_index_from_string
 from openpyxl.utils.dataframe import dataframe_to_rows
 import pandas as pd
 
+from result_set import ResultSet
+import tracing
+
 class AdaptiveExcelProcessor:
     """
     Processor yang adaptif terhadap perubahan template Excel
@@ -347,19 +351,13 @@ class AdaptiveExcelProcessor:
         try:
             self.logger.info("Starting adaptive report generation...")
 
-            # Create new workbook from template
-            new_workbook = self._create_workbook_from_template()
-
-            # Process each sheet
-            for sheet_name in new_workbook.sheetnames:
-                if sheet_name in self.template_info['data_sections']:
-                    success = self._process_sheet(new_workbook[sheet_name], data, sheet_name)
-                    if not success:
-                        self.logger.error(f"Failed to process sheet: {sheet_name}")
-                        return False
+            new_workbook = self.render_workbook(data)
+            if new_workbook is None:
+                return False
 
             # Save the workbook
-            new_workbook.save(output_path)
+            with tracing.span('save_workbook', stage='save'):
+                new_workbook.save(output_path)
             self.logger.info(f"Report saved to: {output_path}")
 
             return True
@@ -368,6 +366,27 @@ class AdaptiveExcelProcessor:
             self.logger.error(f"Error generating report: {e}")
             return False
 
+    @tracing.traced(stage='render')
+    def render_workbook(self, data: Dict[str, Any]) -> Optional[Workbook]:
+        """
+        Isi salinan template dengan data tanpa menyimpan ke file
+
+        Returns:
+            Workbook hasil render, None jika ada sheet yang gagal diproses
+        """
+        # Create new workbook from template
+        new_workbook = self._create_workbook_from_template()
+
+        # Process each sheet
+        for sheet_name in new_workbook.sheetnames:
+            if sheet_name in self.template_info['data_sections']:
+                success = self._process_sheet(new_workbook[sheet_name], data, sheet_name)
+                if not success:
+                    self.logger.error(f"Failed to process sheet: {sheet_name}")
+                    return None
+
+        return new_workbook
+
     def _create_workbook_from_template(self) -> Workbook:
         """Create new workbook from template preserving formatting"""
         # Copy the template workbook
@@ -481,7 +500,7 @@ class AdaptiveExcelProcessor:
         if placeholder in data:
             value = data[placeholder]
             # Safety check - don't return complex objects for single placeholders
-            if isinstance(value, (list, dict, set, tuple)):
+            if isinstance(value, (list, dict, set, tuple, ResultSet)):
                 self.logger.warning(f"Value for {placeholder} is complex, converting to string")
                 return str(value) if value else ""
             return value
@@ -490,7 +509,7 @@ class AdaptiveExcelProcessor:
         for key, value in data.items():
             if key.lower() == placeholder.lower():
                 # Safety check
-                if isinstance(value, (list, dict, set, tuple)):
+                if isinstance(value, (list, dict, set, tuple, ResultSet)):
                     self.logger.warning(f"Value for {placeholder} (case-insensitive) is complex, converting to string")
                     return str(value) if value else ""
                 return value
@@ -499,7 +518,7 @@ class AdaptiveExcelProcessor:
         for key, value in data.items():
             if placeholder.lower() in key.lower() or key.lower() in placeholder.lower():
                 # Safety check
-                if isinstance(value, (list, dict, set, tuple)):
+                if isinstance(value, (list, dict, set, tuple, ResultSet)):
                     self.logger.warning(f"Value for {placeholder} (partial match) is complex, converting to string")
                     return str(value) if value else ""
                 return value
@@ -510,7 +529,7 @@ class AdaptiveExcelProcessor:
                 if isinstance(nested_value, dict) and placeholder in nested_value:
                     value = nested_value[placeholder]
                     # Safety check
-                    if isinstance(value, (list, dict, set, tuple)):
+                    if isinstance(value, (list, dict, set, tuple, ResultSet)):
                         self.logger.warning(f"Value for {placeholder} (nested) is complex, converting to string")
                         return str(value) if value else ""
                     return value
@@ -657,7 +676,7 @@ class AdaptiveExcelProcessor:
         # Try various data source strategies
 
         # 1. Look for data keyed by sheet name
-        if sheet_name in data and isinstance(data[sheet_name], list):
+        if sheet_name in data and isinstance(data[sheet_name], (list, ResultSet)):
             return data[sheet_name]
 
         # 2. Look for common table data keys
@@ -668,17 +687,17 @@ class AdaptiveExcelProcessor:
         ]
 
         for key in table_keys:
-            if key in data and isinstance(data[key], list):
+            if key in data and isinstance(data[key], (list, ResultSet)):
                 return data[key]
 
         # 3. Look for data based on headers
         headers = [h.strip() for h in table['headers'] if h.strip()]
         if headers:
             for data_key, data_value in data.items():
-                if isinstance(data_value, list) and data_value:
+                if isinstance(data_value, (list, ResultSet)) and data_value:
                     # Check if first row has matching keys
                     first_row = data_value[0]
-                    if isinstance(first_row, dict):
+                    if isinstance(first_row, Mapping):
                         matching_keys = sum(1 for header in headers if any(header.lower() in str(k).lower() for k in first_row.keys()))
                         if matching_keys >= len(headers) / 2:  # At least 50% match
                             return data_value
@@ -692,7 +711,7 @@ class AdaptiveExcelProcessor:
 
     def _get_value_from_row_data(self, placeholder: str, row_data: Dict) -> Any:
         """Get value from row data for a placeholder"""
-        if not isinstance(row_data, dict):
+        if not isinstance(row_data, Mapping):
             self.logger.warning(f"Row data is not a dictionary: {type(row_data)} - {row_data}")
             return None
 
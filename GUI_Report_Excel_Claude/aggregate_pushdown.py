@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+"""
+Aggregate Pushdown - hitung calculated_variables agregat di Firebird
+READ-ONLY ACCESS - No data modification
+
+Formula JSON mendefinisikan calculated_variables seperti:
+
+    "total_bunches": {"formula": "SUM(raw_ffb_data.BUNCHES)"}
+    "unique_operators": {"formula": "COUNT(DISTINCT(operator_performance.OPERATORID))"}
+    "daily_average_bunches": {"formula": "total_bunches / active_days"}
+
+Planner mengenali fungsi agregat (SUM/AVG/MIN/MAX/COUNT, COUNT(DISTINCT ...))
+atas kolom satu query sumber dan menulis ulang semuanya menjadi SATU statement
+agregat per sumber, dengan SQL sumber sebagai derived table:
+
+    SELECT SUM(SRC.BUNCHES) AS A0, COUNT(DISTINCT SRC.OPERATORID) AS A1
+    FROM (<sql raw_ffb_data>) SRC
+
+Yang melewati isql hanya satu row ringkasan per sumber, bukan seluruh tabel
+bulanan. Variabel turunan (total_bunches / active_days) dihitung dari hasil
+agregat. Row ringkasan disimpan di query_results['<sumber>__aggregates']
+(ikut tersimpan di snapshot untuk replay) dan dipakai ulang selama SQL-nya sama.
+Sumber yang gagal di-pushdown dihitung dari hasil query di memory; statement
+yang sudah gagal tidak diulang oleh plan yang sama. Derived table baru ada di
+Firebird 2.0, jadi untuk server Firebird 1.5 pushdown dilewati sama sekali
+(pushdown_supported, fallback di-log sekali per database).
+
+    plan = plan_calculated_variables(formula['calculated_variables'], formula['queries'])
+    values = plan.execute(lambda source: engine_sql(source), run_sql, query_results)
+
+Version: 1.0.0
+"""
+
+import os
+import re
+import sys
+import logging
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import pandas as pd
+
+# Modul bersama (report_common) ada di root repository
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from result_set import to_frame
+from report_common.sql_preview import connector_supports_derived_tables
+
+AGGREGATE_FUNCTIONS = ('SUM', 'AVG', 'MIN', 'MAX', 'COUNT')
+
+# FUNC(src.COL), FUNC(COL), COUNT(*), COUNT(src.*), COUNT(DISTINCT src.COL), COUNT(DISTINCT(src.COL))
+AGGREGATE_PATTERN = re.compile(
+    r'\b(SUM|AVG|MIN|MAX|COUNT)\s*\(\s*'
+    r'(?:(DISTINCT)\s*(\()?\s*)?'
+    r'(?:([A-Za-z_]\w*)\.)?(\*|[A-Za-z_]\w*)\s*'
+    r'(?(3)\))\s*\)',
+    re.IGNORECASE
+)
+
+IDENTIFIER_PATTERN = re.compile(r'\b[A-Za-z_]\w*\b')
+
+# Pseudo-kolom jumlah row sumber (SUM(raw_ffb_data.length) = jumlah transaksi)
+ROW_COUNT_COLUMN = 'length'
+
+ORDER_BY_TAIL = re.compile(r'\s+ORDER\s+BY\s+[^()]*$', re.IGNORECASE)
+ROW_LIMIT = re.compile(r'\b(FIRST|SKIP|ROWS)\b', re.IGNORECASE)
+
+SOURCE_ALIAS = 'SRC'
+
+# Key hasil ringkasan per sumber di query_results
+AGGREGATE_RESULT_SUFFIX = '__aggregates'
+
+# Database yang fallback Firebird 1.5-nya sudah di-log
+_LEGACY_SERVERS_LOGGED = set()
+
+logger = logging.getLogger(__name__)
+
+
+def pushdown_supported(connector: Any) -> bool:
+    """
+    True jika server connector mendukung derived table (Firebird 2.0+). Untuk
+    Firebird 1.5 agregat dihitung di memory; peringatannya di-log sekali per database.
+    """
+    if connector_supports_derived_tables(connector):
+        return True
+    key = getattr(connector, 'db_path', None) or id(connector)
+    if key not in _LEGACY_SERVERS_LOGGED:
+        _LEGACY_SERVERS_LOGGED.add(key)
+        logger.warning(f"Server of {key} has no derived tables (Firebird < 2.0); "
+                       f"computing calculated_variables in memory")
+    return False
+
+
+class Aggregate:
+    """Satu fungsi agregat atas kolom query sumber"""
+
+    def __init__(self, function: str, column: Optional[str], distinct: bool = False):
+        self.function = function.upper()
+        self.column = column          # None = COUNT(*)
+        self.distinct = distinct
+        self.alias = None
+
+    @property
+    def key(self) -> Tuple[str, Optional[str], bool]:
+        return (self.function, self.column, self.distinct)
+
+    @property
+    def label(self) -> str:
+        """Nama kolom di row ringkasan (mis. 'COUNT(DISTINCT OPERATORID)')"""
+        if self.column is None:
+            return 'COUNT(*)'
+        distinct = 'DISTINCT ' if self.distinct else ''
+        return f"{self.function}({distinct}{self.column})"
+
+    def sql(self) -> str:
+        """Ekspresi SQL atas derived table sumber"""
+        if self.column is None:
+            return 'COUNT(*)'
+        distinct = 'DISTINCT ' if self.distinct else ''
+        return f"{self.function}({distinct}{SOURCE_ALIAS}.{self.column})"
+
+    def evaluate(self, records: Any) -> Any:
+        """Fallback: agregat yang sama dihitung dari hasil query di memory"""
+        frame = records_frame(records)
+        if self.column is None:
+            return len(frame)
+        column = next((name for name in frame.columns if str(name).upper() == self.column), None)
+        if column is None:
+            return None
+        values = frame[column].dropna()
+        if self.function == 'COUNT':
+            return int(values.nunique()) if self.distinct else int(len(values))
+        if self.distinct:
+            values = values.drop_duplicates()
+        if values.empty:
+            return None
+        result = getattr(values, {'SUM': 'sum', 'AVG': 'mean', 'MIN': 'min', 'MAX': 'max'}[self.function])()
+        return result.item() if hasattr(result, 'item') else result
+
+
+class AggregatePlan:
+    """
+    Hasil planning calculated_variables: agregat per query sumber dan ekspresi
+    per variabel (agregat diganti nama alias)
+    """
+
+    def __init__(self):
+        self.sources = {}         # sumber -> [Aggregate] (alias unik per plan)
+        self.expressions = {}     # variabel -> ekspresi Python (alias / nama variabel)
+        self.unplanned = {}       # variabel -> alasan tidak bisa dihitung
+        self.failed_statements = set()  # statement agregat yang gagal (tidak diulang)
+
+    def add(self, source: str, aggregate: Aggregate) -> str:
+        """Daftarkan agregat (agregat identik dipakai bersama) dan kembalikan aliasnya"""
+        aggregates = self.sources.setdefault(source, [])
+        for existing in aggregates:
+            if existing.key == aggregate.key:
+                return existing.alias
+        aggregate.alias = f"{source.upper()}__A{len(aggregates)}"
+        aggregates.append(aggregate)
+        return aggregate.alias
+
+    def build_sql(self, source: str, source_sql: str) -> str:
+        """Satu statement agregat untuk semua agregat sumber ini"""
+        body = source_sql.strip().rstrip(';').strip()
+        if not ROW_LIMIT.search(body):
+            # ORDER BY tidak berpengaruh pada agregat dan tidak perlu dijalankan
+            body = ORDER_BY_TAIL.sub('', body)
+        columns = ",\n       ".join(f"{aggregate.sql()} AS A{index}"
+                                    for index, aggregate in enumerate(self.sources[source]))
+        return f"SELECT {columns}\nFROM (\n{body}\n) {SOURCE_ALIAS}"
+
+    def summarize(self, source: str, statement: Optional[str],
+                  run_sql: Optional[Callable[[str, str], Any]],
+                  query_results: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Row ringkasan satu sumber: dari query_results jika SQL-nya sama, kalau tidak
+        dijalankan ke database (hasilnya disimpan ke query_results)
+        """
+        key = source + AGGREGATE_RESULT_SUFFIX
+        cached = records_frame(query_results.get(key))
+        if statement and not cached.empty and cached.iloc[0].get('SQL') == statement:
+            return cached.iloc[0].to_dict()
+        if not statement or run_sql is None:
+            return None
+        if statement in self.failed_statements:
+            logger.debug(f"Aggregate pushdown for '{source}' failed before; computing in memory")
+            return None
+
+        try:
+            frame = records_frame(run_sql(source, statement))
+        except Exception as e:
+            # Mis. derived table dengan kolom tanpa alias; hitung di memory
+            logger.warning(f"Aggregate pushdown failed for '{source}': {e}")
+            self.failed_statements.add(statement)
+            return None
+        if frame.empty:
+            return None
+
+        row = {str(name).upper(): value for name, value in frame.iloc[0].items()}
+        summary = {'SQL': statement}
+        for index, aggregate in enumerate(self.sources[source]):
+            value = row.get(f"A{index}")
+            summary[aggregate.label] = None if pd.isna(value) else (value.item() if hasattr(value, 'item') else value)
+        query_results[key] = [summary]
+        return summary
+
+    def execute(self, source_sql: Callable[[str], Optional[str]],
+                run_sql: Optional[Callable[[str, str], Any]] = None,
+                query_results: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Jalankan plan
+
+        Args:
+            source_sql: source_sql(nama_query) -> SQL sumber siap jalan (None = tidak ada)
+            run_sql: run_sql(nama_query, sql) -> records; None = tanpa database
+            query_results: Hasil query (ringkasan lama dan fallback di memory);
+                           ringkasan baru ditambahkan ke dict ini
+
+        Returns:
+            {variabel: nilai} untuk semua variabel yang bisa dihitung
+        """
+        query_results = query_results if query_results is not None else {}
+        values = {}
+        for source, aggregates in self.sources.items():
+            sql = source_sql(source)
+            statement = self.build_sql(source, sql) if sql else None
+            summary = self.summarize(source, statement, run_sql, query_results)
+
+            if summary is not None:
+                for aggregate in aggregates:
+                    values[aggregate.alias] = summary.get(aggregate.label)
+            elif query_results.get(source) is not None:
+                logger.info(f"Computing {len(aggregates)} aggregates of '{source}' in memory")
+                for aggregate in aggregates:
+                    values[aggregate.alias] = aggregate.evaluate(query_results[source])
+
+        return evaluate_expressions(self.expressions, values)
+
+
+def records_frame(records: Any) -> pd.DataFrame:
+    """DataFrame dari hasil query (DataFrame, ResultSet, list of dict, format [{'headers', 'rows'}])"""
+    if isinstance(records, pd.DataFrame):
+        return records
+    if isinstance(records, list) and records and isinstance(records[0], dict) \
+            and 'headers' in records[0] and 'rows' in records[0]:
+        records = records[0]['rows']
+    return to_frame(records)
+
+
+def evaluate_expressions(expressions: Dict[str, str], values: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Evaluasi ekspresi variabel; variabel boleh merujuk variabel lain (urutan bebas).
+    Pembagian dengan nol menghasilkan 0, operand kosong menghasilkan None.
+    """
+    results = {}
+    pending = dict(expressions)
+    while pending:
+        progressed = False
+        for name, expression in list(pending.items()):
+            names = set(IDENTIFIER_PATTERN.findall(expression))
+            if any(ref in pending and ref != name for ref in names):
+                continue
+            scope = {ref: results.get(ref, values.get(ref)) for ref in names}
+            results[name] = _evaluate(expression, scope)
+            del pending[name]
+            progressed = True
+        if not progressed:
+            # Referensi melingkar
+            for name in pending:
+                logger.warning(f"Calculated variable '{name}' has circular references")
+                results[name] = None
+            break
+    return results
+
+
+def _evaluate(expression: str, scope: Dict[str, Any]) -> Any:
+    if any(value is None for value in scope.values()):
+        return None
+    try:
+        return eval(expression, {"__builtins__": {}}, scope)
+    except ZeroDivisionError:
+        return 0
+    except Exception as e:
+        logger.warning(f"Error evaluating '{expression}': {e}")
+        return None
+
+
+def plan_calculated_variables(definitions: Dict[str, Any], queries: Dict[str, Any],
+                              default_source: Optional[str] = None) -> AggregatePlan:
+    """
+    Buat plan pushdown dari definisi calculated_variables
+
+    Args:
+        definitions: {nama: "formula"} atau {nama: {"formula": ..., "source": ...}}
+        queries: Definisi query formula (sumber agregat harus punya 'sql')
+        default_source: Sumber untuk agregat tanpa prefix query (mis. SUM(BUNCHES))
+
+    Returns:
+        AggregatePlan
+    """
+    plan = AggregatePlan()
+    queries = queries or {}
+
+    for name, definition in (definitions or {}).items():
+        if isinstance(definition, dict):
+            formula = definition.get('formula', '')
+            source_default = definition.get('source', default_source)
+        else:
+            formula = str(definition or '')
+            source_default = default_source
+        if not formula:
+            continue
+
+        problems = []
+
+        def rewrite(match):
+            function, distinct, _, source, column = match.groups()
+            source = source or source_default
+            if not source or 'sql' not in queries.get(source, {}):
+                problems.append(f"unknown source for {match.group(0)}")
+                return match.group(0)
+            if column == '*' or column.lower() == ROW_COUNT_COLUMN:
+                aggregate = Aggregate('COUNT', None)
+            else:
+                aggregate = Aggregate(function, column.upper(), bool(distinct))
+            return plan.add(source, aggregate)
+
+        expression = AGGREGATE_PATTERN.sub(rewrite, formula)
+        if problems:
+            plan.unplanned[name] = '; '.join(problems)
+            continue
+        plan.expressions[name] = expression
+
+    # Variabel yang merujuk variabel tak terhitung ikut tidak terhitung
+    changed = True
+    while changed:
+        changed = False
+        for name, expression in list(plan.expressions.items()):
+            refs = set(IDENTIFIER_PATTERN.findall(expression))
+            missing = [ref for ref in refs if ref in plan.unplanned]
+            if missing:
+                plan.unplanned[name] = f"depends on {', '.join(sorted(missing))}"
+                del plan.expressions[name]
+                changed = True
+
+    for name, reason in plan.unplanned.items():
+        logger.warning(f"Calculated variable '{name}' not computed: {reason}")
+    return plan
@@ -0,0 +1,502 @@
+#!/usr/bin/env python3
+"""
+Benchmark Pipeline - ukur throughput pipeline laporan FFB tanpa server Firebird
+
+Data sintetis deterministik berbentuk FFBSCANNERDATA{MM}, OCFIELD, CRDIVISION dan EMP
+disimpan di SQLite (satu file per estate). Sebuah isql palsu menjalankan SQL ke SQLite
+dan menulis output dengan format kolom isql, sehingga yang diukur adalah kode produksi:
+FirebirdConnectorEnhanced (extract + parse), EnhancedDynamicFormulaEngine (analyze) dan
+AdaptiveExcelProcessor (render + save).
+
+Setiap stage dicatat terpisah dan hasilnya ditulis ke JSON agar regresi di hot path
+bisa dibandingkan antar versi:
+
+    python benchmark_pipeline.py --rows 50000 --estates 2 --months 3
+    python benchmark_pipeline.py --baseline benchmark_results/benchmark_20251101_120000.json
+
+Catatan: stage extract mencakup proses isql palsu (Python + SQLite), jadi angka
+absolutnya berbeda dengan Firebird asli; yang dibandingkan adalah tren antar versi.
+"""
+
+import os
+import sys
+import json
+import time
+import stat
+import shutil
+import logging
+import sqlite3
+import argparse
+import calendar
+import platform
+import statistics
+import subprocess
+import tempfile
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Any, Optional
+
+import numpy as np
+import pandas as pd
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from firebird_connector_enhanced import FirebirdConnectorEnhanced
+from dynamic_formula_engine_enhanced import EnhancedDynamicFormulaEngine
+from adaptive_excel_processor import AdaptiveExcelProcessor
+import tracing
+
+logger = logging.getLogger(__name__)
+
+STAGES = ('extract', 'parse', 'analyze', 'render', 'save')
+
+DEFAULT_TEMPLATE = Path(__file__).parent / 'templates' / 'Template_Laporan_FFB_Analysis.xlsx'
+DEFAULT_RESULTS_DIR = Path(__file__).parent / 'benchmark_results'
+
+# Kolom FFBSCANNERDATA yang dibaca raw_ffb_data (urutan sama dengan formula PGE 2B)
+FFB_COLUMNS = [
+    ('ID', 'INTEGER'), ('SCANUSERID', 'INTEGER'), ('OCID', 'INTEGER'), ('WORKERID', 'INTEGER'),
+    ('CARRIERID', 'INTEGER'), ('FIELDID', 'INTEGER'), ('TASKNO', 'TEXT'),
+    ('RIPEBCH', 'INTEGER'), ('UNRIPEBCH', 'INTEGER'), ('BLACKBCH', 'INTEGER'), ('ROTTENBCH', 'INTEGER'),
+    ('LONGSTALKBCH', 'INTEGER'), ('RATDMGBCH', 'INTEGER'), ('LOOSEFRUIT', 'REAL'),
+    ('TRANSNO', 'TEXT'), ('TRANSDATE', 'TEXT'), ('TRANSTIME', 'TEXT'), ('UPLOADDATETIME', 'TEXT'),
+    ('RECORDTAG', 'TEXT'), ('TRANSSTATUS', 'TEXT'), ('TRANSTYPE', 'TEXT'), ('LASTUSER', 'TEXT'),
+    ('LASTUPDATED', 'TEXT'), ('OVERRIPEBCH', 'INTEGER'), ('UNDERRIPEBCH', 'INTEGER'),
+    ('ABNORMALBCH', 'INTEGER'), ('LOOSEFRUIT2', 'REAL')
+]
+
+# Sheet template -> view engine yang dipakai sebagai tabel repeating
+SHEET_VIEWS = {
+    'Harian': 'daily_performance',
+    'Karyawan': 'employee_performance',
+    'Field': 'field_performance'
+}
+
+FIELDS_PER_DIVISION = 12
+EMPLOYEES_PER_DIVISION = 40
+
+# Kerani (PM) scan semua transaksi, mandor (P1) / asisten (P5) memverifikasi sebagian
+RECORDTAG_CHOICES = ('PM', 'P1', 'P5')
+RECORDTAG_WEIGHTS = (0.7, 0.2, 0.1)
+
+# Isql palsu: argumen sama dengan isql (-u, -p, localhost:<db>, -i, -o, -r),
+# database adalah file SQLite dan output memakai format kolom isql
+FAKE_ISQL_SOURCE = '''
+import sys
+import sqlite3
+
+def format_result(cursor, rows):
+    headers = [column[0] for column in cursor.description]
+    texts = [['<null>' if value is None else str(value) for value in row] for row in rows]
+    widths = [len(header) for header in headers]
+    for values in texts:
+        widths = [max(width, len(value)) for width, value in zip(widths, values)]
+    lines = ['', ' '.join(header.ljust(width) for header, width in zip(headers, widths)),
+             ' '.join('=' * width for width in widths)]
+    lines.extend(' '.join(value.ljust(width) for value, width in zip(values, widths)) for values in texts)
+    lines.append('')
+    return '\\n'.join(lines) + '\\n'
+
+def main(argv):
+    options, positional = {}, []
+    index = 0
+    while index < len(argv):
+        if argv[index] in ('-u', '-p', '-i', '-o', '-r'):
+            options[argv[index]] = argv[index + 1]
+            index += 2
+        else:
+            positional.append(argv[index])
+            index += 1
+    database = positional[0].split(':', 1)[1] if positional[0].startswith('localhost:') else positional[0]
+
+    with open(options['-i'], 'r', encoding='utf-8') as f:
+        statements = [part.strip() for part in f.read().split(';')]
+
+    output = open(options['-o'], 'w', encoding='utf-8') if '-o' in options else sys.stdout
+    connection = sqlite3.connect(database)
+    try:
+        for statement in statements:
+            if not statement or statement.upper() == 'EXIT':
+                continue
+            cursor = connection.execute(statement)
+            if cursor.description:
+                output.write(format_result(cursor, cursor.fetchall()))
+    finally:
+        connection.close()
+        if output is not sys.stdout:
+            output.close()
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
+'''
+
+
+def benchmark_formula() -> Dict[str, Any]:
+    """Formula JSON minimal untuk EnhancedDynamicFormulaEngine (query dimensi tidak di-cache)"""
+    ffb_columns = ', '.join(f"a.{name}" for name, _ in FFB_COLUMNS)
+    return {
+        'queries': {
+            'employee_mapping': {
+                'sql': 'SELECT ID AS EMPID, NAME AS EMPNAME FROM EMP',
+                'dimension': False
+            },
+            'raw_ffb_data': {
+                'sql': f"SELECT {ffb_columns}, b.DIVID, b.FIELDNAME "
+                       f"FROM FFBSCANNERDATA{{month:02d}} a JOIN OCFIELD b ON a.FIELDID = b.ID",
+                'date_column': 'a.TRANSDATE'
+            }
+        }
+    }
+
+
+class SyntheticFFBGenerator:
+    """
+    Generator data FFB sintetis yang deterministik (seed + estate + bulan)
+    """
+
+    def __init__(self, rows: int = 20000, divisions: int = 4, estates: int = 1,
+                 months: int = 1, year: int = 2025, seed: int = 42):
+        """
+        Args:
+            rows: Jumlah record FFBSCANNERDATA per estate per bulan
+            divisions: Jumlah divisi per estate
+            estates: Jumlah estate (satu database per estate)
+            months: Jumlah bulan (FFBSCANNERDATA01..NN)
+            year: Tahun transaksi
+            seed: Seed random
+        """
+        self.rows = rows
+        self.divisions = divisions
+        self.estates = estates
+        self.months = months
+        self.year = year
+        self.seed = seed
+
+    def estate_names(self) -> List[str]:
+        return [f"BENCH {index + 1}" for index in range(self.estates)]
+
+    def create_estate_database(self, db_path: str, estate_index: int) -> Dict[str, int]:
+        """
+        Buat database SQLite satu estate
+
+        Returns:
+            Jumlah record per tabel
+        """
+        if os.path.exists(db_path):
+            os.remove(db_path)
+
+        counts = {}
+        connection = sqlite3.connect(db_path)
+        try:
+            for table, columns, rows in self._dimension_tables(estate_index):
+                self._create_table(connection, table, columns, rows)
+                counts[table] = len(rows)
+
+            for month in range(1, self.months + 1):
+                table = f"FFBSCANNERDATA{month:02d}"
+                rows = self.generate_month(estate_index, month)
+                self._create_table(connection, table, FFB_COLUMNS, rows)
+                counts[table] = len(rows)
+
+            connection.commit()
+        finally:
+            connection.close()
+
+        return counts
+
+    def _dimension_tables(self, estate_index: int) -> List:
+        """Tabel EMP, CRDIVISION dan OCFIELD untuk satu estate"""
+        divisions = [(division_id, f"DIVISI {estate_index + 1}-{division_id:02d}")
+                     for division_id in range(1, self.divisions + 1)]
+        fields = [(division_id * 100 + number, f"F{division_id:02d}{number:02d}", division_id)
+                  for division_id in range(1, self.divisions + 1)
+                  for number in range(1, FIELDS_PER_DIVISION + 1)]
+        employees = [(employee_id, f"KARYAWAN {employee_id:04d}")
+                     for employee_id in range(1, self.divisions * EMPLOYEES_PER_DIVISION + 1)]
+        return [
+            ('EMP', [('ID', 'INTEGER'), ('NAME', 'TEXT')], employees),
+            ('CRDIVISION', [('ID', 'INTEGER'), ('DIVNAME', 'TEXT')], divisions),
+            ('OCFIELD', [('ID', 'INTEGER'), ('FIELDNAME', 'TEXT'), ('DIVID', 'INTEGER')], fields)
+        ]
+
+    def generate_month(self, estate_index: int, month: int) -> List[tuple]:
+        """Record FFBSCANNERDATA satu bulan (tuple sesuai urutan FFB_COLUMNS)"""
+        rng = np.random.default_rng([self.seed, estate_index, month])
+        count = self.rows
+        days = calendar.monthrange(self.year, month)[1]
+
+        ids = np.arange(count) + month * 10_000_000
+        division = rng.integers(1, self.divisions + 1, count)
+        field_ids = division * 100 + rng.integers(1, FIELDS_PER_DIVISION + 1, count)
+        employees = (division - 1) * EMPLOYEES_PER_DIVISION + rng.integers(1, EMPLOYEES_PER_DIVISION + 1, count)
+        day = rng.integers(1, days + 1, count)
+        seconds = rng.integers(6 * 3600, 18 * 3600, count)
+        tags = rng.choice(np.array(RECORDTAG_CHOICES), count, p=RECORDTAG_WEIGHTS)
+        bunches = rng.poisson([25, 2, 1, 1, 1, 1, 0.5, 0.5, 0.3], (count, 9))
+        loose_fruit = np.round(rng.gamma(2.0, 1.5, count), 2)
+        loose_missing = rng.random(count) < 0.05
+
+        # Transaksi verifikasi (P1/P5) memakai TRANSNO transaksi PM yang diverifikasi
+        transno = ids.copy()
+        pm_positions = np.flatnonzero(tags == 'PM')
+        verifier_positions = np.flatnonzero(tags != 'PM')
+        if len(pm_positions) and len(verifier_positions):
+            transno[verifier_positions] = ids[rng.choice(pm_positions, len(verifier_positions))]
+
+        rows = []
+        for i in range(count):
+            trans_date = f"{self.year}-{month:02d}-{day[i]:02d}"
+            trans_time = f"{seconds[i] // 3600:02d}:{seconds[i] % 3600 // 60:02d}:{seconds[i] % 60:02d}"
+            b = bunches[i]
+            rows.append((
+                int(ids[i]), int(employees[i]), 1, int(employees[i]), int(employees[i]), int(field_ids[i]),
+                f"T{int(field_ids[i])}", int(b[0]), int(b[1]), int(b[2]), int(b[3]), int(b[4]), int(b[5]),
+                None if loose_missing[i] else float(loose_fruit[i]),
+                f"TR{int(transno[i])}", trans_date, trans_time, f"{trans_date} {trans_time}",
+                str(tags[i]), '1', 'FFB', f"USER{int(employees[i])}", f"{trans_date} {trans_time}",
+                int(b[6]), int(b[7]), int(b[8]), 0.0
+            ))
+        return rows
+
+    def _create_table(self, connection, table: str, columns: List, rows: List[tuple]):
+        definition = ', '.join(f"{name} {kind}" for name, kind in columns)
+        connection.execute(f"CREATE TABLE {table} ({definition})")
+        placeholders = ', '.join('?' for _ in columns)
+        connection.executemany(f"INSERT INTO {table} VALUES ({placeholders})", rows)
+
+
+class PipelineBenchmark:
+    """
+    Jalankan pipeline extract -> parse -> analyze -> render -> save pada data sintetis
+    """
+
+    def __init__(self, generator: SyntheticFFBGenerator, workdir: Optional[str] = None,
+                 template_path: Optional[str] = None, repeat: int = 1):
+        """
+        Args:
+            generator: SyntheticFFBGenerator dengan parameter skala
+            workdir: Folder data sintetis (default: folder temporary yang dihapus setelah run)
+            template_path: Template Excel untuk stage render/save
+            repeat: Jumlah pengulangan pipeline (hasil per stage: min dan median)
+        """
+        self.generator = generator
+        self.workdir = Path(workdir) if workdir else None
+        self.template_path = Path(template_path) if template_path else DEFAULT_TEMPLATE
+        self.repeat = max(1, repeat)
+        self.keep_workdir = workdir is not None
+
+    def prepare(self) -> Dict[str, Any]:
+        """Buat isql palsu, formula dan database sintetis semua estate"""
+        if self.workdir is None:
+            self.workdir = Path(tempfile.mkdtemp(prefix='ffb_benchmark_'))
+        self.workdir.mkdir(parents=True, exist_ok=True)
+
+        self.isql_path = self.workdir / 'fake_isql.py'
+        self.isql_path.write_text(f"#!{sys.executable}\n{FAKE_ISQL_SOURCE}", encoding='utf-8')
+        self.isql_path.chmod(self.isql_path.stat().st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+
+        self.formula_path = self.workdir / 'benchmark_formula.json'
+        with open(self.formula_path, 'w', encoding='utf-8') as f:
+            json.dump(benchmark_formula(), f, indent=2)
+
+        started = time.perf_counter()
+        self.databases = {}
+        tables = {}
+        for index, estate in enumerate(self.generator.estate_names()):
+            db_path = self.workdir / f"{estate.replace(' ', '_')}.db"
+            tables[estate] = self.generator.create_estate_database(str(db_path), index)
+            self.databases[estate] = db_path
+
+        return {'seconds': time.perf_counter() - started, 'tables': tables}
+
+    def run(self) -> Dict[str, Any]:
+        """Jalankan benchmark dan kembalikan hasil (siap ditulis ke JSON)"""
+        setup = self.prepare()
+        try:
+            runs = [self._run_once(run_index) for run_index in range(self.repeat)]
+        finally:
+            if not self.keep_workdir:
+                shutil.rmtree(self.workdir, ignore_errors=True)
+
+        stages = {}
+        for stage in STAGES:
+            values = [run['stages'][stage] for run in runs]
+            stages[stage] = {
+                'min_seconds': min(values),
+                'median_seconds': statistics.median(values),
+                'runs': values
+            }
+        rows = runs[0]['rows']
+        totals = [sum(run['stages'].values()) for run in runs]
+
+        return {
+            'benchmark': 'ffb_pipeline',
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'environment': self._environment(),
+            'config': {
+                'rows': self.generator.rows,
+                'divisions': self.generator.divisions,
+                'estates': self.generator.estates,
+                'months': self.generator.months,
+                'year': self.generator.year,
+                'seed': self.generator.seed,
+                'repeat': self.repeat,
+                'template': str(self.template_path) if self.template_path.exists() else None
+            },
+            'setup_seconds': setup['seconds'],
+            'rows': rows,
+            'stages': stages,
+            'total_seconds': {'min': min(totals), 'median': statistics.median(totals)},
+            'rows_per_second': {
+                stage: (rows / stages[stage]['min_seconds'] if stages[stage]['min_seconds'] > 0 else None)
+                for stage in ('extract', 'parse', 'analyze')
+            },
+            'partitions': runs[0]['partitions']
+        }
+
+    def _run_once(self, run_index: int) -> Dict[str, Any]:
+        """Satu putaran pipeline untuk semua estate dan bulan"""
+        totals = {stage: 0.0 for stage in STAGES}
+        partitions = []
+        rows = 0
+        output_dir = self.workdir / f"reports_{run_index}"
+        output_dir.mkdir(exist_ok=True)
+
+        processor = None
+        if self.template_path.exists():
+            processor = AdaptiveExcelProcessor(str(self.template_path), debug_mode=False)
+        else:
+            logger.warning(f"Template not found, render/save skipped: {self.template_path}")
+
+        for estate, db_path in self.databases.items():
+            connector = FirebirdConnectorEnhanced(db_path=str(db_path), isql_path=str(self.isql_path))
+            engine = EnhancedDynamicFormulaEngine(str(self.formula_path), connector)
+
+            for month in range(1, self.generator.months + 1):
+                last_day = calendar.monthrange(self.generator.year, month)[1]
+                parameters = {
+                    'start_date': f"{self.generator.year}-{month:02d}-01",
+                    'end_date': f"{self.generator.year}-{month:02d}-{last_day:02d}",
+                    'month': month,
+                    'estate_name': estate
+                }
+                # Waktu per stage diambil dari span instrumentasi (tracing)
+                tracer = tracing.start_run('benchmark', estate=estate, month=month)
+                try:
+                    engine.store_query_result('employee_mapping', engine.execute_query('employee_mapping', parameters))
+                    engine.store_query_result('raw_ffb_data', engine.execute_query('raw_ffb_data', parameters))
+
+                    query_results = engine.derive_processed_results(parameters)
+                    report_data = {**engine.process_variables(query_results, parameters), **query_results}
+                    report_data.update({sheet: query_results.get(view, []) for sheet, view in SHEET_VIEWS.items()})
+
+                    if processor is not None:
+                        workbook = processor.render_workbook(report_data)
+                        if workbook is not None:
+                            with tracing.span('save_workbook', stage='save'):
+                                workbook.save(output_dir / f"{estate.replace(' ', '_')}_{month:02d}.xlsx")
+                finally:
+                    tracing.finish_run()
+
+                stage_seconds = {stage: tracer.stage_totals()[stage] for stage in STAGES}
+                partition_rows = len(engine.raw_ffb_data)
+                rows += partition_rows
+                for stage in STAGES:
+                    totals[stage] += stage_seconds[stage]
+                partitions.append({
+                    'estate': estate,
+                    'month': month,
+                    'rows': partition_rows,
+                    'stages': stage_seconds,
+                    'queries': tracer.query_totals()
+                })
+
+        return {'stages': totals, 'rows': rows, 'partitions': partitions}
+
+    def _environment(self) -> Dict[str, Any]:
+        """Versi Python/library dan commit git untuk membandingkan hasil antar versi"""
+        environment = {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'pandas': pd.__version__,
+            'numpy': np.__version__,
+            'git_commit': None
+        }
+        try:
+            result = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                    cwd=os.path.dirname(os.path.abspath(__file__)), timeout=10)
+            if result.returncode == 0:
+                environment['git_commit'] = result.stdout.strip()
+        except Exception:
+            pass
+        return environment
+
+
+def compare_results(current: Dict[str, Any], baseline: Dict[str, Any]) -> Dict[str, Optional[float]]:
+    """Rasio waktu per stage (min) terhadap baseline; > 1 berarti lebih lambat"""
+    ratios = {}
+    for stage in STAGES:
+        now = current.get('stages', {}).get(stage, {}).get('min_seconds')
+        before = baseline.get('stages', {}).get(stage, {}).get('min_seconds')
+        ratios[stage] = (now / before) if now is not None and before else None
+    return ratios
+
+
+def save_results(results: Dict[str, Any], output_path: Optional[str] = None) -> Path:
+    """Tulis hasil benchmark ke JSON (default: benchmark_results/benchmark_<timestamp>.json)"""
+    if output_path:
+        path = Path(output_path)
+    else:
+        path = DEFAULT_RESULTS_DIR / f"benchmark_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    return path
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description='Benchmark pipeline laporan FFB dengan data sintetis')
+    parser.add_argument('--rows', type=int, default=20000, help='Record per estate per bulan')
+    parser.add_argument('--divisions', type=int, default=4, help='Divisi per estate')
+    parser.add_argument('--estates', type=int, default=1, help='Jumlah estate')
+    parser.add_argument('--months', type=int, default=1, help='Jumlah bulan (FFBSCANNERDATA01..NN)')
+    parser.add_argument('--year', type=int, default=2025)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--repeat', type=int, default=1, help='Jumlah pengulangan pipeline')
+    parser.add_argument('--template', help='Template Excel (default: templates/Template_Laporan_FFB_Analysis.xlsx)')
+    parser.add_argument('--workdir', help='Simpan data sintetis di folder ini (tidak dihapus)')
+    parser.add_argument('--output', help='File JSON hasil benchmark')
+    parser.add_argument('--baseline', help='File JSON hasil benchmark sebelumnya untuk dibandingkan')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.ERROR, format='%(levelname)s - %(name)s - %(message)s')
+
+    generator = SyntheticFFBGenerator(rows=args.rows, divisions=args.divisions, estates=args.estates,
+                                      months=args.months, year=args.year, seed=args.seed)
+    benchmark = PipelineBenchmark(generator, workdir=args.workdir, template_path=args.template, repeat=args.repeat)
+
+    print("🚀 FFB Pipeline Benchmark")
+    print("=" * 50)
+    results = benchmark.run()
+
+    print(f"📊 {results['rows']} rows ({args.estates} estate x {args.months} bulan), setup {results['setup_seconds']:.2f}s")
+    for stage in STAGES:
+        print(f"  {stage:<8} {results['stages'][stage]['min_seconds']:8.3f}s")
+    print(f"  {'total':<8} {results['total_seconds']['min']:8.3f}s")
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        results['baseline'] = {'path': args.baseline, 'ratios': compare_results(results, baseline)}
+        print(f"📈 Dibandingkan dengan {args.baseline}:")
+        for stage, ratio in results['baseline']['ratios'].items():
+            print(f"  {stage:<8} {'n/a' if ratio is None else f'{ratio:.2f}x'}")
+
+    path = save_results(results, args.output)
+    print(f"✅ Hasil disimpan: {path}")
+
+
+if __name__ == "__main__":
+    main()
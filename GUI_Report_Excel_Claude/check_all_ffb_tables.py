@@ -51,12 +51,15 @@ def check_all_ffb_tables():
         
         tables_with_data = []
         
+        # Estimasi semua tabel FFB sekaligus (metadata index + cache), tanpa COUNT(*) per tabel
+        connector.estimate_row_counts(ffb_tables)
+        
         for table in sorted(ffb_tables):
             print(f"\n📋 Checking {table}...")
             
             try:
-                # Get row count
-                row_count = connector.get_row_count(table)
+                # Get row count (estimasi jika tersedia)
+                row_count = connector.get_row_count(table, approximate=True)
                 print(f"   📊 Row count: {row_count:,}")
                 
                 if row_count > 0:
@@ -40,12 +40,15 @@ def check_database_info():
         print("\n🔍 Checking all tables for data...")
         tables_with_data = []
         
+        # Estimasi semua tabel sekaligus (metadata index + cache), tanpa COUNT(*) per tabel
+        connector.estimate_row_counts(tables)
+        
         for i, table in enumerate(tables):
             if i % 20 == 0:  # Progress indicator
                 print(f"   Progress: {i}/{len(tables)} tables checked...")
             
             try:
-                row_count = connector.get_row_count(table)
+                row_count = connector.get_row_count(table, approximate=True)
                 if row_count > 0:
                     tables_with_data.append((table, row_count))
             except Exception as e:
@@ -54,7 +54,7 @@ def main():
         
         for table in all_relevant_tables:
             try:
-                count = connector.get_row_count(table)
+                count = connector.get_row_count(table, approximate=True)
                 if count > 0:
                     tables_with_data.append((table, count))
                     print(f"  ✅ {table}: {count:,} rows")
@@ -73,7 +73,7 @@ def main():
             print(f"\n🔍 Checking ALL tables for data:")
             for table in tables[:20]:  # Check first 20 tables
                 try:
-                    count = connector.get_row_count(table)
+                    count = connector.get_row_count(table, approximate=True)
                     if count > 0:
                         tables_with_data.append((table, count))
                         print(f"  ✅ {table}: {count:,} rows")
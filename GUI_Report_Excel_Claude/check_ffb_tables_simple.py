@@ -48,7 +48,7 @@ def check_ffb_tables_simple():
                 
                 # Get row count
                 try:
-                    row_count = connector.get_row_count(table)
+                    row_count = connector.get_row_count(table, approximate=True)
                     print(f"   📊 Row count: {row_count:,}")
                     
                     if row_count > 0:
@@ -78,7 +78,7 @@ def test_database_with_auth(db_path, username='SYSDBA', password='masterkey'):
         
         for table in ffb_tables:
             try:
-                count = connector.get_row_count(table)
+                count = connector.get_row_count(table, approximate=True)
                 if count > 0:
                     ffb_data[table] = count
                     total_records += count
@@ -0,0 +1,390 @@
+#!/usr/bin/env python3
+"""
+Database Catalog - indeks file database (.FDB) beserta isi tabel FFBSCANNERDATA
+READ-ONLY ACCESS - No data modification
+
+Mencari snapshot database yang tepat di antara puluhan file tidak perlu lagi
+menjelajah seluruh folder dan menjalankan COUNT(*) satu per satu setiap kali:
+- Folder dijelajah paralel (os.scandir per folder di thread pool)
+- Indeks persisten (JSON) menyimpan path, ukuran dan mtime setiap file
+- Jumlah row tabel FFBSCANNERDATA diprobe bersamaan dengan pool terbatas
+  (setiap probe = satu proses isql); default memakai estimasi table_statistics
+  (metadata index + cache exact count), exact COUNT(*) hanya jika diminta
+- Hasil probe dipakai ulang sampai ukuran / mtime file berubah
+
+    catalog = DatabaseCatalog(r"D:\\Gawean Rebinmas\\Monitoring Database")
+    databases = catalog.scan(min_size=10 * 1024 * 1024)
+    catalog.probe(db['path'] for db in databases)
+    for db in catalog.databases_with_data():
+        print(db['path'], db['probe']['total_records'])
+
+Version: 1.0.0
+"""
+
+import os
+import json
+import logging
+import threading
+from datetime import datetime
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, as_completed, wait
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+DEFAULT_INDEX_PATH = Path(__file__).parent / 'cache' / 'database_catalog.json'
+INDEX_VERSION = 1
+
+# Thread penjelajah folder (I/O metadata, aman dibuat banyak)
+DEFAULT_SCAN_WORKERS = 8
+
+# Proses isql yang boleh berjalan bersamaan saat probe row count
+DEFAULT_PROBE_WORKERS = 4
+
+DEFAULT_EXTENSIONS = ('.fdb',)
+
+# Tabel transaksi yang menentukan apakah database berisi data FFB
+FFB_TABLE_MARKER = 'FFBSCANNERDATA'
+
+logger = logging.getLogger(__name__)
+
+
+def _default_connector_factory(db_path: str, isql_path: Optional[str] = None):
+    from firebird_connector_enhanced import FirebirdConnectorEnhanced
+    return FirebirdConnectorEnhanced(db_path=db_path, isql_path=isql_path)
+
+
+class DatabaseCatalog:
+    """
+    Indeks file database dan hasil probe tabel FFBSCANNERDATA per file
+    """
+
+    def __init__(self, base_dirs, index_path: str = None,
+                 scan_workers: int = DEFAULT_SCAN_WORKERS,
+                 probe_workers: int = DEFAULT_PROBE_WORKERS,
+                 connector_factory: Callable = None):
+        """
+        Args:
+            base_dirs: Folder (atau list folder) yang dijelajah
+            index_path: File indeks persisten (default: cache/database_catalog.json)
+            scan_workers: Thread penjelajah folder
+            probe_workers: Proses isql bersamaan saat probe
+            connector_factory: factory(db_path, isql_path) -> connector (default:
+                               FirebirdConnectorEnhanced)
+        """
+        self.base_dirs = [base_dirs] if isinstance(base_dirs, (str, Path)) else list(base_dirs)
+        self.index_path = Path(index_path) if index_path else DEFAULT_INDEX_PATH
+        self.scan_workers = max(1, int(scan_workers))
+        self.probe_workers = max(1, int(probe_workers))
+        self.connector_factory = connector_factory or _default_connector_factory
+
+        self._lock = threading.Lock()
+        self._cancelled = threading.Event()
+        self._active_connectors = set()
+        self._isql_path = None
+        self.entries = self._load_index()
+
+    # ------------------------------------------------------------------ index
+
+    def _load_index(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+            if index.get('version') != INDEX_VERSION:
+                return {}
+            return index.get('entries', {})
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            logger.warning(f"Could not read database catalog {self.index_path}: {e}")
+            return {}
+
+    def save(self):
+        """Simpan indeks (tulis ke file sementara lalu rename)"""
+        try:
+            self.index_path.parent.mkdir(parents=True, exist_ok=True)
+            temp_path = self.index_path.with_name(self.index_path.name + '.tmp')
+            with self._lock:
+                payload = {'version': INDEX_VERSION, 'saved_at': datetime.now().isoformat(),
+                           'entries': self.entries}
+                with open(temp_path, 'w', encoding='utf-8') as f:
+                    json.dump(payload, f, indent=2, default=str)
+            os.replace(temp_path, self.index_path)
+        except Exception as e:
+            logger.warning(f"Could not save database catalog {self.index_path}: {e}")
+
+    # ------------------------------------------------------------------- scan
+
+    def _list_directory(self, directory: str, extensions: tuple):
+        """Isi satu folder: (subfolder, [(path, size, mtime_ns)])"""
+        subdirs = []
+        files = []
+        try:
+            with os.scandir(directory) as iterator:
+                for entry in iterator:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            subdirs.append(entry.path)
+                        elif entry.name.lower().endswith(extensions):
+                            stat = entry.stat()
+                            files.append((entry.path, stat.st_size, stat.st_mtime_ns))
+                    except OSError:
+                        continue
+        except OSError as e:
+            logger.debug(f"Cannot list {directory}: {e}")
+        return subdirs, files
+
+    def _walk_parallel(self, extensions: tuple) -> List[tuple]:
+        """Jelajah semua base_dirs; setiap folder di-list oleh thread pool"""
+        found = []
+        with ThreadPoolExecutor(max_workers=self.scan_workers, thread_name_prefix='catalog-scan') as executor:
+            pending = {executor.submit(self._list_directory, directory, extensions)
+                       for directory in self.base_dirs if os.path.isdir(directory)}
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    subdirs, files = future.result()
+                    found.extend(files)
+                    pending.update(executor.submit(self._list_directory, subdir, extensions)
+                                   for subdir in subdirs)
+        return found
+
+    def scan(self, min_size: int = 0, extensions: Iterable[str] = DEFAULT_EXTENSIONS) -> List[Dict[str, Any]]:
+        """
+        Perbarui indeks dari isi folder. File yang ukuran / mtime-nya berubah
+        kehilangan hasil probe lama; file yang sudah hilang dibuang dari indeks.
+
+        Args:
+            min_size: Ukuran minimal file (byte) yang dikembalikan
+            extensions: Ekstensi file database
+
+        Returns:
+            List info database (newest first): path, name, size, size_mb, modified,
+            relative_path, base_dir, probe (None jika belum diprobe / file berubah)
+        """
+        extensions = tuple(ext.lower() for ext in extensions)
+        found = self._walk_parallel(extensions)
+
+        with self._lock:
+            seen = set()
+            for path, size, mtime_ns in found:
+                seen.add(path)
+                entry = self.entries.get(path)
+                if entry is None or entry.get('size') != size or entry.get('mtime_ns') != mtime_ns:
+                    self.entries[path] = {'size': size, 'mtime_ns': mtime_ns, 'probe': None}
+
+            # Hanya file di bawah base_dirs yang dijelajah yang bisa dinyatakan hilang
+            for path in list(self.entries):
+                if path not in seen and path.lower().endswith(extensions) and self._base_for(path):
+                    del self.entries[path]
+
+        self.save()
+        databases = [self.describe(path) for path, size, _ in found if size >= min_size]
+        databases.sort(key=lambda db: db['modified'], reverse=True)
+        return databases
+
+    def _base_for(self, path: str) -> Optional[str]:
+        """Base dir yang memuat path (None jika di luar semua base_dirs)"""
+        path = os.path.abspath(path)
+        for base_dir in self.base_dirs:
+            base = os.path.abspath(base_dir)
+            try:
+                if os.path.commonpath([path, base]) == base:
+                    return base_dir
+            except ValueError:
+                # Drive berbeda (Windows)
+                continue
+        return None
+
+    def describe(self, path: str) -> Dict[str, Any]:
+        """Info satu database dari indeks (format lama DatabaseSelector + probe)"""
+        entry = self.entries.get(path, {})
+        size = entry.get('size', 0)
+        base_dir = self._base_for(path)
+        return {
+            'path': path,
+            'name': os.path.basename(path),
+            'size': size,
+            'size_mb': size / (1024 * 1024),
+            'modified': datetime.fromtimestamp(entry.get('mtime_ns', 0) / 1e9),
+            'relative_path': os.path.relpath(path, base_dir) if base_dir else path,
+            'base_dir': base_dir,
+            'probe': entry.get('probe')
+        }
+
+    # ------------------------------------------------------------------ probe
+
+    def _is_current(self, path: str) -> bool:
+        """True jika hasil probe di indeks masih berlaku untuk file saat ini"""
+        entry = self.entries.get(path)
+        if not entry or not entry.get('probe'):
+            return False
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return False
+        return stat.st_size == entry.get('size') and stat.st_mtime_ns == entry.get('mtime_ns')
+
+    def _refresh_entry(self, path: str):
+        """Entri indeks untuk path yang belum pernah di-scan (mis. probe langsung)"""
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return
+        with self._lock:
+            entry = self.entries.get(path)
+            if entry is None or entry.get('size') != stat.st_size or entry.get('mtime_ns') != stat.st_mtime_ns:
+                self.entries[path] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'probe': None}
+
+    def _connector(self, path: str):
+        connector = self.connector_factory(path, self._isql_path)
+        # isql cukup dideteksi sekali (deteksi menjalankan proses isql)
+        self._isql_path = self._isql_path or getattr(connector, 'isql_path', None)
+        with self._lock:
+            self._active_connectors.add(connector)
+        return connector
+
+    def _release(self, connector):
+        with self._lock:
+            self._active_connectors.discard(connector)
+        if hasattr(connector, 'close'):
+            try:
+                connector.close()
+            except Exception:
+                pass
+
+    def _list_tables(self, path: str):
+        """Fase 1: koneksi + daftar tabel FFBSCANNERDATA (satu isql per database)"""
+        connector = None
+        try:
+            connector = self._connector(path)
+            if not connector.test_connection():
+                self._release(connector)
+                return None, [], "Connection failed"
+            tables = [table for table in connector.get_table_list() if FFB_TABLE_MARKER in table.upper()]
+            return connector, tables, None
+        except Exception as e:
+            if connector is not None:
+                self._release(connector)
+            return None, [], str(e)
+
+    def _count_rows(self, connector, tables: List[str], exact: bool) -> Dict[str, Optional[int]]:
+        """
+        Fase 2: row count semua tabel satu database. Estimasi = query metadata /
+        cache; exact = COUNT(*) semua tabel dalam satu statement.
+        """
+        if self._cancelled.is_set():
+            return {}
+        if exact:
+            counts = connector.exact_row_counts(tables)
+            return {table: counts.get(table.upper(), 0) for table in tables}
+        estimates = connector.estimate_row_counts(tables)
+        return {table: estimates.get(table.upper(), {}).get('rows') for table in tables}
+
+    def probe(self, paths: Iterable[str] = None, force: bool = False,
+              progress: Callable[[int, int, str], Any] = None,
+              exact: bool = False) -> Dict[str, Dict[str, Any]]:
+        """
+        Hitung row tabel FFBSCANNERDATA untuk database yang belum punya hasil probe
+        yang berlaku. Probe semua database berbagi satu pool berisi probe_workers
+        proses isql.
+
+        Args:
+            paths: Database yang diprobe (default: semua di indeks)
+            force: Probe ulang walaupun hasil lama masih berlaku
+            progress: progress(selesai, total, path) setiap database selesai
+            exact: Exact COUNT(*) (full scan); default estimasi dari table_statistics
+
+        Returns:
+            {path: probe} dengan probe = {tables: {nama: row}, total_records,
+            has_data, exact, probed_at, error}; row None = tabel berisi data
+            tetapi jumlahnya tidak bisa diestimasi
+        """
+        self._cancelled.clear()
+        paths = list(self.entries) if paths is None else list(paths)
+        for path in paths:
+            if path not in self.entries:
+                self._refresh_entry(path)
+
+        results = {}
+        todo = []
+        for path in paths:
+            if not force and self._is_current(path) and (not exact or self.entries[path]['probe'].get('exact', True)):
+                results[path] = self.entries[path]['probe']
+            elif os.path.exists(path):
+                todo.append(path)
+
+        if not todo:
+            return results
+
+        logger.info(f"Probing {len(todo)} databases ({len(results)} cached)")
+        done = 0
+        with ThreadPoolExecutor(max_workers=self.probe_workers, thread_name_prefix='catalog-probe') as executor:
+            listing = {executor.submit(self._list_tables, path): path for path in todo}
+            counts = {}
+            connectors = {}
+            for future in as_completed(listing):
+                path = listing[future]
+                connector, tables, error = future.result()
+                if connector is None or not tables or self._cancelled.is_set():
+                    if connector is not None:
+                        self._release(connector)
+                    results[path] = self._store_probe(path, {}, error, exact)
+                    done += 1
+                    if progress:
+                        progress(done, len(todo), path)
+                    continue
+                connectors[path] = connector
+                counts[path] = executor.submit(self._count_rows, connector, tables, exact)
+
+            for path, future in counts.items():
+                tables = {}
+                error = None
+                try:
+                    tables = future.result()
+                except Exception as e:
+                    error = str(e)
+                self._release(connectors[path])
+                results[path] = self._store_probe(path, tables, error, exact)
+                done += 1
+                if progress:
+                    progress(done, len(todo), path)
+
+        self.save()
+        return results
+
+    def _store_probe(self, path: str, tables: Dict[str, Optional[int]], error: Optional[str],
+                     exact: bool = False) -> Dict[str, Any]:
+        cancelled = self._cancelled.is_set()
+        if cancelled:
+            error = error or "Probe cancelled"
+        probe = {
+            'tables': tables,
+            'total_records': sum(rows for rows in tables.values() if rows),
+            'has_data': any(rows is None or rows > 0 for rows in tables.values()),
+            'exact': exact,
+            'probed_at': datetime.now().isoformat(),
+            'error': error
+        }
+        with self._lock:
+            entry = self.entries.setdefault(path, {})
+            # Probe yang dibatalkan tidak di-cache; database yang gagal dibuka tetap
+            # di-cache sampai filenya berubah (atau probe(force=True))
+            entry['probe'] = None if cancelled else probe
+        return probe
+
+    def cancel(self):
+        """Hentikan probe yang sedang berjalan (proses isql aktif di-kill)"""
+        self._cancelled.set()
+        with self._lock:
+            connectors = list(self._active_connectors)
+        for connector in connectors:
+            if hasattr(connector, 'cancel'):
+                connector.cancel()
+
+    def databases_with_data(self, min_size: int = 0) -> List[Dict[str, Any]]:
+        """Database di indeks yang hasil probe-nya berisi row FFB (terbanyak dulu)"""
+        databases = [self.describe(path) for path in self.entries
+                     if self._is_current(path) and self.entries[path].get('size', 0) >= min_size]
+        databases = [db for db in databases
+                     if db['probe'].get('has_data', db['probe']['total_records'] > 0)]
+        databases.sort(key=lambda db: db['probe']['total_records'], reverse=True)
+        return databases
@@ -4,6 +4,10 @@ Database Helper Module
 Handles the special headers/rows structure format used by the Firebird database
 """
 
+from collections.abc import Mapping
+
+from result_set import ResultSet
+
 def extract_structured_data(query_result):
     """
     Extract data from the special headers/rows format
@@ -12,10 +16,15 @@ def extract_structured_data(query_result):
         query_result: Result from database query in format [{'headers': [...], 'rows': [...]}]
     
     Returns:
-        List of dictionaries with proper column names
+        List of dictionaries with proper column names (ResultSet kolumnar jika
+        connector mengembalikan satu result set; row-nya tetap bisa diakses seperti dict)
     """
     if not query_result or len(query_result) == 0:
         return []
+
+    # Connector enhanced: rows sudah berupa ResultSet, tidak perlu disalin per row
+    if len(query_result) == 1 and isinstance(query_result[0], dict) and isinstance(query_result[0].get('rows'), ResultSet):
+        return query_result[0]['rows']
     
     extracted_data = []
     
@@ -31,7 +40,7 @@ def extract_structured_data(query_result):
         
         # Process each row
         for row in rows:
-            if isinstance(row, dict):
+            if isinstance(row, Mapping):
                 # Row is already a dictionary, use it directly
                 extracted_data.append(row)
             elif isinstance(row, (list, tuple)):
@@ -162,7 +171,7 @@ def normalize_data_row(row_dict):
     Returns:
         Normalized dictionary
     """
-    if not isinstance(row_dict, dict):
+    if not isinstance(row_dict, Mapping):
         return row_dict
     
     normalized = {}
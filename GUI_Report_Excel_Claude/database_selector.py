@@ -2,57 +2,52 @@
 """
 Database Selector - Choose from available database files
 READ-ONLY ACCESS - No data modification
+
+Pencarian file dan jumlah row FFBSCANNERDATA memakai DatabaseCatalog: folder
+dijelajah paralel, row count diestimasi bersamaan (table_statistics, tanpa
+COUNT(*) full scan), dan hasilnya di-cache sampai file database berubah.
 """
 
 import os
+import sys
 import glob
-import datetime
 from pathlib import Path
+# Modul bersama (report_common) ada di root repository
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from firebird_connector_enhanced import FirebirdConnectorEnhanced
+from database_catalog import DatabaseCatalog
+from report_common.table_statistics import format_row_count
+
+# Hanya file > 10MB yang kemungkinan berisi data
+MIN_DATABASE_SIZE = 10 * 1024 * 1024
 
 class DatabaseSelector:
-    def __init__(self):
-        self.base_dir = r"D:\Gawean Rebinmas\Monitoring Database"
+    def __init__(self, base_dir: str = None, catalog: DatabaseCatalog = None):
+        self.base_dir = base_dir or r"D:\Gawean Rebinmas\Monitoring Database"
+        self.catalog = catalog or DatabaseCatalog(self.base_dir)
         self.available_databases = []
         
     def find_databases(self):
         """Find all available database files"""
         print(f"🔍 Searching for database files in: {self.base_dir}")
         
-        # Find all .fdb files
-        fdb_files = []
-        for root, dirs, files in os.walk(self.base_dir):
-            for file in files:
-                if file.lower().endswith('.fdb'):
-                    full_path = os.path.join(root, file)
-                    fdb_files.append(full_path)
-        
-        # Filter and sort by size
-        db_info = []
-        for file_path in fdb_files:
-            try:
-                size = os.path.getsize(file_path)
-                mtime = os.path.getmtime(file_path)
-                mod_date = datetime.datetime.fromtimestamp(mtime)
-                
-                # Only include files larger than 10MB (likely to have data)
-                if size > 10 * 1024 * 1024:
-                    db_info.append({
-                        'path': file_path,
-                        'size': size,
-                        'size_mb': size / (1024 * 1024),
-                        'modified': mod_date,
-                        'name': os.path.basename(file_path),
-                        'relative_path': os.path.relpath(file_path, self.base_dir)
-                    })
-            except:
-                continue
-        
-        # Sort by modification date (newest first)
-        db_info.sort(key=lambda x: x['modified'], reverse=True)
+        # Sorted by modification date (newest first)
+        db_info = self.catalog.scan(min_size=MIN_DATABASE_SIZE)
         self.available_databases = db_info
         
         return db_info
+
+    def find_databases_with_data(self, progress=None):
+        """
+        Database yang berisi data FFB: semua file diprobe bersamaan (hasil probe
+        file yang tidak berubah diambil dari cache)
+
+        Returns:
+            List info database (dengan 'probe'), record FFB terbanyak dulu
+        """
+        databases = self.find_databases()
+        self.catalog.probe([db['path'] for db in databases], progress=progress)
+        return self.catalog.databases_with_data(min_size=MIN_DATABASE_SIZE)
     
     def display_databases(self):
         """Display available databases for selection"""
@@ -83,52 +78,40 @@ class DatabaseSelector:
         print("=" * 60)
         
         try:
-            # Create temporary connector with this database
-            connector = FirebirdConnectorEnhanced()
-            original_path = connector.db_path
-            connector.db_path = db_path
-            
-            # Test connection
-            if not connector.test_connection():
-                print("❌ Connection failed")
+            # Row count tabel FFBSCANNERDATA (dari cache jika file belum berubah)
+            probe = self.catalog.probe([db_path]).get(db_path)
+            if not probe or probe.get('error'):
+                error = probe.get('error') if probe else "Database not found"
+                print(f"❌ {error}")
                 return False
             
             print("✅ Connection successful")
             
-            # Get FFB tables
-            tables = connector.get_table_list()
-            ffb_tables = [t for t in tables if 'FFB' in t.upper() and 'SCANNER' in t.upper()]
-            
+            ffb_tables = probe['tables']
             print(f"📊 Found {len(ffb_tables)} FFBSCANNERDATA tables")
             
-            # Check for data in FFB tables
-            tables_with_data = []
-            for table in ffb_tables:
-                try:
-                    count = connector.get_row_count(table)
-                    if count > 0:
-                        tables_with_data.append((table, count))
-                except:
-                    continue
+            # Check for data in FFB tables (row None = berisi data, jumlah tidak diestimasi)
+            exact = probe.get('exact', True)
+            tables_with_data = [(table, count) for table, count in ffb_tables.items()
+                                if count is None or count > 0]
             
             if tables_with_data:
                 print(f"🎯 {len(tables_with_data)} tables contain data:")
-                total_records = 0
                 
                 for table, count in tables_with_data:
-                    print(f"   - {table}: {count:,} records")
-                    total_records += count
+                    print(f"   - {table}: {format_row_count(count, exact)} records")
                 
-                print(f"\n📈 Total FFB records: {total_records:,}")
+                print(f"\n📈 Total FFB records: {format_row_count(probe['total_records'], exact)}")
                 
                 # Check FFBSCANNERDATA04 specifically
                 ffb04_found = False
                 for table, count in tables_with_data:
                     if table == 'FFBSCANNERDATA04':
                         ffb04_found = True
-                        print(f"🎯 FFBSCANNERDATA04: {count:,} records ✅")
+                        print(f"🎯 FFBSCANNERDATA04: {format_row_count(count, exact)} records ✅")
                         
                         # Get sample data
+                        connector = FirebirdConnectorEnhanced(db_path=db_path)
                         sample = connector.get_sample_data('FFBSCANNERDATA04', limit=1)
                         if sample and len(sample) > 0:
                             record = sample[0]
@@ -150,10 +133,8 @@ class DatabaseSelector:
             print(f"❌ Error testing database: {str(e)}")
             return False
         finally:
-            if 'connector' in locals():
-                connector.db_path = original_path  # Restore original path
-                if hasattr(connector, 'close'):
-                    connector.close()
+            if 'connector' in locals() and hasattr(connector, 'close'):
+                connector.close()
     
     def select_database(self):
         """Interactive database selection"""
@@ -201,30 +182,19 @@ def main():
     
     # Show current default database status
     print("🔍 Current default database status:")
-    current_connector = FirebirdConnectorEnhanced()
-    print(f"   Path: {current_connector.db_path}")
+    current_db = FirebirdConnectorEnhanced.DEFAULT_DATABASE
+    print(f"   Path: {current_db}")
     
-    if current_connector.test_connection():
-        tables = current_connector.get_table_list()
-        ffb_tables = [t for t in tables if 'FFB' in t.upper() and 'SCANNER' in t.upper()]
-        
-        ffb_data_count = 0
-        for table in ffb_tables:
-            try:
-                count = current_connector.get_row_count(table)
-                ffb_data_count += count
-            except:
-                continue
-        
-        if ffb_data_count > 0:
-            print(f"   Status: ✅ Contains {ffb_data_count:,} FFB records")
+    probe = selector.catalog.probe([current_db]).get(current_db)
+    if probe and not probe.get('error'):
+        if probe.get('has_data', probe['total_records'] > 0):
+            ffb_data_count = format_row_count(probe['total_records'], probe.get('exact', True))
+            print(f"   Status: ✅ Contains {ffb_data_count} FFB records")
         else:
             print(f"   Status: ❌ No FFB data (empty database)")
     else:
         print(f"   Status: ❌ Connection failed")
     
-    current_connector.close()
-    
     # Interactive selection
     selected = selector.select_database()
     
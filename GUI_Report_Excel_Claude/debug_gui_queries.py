@@ -84,7 +84,7 @@ def test_gui_queries():
         try:
             exists = connector.check_table_exists(table)
             if exists:
-                count = connector.get_row_count(table)
+                count = connector.get_row_count(table, approximate=True)
                 print(f"✅ {table}: exists, {count} rows")
             else:
                 print(f"❌ {table}: does not exist")
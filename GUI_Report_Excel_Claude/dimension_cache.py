@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+Dimension Cache - cache tabel dimensi (EMP, OCFIELD, CRDIVISION) per database estate
+Tabel dimensi dibaca sekali per snapshot database (fingerprint: path, ukuran, mtime),
+disimpan ke disk sebagai JSON kolumnar dan dipakai sebagai lookup table pandas
+untuk join di memory, sehingga query dimensi tidak diulang setiap run atau setiap bulan.
+Kolom Decimal/date/datetime/time dicatat tipenya di file cache dan dikembalikan saat
+cache dibaca, sehingga hasil dari cache sama dengan hasil query langsung.
+"""
+
+import os
+import re
+import json
+import hashlib
+import logging
+from datetime import datetime, date, time
+from decimal import Decimal
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Callable
+
+import pandas as pd
+
+DEFAULT_CACHE_DIR = Path(__file__).parent / 'cache' / 'dimensions'
+
+# Tabel master yang isinya tidak bergantung pada periode laporan
+DIMENSION_TABLE_NAMES = ('EMP', 'OCFIELD', 'CRDIVISION')
+
+# Query dimensi bawaan untuk join in-memory
+DEFAULT_DIMENSIONS = {
+    'employees': 'SELECT ID, NAME FROM EMP',
+    'fields': 'SELECT ID, FIELDNAME, DIVID FROM OCFIELD',
+    'divisions': 'SELECT ID, DIVNAME FROM CRDIVISION'
+}
+
+TABLE_REFERENCE_PATTERN = re.compile(r'\b(?:FROM|JOIN)\s+("?[\w$]+"?)', re.IGNORECASE)
+
+_CACHES = {}
+
+# Tipe kolom yang tidak punya padanan JSON: disimpan sebagai string, dibaca kembali
+# dengan parser-nya (datetime dicek sebelum date karena turunannya)
+COLUMN_TYPES = (
+    ('datetime', datetime, datetime.fromisoformat),
+    ('date', date, date.fromisoformat),
+    ('time', time, time.fromisoformat),
+    ('decimal', Decimal, Decimal)
+)
+COLUMN_PARSERS = {name: parser for name, _, parser in COLUMN_TYPES}
+
+
+def column_types(columns: List[str], rows: List[List[Any]]) -> Dict[str, str]:
+    """Tipe kolom non-JSON (nilai non-NULL pertama) -> {kolom: 'decimal'/'date'/...}"""
+    types = {}
+    for index, column in enumerate(columns):
+        value = next((row[index] for row in rows if row[index] is not None), None)
+        for name, value_type, _ in COLUMN_TYPES:
+            if isinstance(value, value_type):
+                types[column] = name
+                break
+    return types
+
+
+def restore_column_types(entry: Dict[str, Any]) -> Dict[str, Any]:
+    """Kembalikan nilai string hasil JSON ke tipe kolom yang tercatat di entry['types']"""
+    types = entry.get('types') or {}
+    if not types:
+        return entry
+
+    parsers = [COLUMN_PARSERS.get(types.get(column)) for column in entry['columns']]
+    entry['rows'] = [
+        [parser(value) if parser and isinstance(value, str) else value for parser, value in zip(parsers, row)]
+        for row in entry['rows']
+    ]
+    return entry
+
+
+def database_fingerprint(db_path: str) -> str:
+    """Fingerprint snapshot database: berubah setiap kali file database ditulis"""
+    stat = os.stat(db_path)
+    raw = f"{os.path.abspath(db_path)}|{stat.st_size}|{stat.st_mtime_ns}"
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+def is_dimension_sql(sql: str) -> bool:
+    """
+    True jika SQL hanya membaca tabel dimensi dan tidak punya placeholder periode
+    (hasilnya sama untuk setiap run pada snapshot database yang sama)
+    """
+    if not sql or '{' in sql:
+        return False
+    tables = [name.strip('"').upper() for name in TABLE_REFERENCE_PATTERN.findall(sql)]
+    return bool(tables) and all(name in DIMENSION_TABLE_NAMES for name in tables)
+
+
+def get_dimension_cache(db_path: Optional[str], cache_dir: Optional[str] = None) -> Optional['DimensionCache']:
+    """DimensionCache bersama per database (None jika file database tidak ada)"""
+    if not db_path or not os.path.exists(db_path):
+        return None
+
+    key = (os.path.abspath(db_path), str(cache_dir or DEFAULT_CACHE_DIR))
+    if key not in _CACHES:
+        _CACHES[key] = DimensionCache(db_path, cache_dir)
+    return _CACHES[key]
+
+
+class DimensionCache:
+    """
+    Cache tabel dimensi untuk satu database estate
+    """
+
+    def __init__(self, db_path: str, cache_dir: Optional[str] = None):
+        """
+        Args:
+            db_path: Path file database (.FDB)
+            cache_dir: Folder penyimpanan cache (default: cache/dimensions)
+        """
+        self.db_path = db_path
+        self.cache_dir = Path(cache_dir) if cache_dir else DEFAULT_CACHE_DIR
+        self.logger = logging.getLogger(__name__)
+
+        self.fingerprint = None
+        self.tables = {}  # name -> {'sql': str, 'columns': [...], 'types': {...}, 'rows': [[...]]}
+        self._frames = {}  # name -> DataFrame
+
+    @property
+    def cache_file(self) -> Path:
+        """File cache untuk fingerprint saat ini"""
+        stem = Path(self.db_path).stem
+        return self.cache_dir / f"{stem}_{(self.fingerprint or '')[:16]}.json"
+
+    def _check_snapshot(self):
+        """Muat ulang cache jika database berubah sejak terakhir dibaca"""
+        fingerprint = database_fingerprint(self.db_path)
+        if fingerprint == self.fingerprint:
+            return
+
+        self.fingerprint = fingerprint
+        self.tables = {}
+        self._frames = {}
+
+        try:
+            if self.cache_file.exists():
+                with open(self.cache_file, 'r', encoding='utf-8') as f:
+                    payload = json.load(f)
+                if payload.get('fingerprint') == fingerprint:
+                    self.tables = {name: restore_column_types(entry)
+                                   for name, entry in payload.get('tables', {}).items()}
+                    self.logger.info(f"Loaded {len(self.tables)} dimension tables from {self.cache_file}")
+        except Exception as e:
+            self.logger.warning(f"Could not read dimension cache {self.cache_file}: {e}")
+            self.tables = {}
+
+    def _save(self):
+        """Simpan cache ke disk dan hapus file cache snapshot lama database ini"""
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            for old_file in self.cache_dir.glob(f"{Path(self.db_path).stem}_*.json"):
+                if old_file != self.cache_file:
+                    old_file.unlink()
+
+            payload = {
+                'database': os.path.abspath(self.db_path),
+                'fingerprint': self.fingerprint,
+                'saved_at': datetime.now().isoformat(),
+                'tables': self.tables
+            }
+            with open(self.cache_file, 'w', encoding='utf-8') as f:
+                # Nilai non-JSON ditulis sebagai string; tipenya ada di entry['types']
+                json.dump(payload, f, default=str)
+        except Exception as e:
+            self.logger.warning(f"Could not save dimension cache {self.cache_file}: {e}")
+
+    def get_records(self, name: str, sql: str, run_query: Callable[[str], List[Dict]]) -> List[Dict]:
+        """
+        Hasil query dimensi sebagai list of dict, dari cache jika SQL dan snapshot sama
+
+        Args:
+            name: Nama tabel dimensi / query
+            sql: SQL dimensi (sudah tersubstitusi)
+            run_query: Fungsi eksekusi SQL ke database (dipanggil hanya saat cache miss)
+        """
+        self._check_snapshot()
+
+        entry = self.tables.get(name)
+        if entry is None or entry.get('sql') != sql:
+            self.logger.info(f"Dimension '{name}' not cached, reading from database")
+            records = run_query(sql) or []
+            if not records:
+                # Hasil kosong (atau query gagal) tidak di-cache
+                return []
+
+            columns = []
+            for record in records:
+                for column in record:
+                    if column not in columns:
+                        columns.append(column)
+            rows = [[record.get(column) for column in columns] for record in records]
+            entry = {
+                'sql': sql,
+                'columns': columns,
+                'types': column_types(columns, rows),
+                'rows': rows
+            }
+            self.tables[name] = entry
+            self._frames.pop(name, None)
+            self._save()
+        else:
+            self.logger.info(f"Dimension '{name}' served from cache ({len(entry['rows'])} rows)")
+
+        columns = entry['columns']
+        return [dict(zip(columns, row)) for row in entry['rows']]
+
+    def get_table(self, name: str, run_query: Callable[[str], List[Dict]], sql: Optional[str] = None) -> pd.DataFrame:
+        """
+        Tabel dimensi sebagai DataFrame (dibangun sekali per snapshot)
+
+        Args:
+            name: Nama tabel dimensi (default SQL diambil dari DEFAULT_DIMENSIONS)
+            run_query: Fungsi eksekusi SQL ke database
+            sql: SQL custom (opsional)
+        """
+        sql = sql or DEFAULT_DIMENSIONS[name]
+        self._check_snapshot()
+
+        entry = self.tables.get(name)
+        if name in self._frames and entry is not None and entry.get('sql') == sql:
+            return self._frames[name]
+
+        self.get_records(name, sql, run_query)
+        entry = self.tables.get(name)
+        if entry is None or entry.get('sql') != sql:
+            return pd.DataFrame()
+        frame = pd.DataFrame(entry['rows'], columns=entry['columns'])
+        self._frames[name] = frame
+        return frame
+
+    def lookup(self, name: str, key_column: str, value_column: str,
+               run_query: Callable[[str], List[Dict]], sql: Optional[str] = None) -> pd.Series:
+        """Lookup Series key -> value dari tabel dimensi (untuk Series.map)"""
+        frame = self.get_table(name, run_query, sql)
+        if frame.empty or key_column not in frame.columns or value_column not in frame.columns:
+            return pd.Series(dtype=object)
+        frame = frame[frame[key_column].notna()].drop_duplicates(key_column, keep='last')
+        return pd.Series(frame[value_column].to_numpy(), index=frame[key_column].to_numpy())
+
+    def resolve_fields(self, field_ids: List[Any], run_query: Callable[[str], List[Dict]]) -> pd.DataFrame:
+        """
+        Join FIELDID ke OCFIELD dan CRDIVISION di memory
+
+        Returns:
+            DataFrame dengan kolom FIELDID, FIELDNAME, DIVID, DIVNAME
+        """
+        result = pd.DataFrame({'FIELDID': pd.Series(list(field_ids), dtype=object)})
+        fields = self.get_table('fields', run_query)
+        divisions = self.get_table('divisions', run_query)
+
+        if not fields.empty and 'ID' in fields.columns:
+            fields = fields.astype(object).drop_duplicates('ID', keep='last').rename(columns={'ID': 'FIELDID'})
+            result = result.merge(fields, on='FIELDID', how='left')
+        if not divisions.empty and 'ID' in divisions.columns and 'DIVID' in result.columns:
+            divisions = divisions.astype(object).drop_duplicates('ID', keep='last').rename(columns={'ID': 'DIVID'})
+            result = result.merge(divisions, on='DIVID', how='left')
+
+        for column in ('FIELDNAME', 'DIVID', 'DIVNAME'):
+            if column not in result.columns:
+                result[column] = None
+        result = result.astype(object).where(result.notna(), None)
+        return result[['FIELDID', 'FIELDNAME', 'DIVID', 'DIVNAME']]
+
+    def invalidate(self, name: Optional[str] = None):
+        """Buang cache satu tabel dimensi (atau semua) agar dibaca ulang dari database"""
+        self._check_snapshot()
+        if name is None:
+            self.tables = {}
+            self._frames = {}
+        else:
+            self.tables.pop(name, None)
+            self._frames.pop(name, None)
+        self._save()
@@ -5,16 +5,27 @@ Mendukung algoritma pemrosesan data berdasarkan referensi gui_multi_estate_ffb_a
 """
 
 import os
+import sys
 import json
 import logging
+import pandas as pd
 from datetime import datetime, date
 from typing import Dict, List, Any, Optional, Tuple
 from pathlib import Path
-from collections import defaultdict
+
+from grouping_engine import GroupingEngine, DEFAULT_GROUPING_VIEWS
+from dimension_cache import get_dimension_cache, is_dimension_sql
+from result_set import ResultSet, to_frame
+from aggregate_pushdown import plan_calculated_variables, pushdown_supported
+import tracing
+
+# Modul bersama (report_common) ada di root repository
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from report_common.sql_preview import add_where_predicate
 
 # Import Firebird connector
 try:
-    from firebird_connector_enhanced import FirebirdConnectorEnhanced
+    from firebird_connector_enhanced import FirebirdConnectorEnhanced, QueryCancelledError
 except ImportError:
     # Fallback to standard connector
     try:
@@ -24,11 +35,29 @@ except ImportError:
         print("Warning: No Firebird connector available")
         FirebirdConnectorEnhanced = None
 
+    class QueryCancelledError(Exception):
+        """Query dibatalkan (connector tanpa dukungan cancel tidak pernah memunculkannya)"""
+
 class EnhancedDynamicFormulaEngine:
     """
     Enhanced formula engine dengan raw data processing dan algoritma yang diperbaiki
     """
 
+    # Query yang menjadi sumber hasil turunan (derive_processed_results)
+    DERIVED_RESULT_SOURCES = ('employee_mapping', 'raw_ffb_data')
+
+    # Format TRANSDATE yang didukung, dicoba berurutan
+    TRANSDATE_FORMATS = ('%Y-%m-%d', '%d/%m/%Y')
+
+    # Kolom raw_ffb_data yang dijumlahkan untuk summary variables
+    SUMMARY_SUM_COLUMNS = (
+        ('total_ripe', 'RIPEBCH'), ('total_unripe', 'UNRIPEBCH'), ('total_black', 'BLACKBCH'),
+        ('total_rotten', 'ROTTENBCH'), ('total_ratdamage', 'RATDMGBCH')
+    )
+
+    # Ukuran chunk default query raw_ffb_data dengan "stream": true
+    STREAM_CHUNK_SIZE = 50000
+
     def __init__(self, formula_path: str, db_connector=None):
         """
         Inisialisasi enhanced dynamic formula engine
@@ -57,12 +86,26 @@ class EnhancedDynamicFormulaEngine:
         # Data storage for processing
         self.employee_mapping = {}
         self.raw_ffb_data = []
+        self.raw_ffb_frame = None  # raw_ffb_data sebagai DataFrame, dibangun sekali per hasil query
+        self.raw_ffb_dates = None  # TRANSDATE raw_ffb_data, di-parse sekali (datetime64)
         self.filtered_data = []
         self.processed_data = {}
+        self.stream_totals = None  # total summary dari mode streaming (raw data tidak disimpan)
+
+        # Rentang tanggal yang sudah difilter di SQL per query: query_name -> (start, end)
+        self.sql_date_ranges = {}
+
+        # Plan pushdown calculated_variables (dibuat sekali per formula)
+        self._aggregate_plan = None
 
         self._load_formula()
         self._setup_queries_from_json()
 
+        # View agregasi (daily/employee/field/verification) sebagai group-by spec
+        views = dict(DEFAULT_GROUPING_VIEWS)
+        views.update((self.formula_data or {}).get('grouping_views', {}))
+        self.grouping_engine = GroupingEngine(views)
+
     def _load_formula(self):
         """Load formula JSON file"""
         try:
@@ -110,26 +153,68 @@ class EnhancedDynamicFormulaEngine:
                 return []
 
             query_def = self.dynamic_queries[query_name]
-            
-            if 'sql' not in query_def:
+            sql = self._prepare_sql(query_name, parameters)
+            if sql is None:
                 self.logger.error(f"No SQL found for query '{query_name}'")
                 return []
 
-            # Substitute parameters in SQL
-            sql = self._substitute_parameters(query_def['sql'], parameters)
             self.logger.info(f"Executing query '{query_name}': {sql}")
 
             if not self.db_connector:
                 self.logger.error("No database connector available")
                 return []
 
+            with tracing.span(query_name, stage='extract', query=query_name) as query_span:
+                result = None
+                if self._is_dimension_query(query_name, query_def, sql):
+                    dimension_cache = get_dimension_cache(getattr(self.db_connector, 'db_path', None))
+                    if dimension_cache:
+                        result = dimension_cache.get_records(query_name, sql, lambda dim_sql: self._run_sql(query_name, dim_sql))
+
+                if result is None:
+                    result = self._run_sql(query_name, sql)
+                query_span.set(rows=len(result))
+
+            return result
+
+        except QueryCancelledError:
+            raise
+
+        except Exception as e:
+            self.logger.error(f"Error executing query '{query_name}': {e}")
+            return []
+
+    def _prepare_sql(self, query_name: str, parameters: Dict[str, Any]) -> Optional[str]:
+        """SQL query siap jalan: predicate tanggal di-push dan parameter disubstitusi"""
+        query_def = self.dynamic_queries.get(query_name, {})
+        if 'sql' not in query_def:
+            return None
+        sql = self._push_date_predicate(query_name, query_def, query_def['sql'], parameters)
+        return self._substitute_parameters(sql, parameters)
+
+    def _is_dimension_query(self, query_name: str, query_def: Dict, sql: str) -> bool:
+        """Query master data (EMP/OCFIELD/CRDIVISION) yang hasilnya tetap selama database tidak berubah"""
+        if 'dimension' in query_def:
+            return bool(query_def['dimension'])
+        return is_dimension_sql(sql)
+
+    def _run_sql(self, query_name: str, sql: str) -> List[Dict]:
+        """Eksekusi SQL ke database dan kembalikan list of dict (ResultSet jika connector mendukung)"""
+        try:
             # Execute query
-            results = self.db_connector.execute_query(sql)
+            if isinstance(self.db_connector, FirebirdConnectorEnhanced):
+                results = self.db_connector.execute_query(sql, return_format='resultset')
+            else:
+                results = self.db_connector.execute_query(sql)
             
             if not results:
                 self.logger.warning(f"Query '{query_name}' returned no results")
                 return []
 
+            if isinstance(results, ResultSet):
+                self.logger.info(f"Query '{query_name}' returned {len(results)} rows ({', '.join(results.columns)})")
+                return results
+
             # Convert to list of dictionaries
             if isinstance(results, list) and len(results) > 0:
                 if isinstance(results[0], dict):
@@ -149,10 +234,50 @@ class EnhancedDynamicFormulaEngine:
             
             return []
 
+        except QueryCancelledError:
+            raise
+
         except Exception as e:
             self.logger.error(f"Error executing query '{query_name}': {e}")
             return []
 
+    def _push_date_predicate(self, query_name: str, query_def: Dict, sql: str, parameters: Dict[str, Any]) -> str:
+        """
+        Pastikan filter tanggal dijalankan di database, bukan di Python
+
+        - SQL yang sudah memakai {start_date} dan {end_date} dianggap sudah terfilter.
+        - Query dengan metadata 'date_column' (mis. "a.TRANSDATE") mendapat predicate
+          BETWEEN di WHERE level terluar (sql_preview.add_where_predicate, sehingga
+          WHERE/GROUP BY di subquery atau string tidak ikut terbaca).
+
+        Rentang yang ter-push dicatat di sql_date_ranges agar filter in-memory bisa dilewati.
+        """
+        self.sql_date_ranges.pop(query_name, None)
+
+        start_date = parameters.get('start_date')
+        end_date = parameters.get('end_date')
+        if not start_date or not end_date:
+            return sql
+
+        if '{start_date}' in sql and '{end_date}' in sql:
+            self.sql_date_ranges[query_name] = (start_date, end_date)
+            return sql
+
+        date_column = query_def.get('date_column')
+        if not date_column:
+            return sql
+
+        predicate = f"{date_column} BETWEEN '{{start_date}}' AND '{{end_date}}'"
+        pushed_sql = add_where_predicate(sql, predicate)
+        if pushed_sql is None:
+            # Mis. UNION terluar; filter tanggal tetap dijalankan di memory
+            self.logger.warning(f"Cannot push date predicate into '{query_name}', filtering in memory")
+            return sql
+
+        self.sql_date_ranges[query_name] = (start_date, end_date)
+        self.logger.debug(f"Pushed date predicate into '{query_name}': {predicate}")
+        return pushed_sql
+
     def _substitute_parameters(self, sql: str, parameters: Dict[str, Any]) -> str:
         """Enhanced parameter substitution with better formatting"""
         try:
@@ -193,44 +318,34 @@ class EnhancedDynamicFormulaEngine:
             # Step 1: Execute employee mapping query first
             if 'employee_mapping' in self.dynamic_queries:
                 self.logger.info("Step 1: Creating employee mapping...")
-                employee_data = self.execute_query('employee_mapping', parameters)
-                results['employee_mapping'] = employee_data
-                
-                # Create mapping dictionary
-                self.employee_mapping = {}
-                for emp in employee_data:
-                    empid = emp.get('EMPID')
-                    empname = emp.get('EMPNAME', 'Unknown')
-                    if empid:
-                        self.employee_mapping[empid] = empname
-                
-                self.logger.info(f"Created employee mapping with {len(self.employee_mapping)} entries")
-
-            # Step 2: Execute raw FFB data query
-            if 'raw_ffb_data' in self.dynamic_queries:
-                self.logger.info("Step 2: Extracting raw FFB data...")
-                self.raw_ffb_data = self.execute_query('raw_ffb_data', parameters)
-                results['raw_ffb_data'] = self.raw_ffb_data
-                self.logger.info(f"Extracted {len(self.raw_ffb_data)} raw FFB records")
+                results['employee_mapping'] = self.execute_query('employee_mapping', parameters)
+                self.store_query_result('employee_mapping', results['employee_mapping'])
+
+            raw_query = self.dynamic_queries.get('raw_ffb_data', {})
+            if raw_query.get('stream'):
+                # Step 2-4: raw data di-stream per chunk langsung ke view (tidak disimpan di memory)
+                self.logger.info("Step 2-4: Streaming raw FFB data into views...")
+                self.compute_views_streaming(parameters, raw_query.get('stream_chunk_size', self.STREAM_CHUNK_SIZE))
+                results['raw_ffb_data'] = []
+            else:
+                # Step 2: Execute raw FFB data query
+                if raw_query:
+                    self.logger.info("Step 2: Extracting raw FFB data...")
+                    results['raw_ffb_data'] = self.execute_query('raw_ffb_data', parameters)
+                    self.store_query_result('raw_ffb_data', results['raw_ffb_data'])
 
-            # Step 3: Filter data by date range
-            self.logger.info("Step 3: Filtering data by date range...")
-            self.filtered_data = self._filter_by_date_range(
-                self.raw_ffb_data, 
-                parameters.get('start_date'), 
-                parameters.get('end_date')
-            )
-            self.logger.info(f"Filtered to {len(self.filtered_data)} records within date range")
+                # Step 3-4: Filter by date range dan process views
+                self.processed_data = self.derive_processed_results(parameters)
 
-            # Step 4: Process data for different views
-            self.logger.info("Step 4: Processing data for different views...")
-            self.processed_data = self._process_filtered_data(self.filtered_data)
+            # Step 5: Execute other queries (query aggregate_only hanya dibaca lewat pushdown)
+            for query_name, query_def in self.dynamic_queries.items():
+                if query_name in ['employee_mapping', 'raw_ffb_data'] or query_def.get('aggregate_only'):
+                    continue
+                self.logger.info(f"Step 5: Executing query '{query_name}'...")
+                results[query_name] = self.execute_query(query_name, parameters)
 
-            # Step 5: Execute other queries
-            for query_name in self.dynamic_queries:
-                if query_name not in ['employee_mapping', 'raw_ffb_data']:
-                    self.logger.info(f"Step 5: Executing query '{query_name}'...")
-                    results[query_name] = self.execute_query(query_name, parameters)
+            # Step 6: Agregat calculated_variables dihitung di database (satu row per sumber)
+            self.compute_calculated_variables(results, parameters)
 
             # Add processed data to results
             results.update(self.processed_data)
@@ -240,165 +355,181 @@ class EnhancedDynamicFormulaEngine:
 
         return results
 
-    def _filter_by_date_range(self, data: List[Dict], start_date: str, end_date: str) -> List[Dict]:
-        """Filter data by date range at application level"""
+    def store_query_result(self, query_name: str, result: List[Dict]):
+        """Simpan hasil query yang dipakai processing internal (employee mapping, raw data)"""
+        if query_name == 'employee_mapping':
+            # Create mapping dictionary (vectorized; record tanpa EMPID dilewati)
+            self.employee_mapping = {}
+            frame = to_frame(result).astype(object)
+            if 'EMPID' in frame.columns:
+                names = frame['EMPNAME'] if 'EMPNAME' in frame.columns else pd.Series('Unknown', index=frame.index)
+                valid = frame['EMPID'].notna() & frame['EMPID'].astype(bool)
+                self.employee_mapping = dict(zip(frame.loc[valid, 'EMPID'], names[valid]))
+
+            self.logger.info(f"Created employee mapping with {len(self.employee_mapping)} entries")
+
+        elif query_name == 'raw_ffb_data':
+            self.raw_ffb_data = result or []
+            self.raw_ffb_frame = None
+            self.raw_ffb_dates = None
+            self.stream_totals = None
+            self.logger.info(f"Extracted {len(self.raw_ffb_data)} raw FFB records")
+
+    @tracing.traced(stage='analyze')
+    def derive_processed_results(self, parameters: Dict[str, Any]) -> Dict[str, List[Dict]]:
+        """
+        Filter raw data sesuai rentang tanggal dan hitung view turunan di memory
+
+        Tidak menjalankan query; cukup dipanggil ulang saat tanggal berubah
+        dalam bulan yang sama atau setelah raw_ffb_data di-refresh.
+        """
+        start_date = parameters.get('start_date')
+        end_date = parameters.get('end_date')
+
+        # DataFrame dibangun sekali per hasil raw_ffb_data; perubahan tanggal cukup slicing
+        if self.raw_ffb_frame is None:
+            self.raw_ffb_frame = to_frame(self.raw_ffb_data)
+
+        indices = None
+        if self.sql_date_ranges.get('raw_ffb_data') == (start_date, end_date):
+            # Sudah difilter oleh database untuk rentang yang sama
+            self.logger.info(f"Step 3: Date range already applied in SQL ({len(self.raw_ffb_data)} records)")
+        elif self.raw_ffb_data and start_date and end_date:
+            self.logger.info("Step 3: Filtering data by date range...")
+            if self.raw_ffb_dates is None:
+                self.raw_ffb_dates = self._parse_transdates(self.raw_ffb_data)
+            indices = self._date_range_indices(self.raw_ffb_dates, start_date, end_date)
+
+        if indices is None:
+            self.filtered_data = self.raw_ffb_data
+            filtered_frame = self.raw_ffb_frame
+        else:
+            if isinstance(self.raw_ffb_data, ResultSet):
+                self.filtered_data = self.raw_ffb_data.take(indices)
+            else:
+                self.filtered_data = [self.raw_ffb_data[i] for i in indices]
+            filtered_frame = self.raw_ffb_frame.iloc[indices]
+            self.logger.info(f"Filtered to {len(self.filtered_data)} records within date range")
+
+        self.logger.info("Step 4: Processing data for different views...")
+        return self._process_filtered_data(self.filtered_data, frame=filtered_frame)
+
+    def compute_views_streaming(self, parameters: Dict[str, Any], chunk_size: int = 50000) -> Dict[str, List[Dict]]:
+        """
+        Hitung view turunan langsung dari stream raw_ffb_data (connector.iter_query)
+
+        Untuk rentang panjang (mis. satu tahun): raw data tidak disimpan di memory,
+        setiap chunk difilter tanggal lalu diagregasi sebagian oleh GroupingEngine;
+        total untuk summary variables diakumulasi per chunk (stream_totals).
+        Connector tanpa iter_query memakai jalur biasa (execute_query + derive).
+        Dipakai execute_all_queries jika query raw_ffb_data diberi "stream": true.
+        """
+        query_def = self.dynamic_queries.get('raw_ffb_data')
+        if not query_def or 'sql' not in query_def:
+            self.logger.error("Query 'raw_ffb_data' not found in formula file")
+            return {}
+
+        if not hasattr(self.db_connector, 'iter_query'):
+            self.store_query_result('raw_ffb_data', self.execute_query('raw_ffb_data', parameters))
+            self.processed_data = self.derive_processed_results(parameters)
+            return self.processed_data
+
+        start_date = parameters.get('start_date')
+        end_date = parameters.get('end_date')
+        sql = self._push_date_predicate('raw_ffb_data', query_def, query_def['sql'], parameters)
+        sql = self._substitute_parameters(sql, parameters)
+        filter_in_memory = bool(start_date and end_date) and \
+            self.sql_date_ranges.get('raw_ffb_data') != (start_date, end_date)
+
+        # Raw data tidak disimpan pada mode streaming
+        self.store_query_result('raw_ffb_data', [])
+        self.filtered_data = []
+        counts = {'rows': 0, 'kept': 0}
+        totals = self._summary_totals([])
+
+        def filtered_chunks():
+            for chunk in self.db_connector.iter_query(sql, chunk_size=chunk_size):
+                counts['rows'] += len(chunk)
+                if filter_in_memory:
+                    indices = self._date_range_indices(self._parse_transdates(chunk), start_date, end_date)
+                    if indices is not None:
+                        chunk = chunk.take(indices)
+                counts['kept'] += len(chunk)
+                for key, value in self._summary_totals(chunk).items():
+                    totals[key] += value
+                yield chunk
+
+        self.logger.info(f"Streaming query 'raw_ffb_data' in chunks of {chunk_size}: {sql}")
+        try:
+            self.processed_data = self.grouping_engine.compute_chunks(
+                filtered_chunks(), lookup_sources={'employee_mapping': self.employee_mapping}
+            )
+            self.stream_totals = totals
+        except Exception as e:
+            self.logger.error(f"Error streaming query 'raw_ffb_data': {e}")
+            self.processed_data = {}
+
+        self.logger.info(f"Streamed {counts['rows']} raw FFB records, {counts['kept']} within date range")
+        return self.processed_data
+
+    def _parse_transdates(self, data: List[Dict]) -> pd.Series:
+        """Parse kolom TRANSDATE sekali secara vectorized (NaT untuk nilai yang tidak valid)"""
+        if isinstance(data, ResultSet):
+            values = pd.Series(data.column('TRANSDATE') if 'TRANSDATE' in data.columns else [None] * len(data), dtype=object)
+        else:
+            values = pd.Series([record.get('TRANSDATE') for record in data], dtype=object)
+        parsed = pd.Series(pd.NaT, index=values.index, dtype='datetime64[ns]')
+
+        for date_format in self.TRANSDATE_FORMATS:
+            missing = parsed.isna() & values.notna()
+            if not missing.any():
+                break
+            parsed[missing] = pd.to_datetime(values[missing], format=date_format, errors='coerce')
+
+        return parsed.dt.normalize()
+
+    def _filter_by_date_range(self, data: List[Dict], start_date: str, end_date: str,
+                              parsed_dates: Optional[pd.Series] = None) -> List[Dict]:
+        """Filter data by date range at application level (vectorized atas TRANSDATE)"""
         if not data or not start_date or not end_date:
             return data
 
-        try:
-            start_dt = datetime.strptime(start_date, '%Y-%m-%d').date()
-            end_dt = datetime.strptime(end_date, '%Y-%m-%d').date()
-            
-            filtered = []
-            for record in data:
-                trans_date = record.get('TRANSDATE')
-                if trans_date:
-                    if isinstance(trans_date, str):
-                        try:
-                            trans_dt = datetime.strptime(trans_date, '%Y-%m-%d').date()
-                        except ValueError:
-                            try:
-                                trans_dt = datetime.strptime(trans_date, '%d/%m/%Y').date()
-                            except ValueError:
-                                continue
-                    elif isinstance(trans_date, date):
-                        trans_dt = trans_date
-                    else:
-                        continue
-                    
-                    if start_dt <= trans_dt <= end_dt:
-                        filtered.append(record)
-            
-            return filtered
+        if parsed_dates is None or len(parsed_dates) != len(data):
+            parsed_dates = self._parse_transdates(data)
 
-        except Exception as e:
-            self.logger.error(f"Error filtering by date range: {e}")
+        indices = self._date_range_indices(parsed_dates, start_date, end_date)
+        if indices is None:
             return data
+        if isinstance(data, ResultSet):
+            return data.take(indices)
+        return [data[i] for i in indices]
 
-    def _process_filtered_data(self, data: List[Dict]) -> Dict[str, List[Dict]]:
-        """Process filtered data into different views"""
-        processed = {}
-        
+    def _date_range_indices(self, parsed_dates: pd.Series, start_date: str, end_date: str):
+        """Posisi record dengan TRANSDATE dalam rentang (None jika rentang tidak valid)"""
         try:
-            # Daily performance data
-            daily_data = self._group_by_date(data)
-            processed['daily_performance'] = daily_data
-            processed['processed_daily_data'] = daily_data
-
-            # Employee performance data
-            employee_data = self._group_by_employee(data)
-            processed['employee_performance'] = employee_data
-            processed['processed_employee_data'] = employee_data
+            start_dt = pd.Timestamp(datetime.strptime(start_date, '%Y-%m-%d'))
+            end_dt = pd.Timestamp(datetime.strptime(end_date, '%Y-%m-%d'))
+        except Exception as e:
+            self.logger.error(f"Error filtering by date range: {e}")
+            return None
 
-            # Field performance data
-            field_data = self._group_by_field(data)
-            processed['field_performance'] = field_data
-            processed['processed_field_data'] = field_data
+        mask = ((parsed_dates >= start_dt) & (parsed_dates <= end_dt)).to_numpy()
+        return mask.nonzero()[0]
 
-            # Verification analysis
-            verification_data = self._calculate_verification_rate(data)
-            processed['verification_data'] = verification_data
+    def _process_filtered_data(self, data: List[Dict], frame: Optional[pd.DataFrame] = None) -> Dict[str, List[Dict]]:
+        """Process filtered data into different views (satu DataFrame, satu groupby per view)"""
+        processed = {}
 
+        try:
+            processed = self.grouping_engine.compute(
+                data, lookup_sources={'employee_mapping': self.employee_mapping}, frame=frame
+            )
         except Exception as e:
             self.logger.error(f"Error processing filtered data: {e}")
 
         return processed
 
-    def _group_by_date(self, data: List[Dict]) -> List[Dict]:
-        """Group data by transaction date"""
-        daily_totals = defaultdict(lambda: {
-            'TRANSDATE': '',
-            'JUMLAH_TRANSAKSI': 0,
-            'RIPE_BUNCHES': 0,
-            'UNRIPE_BUNCHES': 0,
-            'BLACK_BUNCHES': 0,
-            'ROTTEN_BUNCHES': 0,
-            'RAT_DAMAGE_BUNCHES': 0
-        })
-
-        for record in data:
-            trans_date = record.get('TRANSDATE', '')
-            if trans_date:
-                daily_totals[trans_date]['TRANSDATE'] = trans_date
-                daily_totals[trans_date]['JUMLAH_TRANSAKSI'] += 1
-                daily_totals[trans_date]['RIPE_BUNCHES'] += record.get('RIPEBCH', 0)
-                daily_totals[trans_date]['UNRIPE_BUNCHES'] += record.get('UNRIPEBCH', 0)
-                daily_totals[trans_date]['BLACK_BUNCHES'] += record.get('BLACKBCH', 0)
-                daily_totals[trans_date]['ROTTEN_BUNCHES'] += record.get('ROTTENBCH', 0)
-                daily_totals[trans_date]['RAT_DAMAGE_BUNCHES'] += record.get('RATDMGBCH', 0)
-
-        return list(daily_totals.values())
-
-    def _group_by_employee(self, data: List[Dict]) -> List[Dict]:
-        """Group data by employee and role"""
-        employee_totals = defaultdict(lambda: {
-            'EMPLOYEE_NAME': '',
-            'RECORDTAG': '',
-            'JUMLAH_TRANSAKSI': 0,
-            'TOTAL_RIPE': 0,
-            'TOTAL_UNRIPE': 0,
-            'VERIFICATION_RATE': 0
-        })
-
-        for record in data:
-            empid = record.get('SCANUSERID', '')
-            recordtag = record.get('RECORDTAG', '')
-            
-            if empid and recordtag:
-                key = f"{empid}_{recordtag}"
-                employee_name = self.employee_mapping.get(empid, f"EMP_{empid}")
-                
-                employee_totals[key]['EMPLOYEE_NAME'] = employee_name
-                employee_totals[key]['RECORDTAG'] = recordtag
-                employee_totals[key]['JUMLAH_TRANSAKSI'] += 1
-                employee_totals[key]['TOTAL_RIPE'] += record.get('RIPEBCH', 0)
-                employee_totals[key]['TOTAL_UNRIPE'] += record.get('UNRIPEBCH', 0)
-
-        # Calculate verification rates
-        for emp_data in employee_totals.values():
-            if emp_data['RECORDTAG'] != 'PM':
-                emp_data['VERIFICATION_RATE'] = 100  # Non-PM records are considered verified
-            else:
-                emp_data['VERIFICATION_RATE'] = 0   # PM records need verification
-
-        return list(employee_totals.values())
-
-    def _group_by_field(self, data: List[Dict]) -> List[Dict]:
-        """Group data by field/division"""
-        field_totals = defaultdict(lambda: {
-            'FIELDNAME': '',
-            'JUMLAH_TRANSAKSI': 0,
-            'TOTAL_RIPE': 0,
-            'TOTAL_UNRIPE': 0
-        })
-
-        for record in data:
-            divid = record.get('DIVID', '')
-            fieldname = record.get('FIELDNAME', divid or 'Unknown Field')
-            
-            if divid:
-                field_totals[divid]['FIELDNAME'] = fieldname
-                field_totals[divid]['JUMLAH_TRANSAKSI'] += 1
-                field_totals[divid]['TOTAL_RIPE'] += record.get('RIPEBCH', 0)
-                field_totals[divid]['TOTAL_UNRIPE'] += record.get('UNRIPEBCH', 0)
-
-        return list(field_totals.values())
-
-    def _calculate_verification_rate(self, data: List[Dict]) -> List[Dict]:
-        """Calculate verification rate based on PM vs non-PM records"""
-        total_transactions = len(data)
-        pm_transactions = len([r for r in data if r.get('RECORDTAG') == 'PM'])
-        verified_transactions = total_transactions - pm_transactions
-        
-        verification_rate = (verified_transactions / total_transactions * 100) if total_transactions > 0 else 0
-        
-        return [{
-            'total_transactions': total_transactions,
-            'pm_transactions': pm_transactions,
-            'verified_transactions': verified_transactions,
-            'verification_rate': round(verification_rate, 2)
-        }]
-
+    @tracing.traced(stage='analyze')
     def process_variables(self, query_results: Dict[str, List[Dict]], parameters: Dict[str, Any]) -> Dict[str, Any]:
         """
         Enhanced variable processing with raw data calculations
@@ -413,6 +544,9 @@ class EnhancedDynamicFormulaEngine:
             # Calculate variables from processed data
             variables.update(self._calculate_summary_variables(query_results))
 
+            # calculated_variables formula (agregat di-pushdown ke database)
+            variables.update(self.compute_calculated_variables(query_results, parameters))
+
             # Add basic report info
             variables.update({
                 'report_title': parameters.get('report_title', 'LAPORAN ANALISIS FRESH FRUIT BUNCH (FFB) - PGE 2B'),
@@ -433,20 +567,17 @@ class EnhancedDynamicFormulaEngine:
         variables = {}
 
         try:
-            # Get data from filtered results
-            filtered_data = self.filtered_data
+            # Totals dari filtered data, atau hasil akumulasi mode streaming
+            totals = self.stream_totals if self.stream_totals is not None else self._summary_totals(self.filtered_data)
             
-            if filtered_data:
-                # Calculate totals
-                total_transactions = len(filtered_data)
-                total_ripe = sum(record.get('RIPEBCH', 0) for record in filtered_data)
-                total_unripe = sum(record.get('UNRIPEBCH', 0) for record in filtered_data)
-                total_black = sum(record.get('BLACKBCH', 0) for record in filtered_data)
-                total_rotten = sum(record.get('ROTTENBCH', 0) for record in filtered_data)
-                total_ratdamage = sum(record.get('RATDMGBCH', 0) for record in filtered_data)
-                
-                # Calculate verification metrics
-                verified_transactions = len([r for r in filtered_data if r.get('RECORDTAG') != 'PM'])
+            if totals['total_transactions']:
+                total_transactions = totals['total_transactions']
+                total_ripe = totals['total_ripe']
+                total_unripe = totals['total_unripe']
+                total_black = totals['total_black']
+                total_rotten = totals['total_rotten']
+                total_ratdamage = totals['total_ratdamage']
+                verified_transactions = totals['verified_transactions']
                 
                 # Calculate daily averages
                 daily_data = query_results.get('daily_performance', [])
@@ -501,6 +632,53 @@ class EnhancedDynamicFormulaEngine:
 
         return variables
 
+    def _summary_totals(self, data) -> Dict[str, Any]:
+        """Jumlah transaksi, total per kolom SUMMARY_SUM_COLUMNS dan transaksi terverifikasi"""
+        totals = {'total_transactions': len(data) if data else 0}
+        for key, column in self.SUMMARY_SUM_COLUMNS:
+            totals[key] = sum(record.get(column, 0) for record in data) if data else 0
+        totals['verified_transactions'] = len([r for r in data if r.get('RECORDTAG') != 'PM']) if data else 0
+        return totals
+
+    def compute_calculated_variables(self, query_results: Dict[str, Any], parameters: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Hitung calculated_variables formula. Agregat (SUM/COUNT(DISTINCT ...)) atas
+        satu query sumber dijalankan sebagai satu statement agregat per sumber;
+        ringkasannya disimpan di query_results['<sumber>__aggregates'] dan dipakai
+        ulang selama SQL sumber sama. Tanpa connector (replay) agregat dihitung dari
+        ringkasan snapshot atau dari hasil query di memory.
+        """
+        definitions = (self.formula_data or {}).get('calculated_variables')
+        if not definitions:
+            return {}
+
+        try:
+            if self._aggregate_plan is None:
+                self._aggregate_plan = plan_calculated_variables(
+                    definitions, self.dynamic_queries,
+                    (self.formula_data or {}).get('calculated_variables_source'))
+
+            # Firebird 1.5 tidak punya derived table: agregat langsung dihitung di memory
+            pushdown = self.db_connector and pushdown_supported(self.db_connector)
+            run_sql = self._run_aggregate_sql if pushdown else None
+            return self._aggregate_plan.execute(
+                lambda source: self._prepare_sql(source, dict(parameters)), run_sql, query_results)
+
+        except QueryCancelledError:
+            raise
+
+        except Exception as e:
+            self.logger.error(f"Error computing calculated variables: {e}")
+            return {}
+
+    def _run_aggregate_sql(self, source: str, sql: str) -> List[Dict]:
+        """Eksekusi statement agregat satu sumber"""
+        self.logger.info(f"Executing aggregates of '{source}': {sql}")
+        with tracing.span(f"{source} aggregates", stage='extract', query=source) as query_span:
+            result = self._run_sql(f"{source} aggregates", sql)
+            query_span.set(rows=len(result))
+        return result
+
     def _process_json_variables(self, variable_definitions: Dict, query_results: Dict[str, List[Dict]], parameters: Dict[str, Any]) -> Dict[str, Any]:
         """Process variable definitions from JSON file"""
         variables = {}
@@ -535,6 +713,7 @@ class EnhancedDynamicFormulaEngine:
 
         return variables
 
+    @tracing.traced(stage='analyze')
     def get_repeating_data(self, query_results: Dict[str, List[Dict]]) -> Dict[str, List[Dict]]:
         """Get data for repeating sections"""
         repeating_data = {}
@@ -6,6 +6,7 @@ Menggabungkan semua komponen untuk menghasilkan laporan Excel dari template
 import os
 import json
 import logging
+import threading
 from datetime import datetime, date
 from typing import Dict, List, Any, Optional, Tuple
 from pathlib import Path
@@ -41,11 +42,24 @@ class ExcelReportGenerator:
         self.formula_engine = None
         self.db_connector = None
 
+        # Diset oleh cancel() (GUI job runner); dicek di antara estate
+        self.cancel_event = threading.Event()
+
         # Load estate configuration
         self.estate_config = self._load_estate_config()
 
         self.logger.info("Excel Report Generator initialized")
 
+    def cancel(self):
+        """
+        Hentikan generate_report yang sedang berjalan: query isql estate aktif di-kill
+        dan estate berikutnya tidak diproses (aman dipanggil dari thread lain)
+        """
+        self.cancel_event.set()
+        connector = self.db_connector
+        if connector is not None and hasattr(connector, 'cancel'):
+            connector.cancel()
+
     def _setup_logging(self):
         """Setup logging configuration"""
         log_format = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
@@ -131,6 +145,10 @@ class ExcelReportGenerator:
 
             # Generate report untuk setiap estate
             for estate_name in selected_estates:
+                if self.cancel_event.is_set():
+                    self.logger.warning("Report generation cancelled")
+                    return False, ["Report generation cancelled"]
+
                 try:
                     self.logger.info(f"Generating report for estate: {estate_name}")
 
@@ -160,7 +178,7 @@ class ExcelReportGenerator:
                     errors.append(error_msg)
 
             # Generate consolidated report if multiple estates
-            if len(selected_estates) > 1 and len(output_files) > 0:
+            if len(selected_estates) > 1 and len(output_files) > 0 and not self.cancel_event.is_set():
                 try:
                     consolidated_file = self._generate_consolidated_report(
                         selected_estates, start_date, end_date, output_dir
@@ -246,6 +264,9 @@ class ExcelReportGenerator:
         try:
             # Initialize database connection
             self.db_connector = FirebirdConnector(db_path=db_path)
+            if self.cancel_event.is_set():
+                # cancel() dipanggil sebelum connector estate ini dibuat
+                return None
 
             # Test connection
             if not self.db_connector.test_connection():
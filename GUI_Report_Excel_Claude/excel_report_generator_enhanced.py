@@ -1,25 +1,46 @@
 """
 Enhanced Excel Report Generator Utama
 Menggabungkan semua komponen enhanced untuk menghasilkan laporan Excel dari template dengan debug logging
+
+Hasil query per estate disimpan sebagai snapshot (etl_artifacts). Mode replay
+(--from-snapshot) memuat snapshot dan hanya menjalankan transform + render, tanpa
+koneksi ke Firebird:
+
+    python excel_report_generator_enhanced.py --from-snapshot etl_reports/ETL_Run_PGE_2B_...
+    python excel_report_generator_enhanced.py --estates "PGE 2B" --start-date 2025-10-01 \
+        --end-date 2025-10-31 --from-snapshot etl_reports
+
+Dengan --pdf (atau export_pdf=True) PDF dirender langsung dari data yang sama,
+paralel dengan render template Excel (tanpa membuka ulang file xlsx).
 """
 
 import os
+import sys
 import json
+import argparse
 import logging
+import threading
 from datetime import datetime, date
 from typing import Dict, List, Any, Optional, Tuple
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 
+# Modul bersama (report_common) ada di root repository
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from firebird_connector_enhanced import FirebirdConnectorEnhanced as FirebirdConnector
 from template_processor_enhanced import TemplateProcessorEnhanced
 from formula_engine_enhanced import FormulaEngineEnhanced
+from report_common.etl_artifacts import ArtifactStore, load_artifact, read_manifest, queries_fingerprint
+from pdf_report_generator import PDFReportGenerator, REPORTLAB_AVAILABLE
+import tracing
 
 class ExcelReportGeneratorEnhanced:
     """
     Enhanced report generator dengan debug logging dan perbaikan processing
     """
 
-    def __init__(self, template_path: str = None, formula_path: str = None, estate_config_path: str = None):
+    def __init__(self, template_path: str = None, formula_path: str = None, estate_config_path: str = None,
+                 snapshot_dir: str = None, capture_snapshots: bool = True, export_pdf: bool = False):
         """
         Inisialisasi enhanced report generator
 
@@ -27,6 +48,9 @@ class ExcelReportGeneratorEnhanced:
             template_path: Path ke template Excel (default: Template_Laporan_FFB_Analysis.xlsx)
             formula_path: Path ke formula file (default: laporan_ffb_analysis_formula.json)
             estate_config_path: Path ke estate config (default: estate_config.json)
+            snapshot_dir: Folder snapshot hasil query (default: etl_reports)
+            capture_snapshots: Simpan hasil query setiap estate untuk replay
+            export_pdf: Render PDF dari data yang sama, paralel dengan Excel
         """
         # Set default paths
         self.template_path = template_path or "Template_Laporan_FFB_Analysis.xlsx"
@@ -41,11 +65,35 @@ class ExcelReportGeneratorEnhanced:
         self.formula_engine = None
         self.db_connector = None
 
+        # Diset oleh cancel() (GUI job runner); dicek di antara estate
+        self.cancel_event = threading.Event()
+
+        # Snapshot hasil query per estate (replay tanpa database)
+        self.capture_snapshots = capture_snapshots
+        self.snapshot_store = ArtifactStore(snapshot_dir or "etl_reports")
+
+        # PDF dirender dari data in-memory di thread terpisah (layout dari formula 'pdf_layout')
+        self.export_pdf = export_pdf and REPORTLAB_AVAILABLE
+        if export_pdf and not REPORTLAB_AVAILABLE:
+            self.logger.warning("reportlab not available, PDF export disabled")
+        self.pdf_generator = PDFReportGenerator() if self.export_pdf else None
+        self.pdf_outputs = {}
+
         # Load estate configuration
         self.estate_config = self._load_estate_config()
 
         self.logger.info("Enhanced Excel Report Generator initialized")
 
+    def cancel(self):
+        """
+        Hentikan generate_report yang sedang berjalan: query isql estate aktif di-kill
+        dan estate berikutnya tidak diproses (aman dipanggil dari thread lain)
+        """
+        self.cancel_event.set()
+        connector = self.db_connector
+        if connector is not None and hasattr(connector, 'cancel'):
+            connector.cancel()
+
     def _setup_enhanced_logging(self):
         """Setup enhanced logging dengan debug detail"""
         self.logger = logging.getLogger(f"{__name__}_enhanced")
@@ -106,7 +154,8 @@ class ExcelReportGeneratorEnhanced:
                        start_date: str,
                        end_date: str,
                        selected_estates: List[str],
-                       output_dir: str = "reports") -> Tuple[bool, List[str]]:
+                       output_dir: str = "reports",
+                       from_snapshot: str = None) -> Tuple[bool, List[str]]:
         """
         Generate laporan untuk multiple estates dengan enhanced debugging
 
@@ -115,19 +164,34 @@ class ExcelReportGeneratorEnhanced:
             end_date: Tanggal akhir (YYYY-MM-DD atau DD/MM/YYYY)
             selected_estates: List estate yang akan diproses
             output_dir: Directory untuk output files
+            from_snapshot: Mode replay - folder snapshot satu run (estate dan periode
+                           diambil dari manifest jika kosong) atau folder snapshot
+                           (snapshot terbaru per estate dan periode dipakai)
 
         Returns:
             Tuple (success, list of output files)
         """
         try:
+            if from_snapshot:
+                manifest = read_manifest(from_snapshot)
+                if manifest is not None:
+                    # Snapshot satu run: estate dan periode default dari manifest
+                    snapshot_params = manifest.get('parameters', {})
+                    start_date = start_date or snapshot_params.get('start_date')
+                    end_date = end_date or snapshot_params.get('end_date')
+                    selected_estates = selected_estates or [manifest.get('estate')]
+
             self.logger.info("=== STARTING ENHANCED REPORT GENERATION ===")
             self.logger.info(f"Start date: {start_date}")
             self.logger.info(f"End date: {end_date}")
             self.logger.info(f"Selected estates: {selected_estates}")
             self.logger.info(f"Output directory: {output_dir}")
+            if from_snapshot:
+                self.logger.info(f"Replay mode: snapshot {from_snapshot} (no database queries)")
 
             # Validate inputs
-            validation_result = self._validate_inputs(start_date, end_date, selected_estates)
+            validation_result = self._validate_inputs(start_date, end_date, selected_estates,
+                                                      require_database=not from_snapshot)
             if not validation_result[0]:
                 self.logger.error(f"Input validation failed: {validation_result[1]}")
                 return False, validation_result[1]
@@ -147,12 +211,37 @@ class ExcelReportGeneratorEnhanced:
 
             output_files = []
             errors = []
+            self.pdf_outputs = {}
 
             # Generate report untuk setiap estate
             for i, estate_name in enumerate(selected_estates, 1):
+                if self.cancel_event.is_set():
+                    self.logger.warning("Report generation cancelled")
+                    return False, ["Report generation cancelled"]
+
                 try:
                     self.logger.info(f"=== PROCESSING ESTATE {i}/{len(selected_estates)}: {estate_name} ===")
 
+                    if from_snapshot:
+                        snapshot_path = self._resolve_snapshot(from_snapshot, estate_name, start_date, end_date)
+                        if not snapshot_path:
+                            error_msg = f"No snapshot found for estate {estate_name} ({start_date} to {end_date})"
+                            self.logger.error(error_msg)
+                            errors.append(error_msg)
+                            continue
+
+                        with tracing.span(estate_name, estate=estate_name):
+                            output_file = self._replay_single_estate_report(estate_name, snapshot_path, output_dir)
+
+                        if output_file:
+                            output_files.append(output_file)
+                            self.logger.info(f"✓ Report replayed successfully: {output_file}")
+                        else:
+                            error_msg = f"Failed to replay report for estate {estate_name}"
+                            self.logger.error(f"✗ {error_msg}")
+                            errors.append(error_msg)
+                        continue
+
                     # Get estate database path
                     db_path = self.estate_config.get(estate_name)
                     if not db_path:
@@ -184,9 +273,10 @@ class ExcelReportGeneratorEnhanced:
                         continue
 
                     # Generate single estate report
-                    output_file = self._generate_single_estate_report(
-                        estate_name, db_path, start_date, end_date, output_dir
-                    )
+                    with tracing.span(estate_name, estate=estate_name):
+                        output_file = self._generate_single_estate_report(
+                            estate_name, db_path, start_date, end_date, output_dir
+                        )
 
                     if output_file:
                         output_files.append(output_file)
@@ -202,7 +292,7 @@ class ExcelReportGeneratorEnhanced:
                     errors.append(error_msg)
 
             # Generate consolidated report if multiple estates
-            if len(selected_estates) > 1 and len(output_files) > 0:
+            if len(selected_estates) > 1 and len(output_files) > 0 and not self.cancel_event.is_set():
                 try:
                     self.logger.info("=== GENERATING CONSOLIDATED REPORT ===")
                     consolidated_file = self._generate_consolidated_report(
@@ -216,6 +306,9 @@ class ExcelReportGeneratorEnhanced:
                     self.logger.error(f"✗ {error_msg}", exc_info=True)
                     errors.append(error_msg)
 
+            # PDF per estate (dirender paralel dengan Excel) ikut dilaporkan
+            output_files.extend(self.pdf_outputs.values())
+
             success = len(output_files) > 0
             self.logger.info(f"=== REPORT GENERATION COMPLETED ===")
             self.logger.info(f"Success: {success}, Generated files: {len(output_files)}, Errors: {len(errors)}")
@@ -236,8 +329,9 @@ class ExcelReportGeneratorEnhanced:
             self.logger.error(f"Fatal error in generate_report: {e}", exc_info=True)
             return False, [str(e)]
 
-    def _validate_inputs(self, start_date: str, end_date: str, selected_estates: List[str]) -> Tuple[bool, List[str]]:
-        """Validate input parameters dengan debug"""
+    def _validate_inputs(self, start_date: str, end_date: str, selected_estates: List[str],
+                         require_database: bool = True) -> Tuple[bool, List[str]]:
+        """Validate input parameters dengan debug (require_database=False untuk mode replay)"""
         self.logger.debug("Validating input parameters")
         errors = []
 
@@ -258,7 +352,7 @@ class ExcelReportGeneratorEnhanced:
             errors.append(error)
         else:
             for estate in selected_estates:
-                if estate not in self.estate_config:
+                if require_database and estate not in self.estate_config:
                     error = f"Estate {estate} not found in configuration"
                     self.logger.error(error)
                     errors.append(error)
@@ -331,6 +425,9 @@ class ExcelReportGeneratorEnhanced:
             # Initialize database connection
             self.logger.debug("Initializing database connection")
             self.db_connector = FirebirdConnector(db_path=db_path)
+            if self.cancel_event.is_set():
+                # cancel() dipanggil sebelum connector estate ini dibuat
+                return None
 
             # Test connection
             self.logger.debug("Testing database connection")
@@ -362,6 +459,73 @@ class ExcelReportGeneratorEnhanced:
             successful_queries = sum(1 for result in query_results.values() if result is not None)
             self.logger.info(f"Query execution completed: {successful_queries}/{len(query_results)} successful")
 
+            self._save_snapshot(parameters, query_results, db_path)
+
+            return self._render_estate_report(estate_name, parameters, query_results, output_dir)
+
+        except Exception as e:
+            self.logger.error(f"Error generating report for estate {estate_name}: {e}", exc_info=True)
+            return None
+
+    def _replay_single_estate_report(self, estate_name: str, snapshot_path: str, output_dir: str) -> Optional[str]:
+        """Render laporan satu estate dari snapshot hasil query (tanpa koneksi database)"""
+        try:
+            self.logger.info(f"=== REPLAYING REPORT FOR ESTATE: {estate_name} ===")
+            with tracing.span('load_snapshot', stage='extract'):
+                snapshot = load_artifact(snapshot_path)
+            manifest = snapshot['manifest']
+            self.logger.info(f"Snapshot: {snapshot['path']} (captured {manifest.get('created_at')}, "
+                             f"{len(snapshot['query_results'])} query results)")
+
+            self.db_connector = None
+            self.formula_engine = FormulaEngineEnhanced(self.formula_path, None)
+            if manifest.get('queries_fingerprint') != queries_fingerprint(self.formula_engine.formulas.get('queries', {})):
+                self.logger.warning("Snapshot was captured with different query definitions; "
+                                    "variables may not match the current formula")
+            if manifest.get('mode') == 'preview':
+                self.logger.warning("Snapshot comes from a preview run (sampled rows)")
+
+            return self._render_estate_report(estate_name, snapshot['parameters'],
+                                              snapshot['query_results'], output_dir)
+
+        except Exception as e:
+            self.logger.error(f"Error replaying report for estate {estate_name}: {e}", exc_info=True)
+            return None
+
+    def _resolve_snapshot(self, from_snapshot: str, estate_name: str, start_date: str, end_date: str) -> Optional[str]:
+        """Folder snapshot untuk estate: folder run itu sendiri, atau snapshot terbaru di folder snapshot"""
+        manifest = read_manifest(from_snapshot)
+        if manifest is not None:
+            if manifest.get('estate') != estate_name:
+                self.logger.warning(f"Snapshot {from_snapshot} is for estate {manifest.get('estate')}, not {estate_name}")
+                return None
+            return from_snapshot
+        return ArtifactStore(from_snapshot).latest_run(estate_name, mode='run',
+                                                       start_date=start_date, end_date=end_date)
+
+    def _save_snapshot(self, parameters: Dict[str, Any], query_results: Dict[str, Any], db_path: str):
+        """Simpan hasil query estate sebagai snapshot untuk replay (kegagalan hanya di-log)"""
+        if not self.capture_snapshots:
+            return
+        try:
+            with tracing.span('save_snapshot', stage='save'):
+                run_dir = self.snapshot_store.write_run(
+                    query_results, parameters,
+                    queries=self.formula_engine.formulas.get('queries', {}),
+                    database=db_path,
+                    mode='run'
+                )
+            self.logger.info(f"Extraction snapshot saved: {run_dir}")
+        except Exception as e:
+            self.logger.warning(f"Could not save extraction snapshot: {e}")
+
+    def _render_estate_report(self, estate_name: str, parameters: Dict[str, Any],
+                              query_results: Dict[str, Any], output_dir: str) -> Optional[str]:
+        """Transform + render: variable, derived metrics, placeholder, repeating section, simpan"""
+        try:
+            start_date = parameters.get('start_date')
+            end_date = parameters.get('end_date')
+
             # Process variables
             self.logger.info("Processing variables from query results")
             variables = self.formula_engine.process_variables(query_results, parameters)
@@ -386,6 +550,20 @@ class ExcelReportGeneratorEnhanced:
 
             self.logger.info(f"Merged data prepared: {len(all_data)} total items")
 
+            # PDF dari data yang sama berjalan paralel dengan render template Excel
+            base_name = f"Laporan_FFB_Analysis_{estate_name.replace(' ', '_')}_{start_date}_{end_date}"
+            pdf_executor = None
+            pdf_future = None
+            if self.pdf_generator is not None:
+                pdf_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='pdf')
+                pdf_future = pdf_executor.submit(
+                    tracing.bind(self.pdf_generator.generate_pdf_from_data),
+                    all_data, os.path.join(output_dir, f"{base_name}.pdf"),
+                    self.formula_engine.formulas.get('pdf_layout'),
+                    f"LAPORAN ANALISIS FFB - {estate_name}",
+                    f"Periode: {start_date} s/d {end_date}"
+                )
+
             # Create new template instance
             self.logger.debug("Creating new template instance")
             template_instance = self.template_processor.create_copy()
@@ -426,14 +604,17 @@ class ExcelReportGeneratorEnhanced:
                         self.logger.error(f"Error processing repeating section '{section_name}': {e}")
 
             # Generate output filename
-            output_filename = f"Laporan_FFB_Analysis_{estate_name.replace(' ', '_')}_{start_date}_{end_date}.xlsx"
-            output_path = os.path.join(output_dir, output_filename)
+            output_path = os.path.join(output_dir, f"{base_name}.xlsx")
 
             self.logger.info(f"Saving report to: {output_path}")
 
             # Save report
             success = template_instance.save_processed_template(output_path)
 
+            if pdf_future is not None:
+                self._collect_pdf_output(estate_name, pdf_future)
+                pdf_executor.shutdown(wait=False)
+
             if success:
                 self.logger.info(f"✓ Report saved successfully: {output_path}")
                 return output_path
@@ -442,9 +623,18 @@ class ExcelReportGeneratorEnhanced:
                 return None
 
         except Exception as e:
-            self.logger.error(f"Error generating report for estate {estate_name}: {e}", exc_info=True)
+            self.logger.error(f"Error rendering report for estate {estate_name}: {e}", exc_info=True)
             return None
 
+    def _collect_pdf_output(self, estate_name: str, pdf_future):
+        """Tunggu render PDF estate; kegagalan PDF tidak menggagalkan laporan Excel"""
+        try:
+            pdf_path = pdf_future.result()
+            self.pdf_outputs[estate_name] = pdf_path
+            self.logger.info(f"✓ PDF saved successfully: {pdf_path}")
+        except Exception as e:
+            self.logger.error(f"✗ Failed to render PDF for estate {estate_name}: {e}")
+
     def _calculate_derived_metrics(self, base_data: Dict[str, Any]) -> Dict[str, Any]:
         """Calculate derived metrics dari base data"""
         metrics = {}
@@ -543,30 +733,55 @@ class ExcelReportGeneratorEnhanced:
             self.logger.error(f"Error getting template info: {e}")
             return error
 
-def main():
-    """Main function untuk testing enhanced generator"""
-    print("=== Enhanced Excel Report Generator Test ===")
-
-    generator = ExcelReportGeneratorEnhanced()
-
-    # Test dengan sample data
-    estates = generator.get_available_estates()
-    print(f"Available estates: {estates}")
-
-    if estates:
-        # Generate sample report
-        start_date = "2024-01-01"
-        end_date = "2024-01-31"
+def main(argv: List[str] = None):
+    """
+    Command line: generate dari database, atau --from-snapshot untuk render ulang
+    dari snapshot tanpa database. Tanpa argumen menjalankan test PGE 2B Januari 2024.
+    """
+    parser = argparse.ArgumentParser(description="Enhanced Excel Report Generator")
+    parser.add_argument('--start-date', help="Tanggal mulai (YYYY-MM-DD)")
+    parser.add_argument('--end-date', help="Tanggal akhir (YYYY-MM-DD)")
+    parser.add_argument('--estates', nargs='+', help="Estate yang diproses")
+    parser.add_argument('--output-dir', default="reports", help="Folder output")
+    parser.add_argument('--template', help="Template Excel")
+    parser.add_argument('--formula', help="Formula JSON")
+    parser.add_argument('--from-snapshot', dest='from_snapshot',
+                        help="Folder snapshot satu run atau folder snapshot (etl_reports); query tidak dijalankan")
+    parser.add_argument('--pdf', action='store_true',
+                        help="Render PDF dari data yang sama, paralel dengan Excel")
+    args = parser.parse_args(argv)
+
+    print("=== Enhanced Excel Report Generator ===")
+
+    generator = ExcelReportGeneratorEnhanced(template_path=args.template, formula_path=args.formula,
+                                             export_pdf=args.pdf)
+
+    selected_estates = args.estates
+    start_date = args.start_date
+    end_date = args.end_date
+    if not args.from_snapshot and not selected_estates:
+        # Test dengan sample data
+        estates = generator.get_available_estates()
+        print(f"Available estates: {estates}")
+        if not estates:
+            return 1
         selected_estates = ["PGE 2B"]  # Test dengan 1 estate
+        start_date = start_date or "2024-01-01"
+        end_date = end_date or "2024-01-31"
 
+    if args.from_snapshot:
+        print(f"Replaying snapshot {args.from_snapshot}")
+    else:
         print(f"Generating report for {selected_estates} from {start_date} to {end_date}")
 
-        success, results = generator.generate_report(start_date, end_date, selected_estates)
+    success, results = generator.generate_report(start_date, end_date, selected_estates or [],
+                                                 args.output_dir, from_snapshot=args.from_snapshot)
 
-        if success:
-            print(f"✓ Report generated successfully: {results}")
-        else:
-            print(f"✗ Report generation failed: {results}")
+    if success:
+        print(f"✓ Report generated successfully: {results}")
+        return 0
+    print(f"✗ Report generation failed: {results}")
+    return 1
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
@@ -5,10 +5,14 @@ READ-ONLY ACCESS - No data modification
 """
 
 import os
+import sys
 import glob
-import datetime
 from pathlib import Path
+# Modul bersama (report_common) ada di root repository
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from firebird_connector_enhanced import FirebirdConnectorEnhanced
+from database_catalog import DatabaseCatalog
+from report_common.table_statistics import format_row_count
 
 def find_nearby_databases():
     """Find databases in the same directory structure as the current default"""
@@ -19,71 +23,39 @@ def find_nearby_databases():
     print(f"🔍 Current database: {current_db}")
     print(f"🔍 Searching in: {base_dir}")
     
-    # Find all .fdb files in the area
-    fdb_files = []
-    for root, dirs, files in os.walk(base_dir):
-        for file in files:
-            if file.lower().endswith('.fdb'):
-                full_path = os.path.join(root, file)
-                fdb_files.append(full_path)
-    
-    # Get info for all files
-    databases = []
-    for file_path in fdb_files:
-        try:
-            size = os.path.getsize(file_path)
-            mtime = os.path.getmtime(file_path)
-            mod_date = datetime.datetime.fromtimestamp(mtime)
-            
-            databases.append({
-                'path': file_path,
-                'size': size,
-                'size_mb': size / (1024 * 1024),
-                'modified': mod_date,
-                'name': os.path.basename(file_path),
-                'relative_path': os.path.relpath(file_path, base_dir),
-                'is_current': file_path == current_db
-            })
-        except:
-            continue
-    
-    # Sort by modification date (newest first)
-    databases.sort(key=lambda x: x['modified'], reverse=True)
+    # Find all .fdb files in the area (paralel, indeks di cache/database_catalog.json)
+    databases = DatabaseCatalog(base_dir).scan()
+    for db in databases:
+        db['is_current'] = db['path'] == current_db
     
+    # Sorted by modification date (newest first)
     return databases
 
-def test_database_for_data(db_path):
-    """Test a specific database for actual data"""
+def test_database_for_data(db_path, probe=None):
+    """
+    Test a specific database for actual data
+
+    Args:
+        db_path: Path database
+        probe: Hasil DatabaseCatalog.probe untuk database ini (diprobe jika None)
+    """
     try:
-        # Create connector with this database
-        connector = FirebirdConnectorEnhanced(db_path=db_path)
-        
-        # Test connection
-        if not connector.test_connection():
+        if probe is None:
+            probe = DatabaseCatalog(os.path.dirname(db_path)).probe([db_path]).get(db_path)
+        if not probe or probe.get('error'):
             return None
         
-        # Get FFB scanner tables
-        tables = connector.get_table_list()
-        ffb_scanner_tables = [t for t in tables if 'FFBSCANNERDATA' in t.upper()]
-        
         # Check for data
-        ffb_data = {}
-        total_records = 0
-        
-        for table in ffb_scanner_tables:
-            try:
-                count = connector.get_row_count(table)
-                if count > 0:
-                    ffb_data[table] = count
-                    total_records += count
-            except:
-                continue
+        ffb_data = {table: count for table, count in probe['tables'].items() if count is None or count > 0}
+        total_records = probe['total_records']
         
         # Get sample from FFBSCANNERDATA04 if it has data
         sample_data = None
         columns = []
         if 'FFBSCANNERDATA04' in ffb_data:
             try:
+                connector = FirebirdConnectorEnhanced(db_path=db_path)
+
                 # Get table structure
                 table_info = connector.get_table_info('FFBSCANNERDATA04')
                 if table_info and 'columns' in table_info:
@@ -99,6 +71,8 @@ def test_database_for_data(db_path):
         return {
             'total_records': total_records,
             'tables_with_data': ffb_data,
+            'has_data': probe.get('has_data', total_records > 0),
+            'exact': probe.get('exact', True),
             'sample_data': sample_data,
             'columns': columns,
             'connection_success': True
@@ -126,6 +100,9 @@ def main():
     print(f"📊 Found {len(databases)} database files in the area")
     print("=" * 60)
     
+    # Row count semua database diprobe bersamaan (database yang tidak berubah dari cache)
+    probes = DatabaseCatalog(databases[0]['base_dir']).probe([db['path'] for db in databases])
+    
     databases_with_data = []
     
     for i, db in enumerate(databases):
@@ -138,16 +115,17 @@ def main():
         print(f"   📅 Modified: {db['modified'].strftime('%Y-%m-%d %H:%M:%S')}")
         
         # Test the database
-        result = test_database_for_data(db['path'])
+        result = test_database_for_data(db['path'], probes.get(db['path']))
         
         if result and result.get('connection_success'):
-            if result['total_records'] > 0:
-                print(f"   ✅ Contains {result['total_records']:,} FFB records")
+            if result['has_data']:
+                exact = result['exact']
+                print(f"   ✅ Contains {format_row_count(result['total_records'], exact)} FFB records")
                 
                 # Show tables with data
                 tables_info = []
                 for table, count in result['tables_with_data'].items():
-                    tables_info.append(f"{table}({count:,})")
+                    tables_info.append(f"{table}({format_row_count(count, exact)})")
                 
                 print(f"   📋 Tables: {', '.join(tables_info[:3])}")
                 if len(tables_info) > 3:
@@ -156,7 +134,7 @@ def main():
                 # Check for FFBSCANNERDATA04
                 if 'FFBSCANNERDATA04' in result['tables_with_data']:
                     count = result['tables_with_data']['FFBSCANNERDATA04']
-                    print(f"   🎯 FFBSCANNERDATA04: {count:,} records ⭐")
+                    print(f"   🎯 FFBSCANNERDATA04: {format_row_count(count, exact)} records ⭐")
                     
                     # Show columns
                     if result['columns']:
@@ -194,13 +172,13 @@ def main():
             current_text = " (CURRENT)" if db['is_current'] else ""
             print(f"\n📊 {db['name']}{current_text}")
             print(f"   📁 {db['relative_path']}")
-            print(f"   📈 {result['total_records']:,} total FFB records")
+            print(f"   📈 {format_row_count(result['total_records'], result['exact'])} total FFB records")
             print(f"   📊 {db['size_mb']:.1f} MB")
             
             # Highlight FFBSCANNERDATA04
             if 'FFBSCANNERDATA04' in result['tables_with_data']:
                 count = result['tables_with_data']['FFBSCANNERDATA04']
-                print(f"   🎯 FFBSCANNERDATA04: {count:,} records")
+                print(f"   🎯 FFBSCANNERDATA04: {format_row_count(count, result['exact'])} records")
         
         # Recommend the best database
         best_db, best_result = databases_with_data[0]
@@ -209,11 +187,11 @@ def main():
             print(f"\n🏆 RECOMMENDED DATABASE (different from current):")
             print(f"   📁 {best_db['name']}")
             print(f"   📂 Full path: {best_db['path']}")
-            print(f"   📈 {best_result['total_records']:,} FFB records")
+            print(f"   📈 {format_row_count(best_result['total_records'], best_result['exact'])} FFB records")
             
             if 'FFBSCANNERDATA04' in best_result['tables_with_data']:
                 count = best_result['tables_with_data']['FFBSCANNERDATA04']
-                print(f"   🎯 FFBSCANNERDATA04: {count:,} records ✅")
+                print(f"   🎯 FFBSCANNERDATA04: {format_row_count(count, best_result['exact'])} records ✅")
             
             print(f"\n💡 To use this database, update firebird_connector_enhanced.py:")
             print(f"   Change DEFAULT_DATABASE to: r\"{best_db['path']}\"")
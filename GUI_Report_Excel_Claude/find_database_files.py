@@ -4,8 +4,8 @@ Find all database files and check their sizes
 """
 
 import os
-import glob
 from pathlib import Path
+from database_catalog import DatabaseCatalog
 
 def find_database_files():
     """Find all database files in the directory structure"""
@@ -17,16 +17,11 @@ def find_database_files():
     print("=" * 60)
     
     # Common database file extensions
-    db_extensions = ['*.fdb', '*.gdb', '*.db', '*.sqlite', '*.mdb']
+    db_extensions = ['.fdb', '.gdb', '.db', '.sqlite', '.mdb']
     
-    found_files = []
-    
-    # Search recursively
-    for root, dirs, files in os.walk(base_dir):
-        for ext in db_extensions:
-            pattern = os.path.join(root, ext)
-            matches = glob.glob(pattern)
-            found_files.extend(matches)
+    # Search recursively (folder dijelajah paralel oleh DatabaseCatalog)
+    found_databases = DatabaseCatalog(base_dir).scan(extensions=db_extensions)
+    found_files = [db['path'] for db in found_databases]
     
     if not found_files:
         print("❌ No database files found")
@@ -36,13 +31,7 @@ def find_database_files():
     print()
     
     # Sort by size (largest first)
-    file_info = []
-    for file_path in found_files:
-        try:
-            size = os.path.getsize(file_path)
-            file_info.append((file_path, size))
-        except:
-            file_info.append((file_path, 0))
+    file_info = [(db['path'], db['size']) for db in found_databases]
     
     file_info.sort(key=lambda x: x[1], reverse=True)
     
@@ -6,19 +6,34 @@ Didesain untuk digunakan oleh berbagai modul lain dengan mudah
 
 import os
 import sys
+import copy
 import subprocess
 import tempfile
+import threading
 import json
 import re
 import pandas as pd
 import logging
 from datetime import datetime, date
-from typing import Dict, List, Any, Optional, Union, Tuple
+from typing import Dict, List, Any, Optional, Union, Tuple, Iterator
 from pathlib import Path
 
+# Modul bersama (report_common) ada di root repository
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from result_set import ResultSet
+from report_common.sql_preview import preview_sql, engine_version, supports_derived_tables
+from dimension_cache import is_dimension_sql
+from report_common.table_statistics import get_table_statistics, query_records
+from report_common.isql_policy import get_execution_policy
+import tracing
+
 # Setup logging
 logger = logging.getLogger(__name__)
 
+class QueryCancelledError(Exception):
+    """Query dihentikan lewat FirebirdConnectorEnhanced.cancel()"""
+
+
 class FirebirdConnectorEnhanced:
     """
     Enhanced Firebird Database Connector
@@ -42,6 +57,17 @@ class FirebirdConnectorEnhanced:
         r'C:\Firebird\Firebird_3_0\bin\isql.exe'
     ]
 
+    # Marker statement pemisah output execute_batch_queries
+    BATCH_MARKER_COLUMN = 'BATCH_MARKER'
+    BATCH_MARKER_SQL = "SELECT '@@BATCH {index}@@' AS BATCH_MARKER FROM RDB$DATABASE"
+    BATCH_MARKER_PATTERN = re.compile(r'^@@BATCH (\d+)@@$')
+
+    # Prompt isql interaktif yang ikut tercetak saat script dikirim lewat stdin
+    ISQL_PROMPT_PATTERN = re.compile(r'^(?:(?:SQL|CON)> ?)+', re.MULTILINE)
+
+    # Bentuk pemanggilan isql: script lewat stdin atau file input (-i)
+    INVOCATION_FORMS = ('stdin', 'input_file')
+
     # Firebird server installation paths
     FIREBIRD_PATHS = [
         r'C:\Program Files (x86)\Firebird\Firebird_1_5',
@@ -86,6 +112,17 @@ class FirebirdConnectorEnhanced:
         self.connection_info = {}
         self.last_error = None
 
+        # Mode preview: FIRST n di projection terluar, agregasi dari sampel
+        self.preview_limit = None
+        self.preview_sample_size = None
+
+        # Versi engine server (dibaca sekali, lihat server_version)
+        self._server_version = None
+        self._server_version_checked = False
+
+        # Proses isql yang sedang berjalan (untuk cancel)
+        self._reset_process_state()
+
         # Initialize ISQL path
         self.isql_path = isql_path or self._detect_isql()
 
@@ -178,7 +215,7 @@ class FirebirdConnectorEnhanced:
         Args:
             query: SQL query string
             parameters: Parameter untuk substitution
-            return_format: 'dict', 'dataframe', atau 'raw'
+            return_format: 'dict', 'dataframe', 'resultset' atau 'raw'
 
         Returns:
             Query result sesuai format yang diminta
@@ -187,37 +224,22 @@ class FirebirdConnectorEnhanced:
             # Parameter substitution
             if parameters:
                 query = self._substitute_parameters(query, parameters)
+            query = self._preview_query(query)
 
-            # Create temporary files
-            with tempfile.NamedTemporaryFile(mode='w', suffix='.sql', delete=False, encoding='utf-8') as sql_file:
-                sql_file.write(query + ";\nEXIT;\n")
-                sql_file_path = sql_file.name
-
-            with tempfile.NamedTemporaryFile(mode='w', suffix='.txt', delete=False, encoding='utf-8') as output_file:
-                output_path = output_file.name
-
-            try:
-                # Build command
-                cmd = self._build_command(sql_file_path, output_path)
+            # Execute query (SQL lewat stdin, output dari pipe stdout)
+            with tracing.span('isql', stage='extract'):
+                completed = self._execute_script(query + ";\nEXIT;\n")
 
-                # Execute query
-                result = subprocess.run(
-                    cmd,
-                    capture_output=True,
-                    text=True,
-                    encoding='utf-8',
-                    timeout=self.timeout
-                )
+            # Parse output
+            with tracing.span('parse_isql_output', stage='parse') as parse_span:
+                data = self._parse_output(completed.stdout, return_format)
+                if isinstance(data, list) and data and isinstance(data[0], dict) and 'rows' in data[0]:
+                    parse_span.set(rows=len(data[0]['rows']))
+                elif data is not None:
+                    parse_span.set(rows=len(data))
 
-                # Parse output
-                data = self._parse_output(output_path, return_format)
-
-                logger.debug(f"Query executed successfully: {len(data)} rows returned")
-                return data
-
-            finally:
-                # Cleanup temporary files
-                self._cleanup_files([sql_file_path, output_path])
+            logger.debug(f"Query executed successfully: {len(data)} rows returned")
+            return data
 
         except subprocess.TimeoutExpired:
             error_msg = f"Query timeout after {self.timeout} seconds"
@@ -225,12 +247,172 @@ class FirebirdConnectorEnhanced:
             self.last_error = error_msg
             raise Exception(error_msg)
 
+        except QueryCancelledError:
+            logger.info("Query cancelled")
+            raise
+
         except Exception as e:
             error_msg = f"Query execution failed: {e}"
             logger.error(error_msg)
             self.last_error = error_msg
             raise Exception(error_msg)
 
+    def _reset_process_state(self):
+        self._processes = set()
+        self._process_lock = threading.Lock()
+        self._cancelled = threading.Event()
+
+    def _start_isql(self, cmd: List[str], **popen_kwargs) -> subprocess.Popen:
+        """Start proses isql dan daftarkan agar bisa dihentikan lewat cancel()"""
+        if self._cancelled.is_set():
+            raise QueryCancelledError("Query cancelled")
+        process = subprocess.Popen(cmd, **popen_kwargs)
+        with self._process_lock:
+            self._processes.add(process)
+        return process
+
+    def _finish_isql(self, process: subprocess.Popen):
+        """Lepas proses dari daftar; QueryCancelledError jika proses dihentikan cancel()"""
+        with self._process_lock:
+            self._processes.discard(process)
+        if self._cancelled.is_set():
+            raise QueryCancelledError("Query cancelled")
+
+    def _run_isql(self, cmd: List[str], timeout: int = None, input: str = None) -> subprocess.CompletedProcess:
+        """Jalankan isql sampai selesai (seperti subprocess.run dengan timeout dan input)"""
+        process = self._start_isql(cmd, stdin=subprocess.PIPE if input is not None else None,
+                                   stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                   text=True, encoding='utf-8', errors='ignore')
+        try:
+            stdout, stderr = process.communicate(input=input, timeout=timeout or self.timeout)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.communicate()
+            raise
+        finally:
+            self._finish_isql(process)
+        return subprocess.CompletedProcess(cmd, process.returncode, stdout, stderr)
+
+    def _execute_script(self, script: str, extra_args: List[str] = None, timeout: int = None) -> subprocess.CompletedProcess:
+        """
+        Jalankan script isql: SQL dikirim lewat stdin dan output dibaca dari pipe
+        stdout (tanpa file sementara). File input (-i) hanya dipakai jika isql ini
+        tidak menerima script dari stdin. Bentuk pemanggilan yang berhasil dan timeout
+        adaptif (dari latensi historis; straggler diulang dengan backoff) diatur
+        ExecutionPolicy per instalasi isql.
+
+        Args:
+            script: Script isql (diakhiri EXIT;)
+            extra_args: Argumen isql tambahan
+            timeout: Batas timeout per percobaan (default: self.timeout)
+
+        Returns:
+            CompletedProcess dengan stdout tanpa prompt SQL>/CON>
+        """
+        extra_args = extra_args or []
+        policy = get_execution_policy(self.isql_path)
+
+        completed = None
+        failed_forms = []
+        for form in policy.forms(self.INVOCATION_FORMS):
+            completed = policy.run_with_retries(
+                script,
+                lambda attempt_timeout: self._run_form(form, script, extra_args, attempt_timeout),
+                max_timeout=timeout or self.timeout)
+            if completed.returncode == 0 or (completed.stdout or '').strip():
+                policy.record_form(form, failed_forms)
+                break
+            if policy.form_verified:
+                # Bentuk terbukti: output kosong adalah hasil/error query itu sendiri
+                break
+            logger.warning(f"isql returned no output with invocation form '{form}', trying next form")
+            failed_forms.append(form)
+        return completed
+
+    def _run_form(self, form: str, script: str, extra_args: List[str], timeout: float) -> subprocess.CompletedProcess:
+        """Jalankan script dengan satu bentuk pemanggilan isql (lihat INVOCATION_FORMS)"""
+        if form == 'stdin':
+            completed = self._run_isql(self._build_command() + extra_args, timeout, input=script)
+            completed.stdout = self.ISQL_PROMPT_PATTERN.sub('', completed.stdout or '')
+            return completed
+
+        with tempfile.NamedTemporaryFile(mode='w', suffix='.sql', delete=False, encoding='utf-8') as sql_file:
+            sql_file.write(script)
+            sql_file_path = sql_file.name
+
+        try:
+            return self._run_isql(self._build_command(sql_file_path) + extra_args, timeout)
+        finally:
+            self._cleanup_files([sql_file_path])
+
+    def cancel(self):
+        """
+        Hentikan query yang sedang berjalan. Query berikutnya pada connector ini
+        langsung gagal dengan QueryCancelledError sampai reset_cancel() dipanggil.
+        """
+        self._cancelled.set()
+        with self._process_lock:
+            processes = list(self._processes)
+        for process in processes:
+            try:
+                process.kill()
+            except OSError:
+                pass
+        if processes:
+            logger.info(f"Cancelled {len(processes)} running queries")
+
+    def reset_cancel(self):
+        """Izinkan connector menjalankan query lagi setelah cancel()"""
+        self._cancelled.clear()
+
+    def preview_copy(self, limit: int = 100, sample_size: int = None) -> 'FirebirdConnectorEnhanced':
+        """
+        Connector baru untuk database yang sama dalam mode preview
+
+        Query dibatasi FIRST n di projection terluar dan query agregasi dihitung dari
+        sampel tabel sumber; query dimensi (EMP/OCFIELD/CRDIVISION) tetap lengkap.
+        Pembatalan (cancel) pada connector preview tidak mempengaruhi connector asal.
+
+        Args:
+            limit: Jumlah row maksimal per query
+            sample_size: Row sampel tabel sumber untuk query agregasi
+        """
+        connector = copy.copy(self)
+        connector.connection_info = dict(self.connection_info)
+        connector.preview_limit = limit
+        connector.preview_sample_size = sample_size
+        connector._reset_process_state()
+        return connector
+
+    def server_version(self) -> Optional[Tuple[int, int]]:
+        """
+        Versi engine server (major, minor), dibaca sekali per connector. None untuk
+        Firebird 1.5 (RDB$GET_CONTEXT belum ada) atau jika versi tidak terbaca.
+        """
+        if not self._server_version_checked:
+            try:
+                # Langsung lewat isql, tanpa rewrite preview
+                self._server_version = engine_version(
+                    lambda sql: self._parse_output(self._execute_script(sql + ";\nEXIT;\n").stdout, 'dict'))
+            except QueryCancelledError:
+                raise
+            except Exception as e:
+                logger.info(f"Engine version not available, assuming Firebird 1.5: {e}")
+                self._server_version = None
+            self._server_version_checked = True
+            logger.info(f"Firebird engine version: {self._server_version or '1.5 (legacy)'}")
+        return self._server_version
+
+    def _preview_query(self, query: str) -> str:
+        """
+        Tulis ulang query untuk mode preview (tidak berubah di luar mode preview).
+        Sampel derived table hanya dipakai jika server Firebird 2.0+.
+        """
+        if not self.preview_limit or is_dimension_sql(query):
+            return query
+        return preview_sql(query, self.preview_limit, self.preview_sample_size,
+                           supports_derived_tables(self.server_version()))
+
     def _substitute_parameters(self, query: str, parameters: Dict[str, Any]) -> str:
         """Substitute parameters dalam query"""
         for key, value in parameters.items():
@@ -257,8 +439,8 @@ class FirebirdConnectorEnhanced:
 
         return query
 
-    def _build_command(self, sql_path: str, output_path: str) -> List[str]:
-        """Build ISQL command using working format from original connector"""
+    def _build_command(self, sql_path: str = None, output_path: str = None) -> List[str]:
+        """Build ISQL command using working format from original connector (tanpa -i: script dari stdin, tanpa -o: output ke stdout)"""
         conn_str = self._build_connection_string()
 
         # Use working format: -u username -p password connection_string
@@ -267,10 +449,12 @@ class FirebirdConnectorEnhanced:
             self.isql_path,
             '-u', self.username,
             '-p', self.password,
-            conn_str,
-            '-i', sql_path,
-            '-o', output_path
+            conn_str
         ]
+        if sql_path:
+            cmd.extend(['-i', sql_path])
+        if output_path:
+            cmd.extend(['-o', output_path])
 
         # Add optional parameters (only if supported by Firebird 1.5)
         if self.role:
@@ -283,32 +467,43 @@ class FirebirdConnectorEnhanced:
         # Always use localhost format as it works with this database
         return f"localhost:{self.db_path}"
 
-    def _parse_output(self, output_path: str, return_format: str) -> Union[List[Dict], pd.DataFrame, None]:
-        """Parse ISQL output file using working method from original connector"""
+    def _parse_output(self, content: str, return_format: str) -> Union[List[Dict], pd.DataFrame, None]:
+        """Parse ISQL output text using working method from original connector"""
         try:
-            with open(output_path, 'r', encoding='utf-8', errors='ignore') as f:
-                content = f.read()
-
             # Use working parsing method from original connector
             result_data = self._parse_isql_output(content, True)
 
             # Return in requested format
-            if return_format == 'dataframe':
-                if result_data and result_data[0].get('rows'):
-                    return pd.DataFrame(result_data[0]['rows'])
-                else:
-                    return pd.DataFrame()
-            elif return_format == 'dict':
-                return result_data
-            else:
-                return result_data
+            return self._format_result(result_data, return_format)
 
         except Exception as e:
             logger.error(f"Error parsing output: {e}")
             return []
 
+    def _format_result(self, result_data: List[Dict], return_format: str) -> Union[List[Dict], pd.DataFrame, ResultSet]:
+        """Ubah hasil _parse_isql_output ke format yang diminta"""
+        if return_format == 'dataframe':
+            if result_data and result_data[0].get('rows'):
+                return result_data[0]['rows'].to_pandas()
+            else:
+                return pd.DataFrame()
+        elif return_format == 'resultset':
+            if result_data:
+                return result_data[0]['rows']
+            return ResultSet([], {})
+        elif return_format == 'dict':
+            return result_data
+        else:
+            return result_data
+
     def _parse_isql_output(self, output_text, as_dict=True):
-        """Parse ISQL output using working method from original connector"""
+        """
+        Parse ISQL output using working method from original connector
+
+        Returns:
+            [{'headers': [...], 'rows': ResultSet}] - rows kolumnar, tetap bisa
+            diiterasi/di-index seperti list of dict
+        """
         lines = output_text.strip().split('\n')
         if not lines:
             return []
@@ -346,45 +541,185 @@ class FirebirdConnectorEnhanced:
         # Process collected data if we have a header
         if has_separator_line and possible_header_line and header_positions:
             # Parse headers
-            headers = []
-            for start, end in header_positions:
-                if start < len(possible_header_line):
-                    if end <= len(possible_header_line):
-                        header = possible_header_line[start:end].strip()
-                    else:
-                        header = possible_header_line[start:].strip()
-                    headers.append(header)
-
-            # Parse data rows
-            rows = []
-            for line in data_lines:
-                if not line.strip():
-                    continue
+            headers = self._parse_headers(possible_header_line, header_positions)
 
-                row = {}
-                for i, (start, end) in enumerate(header_positions):
-                    if i >= len(headers):
-                        continue
-                    col_name = headers[i]
-                    if start < len(line):
-                        if end <= len(line):
-                            value = line[start:end].strip()
-                        else:
-                            value = line[start:].strip()
-                    else:
-                        value = ""
-                    row[col_name] = value
+            # Parse data rows langsung ke kolom teks (tanpa dict per row)
+            positions = header_positions[:len(headers)]
+            parsed_lines = []
+            for line in data_lines:
+                values = [line[start:end].strip() for start, end in positions]
 
                 # Only add rows that actually have data
-                if any(v.strip() for v in row.values()):
-                    rows.append(row)
+                if any(values):
+                    parsed_lines.append(values)
+
+            text_columns = list(zip(*parsed_lines)) if parsed_lines else [[] for _ in positions]
 
             # Create result set
+            rows = ResultSet.from_text_columns(headers, text_columns)
             result = {"headers": headers, "rows": rows}
             result_data.append(result)
 
         return result_data
 
+    def _parse_headers(self, header_line: str, header_positions: List[Tuple[int, int]]) -> List[str]:
+        """Ambil nama kolom dari baris header sesuai posisi kolom separator"""
+        return [header_line[start:end].strip() for start, end in header_positions if start < len(header_line)]
+
+    def iter_query(self,
+                   query: str,
+                   chunk_size: int = 10000,
+                   parameters: Dict[str, Any] = None) -> Iterator[ResultSet]:
+        """
+        Execute SQL query dan yield hasil per chunk selagi isql masih menulis output
+
+        Output isql dibaca langsung dari pipe stdout (tanpa file output dan tanpa
+        membaca seluruh output ke memory), sehingga rentang data besar (mis. satu
+        tahun FFBSCANNERDATA) bisa diproses dengan memory terbatas.
+
+        Args:
+            query: SQL query string
+            chunk_size: Jumlah row maksimal per chunk
+            parameters: Parameter untuk substitution
+
+        Yields:
+            ResultSet per chunk (kolom dan tipe kolom sama untuk semua chunk: tipe
+            ditetapkan dari chunk pertama yang punya nilai, bukan ditebak ulang per chunk)
+
+        Raises:
+            Exception jika isql keluar dengan exit code bukan 0 (pesan dari stderr)
+        """
+        if parameters:
+            query = self._substitute_parameters(query, parameters)
+        query = self._preview_query(query)
+
+        script = query + ";\nEXIT;\n"
+        sql_file_path = None
+        if get_execution_policy(self.isql_path).forms(self.INVOCATION_FORMS)[0] == 'input_file':
+            with tempfile.NamedTemporaryFile(mode='w', suffix='.sql', delete=False, encoding='utf-8') as sql_file:
+                sql_file.write(script)
+                sql_file_path = sql_file.name
+
+        process = None
+        timed_out = threading.Event()
+        timer = None
+        stderr_reader = None
+        stderr_lines = []
+        total_rows = 0
+
+        try:
+            process = self._start_isql(
+                self._build_command(sql_file_path),
+                stdin=subprocess.PIPE if sql_file_path is None else None,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True,
+                encoding='utf-8',
+                errors='ignore'
+            )
+
+            # stderr dibaca di thread terpisah agar pipe stderr tidak penuh selama stdout dibaca
+            stderr_reader = threading.Thread(target=lambda: stderr_lines.extend(process.stderr), daemon=True)
+            stderr_reader.start()
+
+            def _kill_on_timeout():
+                timed_out.set()
+                process.kill()
+
+            timer = threading.Timer(self.timeout, _kill_on_timeout)
+            timer.daemon = True
+            timer.start()
+
+            if sql_file_path is None:
+                try:
+                    process.stdin.write(script)
+                    process.stdin.close()
+                except OSError:
+                    # isql sudah keluar (mis. dibatalkan); error dilaporkan lewat output/timeout
+                    pass
+
+            previous_line = ''
+            headers = None
+            positions = []
+            buffer = []
+            kinds = {}
+
+            def _chunk(rows):
+                # Tipe kolom dikunci dari chunk pertama yang punya nilai untuk kolom tsb,
+                # supaya kode '0012' tidak menjadi teks di satu chunk dan int di chunk lain
+                chunk = ResultSet.from_text_columns(headers, list(zip(*rows)), kinds)
+                for column, kind in chunk.column_kinds().items():
+                    kinds.setdefault(column, kind)
+                return chunk
+
+            for raw_line in process.stdout:
+                line = self.ISQL_PROMPT_PATTERN.sub('', raw_line).rstrip()
+
+                if headers is None:
+                    # Header = baris tepat sebelum separator '===' pertama
+                    if ('=' * 3) in line and previous_line:
+                        header_positions = self._get_column_positions(line)
+                        headers = self._parse_headers(previous_line, header_positions)
+                        positions = header_positions[:len(headers)]
+                    previous_line = line
+                    continue
+
+                # Skip empty lines, SQL prompts dan separator berikutnya
+                if not line or line.startswith('SQL>') or "rows affected" in line.lower() or ('=' * 3) in line:
+                    continue
+
+                values = [line[start:end].strip() for start, end in positions]
+                if any(values):
+                    buffer.append(values)
+
+                if len(buffer) >= chunk_size:
+                    total_rows += len(buffer)
+                    yield _chunk(buffer)
+                    buffer = []
+
+            process.wait()
+            stderr_reader.join()
+            self._finish_isql(process)
+            if timed_out.is_set():
+                raise subprocess.TimeoutExpired(query, self.timeout)
+            if process.returncode != 0:
+                error_output = ''.join(stderr_lines).strip() or f"isql exit code {process.returncode}"
+                error_msg = f"Query execution failed: {error_output}"
+                logger.error(error_msg)
+                self.last_error = error_msg
+                raise Exception(error_msg)
+
+            if buffer:
+                total_rows += len(buffer)
+                yield _chunk(buffer)
+
+            logger.debug(f"Streaming query finished: {total_rows} rows")
+
+        except subprocess.TimeoutExpired:
+            error_msg = f"Query timeout after {self.timeout} seconds"
+            logger.error(error_msg)
+            self.last_error = error_msg
+            raise Exception(error_msg)
+
+        finally:
+            if timer:
+                timer.cancel()
+            if process and process.poll() is None:
+                # Consumer berhenti sebelum output habis
+                process.kill()
+                process.wait()
+            if process:
+                with self._process_lock:
+                    self._processes.discard(process)
+            if stderr_reader:
+                stderr_reader.join()
+            if process and process.stdout:
+                process.stdout.close()
+            if process and process.stderr:
+                process.stderr.close()
+            if sql_file_path:
+                self._cleanup_files([sql_file_path])
+
     def _get_column_positions(self, separator_line):
         """Get column positions from separator line"""
         if not separator_line:
@@ -537,30 +872,82 @@ class FirebirdConnectorEnhanced:
         tables = self.get_table_list()
         return table_name.upper() in [t.upper() for t in tables]
 
-    def get_row_count(self, table_name: str, where_clause: str = None) -> int:
+    def get_row_count(self, table_name: str, where_clause: str = None, approximate: bool = False) -> int:
         """
         Get jumlah rows dalam table
 
         Args:
             table_name: Nama table
             where_clause: Optional WHERE clause
+            approximate: Pakai estimasi dari table_statistics jika tersedia (tanpa
+                         COUNT(*) full scan); diabaikan jika ada where_clause
 
         Returns:
             Jumlah rows
         """
+        if not where_clause:
+            if approximate:
+                estimate = self.estimate_row_counts([table_name]).get(table_name.upper(), {})
+                if estimate.get('rows') is not None:
+                    return int(estimate['rows'])
+            counts = self.exact_row_counts([table_name])
+            if table_name.upper() in counts:
+                return counts[table_name.upper()]
+
         query = f"SELECT COUNT(*) as ROW_COUNT FROM {table_name}"
         if where_clause:
             query += f" WHERE {where_clause}"
 
         try:
-            result = self.execute_query(query)
-            if result and len(result) > 0:
-                return int(result[0]['ROW_COUNT'])
+            records = query_records(self.execute_query(query))
+            if records:
+                return int(next(iter(records[0].values())))
             return 0
         except Exception as e:
             logger.error(f"Error getting row count for {table_name}: {e}")
             return 0
 
+    def estimate_row_counts(self, tables: List[str] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        Estimasi row count tanpa COUNT(*) (lihat table_statistics)
+
+        Args:
+            tables: Nama tables (default: semua table user)
+
+        Returns:
+            {TABLE: {'rows': int atau None, 'exact': bool, 'source': str}}
+        """
+        if tables is None:
+            tables = self.get_table_list()
+        statistics = get_table_statistics(self.db_path)
+        if statistics is None:
+            # Database remote / tidak ada di disk: tanpa cache, exact count
+            return {table.upper(): {'rows': self.get_row_count(table), 'exact': True, 'source': 'count'}
+                    for table in tables}
+        return statistics.estimate_row_counts(tables, self.execute_query)
+
+    def exact_row_counts(self, tables: List[str], refresh: bool = False) -> Dict[str, int]:
+        """
+        Exact row count (COUNT(*) dalam satu statement), di-cache per snapshot database
+
+        Args:
+            tables: Nama tables
+            refresh: Hitung ulang walaupun sudah ada di cache
+
+        Returns:
+            {TABLE: row}; table yang gagal dihitung tidak ada di hasil
+        """
+        statistics = get_table_statistics(self.db_path)
+        if statistics is None:
+            return {}
+        try:
+            return statistics.exact_row_counts(tables, self.execute_query, refresh=refresh)
+        except QueryCancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Error counting rows: {e}")
+            return {}
+
     def get_sample_data(self, table_name: str, limit: int = 10) -> List[Dict]:
         """
         Get sample data dari table
@@ -580,40 +967,136 @@ class FirebirdConnectorEnhanced:
             logger.error(f"Error getting sample data for {table_name}: {e}")
             return []
 
-    def execute_batch_queries(self, queries: List[str], parameters: Dict[str, Any] = None) -> List[Dict]:
+    def execute_batch_queries(self,
+                              queries: List[str],
+                              parameters: Dict[str, Any] = None,
+                              return_format: str = 'dict') -> List[Dict]:
         """
-        Execute multiple queries dalam batch
+        Execute multiple queries dalam satu proses isql
+
+        Semua statement ditulis ke satu script isql (satu attach database) dan
+        dipisahkan dengan statement marker; output gabungan dipecah kembali per
+        query. Error satu statement tidak menghentikan statement berikutnya.
 
         Args:
             queries: List SQL queries
             parameters: Parameters untuk substitution
+            return_format: 'dict', 'dataframe', 'resultset' atau 'raw' (per query)
 
         Returns:
-            List results
+            List results: {'query_index', 'query', 'success', 'data' | 'error'}
         """
-        results = []
+        if not queries:
+            return []
 
-        for i, query in enumerate(queries):
-            try:
-                result = self.execute_query(query, parameters)
+        statements = []
+        for query in queries:
+            statement = self._substitute_parameters(query, parameters) if parameters else query
+            statement = self._preview_query(statement.strip().rstrip(';').strip())
+            statements.append(statement)
+
+        try:
+            # -m: error statement ikut ke stdout, di antara marker statement tsb
+            with tracing.span('isql', stage='extract', query=f"batch[{len(statements)}]"):
+                completed = self._execute_script(self._build_batch_script(statements), ['-m'],
+                                                 timeout=self.timeout * len(statements))
+
+        except subprocess.TimeoutExpired:
+            error_msg = f"Batch timeout after {self.timeout * len(statements)} seconds"
+            logger.error(error_msg)
+            self.last_error = error_msg
+            raise Exception(error_msg)
+
+        with tracing.span('parse_isql_output', stage='parse') as parse_span:
+            segments = self._split_batch_output(completed.stdout, len(statements))
+
+            results = []
+            total_rows = 0
+            for i, query in enumerate(queries):
+                segment = segments.get(i)
+                error = None
+                if segment is None:
+                    error = (completed.stderr or '').strip() or "No output for statement (batch aborted)"
+                else:
+                    error = self._batch_error(segment)
+
+                if error:
+                    self.last_error = error
+                    results.append({
+                        'query_index': i,
+                        'query': query,
+                        'success': False,
+                        'error': error
+                    })
+                    logger.error(f"Batch query {i+1} failed: {error}")
+                    continue
+
+                result_data = self._parse_isql_output(segment, True)
+                if result_data:
+                    total_rows += len(result_data[0]['rows'])
                 results.append({
                     'query_index': i,
                     'query': query,
                     'success': True,
-                    'data': result
+                    'data': self._format_result(result_data, return_format)
                 })
                 logger.debug(f"Batch query {i+1} successful")
-            except Exception as e:
-                results.append({
-                    'query_index': i,
-                    'query': query,
-                    'success': False,
-                    'error': str(e)
-                })
-                logger.error(f"Batch query {i+1} failed: {e}")
+            parse_span.set(rows=total_rows)
 
+        logger.info(f"Batch of {len(queries)} queries executed in one isql run: "
+                    f"{sum(1 for r in results if r['success'])} successful")
         return results
 
+    def _build_batch_script(self, statements: List[str]) -> str:
+        """Script isql: marker sebelum tiap statement dan marker penutup"""
+        lines = []
+        for i, statement in enumerate(statements):
+            lines.append(self.BATCH_MARKER_SQL.format(index=i) + ";")
+            lines.append(statement + ";")
+        lines.append(self.BATCH_MARKER_SQL.format(index=len(statements)) + ";")
+        lines.append("EXIT;")
+        return "\n".join(lines) + "\n"
+
+    def _split_batch_output(self, output_text: str, statement_count: int) -> Dict[int, str]:
+        """
+        Pecah output isql batch per statement berdasarkan marker.
+
+        Returns:
+            {index: output statement}; statement yang marker penutupnya (marker
+            statement berikutnya) tidak muncul dianggap tidak selesai
+        """
+        lines = (output_text or '').splitlines()
+        segments = {}
+        current = None
+        buffer = []
+        i = 0
+        while i < len(lines):
+            # Blok marker: header BATCH_MARKER, separator, nilai marker
+            if (lines[i].strip() == self.BATCH_MARKER_COLUMN and i + 2 < len(lines)
+                    and lines[i + 1].strip().startswith('=')):
+                match = self.BATCH_MARKER_PATTERN.match(lines[i + 2].strip())
+                if match:
+                    if current is not None:
+                        segments[current] = "\n".join(buffer)
+                    index = int(match.group(1))
+                    current = index if index < statement_count else None
+                    buffer = []
+                    i += 3
+                    continue
+            if current is not None:
+                buffer.append(lines[i])
+            i += 1
+        # Statement terakhir tanpa marker penutup: output terpotong, tidak dipakai
+        return segments
+
+    def _batch_error(self, segment: str) -> Optional[str]:
+        """Pesan error isql dalam output satu statement (None jika sukses)"""
+        lines = [line.strip() for line in segment.splitlines() if line.strip()]
+        for i, line in enumerate(lines):
+            if line.startswith(('Statement failed', 'Dynamic SQL Error', 'SQLCODE')):
+                return " ".join(lines[i:])
+        return None
+
     # Static methods untuk kemudahan penggunaan
 
     @staticmethod
@@ -9,7 +9,9 @@ from typing import Dict, List, Any, Optional, Union
 from datetime import datetime, date, timedelta
 import re
 import logging
-from firebird_connector_enhanced import FirebirdConnectorEnhanced as FirebirdConnector
+from firebird_connector_enhanced import FirebirdConnectorEnhanced as FirebirdConnector, QueryCancelledError
+import tracing
+from aggregate_pushdown import plan_calculated_variables, pushdown_supported
 
 class FormulaEngineEnhanced:
     """
@@ -30,6 +32,9 @@ class FormulaEngineEnhanced:
         self.data_cache = {}
         self.variables_cache = {}
 
+        # Plan pushdown calculated_variables (dibuat sekali per formula)
+        self._aggregate_plan = None
+
         # Setup enhanced logging
         self._setup_enhanced_logging()
 
@@ -92,14 +97,30 @@ class FormulaEngineEnhanced:
         self.logger.info(f"Parameters: {parameters}")
         self.logger.info(f"Found {len(queries)} queries to execute")
 
+        query_names = []
         for query_name, query_config in queries.items():
+            if query_config.get('aggregate_only'):
+                # Hanya dibaca lewat agregat calculated_variables (tanpa menarik row)
+                self.logger.info(f"--- Skipping aggregate-only query: {query_name} ---")
+                continue
+            query_names.append(query_name)
+
+        # Semua query dikirim dalam satu proses isql (fallback per query jika batch gagal)
+        batched = self._execute_batch(query_names, parameters)
+
+        for query_name in query_names:
             try:
                 self.logger.info(f"--- Executing query: {query_name} ---")
-                result = self.execute_query(query_name, parameters)
+                if query_name in batched:
+                    result = batched[query_name]
+                    if isinstance(result, Exception):
+                        raise result
+                else:
+                    result = self.execute_query(query_name, parameters)
                 results[query_name] = result
 
                 # Log result summary
-                if result:
+                if result is not None and len(result) > 0:
                     if isinstance(result, list) and len(result) > 0:
                         if isinstance(result[0], dict) and 'rows' in result[0]:
                             rows_count = len(result[0]['rows'])
@@ -117,9 +138,51 @@ class FormulaEngineEnhanced:
                 self.logger.error(f"Error executing query {query_name}: {e}", exc_info=True)
                 results[query_name] = None
 
+        # Agregat calculated_variables dihitung di database (satu row per sumber)
+        self.compute_calculated_variables(results, parameters)
+
         self.logger.info(f"=== QUERY EXECUTION COMPLETED ===")
         return results
 
+    def _execute_batch(self, query_names: List[str], parameters: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Jalankan query lewat execute_batch_queries connector (satu isql per return_format)
+
+        Returns:
+            {query_name: hasil atau Exception}; query yang tidak ada di sini
+            dijalankan satu per satu oleh execute_all_queries
+        """
+        if len(query_names) < 2 or not hasattr(self.db_connector, 'execute_batch_queries'):
+            return {}
+
+        queries = self.formulas.get('queries', {})
+        by_format = {}
+        for query_name in query_names:
+            return_format = queries[query_name].get('return_format', 'dataframe')
+            by_format.setdefault(return_format, []).append(query_name)
+
+        results = {}
+        for return_format, names in by_format.items():
+            sqls = [self._prepare_sql(query_name, parameters) for query_name in names]
+            self.logger.info(f"Executing batch of {len(names)} queries ({return_format}): {', '.join(names)}")
+            try:
+                with tracing.span('query batch', stage='extract', query=', '.join(names)):
+                    batch = self.db_connector.execute_batch_queries(sqls, parameters, return_format)
+            except QueryCancelledError:
+                raise
+            except Exception as e:
+                self.logger.warning(f"Batch execution failed, falling back to single queries: {e}")
+                continue
+
+            for query_name, item in zip(names, batch):
+                if item['success']:
+                    results[query_name] = item['data']
+                    self._debug_log_result(query_name, item['data'])
+                else:
+                    results[query_name] = Exception(item['error'])
+
+        return results
+
     def execute_query(self, query_name: str, parameters: Dict[str, Any]) -> Any:
         """
         Execute single query dengan parameter substitution yang benar
@@ -136,6 +199,25 @@ class FormulaEngineEnhanced:
             raise ValueError(f"Query {query_name} not found in formulas")
 
         query_config = queries[query_name]
+        sql = self._prepare_sql(query_name, parameters)
+
+        # Execute query
+        return_format = query_config.get('return_format', 'dataframe')
+        self.logger.debug(f"Executing {query_name} with return format: {return_format}")
+
+        with tracing.span(query_name, stage='extract', query=query_name):
+            result = self.db_connector.execute_query(sql, parameters, return_format)
+
+        # Debug log result structure
+        self._debug_log_result(query_name, result)
+
+        return result
+
+    def _prepare_sql(self, query_name: str, parameters: Dict[str, Any]) -> Optional[str]:
+        """SQL query siap jalan (substitusi bulan dan parameter)"""
+        query_config = self.formulas.get('queries', {}).get(query_name)
+        if query_config is None:
+            return None
         sql = query_config.get('sql', '')
 
         self.logger.debug(f"Original SQL for {query_name}: {sql}")
@@ -148,17 +230,40 @@ class FormulaEngineEnhanced:
         # Parameter substitution - FIXED: Replace {start_date} and {end_date}
         sql = self._substitute_parameters(sql, parameters)
         self.logger.debug(f"After parameter substitution: {sql}")
+        return sql
 
-        # Execute query
-        return_format = query_config.get('return_format', 'dataframe')
-        self.logger.debug(f"Executing {query_name} with return format: {return_format}")
+    def compute_calculated_variables(self, query_results: Dict[str, Any], parameters: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Hitung calculated_variables formula; agregat atas satu query sumber dijalankan
+        sebagai satu statement agregat per sumber (lihat aggregate_pushdown).
+        Tanpa connector (replay) dipakai ringkasan snapshot / hasil query di memory.
+        """
+        definitions = self.formulas.get('calculated_variables')
+        if not definitions:
+            return {}
 
-        result = self.db_connector.execute_query(sql, parameters, return_format)
+        try:
+            if self._aggregate_plan is None:
+                self._aggregate_plan = plan_calculated_variables(
+                    definitions, self.formulas.get('queries', {}),
+                    self.formulas.get('calculated_variables_source'))
 
-        # Debug log result structure
-        self._debug_log_result(query_name, result)
+            # Firebird 1.5 tidak punya derived table: agregat langsung dihitung di memory
+            pushdown = self.db_connector and pushdown_supported(self.db_connector)
+            run_sql = self._run_aggregate_sql if pushdown else None
+            return self._aggregate_plan.execute(
+                lambda source: self._prepare_sql(source, parameters), run_sql, query_results)
 
-        return result
+        except Exception as e:
+            self.logger.error(f"Error computing calculated variables: {e}", exc_info=True)
+            return {}
+
+    def _run_aggregate_sql(self, source: str, sql: str) -> pd.DataFrame:
+        """Eksekusi statement agregat satu sumber"""
+        self.logger.info(f"Executing aggregates of '{source}'")
+        self.logger.debug(f"Aggregate SQL for {source}: {sql}")
+        with tracing.span(f"{source} aggregates", stage='extract', query=source):
+            return self.db_connector.execute_query(sql, return_format='dataframe')
 
     def _substitute_parameters(self, sql: str, parameters: Dict[str, Any]) -> str:
         """Substitute parameters dalam SQL query dengan proper quoting"""
@@ -241,6 +346,7 @@ class FormulaEngineEnhanced:
             self.logger.error(f"Error in month substitution: {e}")
             return sql
 
+    @tracing.traced(stage='analyze')
     def process_variables(self, query_results: Dict[str, Any], parameters: Dict[str, Any]) -> Dict[str, Any]:
         """
         Process semua variables dengan debug logging
@@ -273,6 +379,9 @@ class FormulaEngineEnhanced:
                     variables[var_name] = default_value
                     self.logger.warning(f"Using default value for {var_name}: {default_value}")
 
+        # calculated_variables formula (agregat di-pushdown ke database)
+        variables.update(self.compute_calculated_variables(query_results, parameters))
+
         self.logger.info(f"=== VARIABLE PROCESSING COMPLETED ===")
         self.logger.info(f"Total variables processed: {len(variables)}")
 
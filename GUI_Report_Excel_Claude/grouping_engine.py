@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+"""
+Grouping Engine - menghitung beberapa view agregasi dari data FFB sekaligus
+View dideklarasikan sebagai group-by spec (default di sini, bisa di-override lewat
+key 'grouping_views' di formula JSON). Data dikonversi ke DataFrame sekali dan setiap
+view cukup satu pandas groupby, sehingga menambah view tidak menambah scan Python
+"""
+
+import logging
+from typing import Dict, List, Any, Optional, Iterable
+
+import numpy as np
+import pandas as pd
+
+# Spec view bawaan, setara dengan _group_by_date/_group_by_employee/_group_by_field
+# dan _calculate_verification_rate versi lama
+DEFAULT_GROUPING_VIEWS = {
+    'daily_performance': {
+        'aliases': ['processed_daily_data'],
+        'group_by': ['TRANSDATE'],
+        'count_as': 'JUMLAH_TRANSAKSI',
+        'sum': {
+            'RIPE_BUNCHES': 'RIPEBCH',
+            'UNRIPE_BUNCHES': 'UNRIPEBCH',
+            'BLACK_BUNCHES': 'BLACKBCH',
+            'ROTTEN_BUNCHES': 'ROTTENBCH',
+            'RAT_DAMAGE_BUNCHES': 'RATDMGBCH'
+        },
+        'columns': ['TRANSDATE', 'JUMLAH_TRANSAKSI', 'RIPE_BUNCHES', 'UNRIPE_BUNCHES',
+                    'BLACK_BUNCHES', 'ROTTEN_BUNCHES', 'RAT_DAMAGE_BUNCHES']
+    },
+    'employee_performance': {
+        'aliases': ['processed_employee_data'],
+        'group_by': ['SCANUSERID', 'RECORDTAG'],
+        'count_as': 'JUMLAH_TRANSAKSI',
+        'sum': {
+            'TOTAL_RIPE': 'RIPEBCH',
+            'TOTAL_UNRIPE': 'UNRIPEBCH'
+        },
+        'lookups': {
+            'EMPLOYEE_NAME': {'field': 'SCANUSERID', 'source': 'employee_mapping', 'default': 'EMP_{value}'}
+        },
+        'conditionals': {
+            # Non-PM records dianggap verified, PM records perlu verifikasi
+            'VERIFICATION_RATE': {'field': 'RECORDTAG', 'equals': 'PM', 'then': 0, 'else': 100}
+        },
+        'columns': ['EMPLOYEE_NAME', 'RECORDTAG', 'JUMLAH_TRANSAKSI', 'TOTAL_RIPE',
+                    'TOTAL_UNRIPE', 'VERIFICATION_RATE']
+    },
+    'field_performance': {
+        'aliases': ['processed_field_data'],
+        'group_by': ['DIVID'],
+        'count_as': 'JUMLAH_TRANSAKSI',
+        'sum': {
+            'TOTAL_RIPE': 'RIPEBCH',
+            'TOTAL_UNRIPE': 'UNRIPEBCH'
+        },
+        'last': {
+            'FIELDNAME': 'FIELDNAME'
+        },
+        'defaults': {
+            'FIELDNAME': '{DIVID}'
+        },
+        'columns': ['FIELDNAME', 'JUMLAH_TRANSAKSI', 'TOTAL_RIPE', 'TOTAL_UNRIPE']
+    },
+    'verification_data': {
+        'group_by': [],
+        'count_as': 'total_transactions',
+        'count_where': {
+            'pm_transactions': {'field': 'RECORDTAG', 'equals': 'PM'},
+            'verified_transactions': {'field': 'RECORDTAG', 'not_equals': 'PM'}
+        },
+        'ratios': {
+            'verification_rate': {'numerator': 'verified_transactions', 'denominator': 'total_transactions',
+                                  'scale': 100, 'round': 2}
+        },
+        'columns': ['total_transactions', 'pm_transactions', 'verified_transactions', 'verification_rate']
+    }
+}
+
+
+def _to_native(value: Any) -> Any:
+    """Konversi scalar numpy/pandas ke tipe Python biasa"""
+    if isinstance(value, np.generic):
+        return value.item()
+    if value is pd.NaT:
+        return None
+    return value
+
+
+class GroupingEngine:
+    """
+    Hitung semua view group-by dari satu DataFrame
+    """
+
+    def __init__(self, views: Optional[Dict[str, Dict]] = None):
+        """
+        Args:
+            views: Spec view (view_name -> spec). Default DEFAULT_GROUPING_VIEWS
+        """
+        self.views = views if views is not None else DEFAULT_GROUPING_VIEWS
+        self.logger = logging.getLogger(__name__)
+
+    def compute(self, data: List[Dict], lookup_sources: Optional[Dict[str, Dict]] = None,
+                frame: Optional[pd.DataFrame] = None) -> Dict[str, List[Dict]]:
+        """
+        Hitung semua view
+
+        Args:
+            data: List record (hasil filter tanggal)
+            lookup_sources: Mapping untuk 'lookups' (mis. {'employee_mapping': {...}})
+            frame: DataFrame dari data yang sama jika sudah tersedia (konversi dilewati)
+
+        Returns:
+            Dictionary view_name (dan alias-nya) -> list of dict
+        """
+        lookup_sources = lookup_sources or {}
+        if frame is None:
+            frame = pd.DataFrame.from_records(data) if data else pd.DataFrame()
+        results = {}
+
+        for view_name, spec in self.views.items():
+            try:
+                rows = self._compute_view(frame, spec, lookup_sources)
+            except Exception as e:
+                self.logger.error(f"Error computing grouping view '{view_name}': {e}")
+                rows = []
+
+            results[view_name] = rows
+            for alias in spec.get('aliases', []):
+                results[alias] = rows
+
+        return results
+
+    def _column(self, frame: pd.DataFrame, field: str, fill: Any = None) -> pd.Series:
+        """Kolom frame, atau kolom berisi fill jika field tidak ada di data"""
+        if field in frame.columns:
+            return frame[field]
+        return pd.Series(fill, index=frame.index, dtype=object)
+
+    def compute_chunks(self, chunks: Iterable, lookup_sources: Optional[Dict[str, Dict]] = None) -> Dict[str, List[Dict]]:
+        """
+        Hitung semua view dari data yang datang per chunk (mis. connector.iter_query)
+
+        Setiap chunk diagregasi sebagian lalu dibuang; hanya hasil parsial per group
+        yang disimpan, sehingga memory tidak bergantung pada jumlah row.
+
+        Args:
+            chunks: Iterable DataFrame / ResultSet (punya to_pandas()) / list of dict
+            lookup_sources: Mapping untuk 'lookups'
+        """
+        lookup_sources = lookup_sources or {}
+        partials = {view_name: [] for view_name in self.views}
+
+        for chunk in chunks:
+            if isinstance(chunk, pd.DataFrame):
+                frame = chunk
+            elif hasattr(chunk, 'to_pandas'):
+                frame = chunk.to_pandas()
+            else:
+                frame = pd.DataFrame.from_records(chunk) if chunk else pd.DataFrame()
+
+            for view_name, spec in self.views.items():
+                try:
+                    partial = self._aggregate(frame, spec)
+                except Exception as e:
+                    self.logger.error(f"Error aggregating chunk for grouping view '{view_name}': {e}")
+                    partial = None
+                if partial is not None:
+                    partials[view_name].append(partial)
+
+        results = {}
+        for view_name, spec in self.views.items():
+            try:
+                rows = self._finalize(self._combine(partials[view_name], spec), spec, lookup_sources)
+            except Exception as e:
+                self.logger.error(f"Error computing grouping view '{view_name}': {e}")
+                rows = []
+
+            results[view_name] = rows
+            for alias in spec.get('aliases', []):
+                results[alias] = rows
+
+        return results
+
+    def _compute_view(self, frame: pd.DataFrame, spec: Dict, lookup_sources: Dict[str, Dict]) -> List[Dict]:
+        """Hitung satu view dengan satu groupby"""
+        return self._finalize(self._aggregate(frame, spec), spec, lookup_sources)
+
+    def _combine(self, partials: List[pd.DataFrame], spec: Dict) -> Optional[pd.DataFrame]:
+        """Gabungkan hasil agregasi parsial per chunk (sum untuk jumlah/count, last untuk 'last')"""
+        keys = spec.get('group_by', [])
+        if not partials:
+            if keys:
+                return None
+            # Agregat global tetap satu baris meskipun tidak ada data
+            return self._aggregate(pd.DataFrame(), spec)
+        if len(partials) == 1:
+            return partials[0]
+
+        combined = pd.concat(partials, ignore_index=True)
+        additive = list(spec.get('sum', {})) + list(spec.get('count_where', {}))
+        if spec.get('count_as'):
+            additive.append(spec['count_as'])
+        aggregations = {column: 'sum' for column in additive}
+        aggregations.update({column: 'last' for column in spec.get('last', {})})
+
+        if keys:
+            return combined.groupby(keys, sort=False).agg(aggregations).reset_index()
+        return pd.DataFrame([{column: combined[column].agg(how) for column, how in aggregations.items()}])
+
+    def _aggregate(self, frame: pd.DataFrame, spec: Dict) -> Optional[pd.DataFrame]:
+        """Agregasi satu view (group key + sum/count_where/last/count), None jika tidak ada group"""
+        keys = spec.get('group_by', [])
+        count_as = spec.get('count_as')
+
+        # Record tanpa nilai key (None/''/0) tidak ikut dikelompokkan
+        if keys:
+            if frame.empty or any(key not in frame.columns for key in keys):
+                return None
+            mask = np.ones(len(frame), dtype=bool)
+            for key in keys:
+                column = frame[key]
+                mask &= column.notna().to_numpy() & column.astype(bool).to_numpy()
+            frame = frame[mask]
+            if frame.empty:
+                return None
+
+        # Kolom kerja: hanya yang dibutuhkan view ini
+        work = pd.DataFrame(index=frame.index)
+        for key in keys:
+            work[key] = frame[key]
+        for out_name, field in spec.get('sum', {}).items():
+            work[out_name] = pd.to_numeric(self._column(frame, field, 0), errors='coerce').fillna(0)
+        for out_name, field in spec.get('last', {}).items():
+            work[out_name] = self._column(frame, field)
+        for out_name, condition in spec.get('count_where', {}).items():
+            work[out_name] = self._condition_mask(self._column(frame, condition['field']), condition).astype(int)
+
+        sum_columns = list(spec.get('sum', {})) + list(spec.get('count_where', {}))
+        last_columns = list(spec.get('last', {}))
+
+        if keys:
+            grouped = work.groupby(keys, sort=False)
+            result = grouped[sum_columns].sum() if sum_columns else pd.DataFrame(index=grouped.size().index)
+            for column in last_columns:
+                result[column] = grouped[column].last()
+            if count_as:
+                result[count_as] = grouped.size()
+            result = result.reset_index()
+        else:
+            # Agregat global: selalu satu baris meskipun data kosong
+            row = {column: work[column].sum() for column in sum_columns}
+            if count_as:
+                row[count_as] = len(work)
+            result = pd.DataFrame([row])
+
+        return result
+
+    def _finalize(self, result: Optional[pd.DataFrame], spec: Dict, lookup_sources: Dict[str, Dict]) -> List[Dict]:
+        """Kolom turunan (lookups, conditionals, ratios, defaults) dan konversi ke list of dict"""
+        if result is None:
+            return []
+
+        for out_name, lookup in spec.get('lookups', {}).items():
+            mapping = lookup_sources.get(lookup.get('source'), {})
+            source = result[lookup['field']]
+            mapped = source.map(mapping)
+            fallback = source.map(lambda value: lookup.get('default', '{value}').format(value=value))
+            result[out_name] = mapped.where(mapped.notna(), fallback)
+
+        for out_name, condition in spec.get('conditionals', {}).items():
+            matches = self._condition_mask(result[condition['field']], condition)
+            result[out_name] = np.where(matches, condition.get('then'), condition.get('else'))
+
+        for out_name, ratio in spec.get('ratios', {}).items():
+            numerator = result[ratio['numerator']].astype(float)
+            denominator = result[ratio['denominator']].astype(float)
+            values = np.where(denominator > 0, numerator / denominator.where(denominator > 0, 1) * ratio.get('scale', 1), 0)
+            if 'round' in ratio:
+                values = np.round(values, ratio['round'])
+            result[out_name] = values
+
+        for out_name, template in spec.get('defaults', {}).items():
+            if out_name in result.columns:
+                missing = result[out_name].isna()
+                if missing.any():
+                    result.loc[missing, out_name] = result[missing].apply(
+                        lambda row: template.format(**row.to_dict()), axis=1
+                    )
+
+        columns = spec.get('columns') or list(result.columns)
+        return [
+            {column: _to_native(value) for column, value in zip(columns, values)}
+            for values in result[columns].itertuples(index=False, name=None)
+        ]
+
+    def _condition_mask(self, series: pd.Series, condition: Dict) -> pd.Series:
+        """Mask boolean untuk kondisi equals/not_equals"""
+        if 'equals' in condition:
+            return series == condition['equals']
+        if 'not_equals' in condition:
+            return series != condition['not_equals']
+        return series.notna()
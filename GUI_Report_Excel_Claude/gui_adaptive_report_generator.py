@@ -6,20 +6,29 @@ Bisa menghandle perubahan format template tanpa perlu mengubah kode
 
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
-import threading
 import os
 import sys
 from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
 import json
 import logging
 
 # Add current directory to path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
+# Modul bersama (report_common) ada di root repository
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
 try:
     from firebird_connector_enhanced import FirebirdConnectorEnhanced
     from dynamic_formula_engine_enhanced import EnhancedDynamicFormulaEngine
     from adaptive_excel_processor import AdaptiveExcelProcessor
+    from render_session import RenderSession
+    from dimension_cache import get_dimension_cache, is_dimension_sql
+    import tracing
+    from report_common.etl_artifacts import ArtifactStore, load_artifact
+    from pdf_report_generator import PDFReportGenerator, REPORTLAB_AVAILABLE
+    from report_common.job_runner import JobRunner, gui_thread
     from database_helper import (
         execute_query_with_extraction, 
         get_table_count, 
@@ -35,6 +44,57 @@ except ImportError as e:
 logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Batas row per query saat preview (query agregasi dihitung dari sampel sumber)
+PREVIEW_ROW_LIMIT = 1000
+
+# Job background (generate, preview, test) yang boleh berjalan bersamaan
+MAX_CONCURRENT_JOBS = 2
+
+# Folder artefak run ETL dan profil (lihat etl_artifacts.RetentionPolicy untuk rotasi)
+ETL_REPORTS_DIR = "etl_reports"
+
+# Layout PDF laporan FFB (dirender dari report_data, bukan dari file Excel);
+# bisa di-override lewat 'pdf_layout' di formula JSON
+FFB_PDF_LAYOUT = {
+    'title': 'LAPORAN ANALISIS FFB',
+    'orientation': 'landscape',
+    'sections': [
+        {'type': 'fields', 'title': 'RINGKASAN', 'fields': [
+            {'label': 'Total Divisi', 'key': 'total_summary.total_divisions'},
+            {'label': 'Total Transaksi', 'key': 'total_summary.total_transactions'},
+            {'label': 'Total Janjang', 'key': 'total_summary.total_bunches'},
+            {'label': 'Total Brondolan', 'key': 'total_summary.total_loosefruit'},
+            {'label': 'Total Berat', 'key': 'total_summary.total_weight', 'format': ',.2f'}
+        ]},
+        {'type': 'table', 'title': 'RINGKASAN PER DIVISI', 'source': 'divisions', 'columns': [
+            {'header': 'Divisi', 'key': 'division_name', 'width': 2},
+            {'header': 'Transaksi', 'key': 'transaction_count'},
+            {'header': 'Janjang', 'key': 'total_bunches'},
+            {'header': 'Brondolan', 'key': 'total_loosefruit'},
+            {'header': 'Berat', 'key': 'total_weight', 'format': ',.2f'}
+        ]},
+        {'type': 'table', 'title': 'RINGKASAN HARIAN', 'source': 'daily_summary_list', 'columns': [
+            {'header': 'Tanggal', 'key': 'date'},
+            {'header': 'Transaksi', 'key': 'transaction_count'},
+            {'header': 'Janjang', 'key': 'total_bunches'},
+            {'header': 'Brondolan', 'key': 'total_loosefruit'},
+            {'header': 'Berat', 'key': 'total_weight', 'format': ',.2f'},
+            {'header': 'Divisi', 'key': 'divisions', 'width': 3}
+        ]},
+        {'type': 'table', 'title': 'RINGKASAN KARYAWAN', 'source': 'employee_summary_list', 'columns': [
+            {'header': 'Nama', 'key': 'name', 'width': 2},
+            {'header': 'Role', 'key': 'role'},
+            {'header': 'Transaksi', 'key': 'transaction_count'},
+            {'header': 'Janjang', 'key': 'total_bunches'},
+            {'header': 'Brondolan', 'key': 'total_loosefruit'},
+            {'header': 'Berat', 'key': 'total_weight', 'format': ',.2f'},
+            {'header': 'Divisi', 'key': 'divisions', 'width': 3}
+        ]},
+        {'type': 'employee_performance', 'title': 'KINERJA KERANI, MANDOR, DAN ASISTEN',
+         'source': 'employee_performance'}
+    ]
+}
+
 class AdaptiveReportGeneratorGUI:
     """
     Adaptive Report Generator yang menyesuaikan dengan template Excel secara otomatis
@@ -53,11 +113,21 @@ class AdaptiveReportGeneratorGUI:
         self.start_date = tk.StringVar(value=(datetime.now() - timedelta(days=30)).strftime("%Y-%m-%d"))
         self.end_date = tk.StringVar(value=datetime.now().strftime("%Y-%m-%d"))
         self.formula_file = tk.StringVar(value="pge2b_corrected_formula.json")
+        self.export_pdf = tk.BooleanVar(value=False)
         self.estate_var = tk.StringVar(value="PGE 2B")
         
         # Multi-estate style variables
         self.is_generating = False
-        self.current_thread = None
+        self.generate_job = None
+
+        # Semua pekerjaan panjang berjalan lewat job runner (queue + root.after, bisa dibatalkan)
+        self.job_runner = JobRunner(self.root, max_workers=MAX_CONCURRENT_JOBS)
+
+        # Artefak run ETL (hasil query kolumnar + manifest) dengan rotasi run lama
+        self.artifact_store = ArtifactStore(ETL_REPORTS_DIR)
+
+        # PDF dirender dari data yang sama dengan Excel (paralel, tanpa membuka ulang xlsx)
+        self.pdf_generator = PDFReportGenerator() if REPORTLAB_AVAILABLE else None
 
         # Status variables
         self.db_connected = tk.BooleanVar(value=False)
@@ -69,12 +139,21 @@ class AdaptiveReportGeneratorGUI:
         self.connector = None
         self.dynamic_engine = None
         self.adaptive_processor = None
+        self.render_session = None
         self.template_analysis = {}
         self.formula_data = None
 
+        # Preview berjalan dengan connector terpisah (mode preview) yang bisa dibatalkan
+        self.preview_connector = None
+        self.preview_session = None
+
         # Setup GUI
         self.setup_gui()
 
+        # Preview yang sedang berjalan dibatalkan jika rentang tanggal / database berubah
+        for variable in (self.start_date, self.end_date, self.db_path):
+            variable.trace_add('write', self.on_preview_parameters_changed)
+
         # Initialize components
         self.initialize_components()
 
@@ -332,6 +411,14 @@ class AdaptiveReportGeneratorGUI:
             command=lambda: self.auto_generate_filename(auto_filename_var.get())
         ).grid(row=1, column=0, columnspan=3, sticky=tk.W, pady=(5, 0))
 
+        # PDF dari data yang sama, dibuat paralel dengan Excel
+        ttk.Checkbutton(
+            output_frame,
+            text="Also export PDF (rendered from report data)",
+            variable=self.export_pdf,
+            state="normal" if REPORTLAB_AVAILABLE else "disabled"
+        ).grid(row=2, column=0, columnspan=3, sticky=tk.W, pady=(2, 0))
+
         # Set default output path
         self.auto_generate_filename(True)
 
@@ -349,6 +436,12 @@ class AdaptiveReportGeneratorGUI:
         )
         self.generate_btn.pack(side=tk.LEFT, padx=(0, 10))
 
+        self.replay_btn = ttk.Button(action_frame, text="Replay Snapshot", command=self.replay_snapshot)
+        self.replay_btn.pack(side=tk.LEFT, padx=(0, 10))
+
+        self.cancel_btn = ttk.Button(action_frame, text="Cancel", command=self.cancel_jobs, state="disabled")
+        self.cancel_btn.pack(side=tk.LEFT, padx=(0, 10))
+
         preview_data_btn = ttk.Button(action_frame, text="Preview Data", command=self.preview_data)
         preview_data_btn.pack(side=tk.LEFT, padx=5)
 
@@ -512,6 +605,7 @@ class AdaptiveReportGeneratorGUI:
             print(f"Error getting query from template: {e}")
             return None
 
+    @gui_thread
     def update_db_status_indicator(self, connected):
         """Update database connection status indicator"""
         self.db_status_canvas.delete("all")
@@ -527,6 +621,7 @@ class AdaptiveReportGeneratorGUI:
             self.db_status_canvas.create_text(10, 10, text="X", fill="white", font=("Arial", 8, "bold"))
             self.db_status_text.set("Disconnected")
 
+    @gui_thread
     def update_analysis_indicator(self, analyzed):
         """Update template analysis status indicator"""
         self.analysis_canvas.delete("all")
@@ -574,7 +669,7 @@ class AdaptiveReportGeneratorGUI:
 
     def connect_database(self):
         """Connect to database"""
-        def connect_worker():
+        def connect_worker(job):
             try:
                 self.log_message("Connecting to database...", "info")
                 self.update_progress(10, "Initializing database connection...")
@@ -609,16 +704,13 @@ class AdaptiveReportGeneratorGUI:
                 self.update_db_status_indicator(False)
                 self.db_connected.set(False)
                 self.log_message(f"Database connection failed: {e}", "error")
-                messagebox.showerror("Connection Error", f"Failed to connect to database: {e}")
+                self.job_runner.call_soon(messagebox.showerror, "Connection Error", f"Failed to connect to database: {e}")
 
-        # Run in separate thread
-        thread = threading.Thread(target=connect_worker)
-        thread.daemon = True
-        thread.start()
+        self.job_runner.submit(connect_worker, name='connect', group='database')
 
     def test_connection(self):
         """Test database connection"""
-        def test_worker():
+        def test_worker(job):
             try:
                 self.log_message("Testing database connection...", "info")
                 self.update_progress(20, "Testing connection...")
@@ -639,23 +731,20 @@ class AdaptiveReportGeneratorGUI:
                     self.db_connected.set(True)
                     self.log_message("Database connection test successful", "success")
                     self.log_message(f"Test result: {result}", "debug")
-                    messagebox.showinfo("Connection Test", "Database connection is working correctly!")
+                    self.job_runner.call_soon(messagebox.showinfo, "Connection Test", "Database connection is working correctly!")
                 else:
                     raise Exception("No results from test query")
 
             except Exception as e:
                 self.update_progress(0, "Connection test failed")
                 self.log_message(f"Connection test failed: {e}", "error")
-                messagebox.showerror("Connection Test", f"Database connection test failed: {e}")
+                self.job_runner.call_soon(messagebox.showerror, "Connection Test", f"Database connection test failed: {e}")
 
-        # Run in separate thread
-        thread = threading.Thread(target=test_worker)
-        thread.daemon = True
-        thread.start()
+        self.job_runner.submit(test_worker, name='test_connection', group='database')
 
     def analyze_template(self):
         """Analyze template with adaptive processing"""
-        def analyze_worker():
+        def analyze_worker(job):
             try:
                 self.log_message("=== STARTING ADAPTIVE TEMPLATE ANALYSIS ===", "adaptive")
                 self.update_progress(10, "Loading template...")
@@ -704,13 +793,11 @@ class AdaptiveReportGeneratorGUI:
                 self.update_analysis_indicator(False)
                 self.template_analyzed.set(False)
                 self.log_message(f"❌ Template analysis failed: {e}", "error")
-                messagebox.showerror("Analysis Error", f"Template analysis failed: {e}")
+                self.job_runner.call_soon(messagebox.showerror, "Analysis Error", f"Template analysis failed: {e}")
 
-        # Run in separate thread
-        thread = threading.Thread(target=analyze_worker)
-        thread.daemon = True
-        thread.start()
+        self.job_runner.submit(analyze_worker, name='analyze_template', group='template')
 
+    @gui_thread
     def display_template_analysis(self, analysis):
         """Display template analysis in treeview"""
         # Clear existing items
@@ -773,7 +860,7 @@ class AdaptiveReportGeneratorGUI:
 
     def validate_system(self):
         """Validate entire system"""
-        def validate_worker():
+        def validate_worker(job):
             try:
                 self.log_message("=== COMPREHENSIVE SYSTEM VALIDATION ===", "info")
                 self.update_progress(10, "Starting system validation...")
@@ -789,7 +876,7 @@ class AdaptiveReportGeneratorGUI:
                 # 2. Validate template analysis
                 self.update_progress(40, "Validating template analysis...")
                 if not self.template_analyzed.get():
-                    self.analyze_template()
+                    self.job_runner.call_soon(self.analyze_template)
                     # Wait for analysis to complete
                     import time
                     time.sleep(2)
@@ -831,21 +918,18 @@ class AdaptiveReportGeneratorGUI:
                 self.log_message("✅ System validation passed all checks", "success")
                 self.log_message("=== COMPREHENSIVE SYSTEM VALIDATION COMPLETED ===", "success")
 
-                messagebox.showinfo("Validation Complete", "All system validations passed successfully!\n\n✅ Database connection: OK\n✅ Template analysis: OK\n✅ Adaptive processing: OK")
+                self.job_runner.call_soon(messagebox.showinfo, "Validation Complete", "All system validations passed successfully!\n\n✅ Database connection: OK\n✅ Template analysis: OK\n✅ Adaptive processing: OK")
 
             except Exception as e:
                 self.update_progress(0, "System validation failed")
                 self.log_message(f"❌ System validation failed: {e}", "error")
-                messagebox.showerror("Validation Error", f"System validation failed: {e}")
+                self.job_runner.call_soon(messagebox.showerror, "Validation Error", f"System validation failed: {e}")
 
-        # Run in separate thread
-        thread = threading.Thread(target=validate_worker)
-        thread.daemon = True
-        thread.start()
+        self.job_runner.submit(validate_worker, name='validate_system', group='validate')
 
     def test_adaptive_processing(self):
         """Test adaptive processing with sample data"""
-        def test_worker():
+        def test_worker(job):
             try:
                 self.log_message("=== TESTING ADAPTIVE PROCESSING ===", "adaptive")
                 self.update_progress(10, "Starting adaptive processing test...")
@@ -930,29 +1014,30 @@ class AdaptiveReportGeneratorGUI:
                     self.log_message("=== ADAPTIVE PROCESSING TEST COMPLETED ===", "success")
 
                     # Ask user if they want to open the test file
-                    result = messagebox.askyesno(
-                        "Adaptive Test Complete",
-                        f"Adaptive processing test completed successfully!\n\nTest file: {test_output}\n\nDo you want to open the test file?"
-                    )
-
-                    if result:
-                        try:
-                            os.startfile(test_output)
-                            self.log_message(f"Opened test file: {test_output}", "info")
-                        except Exception as e:
-                            self.log_message(f"Error opening test file: {e}", "error")
+                    self.job_runner.call_soon(self.ask_open_test_file, test_output)
                 else:
                     raise Exception("Adaptive processing test failed")
 
             except Exception as e:
                 self.update_progress(0, "Adaptive processing test failed")
                 self.log_message(f"❌ Adaptive processing test failed: {e}", "error")
-                messagebox.showerror("Test Error", f"Adaptive processing test failed: {e}")
+                self.job_runner.call_soon(messagebox.showerror, "Test Error", f"Adaptive processing test failed: {e}")
+
+        self.job_runner.submit(test_worker, name='test_adaptive', group='template')
 
-        # Run in separate thread
-        thread = threading.Thread(target=test_worker)
-        thread.daemon = True
-        thread.start()
+    def ask_open_test_file(self, test_output):
+        """Tawarkan membuka file hasil test adaptive (dipanggil di thread GUI)"""
+        result = messagebox.askyesno(
+            "Adaptive Test Complete",
+            f"Adaptive processing test completed successfully!\n\nTest file: {test_output}\n\nDo you want to open the test file?"
+        )
+
+        if result:
+            try:
+                os.startfile(test_output)
+                self.log_message(f"Opened test file: {test_output}", "info")
+            except Exception as e:
+                self.log_message(f"Error opening test file: {e}", "error")
 
     def generate_adaptive_report(self):
         """Generate report with adaptive processing and FFB analysis"""
@@ -969,15 +1054,17 @@ class AdaptiveReportGeneratorGUI:
             messagebox.showerror("Output Error", "Please specify output path")
             return
 
-        def generate_worker():
+        if self.is_generating:
+            messagebox.showwarning("In Progress", "Report generation is already in progress")
+            return
+
+        def generate_worker(job):
+            tracing.start_run('Excel_Report', estate=os.path.splitext(os.path.basename(self.db_path.get()))[0],
+                              start_date=self.start_date.get(), end_date=self.end_date.get())
             try:
                 self.log_message("=== STARTING FFB ANALYSIS REPORT GENERATION ===", "adaptive")
                 self.update_progress(5, "Initializing FFB analysis report generation...")
 
-                # Disable generate button
-                self.generate_btn.config(state="disabled")
-                self.is_generating = True
-
                 # Parse dates
                 try:
                     start_date = datetime.strptime(self.start_date.get(), "%Y-%m-%d")
@@ -990,6 +1077,9 @@ class AdaptiveReportGeneratorGUI:
                 # Get database connection - use the connector directly for queries
                 if not self.connector:
                     raise Exception("Database connector not initialized")
+
+                # Cancel: proses isql yang sedang berjalan di-kill
+                job.add_cancel_callback(self.connector.cancel)
                 
                 # For Firebird, we don't need a persistent connection object
                 # The connector handles connections internally
@@ -1014,15 +1104,20 @@ class AdaptiveReportGeneratorGUI:
 
                 # Analyze each division
                 all_division_data = {}
+                snapshot_rows = []
                 progress_step = 40 / len(divisions) if divisions else 0
 
                 for i, (division_id, division_name) in enumerate(divisions):
+                    job.check_cancelled()
                     self.update_progress(35 + (i * progress_step), f"Analyzing division {division_id}: {division_name}...")
                     
-                    division_data = self.analyze_division(
-                        division_id, division_name, 
-                        self.start_date.get(), self.end_date.get(), employee_map
-                    )
+                    with tracing.span(f"analyze_division {division_id}", stage='analyze'):
+                        raw_rows = self.fetch_division_rows(division_id, self.start_date.get(), self.end_date.get())
+                        snapshot_rows.extend(dict(row, division_id=division_id) for row in raw_rows)
+                        division_data = self.process_division_data(
+                            raw_rows, employee_map, division_id,
+                            self.start_date.get(), self.end_date.get()
+                        )
                     
                     if division_data:
                         all_division_data[division_id] = {
@@ -1030,6 +1125,7 @@ class AdaptiveReportGeneratorGUI:
                             'data': division_data
                         }
 
+                job.check_cancelled()
                 self.update_progress(75, "Preparing report data structure...")
 
                 # Prepare comprehensive data for report
@@ -1044,8 +1140,15 @@ class AdaptiveReportGeneratorGUI:
                     'month': f"{start_date.month:02d}"
                 }
 
-                query_results = self.dynamic_engine.execute_all_queries(parameters)
-                variables = self.dynamic_engine.process_variables(query_results, parameters)
+                # Render session: hanya query/variable yang parameternya berubah yang dihitung ulang
+                render = self.get_render_session().refresh(parameters)
+                query_results = render['query_results']
+                variables = render['variables']
+                self.log_message(f"Render session: {len(render['stats']['changed_queries'])} queries, "
+                                 f"{len(render['stats']['changed_variables'])} variables recomputed", "info")
+
+                # Snapshot hasil ekstraksi untuk replay (render ulang tanpa database)
+                self.save_generate_snapshot(parameters, employee_map, divisions, snapshot_rows, query_results)
 
                 # Combine FFB analysis data with dynamic variables
                 adaptive_data = {
@@ -1053,10 +1156,11 @@ class AdaptiveReportGeneratorGUI:
                     **report_data
                 }
 
+                job.check_cancelled()
                 self.update_progress(90, "Generating Excel report...")
 
-                # Generate report using adaptive processor
-                success = self.adaptive_processor.generate_report(adaptive_data, self.output_path.get())
+                # Generate report using adaptive processor (PDF paralel jika diaktifkan)
+                success = self.render_report_outputs(adaptive_data, self.output_path.get(), parameters)
 
                 self.update_progress(95, "Finalizing report...")
 
@@ -1064,31 +1168,299 @@ class AdaptiveReportGeneratorGUI:
                     self.update_progress(100, "FFB analysis report generated successfully!")
                     self.log_message(f"✅ FFB Analysis Excel report generated: {self.output_path.get()}", "success")
                     self.log_message("=== FFB ANALYSIS REPORT GENERATION COMPLETED ===", "success")
-
-                    # Ask user if they want to open the file
-                    result = messagebox.askyesno(
-                        "Report Generated",
-                        f"FFB Analysis Excel report generated successfully!\n\nOutput: {self.output_path.get()}\n\nDo you want to open the report?"
-                    )
-
-                    if result:
-                        self.open_output_file()
+                    self.report_profile(tracing.finish_run())
+                    return self.output_path.get()
                 else:
                     raise Exception("FFB analysis report generation failed")
 
+            finally:
+                tracing.finish_run()
+
+        # Disable generate button sampai job selesai / dibatalkan
+        self.generate_btn.config(state="disabled")
+        self.replay_btn.config(state="disabled")
+        self.is_generating = True
+        self.generate_job = self.job_runner.submit(
+            generate_worker, name='generate', group='generate',
+            on_success=self.on_generate_success,
+            on_error=self.on_generate_error,
+            on_cancel=self.on_generate_cancelled,
+            on_finish=self.on_generate_finished
+        )
+        self.update_job_buttons()
+
+    def render_report_outputs(self, report_data, output_path, parameters):
+        """
+        Render Excel lewat adaptive processor; jika export PDF aktif, PDF dirender dari
+        report_data yang sama di thread lain secara bersamaan. Kegagalan PDF hanya dicatat.
+
+        Returns:
+            True jika laporan Excel berhasil dibuat
+        """
+        if not self.export_pdf.get() or self.pdf_generator is None:
+            return self.adaptive_processor.generate_report(report_data, output_path)
+
+        layout = (self.formula_data or {}).get('pdf_layout') or FFB_PDF_LAYOUT
+        pdf_path = os.path.splitext(output_path)[0] + '.pdf'
+        subtitle = (f"{self.estate_var.get()} - Periode: {parameters.get('start_date')} "
+                    f"s/d {parameters.get('end_date')}")
+
+        def render_pdf():
+            with tracing.span('render_pdf', stage='render'):
+                pdf_data = {**report_data,
+                            'employee_performance': self.build_employee_performance(report_data)}
+                return self.pdf_generator.generate_pdf_from_data(pdf_data, pdf_path, layout,
+                                                                 subtitle=subtitle)
+
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix='pdf') as executor:
+            pdf_future = executor.submit(tracing.bind(render_pdf))
+            success = self.adaptive_processor.generate_report(report_data, output_path)
+
+            try:
+                pdf_future.result()
+                self.log_message(f"✅ PDF report generated: {pdf_path}", "success")
             except Exception as e:
-                self.update_progress(0, "FFB analysis report generation failed")
-                self.log_message(f"❌ FFB analysis report generation failed: {e}", "error")
-                messagebox.showerror("Generation Error", f"Failed to generate FFB analysis report: {e}")
+                self.log_message(f"PDF export failed: {e}", "warning")
+
+        return success
+
+    def build_employee_performance(self, report_data):
+        """
+        Jumlah transaksi kerani/mandor/asisten per divisi dari all_transactions, dalam
+        bentuk yang dipakai section kinerja PDF (pdf_report_generator.employee_performance_rows)
+        """
+        divisions = {}
+        for transaction in report_data.get('all_transactions', []):
+            division_name = transaction.get('division_name', '')
+            division = divisions.setdefault(division_name, {
+                'estate': self.estate_var.get(),
+                'division': division_name,
+                'kerani_total': 0,
+                'mandor_total': 0,
+                'asisten_total': 0,
+                'employee_details': {}
+            })
+            for role in ('kerani', 'mandor', 'asisten'):
+                emp_id = transaction.get(f'{role}_id')
+                if not emp_id:
+                    continue
+                division[f'{role}_total'] += 1
+                details = division['employee_details'].setdefault(emp_id, {
+                    'name': transaction.get(f'{role}_name') or str(emp_id),
+                    'kerani': 0, 'mandor': 0, 'asisten': 0
+                })
+                details[role] += 1
+        return list(divisions.values())
+
+    def save_generate_snapshot(self, parameters, employee_map, divisions, division_rows, query_results):
+        """
+        Simpan hasil ekstraksi generate (EMP, daftar divisi, transaksi per divisi dan
+        hasil query engine) sebagai snapshot untuk replay_snapshot()
+        """
+        try:
+            snapshot_results = {
+                'employee_map': [{'EMPID': empid, **info} for empid, info in employee_map.items()],
+                'division_list': [{'DIVID': div_id, 'DIVNAME': div_name} for div_id, div_name in divisions],
+                'division_transactions': division_rows,
+                **query_results
+            }
+            with tracing.span('save_snapshot', stage='save'):
+                run_dir = self.artifact_store.write_run(
+                    snapshot_results,
+                    {**parameters, 'estate_name': self.estate_var.get()},
+                    queries=self.dynamic_engine.queries if self.dynamic_engine else None,
+                    database=self.db_path.get() or None,
+                    mode='run'
+                )
+            self.log_message(f"Extraction snapshot saved: {run_dir}", "info")
+        except Exception as e:
+            self.log_message(f"Warning: Could not save extraction snapshot: {e}", "warning")
+
+    def replay_snapshot(self):
+        """
+        Render ulang laporan dari snapshot generate sebelumnya: hanya transform dan
+        render, tanpa query ke database (iterasi template/format)
+        """
+        if not self.template_analyzed.get():
+            messagebox.showerror("Template Not Analyzed", "Please analyze template first")
+            return
+
+        if not self.output_path.get():
+            messagebox.showerror("Output Error", "Please specify output path")
+            return
+
+        if self.is_generating:
+            messagebox.showwarning("In Progress", "Report generation is already in progress")
+            return
+
+        snapshot_path = filedialog.askopenfilename(
+            title="Select Extraction Snapshot",
+            initialdir=ETL_REPORTS_DIR if os.path.isdir(ETL_REPORTS_DIR) else None,
+            filetypes=[("Snapshot Manifest", "manifest.json"), ("All Files", "*.*")]
+        )
+        if not snapshot_path:
+            return
+
+        output_path = self.output_path.get()
+
+        def replay_worker(job):
+            tracing.start_run('Excel_Report_Replay', snapshot=snapshot_path)
+            try:
+                self.log_message("=== REPLAYING REPORT FROM SNAPSHOT ===", "adaptive")
+                self.update_progress(10, "Loading extraction snapshot...")
+
+                with tracing.span('load_snapshot', stage='extract'):
+                    snapshot = load_artifact(snapshot_path, as_records=True)
+                manifest = snapshot['manifest']
+                parameters = snapshot['parameters']
+                query_results = dict(snapshot['query_results'])
+                if 'division_transactions' not in query_results:
+                    raise Exception("Snapshot does not contain division transactions (captured by preview?)")
+
+                self.log_message(f"Snapshot {snapshot['path']}: {manifest.get('estate')}, "
+                                 f"{parameters.get('start_date')} to {parameters.get('end_date')}, "
+                                 f"captured {manifest.get('created_at')}", "info")
+                job.check_cancelled()
+
+                employee_map = {}
+                for row in query_results.pop('employee_map', []):
+                    row = dict(row)
+                    employee_map[row.pop('EMPID')] = row
+                divisions = [(row['DIVID'], row['DIVNAME']) for row in query_results.pop('division_list', [])]
+                division_rows = {}
+                for row in query_results.pop('division_transactions', []):
+                    row = dict(row)
+                    division_rows.setdefault(row.pop('division_id'), []).append(row)
+
+                self.update_progress(30, "Analyzing FFB data by division...")
+                all_division_data = {}
+                for division_id, division_name in divisions:
+                    job.check_cancelled()
+                    with tracing.span(f"analyze_division {division_id}", stage='analyze'):
+                        division_data = self.process_division_data(
+                            division_rows.get(division_id, []), employee_map, division_id,
+                            parameters['start_date'], parameters['end_date']
+                        )
+                    if division_data:
+                        all_division_data[division_id] = {'name': division_name, 'data': division_data}
+
+                self.update_progress(60, "Preparing report data structure...")
+                report_data = self.prepare_ffb_report_data(all_division_data, employee_map)
+
+                engine = self.dynamic_engine
+                if engine is None:
+                    formula_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), self.formula_file.get())
+                    engine = EnhancedDynamicFormulaEngine(formula_path, None)
+                with tracing.span('process_variables', stage='analyze'):
+                    variables = engine.process_variables(query_results, parameters)
+
+                job.check_cancelled()
+                self.update_progress(80, "Generating Excel report...")
+                success = self.render_report_outputs({**variables, **report_data}, output_path, parameters)
+                if not success:
+                    raise Exception("FFB analysis report generation failed")
+
+                self.update_progress(100, "Report replayed from snapshot")
+                self.log_message(f"✅ Report replayed from snapshot: {output_path}", "success")
+                self.report_profile(tracing.finish_run())
+                return output_path
 
             finally:
-                # Re-enable generate button
-                self.generate_btn.config(state="normal")
-                self.is_generating = False
+                tracing.finish_run()
+
+        self.generate_btn.config(state="disabled")
+        self.replay_btn.config(state="disabled")
+        self.is_generating = True
+        self.generate_job = self.job_runner.submit(
+            replay_worker, name='replay', group='generate',
+            on_success=self.on_generate_success,
+            on_error=self.on_generate_error,
+            on_cancel=self.on_generate_cancelled,
+            on_finish=self.on_generate_finished
+        )
+        self.update_job_buttons()
+
+    def on_generate_success(self, output_path):
+        """Generate selesai: tawarkan membuka file laporan"""
+        result = messagebox.askyesno(
+            "Report Generated",
+            f"FFB Analysis Excel report generated successfully!\n\nOutput: {output_path}\n\nDo you want to open the report?"
+        )
+
+        if result:
+            self.open_output_file()
 
-        # Start generation in separate thread
-        self.current_thread = threading.Thread(target=generate_worker, daemon=True)
-        self.current_thread.start()
+    def on_generate_error(self, error):
+        self.update_progress(0, "FFB analysis report generation failed")
+        self.log_message(f"❌ FFB analysis report generation failed: {error}", "error")
+        messagebox.showerror("Generation Error", f"Failed to generate FFB analysis report: {error}")
+
+    def on_generate_cancelled(self):
+        self.update_progress(0, "Report generation cancelled")
+        self.log_message("Report generation cancelled", "warning")
+
+    def on_generate_finished(self, job):
+        """Re-enable generate button; connector bisa dipakai lagi setelah cancel"""
+        if job.cancelled and self.connector is not None:
+            self.connector.reset_cancel()
+        self.generate_btn.config(state="normal")
+        self.replay_btn.config(state="normal")
+        self.is_generating = False
+        self.generate_job = None
+        self.update_job_buttons()
+
+    def on_job_finished(self, job):
+        self.update_job_buttons()
+
+    def update_job_buttons(self):
+        """Tombol Cancel aktif selama ada job generate / preview yang berjalan"""
+        busy = self.job_runner.is_busy('generate') or self.job_runner.is_busy('preview')
+        self.cancel_btn.config(state="normal" if busy else "disabled")
+
+    def cancel_jobs(self):
+        """Batalkan generate / preview yang sedang berjalan (proses isql di-kill)"""
+        self.job_runner.cancel_group('generate')
+        self.cancel_preview()
+        self.update_job_buttons()
+
+    def get_render_session(self):
+        """Render session untuk engine dan template aktif (cache query/variable antar run)"""
+        session = self.render_session
+        if session is None or session.formula_engine is not self.dynamic_engine:
+            session = RenderSession(self.dynamic_engine, self.adaptive_processor)
+            self.render_session = session
+        elif session.template_processor is not self.adaptive_processor:
+            session.set_template_processor(self.adaptive_processor)
+        return session
+
+    def get_preview_session(self):
+        """
+        Render session khusus preview: engine terpisah dengan connector mode preview
+        (FIRST n di projection terluar, agregasi dari sampel) yang bisa dibatalkan
+        tanpa mengganggu generate report
+        """
+        session = self.preview_session
+        if session is None or self.preview_connector is None or self.preview_connector.db_path != self.connector.db_path:
+            self.preview_connector = self.connector.preview_copy(PREVIEW_ROW_LIMIT)
+            engine = EnhancedDynamicFormulaEngine(self.dynamic_engine.formula_path, self.preview_connector)
+            session = RenderSession(engine, self.adaptive_processor)
+            self.preview_session = session
+        elif session.template_processor is not self.adaptive_processor:
+            session.set_template_processor(self.adaptive_processor)
+        return session
+
+    def cancel_preview(self):
+        """Hentikan preview yang sedang berjalan (cancel callback job men-kill query preview)"""
+        if not self.job_runner.is_busy('preview'):
+            return
+        self.job_runner.cancel_group('preview')
+        # Hasil parsial tidak dipakai lagi; preview berikutnya memakai connector baru
+        self.preview_connector = None
+        self.preview_session = None
+
+    def on_preview_parameters_changed(self, *args):
+        """Parameter preview berubah: hentikan preview yang sedang berjalan"""
+        self.cancel_preview()
 
     def prepare_ffb_report_data(self, all_division_data, employee_map):
         """Prepare comprehensive FFB report data structure"""
@@ -1210,7 +1582,11 @@ class AdaptiveReportGeneratorGUI:
             messagebox.showerror("Not Connected", "Please connect to database first")
             return
 
-        def preview_worker():
+        # Preview sebelumnya (jika masih berjalan) tidak dilanjutkan
+        self.cancel_preview()
+
+        def preview_worker(job):
+            tracer = tracing.start_run('ETL_Preview')
             try:
                 etl_stats = {
                     'extract': {'start_time': datetime.now(), 'queries': 0, 'rows_extracted': 0, 'success': True},
@@ -1260,6 +1636,7 @@ class AdaptiveReportGeneratorGUI:
                     'estate_code': estate_name.replace(' ', '_')
                 }
 
+                tracer.metadata.update(estate=estate_name, start_date=parameters['start_date'], end_date=parameters['end_date'])
                 self.log_message(f"PARAMETERS: {len(parameters)} parameters prepared", "info")
                 for param, value in parameters.items():
                     self.log_message(f"   - {param}: {value}", "info")
@@ -1271,10 +1648,19 @@ class AdaptiveReportGeneratorGUI:
                 extract_start = datetime.now()
                 
                 # Get FFB Scanner data using corrected table names
-                ffb_data = self.get_ffb_scanner_preview_data(parameters['start_date'], parameters['end_date'])
+                with tracing.span('ffb_scanner_data', stage='extract', query='ffb_scanner_data'):
+                    ffb_data = self.get_ffb_scanner_preview_data(parameters['start_date'], parameters['end_date'])
                 
-                # Execute other queries
-                query_results = self.dynamic_engine.execute_all_queries(parameters)
+                # Execute other queries (mode preview, incremental via render session)
+                self.log_message(f"PREVIEW MODE: max {PREVIEW_ROW_LIMIT} rows per query, aggregates from sampled source rows", "info")
+                session = self.get_preview_session()
+                job.add_cancel_callback(session.formula_engine.db_connector.cancel)
+                render = session.refresh(parameters)
+                if job.cancelled:
+                    self.update_progress(0, "Preview cancelled")
+                    self.log_message("Preview cancelled: parameters changed", "warning")
+                    return
+                query_results = dict(render['query_results'])
                 query_results['ffb_scanner_data'] = ffb_data
                 
                 extract_end = datetime.now()
@@ -1300,7 +1686,7 @@ class AdaptiveReportGeneratorGUI:
 
                     # Process variables
                     transform_start = datetime.now()
-                    variables = self.dynamic_engine.process_variables(query_results, parameters)
+                    variables = render['variables']
                     etl_stats['transform']['variables_processed'] = len(variables)
 
                     # Get repeating data
@@ -1367,6 +1753,9 @@ class AdaptiveReportGeneratorGUI:
                 preview_text += f"Transform Phase: {transform_duration:.3f}s ({transform_pct:.1f}%)\n"
                 preview_text += f"Load Phase: {load_duration:.3f}s ({load_pct:.1f}%)\n\n"
 
+                # Breakdown per stage dari span (isql / parsing / analisis / openpyxl)
+                preview_text += tracing.finish_run().format_breakdown() + "\n\n"
+
                 # Extract Details
                 preview_text += "EXTRACT PHASE DETAILS:\n"
                 preview_text += "-" * 40 + "\n"
@@ -1454,20 +1843,33 @@ class AdaptiveReportGeneratorGUI:
                 self.log_message(f"FINAL SUMMARY: {etl_stats['extract']['rows_extracted']:,} rows extracted, {etl_stats['load']['rows_processed']:,} rows loaded in {total_duration:.3f}s", "success")
 
                 # Save ETL report to file
-                self.save_etl_report_to_file(preview_text, etl_stats, parameters, query_results)
+                timings = {
+                    'extract': extract_duration,
+                    'transform': transform_duration,
+                    'load': load_duration,
+                    'total': total_duration
+                }
+                self.save_etl_report_to_file(preview_text, etl_stats, parameters, query_results,
+                                             timings=timings, queries=session.formula_engine.queries)
+                self.report_profile(tracer, show_breakdown=False)
 
                 # Show comprehensive preview dialog
-                self.show_preview_dialog("ETL Process Report - Data Preview", preview_text)
+                job.call_in_gui(self.show_preview_dialog, "ETL Process Report - Data Preview", preview_text)
 
             except Exception as e:
+                if job.cancelled:
+                    self.update_progress(0, "Preview cancelled")
+                    self.log_message(f"Preview cancelled: {e}", "warning")
+                    return
                 self.update_progress(0, "ETL Process Failed")
                 self.log_message(f"=== ETL PROCESS FAILED: {e} ===", "error")
-                messagebox.showerror("ETL Process Error", f"Failed to complete ETL process: {e}")
+                job.call_in_gui(messagebox.showerror, "ETL Process Error", f"Failed to complete ETL process: {e}")
+            finally:
+                tracing.finish_run()
 
-        # Run in separate thread
-        thread = threading.Thread(target=preview_worker)
-        thread.daemon = True
-        thread.start()
+        self.job_runner.submit(preview_worker, name='preview', group='preview', replace=True,
+                               on_finish=self.on_job_finished)
+        self.update_job_buttons()
 
     def browse_database(self):
         """Browse for database file"""
@@ -1620,22 +2022,22 @@ class AdaptiveReportGeneratorGUI:
         ttk.Button(button_frame, text="Apply", command=apply_custom_range).pack(side=tk.LEFT, padx=5)
         ttk.Button(button_frame, text="Cancel", command=dialog.destroy).pack(side=tk.LEFT, padx=5)
 
+    @gui_thread
     def update_progress(self, value, message=""):
-        """Update progress bar and label"""
+        """Update progress bar and label (aman dipanggil dari worker thread)"""
         self.progress_var.set(value)
         if message:
             self.progress_label.config(text=message)
         self.status_label.config(text=f"Status: {message}")
-        self.root.update_idletasks()
 
+    @gui_thread
     def log_message(self, message, level="info"):
-        """Add message to log with formatting"""
+        """Add message to log with formatting (aman dipanggil dari worker thread)"""
         timestamp = datetime.now().strftime("%H:%M:%S")
         log_entry = f"[{timestamp}] {message}\n"
 
         self.log_text.insert(tk.END, log_entry, level)
         self.log_text.see(tk.END)
-        self.root.update_idletasks()
 
     def clear_log(self):
         """Clear log text"""
@@ -1673,64 +2075,38 @@ class AdaptiveReportGeneratorGUI:
         export_btn = ttk.Button(dialog, text="Export Report", command=lambda: self.export_etl_report(content))
         export_btn.pack(pady=5)
 
-    def save_etl_report_to_file(self, preview_text, etl_stats, parameters, query_results):
-        """Save ETL report to file"""
+    def save_etl_report_to_file(self, preview_text, etl_stats, parameters, query_results,
+                                timings=None, queries=None, mode='preview'):
+        """
+        Simpan run ETL ke etl_reports/ sebagai artefak kolumnar terkompresi
+        (manifest JSON + satu file per hasil query + summary.txt), lalu rotasi run lama
+        """
         try:
-            # Create reports directory if it doesn't exist
-            reports_dir = "etl_reports"
-            if not os.path.exists(reports_dir):
-                os.makedirs(reports_dir)
-
-            # Generate filename with timestamp
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"{reports_dir}/ETL_Report_{parameters.get('estate_name', 'Unknown')}_{timestamp}.txt"
-
-            # Save detailed report
-            with open(filename, 'w', encoding='utf-8') as f:
-                f.write(preview_text)
-                f.write("\n\n" + "=" * 80 + "\n")
-                f.write("🔍 DETAILED QUERY RESULTS\n")
-                f.write("=" * 80 + "\n\n")
-
-                for query_name, results in query_results.items():
-                    f.write(f"\n{query_name.upper()}:\n")
-                    f.write("-" * 40 + "\n")
-                    if results and len(results) > 0:
-                        f.write(f"Total Rows: {len(results)}\n\n")
-                        for i, row in enumerate(results[:10]):  # Show first 10 rows
-                            f.write(f"Row {i+1}: {row}\n")
-                        if len(results) > 10:
-                            f.write(f"... and {len(results) - 10} more rows\n")
-                    else:
-                        f.write("No data returned\n")
-
-            self.log_message(f"REPORT: ETL report saved to: {filename}", "success")
-
-            # Also save as JSON for machine reading
-            json_filename = filename.replace('.txt', '.json')
-            etl_data = {
-                'timestamp': datetime.now().isoformat(),
-                'parameters': parameters,
-                'etl_stats': etl_stats,
-                'query_results': {k: v for k, v in query_results.items()},
-                'summary': {
-                    'total_queries': etl_stats['extract']['queries'],
-                    'total_rows_extracted': etl_stats['extract']['rows_extracted'],
-                    'total_rows_processed': etl_stats['load']['rows_processed'],
-                    'extract_duration': (etl_stats['transform']['start_time'] - etl_stats['extract']['start_time']).total_seconds() if etl_stats['transform']['start_time'] else 0,
-                    'transform_duration': 0,
-                    'load_duration': 0,
-                    'total_duration': 0
-                }
-            }
-
-            with open(json_filename, 'w', encoding='utf-8') as f:
-                json.dump(etl_data, f, indent=2, ensure_ascii=False, default=str)
+            run_dir = self.artifact_store.write_run(
+                query_results, parameters,
+                etl_stats=etl_stats,
+                timings=timings,
+                summary_text=preview_text,
+                queries=queries,
+                database=self.db_path.get() or None,
+                mode=mode
+            )
+            self.log_message(f"REPORT: ETL artifact saved to: {run_dir} ({self.artifact_store.storage_format})", "success")
+        except Exception as e:
+            self.log_message(f"ERROR: Failed to save ETL report: {e}", "error")
 
-            self.log_message(f"REPORT: ETL JSON report saved to: {json_filename}", "success")
+    def report_profile(self, tracer, show_breakdown=True):
+        """Tampilkan breakdown per stage di log dan simpan profil run ke etl_reports/"""
+        try:
+            if show_breakdown:
+                for line in tracer.format_breakdown().splitlines():
+                    if line.strip():
+                        self.log_message(line, "info")
 
+            json_path, folded_path = tracer.export(ETL_REPORTS_DIR)
+            self.log_message(f"REPORT: Profile saved to: {json_path} (flame graph: {folded_path})", "success")
         except Exception as e:
-            self.log_message(f"ERROR: Failed to save ETL report: {e}", "error")
+            self.log_message(f"ERROR: Failed to save profile: {e}", "error")
 
     def export_etl_report(self, content):
         """Export ETL report to user-selected location"""
@@ -1850,8 +2226,8 @@ ADAPTIVE ADVANTAGES:
                 ORDER BY EMPID
                 """
             
-            # Use helper function to extract data properly
-            results = execute_query_with_extraction(self.connector, query)
+            # EMP dibaca sekali per snapshot database
+            results = self.execute_dimension_query('employee_mapping', query)
             
             employee_map = {}
             for row in results:
@@ -1877,6 +2253,15 @@ ADAPTIVE ADVANTAGES:
             self.log_message(f"Error getting employee mapping: {e}", "error")
             return {}
 
+    def execute_dimension_query(self, name, query):
+        """Execute query master data (EMP/OCFIELD/CRDIVISION) lewat dimension cache jika memungkinkan"""
+        dimension_cache = get_dimension_cache(getattr(self.connector, 'db_path', None))
+        if dimension_cache and is_dimension_sql(query):
+            return dimension_cache.get_records(
+                name, query, lambda sql: execute_query_with_extraction(self.connector, sql)
+            )
+        return execute_query_with_extraction(self.connector, query)
+
     def get_ffb_scanner_preview_data(self, start_date, end_date):
         """Get FFB Scanner data preview using corrected FFBSCANNERDATA tables"""
         try:
@@ -1937,6 +2322,9 @@ ADAPTIVE ADVANTAGES:
                 else:
                     current_date = current_date.replace(month=current_date.month + 1)
             
+            dimension_cache = get_dimension_cache(getattr(self.connector, 'db_path', None))
+            run_query = lambda sql: execute_query_with_extraction(self.connector, sql)
+
             # Query each table for divisions
             for table_name, month in table_names:
                 try:
@@ -1945,6 +2333,24 @@ ADAPTIVE ADVANTAGES:
                                                        month=month, 
                                                        start_date=start_date, 
                                                        end_date=end_date)
+                    if not query and dimension_cache:
+                        # Hanya FIELDID dari tabel bulanan; nama field di-join di memory
+                        # dari OCFIELD yang di-cache per snapshot database
+                        field_ids = [
+                            normalize_data_row(row).get('FIELDID')
+                            for row in run_query(f"""
+                        SELECT DISTINCT f.FIELDID
+                        FROM {table_name} f
+                        WHERE f.TRANSDATE BETWEEN '{start_date}' AND '{end_date}'
+                        AND f.FIELDID IS NOT NULL
+                        """)
+                        ]
+                        fields = dimension_cache.resolve_fields([fid for fid in field_ids if fid], run_query)
+                        for field_id, field_name in zip(fields['FIELDID'], fields['FIELDNAME']):
+                            if field_id and field_name:
+                                divisions.add((field_id, field_name))
+                        continue
+
                     if not query:
                         # Fallback to hardcoded query with proper structure
                         query = f"""
@@ -1959,8 +2365,8 @@ ADAPTIVE ADVANTAGES:
                         ORDER BY f.FIELDID
                         """
                     
-                    # Use helper function to extract data properly
-                    results = execute_query_with_extraction(self.connector, query)
+                    # Query division yang hanya membaca tabel master di-cache (tidak diulang per bulan)
+                    results = self.execute_dimension_query('division_list', query)
                     
                     for row in results:
                         normalized_row = normalize_data_row(row)
@@ -1983,6 +2389,18 @@ ADAPTIVE ADVANTAGES:
 
     def analyze_division(self, division_id, division_name, start_date, end_date, employee_map):
         """Analyze FFB data for a specific division using template query"""
+        try:
+            all_data = self.fetch_division_rows(division_id, start_date, end_date)
+
+            # Process the data to calculate employee details
+            return self.process_division_data(all_data, employee_map, division_id, start_date, end_date)
+
+        except Exception as e:
+            self.log_message(f"Error analyzing division {division_id}: {e}", "error")
+            return {}
+
+    def fetch_division_rows(self, division_id, start_date, end_date):
+        """Baca transaksi FFB satu divisi dari tabel FFBSCANNERDATA per bulan (row ternormalisasi)"""
         try:
             # Generate table names for the date range
             current_date = datetime.strptime(start_date, "%Y-%m-%d")
@@ -2067,14 +2485,11 @@ ADAPTIVE ADVANTAGES:
                     self.log_message(f"Warning: Could not query table {table_name}: {table_error}", "warning")
                     continue
             
-            # Process the data to calculate employee details
-            processed_data = self.process_division_data(all_data, employee_map, division_id, start_date, end_date)
-            
-            return processed_data
+            return all_data
             
         except Exception as e:
-            self.log_message(f"Error analyzing division {division_id}: {e}", "error")
-            return {}
+            self.log_message(f"Error reading division {division_id}: {e}", "error")
+            return []
 
     def process_division_data(self, raw_data, employee_map, division_id, start_date, end_date):
         """Process raw division data to calculate employee details"""
@@ -2194,6 +2609,8 @@ def main():
     # Handle window closing
     def on_closing():
         if messagebox.askokcancel("Quit", "Do you want to quit the application?"):
+            # Job yang masih berjalan dibatalkan agar proses isql tidak tertinggal
+            app.job_runner.shutdown()
             root.destroy()
 
     root.protocol("WM_DELETE_WINDOW", on_closing)
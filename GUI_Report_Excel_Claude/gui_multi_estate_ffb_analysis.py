@@ -7,14 +7,20 @@ Aplikasi GUI untuk generating laporan FFB Analysis multi-estate
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 from tkcalendar import DateEntry
-import threading
 import json
 import os
+import sys
 from datetime import datetime, date
 from pathlib import Path
 import logging
 
+# Modul bersama (report_common) ada di root repository
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from excel_report_generator import ExcelReportGenerator
+from report_common.job_runner import JobRunner, gui_thread
+
+# Job background (generate, preview, test koneksi) yang boleh berjalan bersamaan
+MAX_CONCURRENT_JOBS = 2
 
 class MultiEstateFFBAnalysisGUI:
     """
@@ -30,6 +36,9 @@ class MultiEstateFFBAnalysisGUI:
         # Initialize report generator
         self.report_generator = None
 
+        # Pekerjaan panjang berjalan lewat job runner (queue + root.after, bisa dibatalkan)
+        self.job_runner = JobRunner(self.root, max_workers=MAX_CONCURRENT_JOBS)
+
         # Setup logging
         self.setup_logging()
 
@@ -41,7 +50,7 @@ class MultiEstateFFBAnalysisGUI:
 
         # Status variables
         self.is_generating = False
-        self.current_thread = None
+        self.generate_job = None
 
     def setup_logging(self):
         """Setup logging untuk GUI"""
@@ -206,6 +215,9 @@ class MultiEstateFFBAnalysisGUI:
         )
         self.generate_button.pack(side=tk.LEFT, padx=(0, 10))
 
+        self.cancel_button = ttk.Button(action_frame, text="Cancel", command=self.cancel_jobs, state='disabled')
+        self.cancel_button.pack(side=tk.LEFT, padx=(0, 10))
+
         ttk.Button(action_frame, text="Preview Data", command=self.preview_data).pack(side=tk.LEFT, padx=(0, 10))
         ttk.Button(action_frame, text="Open Reports", command=self.open_reports_folder).pack(side=tk.LEFT, padx=(0, 10))
         ttk.Button(action_frame, text="Exit", command=self.root.quit).pack(side=tk.LEFT, padx=(0, 10))
@@ -358,8 +370,19 @@ class MultiEstateFFBAnalysisGUI:
         self.update_status("Testing database connections...")
         self.log_message(f"Testing connections for {len(selected_estates)} estates...", "info")
 
+        self.job_runner.submit(
+            self._test_connections_job, selected_estates, name='test_connections', group='test',
+            on_success=self._test_connections_complete,
+            on_cancel=lambda: self.update_status("Connection test cancelled"),
+            on_finish=self._job_finished
+        )
+        self._update_cancel_button()
+
+    def _test_connections_job(self, job, selected_estates):
+        """Job untuk test koneksi (berjalan di worker thread)"""
         results = {}
         for estate in selected_estates:
+            job.check_cancelled()
             self.log_message(f"Testing connection to {estate}...", "info")
             try:
                 is_connected = self.report_generator.test_database_connection(estate)
@@ -369,7 +392,10 @@ class MultiEstateFFBAnalysisGUI:
             except Exception as e:
                 results[estate] = False
                 self.log_message(f"Connection to {estate} failed: {e}", "error")
+        return results
 
+    def _test_connections_complete(self, results):
+        """Tampilkan ringkasan test koneksi"""
         # Show summary
         success_count = sum(1 for success in results.values() if success)
         total_count = len(results)
@@ -411,43 +437,44 @@ class MultiEstateFFBAnalysisGUI:
             messagebox.showwarning("Missing Output", "Please specify output directory")
             return
 
-        # Start generation in separate thread
-        self.current_thread = threading.Thread(
-            target=self._generate_report_thread,
-            args=(start_date, end_date, selected_estates, output_dir)
+        # Start generation as background job
+        self.is_generating = True
+        self.generate_button.config(state='disabled')
+        self.generate_job = self.job_runner.submit(
+            self._generate_report_job, start_date, end_date, selected_estates, output_dir,
+            name='generate', group='generate',
+            on_success=lambda result: self._report_generation_complete(*result),
+            on_error=lambda error: self._report_generation_error(str(error)),
+            on_cancel=self._report_generation_cancelled,
+            on_finish=self._job_finished
         )
-        self.current_thread.start()
-
-    def _generate_report_thread(self, start_date, end_date, selected_estates, output_dir):
-        """Thread untuk report generation"""
-        try:
-            self.is_generating = True
-            self.generate_button.config(state='disabled')
-            self.update_status("Generating reports...")
-            self.log_message(f"Starting report generation for {len(selected_estates)} estates", "info")
-            self.log_message(f"Period: {start_date} to {end_date}", "info")
-            self.log_message(f"Output: {output_dir}", "info")
-
-            # Initialize report generator with current paths
-            self.report_generator = ExcelReportGenerator(
-                template_path=self.template_path_var.get(),
-                formula_path=self.formula_path_var.get(),
-                estate_config_path=self.estate_config_var.get()
-            )
-
-            # Generate reports
-            success, results = self.report_generator.generate_report(
-                start_date=start_date,
-                end_date=end_date,
-                selected_estates=selected_estates,
-                output_dir=output_dir
-            )
+        self._update_cancel_button()
+
+    def _generate_report_job(self, job, start_date, end_date, selected_estates, output_dir):
+        """Job untuk report generation (berjalan di worker thread)"""
+        self.update_status("Generating reports...")
+        self.log_message(f"Starting report generation for {len(selected_estates)} estates", "info")
+        self.log_message(f"Period: {start_date} to {end_date}", "info")
+        self.log_message(f"Output: {output_dir}", "info")
+
+        # Initialize report generator with current paths
+        report_generator = ExcelReportGenerator(
+            template_path=self.template_path_var.get(),
+            formula_path=self.formula_path_var.get(),
+            estate_config_path=self.estate_config_var.get()
+        )
+        self.report_generator = report_generator
 
-            # Update UI in main thread
-            self.root.after(0, self._report_generation_complete, success, results)
+        # Cancel: estate berikutnya dilewati dan query isql yang berjalan di-kill
+        job.add_cancel_callback(report_generator.cancel)
 
-        except Exception as e:
-            self.root.after(0, self._report_generation_error, str(e))
+        # Generate reports
+        return report_generator.generate_report(
+            start_date=start_date,
+            end_date=end_date,
+            selected_estates=selected_estates,
+            output_dir=output_dir
+        )
 
     def _report_generation_complete(self, success, results):
         """Handle report generation completion"""
@@ -488,6 +515,29 @@ class MultiEstateFFBAnalysisGUI:
         self.log_message(f"Report generation error: {error_message}", "error")
         messagebox.showerror("Error", f"Report generation failed: {error_message}")
 
+    def _report_generation_cancelled(self):
+        """Handle report generation cancel"""
+        self.is_generating = False
+        self.generate_button.config(state='normal')
+        self.progress_var.set(0)
+        self.update_status("Report generation cancelled")
+        self.log_message("Report generation cancelled", "warning")
+
+    def _job_finished(self, job):
+        if job.group == 'generate':
+            self.generate_job = None
+        self._update_cancel_button()
+
+    def _update_cancel_button(self):
+        """Tombol Cancel aktif selama ada job yang berjalan / antre"""
+        self.cancel_button.config(state='normal' if self.job_runner.is_busy() else 'disabled')
+
+    def cancel_jobs(self):
+        """Batalkan semua job yang berjalan (proses isql di-kill)"""
+        self.log_message("Cancelling running jobs...", "warning")
+        self.job_runner.cancel_all()
+        self._update_cancel_button()
+
     def preview_data(self):
         """Preview data untuk selected estate"""
         selected_estates = self.get_selected_estates()
@@ -502,27 +552,41 @@ class MultiEstateFFBAnalysisGUI:
         self.update_status("Previewing data...")
         self.log_message(f"Previewing data for {estate}", "info")
 
-        try:
-            # Initialize report generator if needed
-            if not self.report_generator:
-                self.report_generator = ExcelReportGenerator(
-                    template_path=self.template_path_var.get(),
-                    formula_path=self.formula_path_var.get(),
-                    estate_config_path=self.estate_config_var.get()
-                )
-
-            preview = self.report_generator.preview_data(estate, start_date, end_date)
-
-            if 'error' in preview:
-                messagebox.showerror("Preview Error", preview['error'])
-            else:
-                self.log_message("Data preview completed successfully", "success")
-                messagebox.showinfo("Preview Result", f"Connection: {'Success' if preview['connection_test'] else 'Failed'}\nSample records: {len(preview['sample_data']['daily_performance'])}")
+        # Preview sebelumnya (jika masih berjalan) digantikan preview baru
+        self.job_runner.submit(
+            self._preview_data_job, estate, start_date, end_date,
+            name='preview', group='preview', replace=True,
+            on_success=self._preview_data_complete,
+            on_error=self._preview_data_error,
+            on_cancel=lambda: self.update_status("Preview cancelled"),
+            on_finish=self._job_finished
+        )
+        self._update_cancel_button()
+
+    def _preview_data_job(self, job, estate, start_date, end_date):
+        """Job untuk preview data (berjalan di worker thread)"""
+        # Generator terpisah agar cancel preview tidak menghentikan generate report
+        report_generator = ExcelReportGenerator(
+            template_path=self.template_path_var.get(),
+            formula_path=self.formula_path_var.get(),
+            estate_config_path=self.estate_config_var.get()
+        )
+        job.add_cancel_callback(report_generator.cancel)
+        return report_generator.preview_data(estate, start_date, end_date)
 
-        except Exception as e:
-            messagebox.showerror("Preview Error", f"Error previewing data: {e}")
-            self.log_message(f"Preview error: {e}", "error")
+    def _preview_data_complete(self, preview):
+        """Tampilkan hasil preview"""
+        if 'error' in preview:
+            messagebox.showerror("Preview Error", preview['error'])
+        else:
+            self.log_message("Data preview completed successfully", "success")
+            messagebox.showinfo("Preview Result", f"Connection: {'Success' if preview['connection_test'] else 'Failed'}\nSample records: {len(preview['sample_data']['daily_performance'])}")
+
+        self.update_status("Ready")
 
+    def _preview_data_error(self, error):
+        messagebox.showerror("Preview Error", f"Error previewing data: {error}")
+        self.log_message(f"Preview error: {error}", "error")
         self.update_status("Ready")
 
     def open_reports_folder(self):
@@ -533,19 +597,19 @@ class MultiEstateFFBAnalysisGUI:
         else:
             messagebox.showwarning("Folder Not Found", f"Reports folder not found: {output_dir}")
 
+    @gui_thread
     def update_status(self, message):
-        """Update status label"""
+        """Update status label (aman dipanggil dari worker thread)"""
         self.status_var.set(message)
-        self.root.update_idletasks()
 
+    @gui_thread
     def log_message(self, message, level="info"):
-        """Add message to log"""
+        """Add message to log (aman dipanggil dari worker thread)"""
         timestamp = datetime.now().strftime("%H:%M:%S")
         log_entry = f"[{timestamp}] {message}\n"
 
         self.log_text.insert(tk.END, log_entry, level)
         self.log_text.see(tk.END)
-        self.root.update_idletasks()
 
         # Also log to file
         if level == "error":
@@ -564,8 +628,11 @@ def main():
     def on_closing():
         if app.is_generating:
             if messagebox.askokcancel("Quit", "Report generation is in progress. Are you sure you want to quit?"):
+                # Job yang masih berjalan dibatalkan agar proses isql tidak tertinggal
+                app.job_runner.shutdown()
                 root.destroy()
         else:
+            app.job_runner.shutdown()
             root.destroy()
 
     root.protocol("WM_DELETE_WINDOW", on_closing)
@@ -6,7 +6,6 @@ GUI lengkap dengan preview data sebelum rendering ke report
 
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox, scrolledtext
-import threading
 import os
 import sys
 from datetime import datetime, timedelta
@@ -18,11 +17,18 @@ from typing import Dict, List, Any, Optional, Tuple
 # Add current directory to path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
+# Modul bersama (report_common) ada di root repository
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
 try:
     from firebird_connector_enhanced import FirebirdConnectorEnhanced
     from template_processor_enhanced import TemplateProcessorEnhanced
     from formula_engine_enhanced import FormulaEngineEnhanced
     from excel_report_generator_enhanced import ExcelReportGeneratorEnhanced
+    from render_session import RenderSession
+    from result_set import to_frame, json_default
+    import tracing
+    from report_common.job_runner import JobRunner, gui_thread
 except ImportError as e:
     messagebox.showerror("Import Error", f"Failed to import required modules: {e}")
     sys.exit(1)
@@ -31,6 +37,12 @@ except ImportError as e:
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Batas row per query saat preview (query agregasi dihitung dari sampel sumber)
+PREVIEW_ROW_LIMIT = 1000
+
+# Job background (preview, generate, koneksi) yang boleh berjalan bersamaan
+MAX_CONCURRENT_JOBS = 2
+
 class EnhancedReportGUIWithPreview:
     """
     GUI untuk Enhanced Report Generator dengan comprehensive data preview
@@ -58,13 +70,21 @@ class EnhancedReportGUIWithPreview:
         self.connector = None
         self.template_processor = None
         self.report_generator = None
+        self.render_session = None
         self.query_results = {}
         self.variables = {}
         self.preview_data = {}
 
+        # Semua pekerjaan panjang berjalan lewat job runner (queue + root.after, bisa dibatalkan)
+        self.job_runner = JobRunner(self.root, max_workers=MAX_CONCURRENT_JOBS)
+
         # Setup GUI
         self.setup_gui()
 
+        # Preview yang sedang berjalan dibatalkan jika rentang tanggal / database berubah
+        for variable in (self.start_date, self.end_date, self.db_path):
+            variable.trace_add('write', self.on_preview_parameters_changed)
+
         # Initialize components
         self.initialize_components()
 
@@ -467,6 +487,12 @@ class EnhancedReportGUIWithPreview:
         )
         self.generate_btn.pack(side=tk.LEFT, padx=(0, 10))
 
+        self.replay_btn = ttk.Button(action_frame, text="Replay Snapshot", command=self.replay_snapshot)
+        self.replay_btn.pack(side=tk.LEFT, padx=(0, 10))
+
+        self.cancel_btn = ttk.Button(action_frame, text="Cancel", command=self.cancel_jobs, state="disabled")
+        self.cancel_btn.pack(side=tk.LEFT, padx=(0, 10))
+
         validate_btn = ttk.Button(action_frame, text="Validate Template", command=self.validate_template)
         validate_btn.pack(side=tk.LEFT, padx=5)
 
@@ -515,15 +541,22 @@ class EnhancedReportGUIWithPreview:
             messagebox.showerror("No Template", "Please select a template first")
             return
 
-        def preview_worker():
+        # Preview sebelumnya (jika masih berjalan) tidak dilanjutkan
+        self.cancel_preview()
+
+        def preview_worker(job):
+            tracing.start_run('Preview', start_date=self.start_date.get(), end_date=self.end_date.get())
             try:
                 self.log_message("=== STARTING COMPREHENSIVE DATA PREVIEW ===", "info")
                 self.update_progress(5, "Initializing preview components...")
 
                 # Initialize components if not already done
-                if not self.template_processor or not self.report_generator:
+                if not self.template_processor:
                     self.initialize_preview_components()
 
+                # Cancel: query preview yang sedang berjalan di-kill
+                job.add_cancel_callback(self.formula_engine.db_connector.cancel)
+
                 # Prepare parameters
                 parameters = {
                     'start_date': self.start_date.get(),
@@ -545,13 +578,15 @@ class EnhancedReportGUIWithPreview:
                 self.preview_data = {}
 
                 # Clear treeviews
-                for item in self.query_tree.get_children():
-                    self.query_tree.delete(item)
-                for item in self.var_tree.get_children():
-                    self.var_tree.delete(item)
+                self.clear_preview_trees()
 
-                # Execute queries
-                query_results = self.formula_engine.execute_all_queries(parameters)
+                # Execute queries (hanya yang parameternya berubah sejak preview terakhir)
+                render = self.get_render_session().refresh(parameters)
+                if job.cancelled:
+                    self.update_progress(0, "Preview cancelled")
+                    self.log_message("Preview cancelled: parameters changed", "warning")
+                    return
+                query_results = render['query_results']
                 execution_time = time.time() - start_time
 
                 self.update_progress(30, "Processing query results...")
@@ -564,9 +599,12 @@ class EnhancedReportGUIWithPreview:
                 self.update_progress(50, "Processing variables...")
                 self.log_message("Processing variables from query results...", "info")
 
-                # Process variables
-                variables = self.formula_engine.process_variables(query_results, parameters)
+                # Variables sudah dihitung ulang secara incremental oleh render session
+                variables = render['variables']
                 self.variables = variables
+                self.log_message(f"Recomputed {len(render['stats']['changed_queries'])} queries, "
+                                 f"{len(render['stats']['changed_variables'])} variables, "
+                                 f"{render['stats']['changed_cells']} cells", "info")
 
                 self.update_progress(70, "Populating variable tree...")
                 self.log_message(f"Processed {len(variables)} variables", "info")
@@ -596,22 +634,40 @@ class EnhancedReportGUIWithPreview:
 
                 self.update_progress(100, "Preview loaded successfully!")
                 self.log_message("=== COMPREHENSIVE DATA PREVIEW COMPLETED ===", "success")
+                self.report_profile(tracing.finish_run())
 
-                self.preview_status_label.config(text=f"Preview loaded: {len(query_results)} queries, {len(variables)} variables")
-
-                # Switch to preview tab
-                self.notebook.select(1)
+                job.call_in_gui(self.show_preview_loaded, len(query_results), len(variables))
 
             except Exception as e:
+                if job.cancelled:
+                    self.update_progress(0, "Preview cancelled")
+                    self.log_message(f"Preview cancelled: {e}", "warning")
+                    return
                 self.update_progress(0, "Preview failed")
                 self.log_message(f"Error loading preview: {e}", "error")
-                messagebox.showerror("Preview Error", f"Failed to load data preview: {e}")
+                job.call_in_gui(messagebox.showerror, "Preview Error", f"Failed to load data preview: {e}")
+            finally:
+                tracing.finish_run()
+
+        self.job_runner.submit(preview_worker, name='preview', group='preview', replace=True,
+                               on_finish=self.on_job_finished)
+        self.update_job_buttons()
+
+    @gui_thread
+    def clear_preview_trees(self):
+        for item in self.query_tree.get_children():
+            self.query_tree.delete(item)
+        for item in self.var_tree.get_children():
+            self.var_tree.delete(item)
 
-        # Run in separate thread
-        thread = threading.Thread(target=preview_worker)
-        thread.daemon = True
-        thread.start()
+    def show_preview_loaded(self, query_count, variable_count):
+        """Preview selesai: update status dan pindah ke tab preview"""
+        self.preview_status_label.config(text=f"Preview loaded: {query_count} queries, {variable_count} variables")
 
+        # Switch to preview tab
+        self.notebook.select(1)
+
+    @gui_thread
     def process_query_result(self, query_name, result, parameters):
         """Process and display query result in tree"""
         try:
@@ -669,6 +725,7 @@ class EnhancedReportGUIWithPreview:
             self.query_tree.insert('', 'end', text=query_name,
                                   values=(query_name, "ERROR", 0, "N/A", str(e)[:100]))
 
+    @gui_thread
     def populate_variable_tree(self, variables, query_results, parameters):
         """Populate variable tree with processed variables"""
         try:
@@ -760,6 +817,7 @@ class EnhancedReportGUIWithPreview:
             self.log_message(f"Error analyzing template placeholders: {e}", "error")
             return {"total_placeholders": 0, "resolved": 0, "unresolved": 0}
 
+    @gui_thread
     def show_preview_summary(self, parameters, query_results, variables, placeholder_analysis):
         """Show comprehensive preview summary"""
         try:
@@ -953,7 +1011,7 @@ SAMPLE DATA:
 
 FULL RESULT:
 {'-'*50}
-{json.dumps(query_data['result'], indent=2, default=str)}
+{json.dumps(query_data['result'], indent=2, default=json_default)}
 """
 
         text_widget.insert('1.0', details)
@@ -1071,7 +1129,7 @@ RECOMMENDATIONS:
                                 # Enhanced connector format
                                 rows = result[0]['rows']
                                 headers = result[0].get('headers', [])
-                                df = pd.DataFrame(rows)
+                                df = to_frame(rows)
                                 filename = os.path.join(export_dir, f"{query_name}.csv")
                                 df.to_csv(filename, index=False)
                                 self.log_message(f"Exported {query_name} to {filename}", "success")
@@ -1098,14 +1156,61 @@ RECOMMENDATIONS:
         except Exception as e:
             messagebox.showerror("Export Error", f"Failed to export data: {e}")
 
+    def get_render_session(self):
+        """Render session untuk engine dan template aktif (cache query/variable antar preview)"""
+        session = self.render_session
+        if session is None or session.formula_engine is not self.formula_engine:
+            session = RenderSession(self.formula_engine, self.template_processor)
+            self.render_session = session
+        elif session.template_processor is not self.template_processor:
+            session.set_template_processor(self.template_processor)
+        return session
+
+    def create_preview_engine(self):
+        """
+        Formula engine untuk preview dengan connector mode preview (FIRST n di
+        projection terluar, agregasi dari sampel) yang bisa dibatalkan
+        """
+        return FormulaEngineEnhanced(self.formula_path, self.connector.preview_copy(PREVIEW_ROW_LIMIT))
+
+    def cancel_preview(self):
+        """Hentikan preview yang sedang berjalan (cancel callback job men-kill query preview)"""
+        if not self.job_runner.is_busy('preview'):
+            return
+        self.job_runner.cancel_group('preview')
+        engine = getattr(self, 'formula_engine', None)
+        if engine is not None and hasattr(engine.db_connector, 'cancel'):
+            # Worker lama tetap memegang engine yang dibatalkan; preview berikutnya memakai engine baru
+            self.formula_engine = self.create_preview_engine()
+            self.render_session = None
+
+    def on_preview_parameters_changed(self, *args):
+        """Parameter preview berubah: hentikan preview yang sedang berjalan"""
+        self.cancel_preview()
+
+    def on_job_finished(self, job):
+        self.update_job_buttons()
+
+    def update_job_buttons(self):
+        """Tombol Cancel aktif selama ada job preview / generate yang berjalan"""
+        busy = self.job_runner.is_busy('preview') or self.job_runner.is_busy('generate')
+        self.cancel_btn.config(state="normal" if busy else "disabled")
+
+    def cancel_jobs(self):
+        """Batalkan preview / generate yang sedang berjalan (proses isql di-kill)"""
+        self.cancel_preview()
+        self.job_runner.cancel_group('generate')
+        self.update_job_buttons()
+
     def initialize_preview_components(self):
         """Initialize components for preview"""
         try:
             self.log_message("Initializing preview components...", "info")
 
-            # Initialize enhanced components
-            self.formula_engine = FormulaEngineEnhanced(self.formula_path, self.connector)
-            self.template_processor = TemplateProcessorEnhanced(self.template_path, self.formula_path)
+            # Initialize enhanced components (formula engine dipertahankan agar cache render session tetap valid)
+            if not getattr(self, 'formula_engine', None):
+                self.formula_engine = self.create_preview_engine()
+            self.template_processor = TemplateProcessorEnhanced(self.template_path.get(), self.formula_path)
 
             self.log_message("Preview components initialized successfully", "success")
 
@@ -1164,6 +1269,9 @@ RECOMMENDATIONS:
                 self.template_path.set(template_path)
                 self.template_ready.set(True)
 
+                # Template baru: processor dibuat ulang saat preview, query/variables tetap dari cache
+                self.template_processor = None
+
                 # Initialize formula path
                 base_path = os.path.dirname(os.path.abspath(__file__))
                 self.formula_path = os.path.join(base_path, "laporan_ffb_analysis_formula_enhanced.json")
@@ -1198,6 +1306,7 @@ RECOMMENDATIONS:
             self.db_connected.set(False)
             self.log_message(f"Connection check error: {e}", "error")
 
+    @gui_thread
     def update_status_indicator(self, connected):
         """Update database connection status indicator"""
         self.status_canvas.delete("all")
@@ -1215,7 +1324,7 @@ RECOMMENDATIONS:
 
     def connect_database(self):
         """Connect to database"""
-        def connect_worker():
+        def connect_worker(job):
             try:
                 self.log_message("Connecting to database...", "info")
                 self.update_progress(20, "Initializing connection...")
@@ -1231,7 +1340,7 @@ RECOMMENDATIONS:
 
                 if self.connector.test_connection():
                     self.update_progress(80, "Initializing formula engine...")
-                    self.formula_engine = FormulaEngineEnhanced(self.formula_path, self.connector)
+                    self.formula_engine = self.create_preview_engine()
 
                     self.update_progress(100, "Database connected successfully!")
                     self.update_status_indicator(True)
@@ -1239,7 +1348,7 @@ RECOMMENDATIONS:
                     self.log_message("Database connected successfully", "success")
 
                     # Enable preview button
-                    self.preview_btn.config(state="normal")
+                    job.call_in_gui(self.preview_btn.config, {'state': "normal"})
                 else:
                     self.update_progress(0, "Connection failed")
                     self.update_status_indicator(False)
@@ -1252,13 +1361,11 @@ RECOMMENDATIONS:
                 self.db_connected.set(False)
                 self.log_message(f"Database connection failed: {e}", "error")
 
-        thread = threading.Thread(target=connect_worker)
-        thread.daemon = True
-        thread.start()
+        self.job_runner.submit(connect_worker, name='connect', group='database')
 
     def test_connection(self):
         """Test database connection"""
-        def test_worker():
+        def test_worker(job):
             try:
                 self.log_message("Testing database connection...", "info")
                 self.update_progress(20, "Preparing test...")
@@ -1278,22 +1385,30 @@ RECOMMENDATIONS:
                     self.update_status_indicator(True)
                     self.db_connected.set(True)
                     self.log_message("Database connection test successful", "success")
-                    messagebox.showinfo("Connection Test", "Database connection is working correctly!")
+                    job.call_in_gui(messagebox.showinfo, "Connection Test", "Database connection is working correctly!")
                 else:
                     raise Exception("No results from test query")
 
             except Exception as e:
                 self.update_progress(0, "Connection test failed")
                 self.log_message(f"Connection test failed: {e}", "error")
-                messagebox.showerror("Connection Test", f"Database connection test failed: {e}")
+                job.call_in_gui(messagebox.showerror, "Connection Test", f"Database connection test failed: {e}")
 
-        thread = threading.Thread(target=test_worker)
-        thread.daemon = True
-        thread.start()
+        self.job_runner.submit(test_worker, name='test_connection', group='database')
 
-    def generate_report(self):
-        """Generate report"""
-        if not self.db_connected.get():
+    def replay_snapshot(self):
+        """Render ulang laporan dari snapshot hasil query (tanpa query ke database)"""
+        snapshot_path = filedialog.askopenfilename(
+            title="Select Extraction Snapshot",
+            initialdir="etl_reports" if os.path.isdir("etl_reports") else None,
+            filetypes=[("Snapshot Manifest", "manifest.json"), ("All Files", "*.*")]
+        )
+        if snapshot_path:
+            self.generate_report(snapshot_path=os.path.dirname(snapshot_path))
+
+    def generate_report(self, snapshot_path=None):
+        """Generate report (snapshot_path: mode replay dari snapshot, tanpa database)"""
+        if not snapshot_path and not self.db_connected.get():
             messagebox.showerror("Not Connected", "Please connect to database first")
             return
 
@@ -1305,37 +1420,52 @@ RECOMMENDATIONS:
             messagebox.showerror("Output Error", "Please specify output path")
             return
 
-        def generate_worker():
+        if self.job_runner.is_busy('generate'):
+            messagebox.showwarning("In Progress", "Report generation is already in progress")
+            return
+
+        def generate_worker(job):
+            tracing.start_run('Excel_Report', start_date=self.start_date.get(), end_date=self.end_date.get())
             try:
                 self.log_message("=== STARTING REPORT GENERATION ===", "info")
                 self.update_progress(5, "Initializing report generation...")
 
                 # Initialize components
                 self.formula_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "laporan_ffb_analysis_formula_enhanced.json")
-                self.report_generator = ExcelReportGeneratorEnhanced(
+                report_generator = ExcelReportGeneratorEnhanced(
                     template_path=self.template_path.get(),
                     formula_path=self.formula_path
                 )
+                self.report_generator = report_generator
 
-                # Prepare parameters
-                parameters = {
-                    'start_date': self.start_date.get(),
-                    'end_date': self.end_date.get(),
-                    'selected_estates': ['PGE 2B']
-                }
+                # Cancel: estate berikutnya dilewati dan query isql yang berjalan di-kill
+                job.add_cancel_callback(report_generator.cancel)
+
+                # Prepare parameters (mode replay: estate dan periode dari snapshot)
+                if snapshot_path:
+                    parameters = {'start_date': None, 'end_date': None, 'selected_estates': []}
+                    self.log_message(f"REPLAY: rendering from snapshot {snapshot_path} (no database queries)", "info")
+                else:
+                    parameters = {
+                        'start_date': self.start_date.get(),
+                        'end_date': self.end_date.get(),
+                        'selected_estates': ['PGE 2B']
+                    }
 
                 self.update_progress(20, "Generating report...")
                 self.log_message(f"Generating report for parameters: {parameters}", "info")
 
                 # Generate report
                 output_dir = os.path.dirname(self.output_path.get())
-                success, files = self.report_generator.generate_report(
+                success, files = report_generator.generate_report(
                     start_date=parameters['start_date'],
                     end_date=parameters['end_date'],
                     selected_estates=parameters['selected_estates'],
-                    output_dir=output_dir
+                    output_dir=output_dir,
+                    from_snapshot=snapshot_path
                 )
 
+                job.check_cancelled()
                 self.update_progress(90, "Finalizing report...")
 
                 if success:
@@ -1348,19 +1478,53 @@ RECOMMENDATIONS:
 
                     self.update_progress(100, "Report generated successfully!")
                     self.log_message("=== REPORT GENERATION COMPLETED ===", "success")
-
-                    messagebox.showinfo("Report Generated", f"Excel report generated successfully!\n\nOutput: {self.output_path.get()}\n\nDo you want to open the report?")
+                    self.report_profile(tracing.finish_run())
+                    return self.output_path.get()
                 else:
                     raise Exception("Report generation failed")
 
-            except Exception as e:
-                self.update_progress(0, "Report generation failed")
-                self.log_message(f"Report generation failed: {e}", "error")
-                messagebox.showerror("Generation Error", f"Failed to generate report: {e}")
+            finally:
+                tracing.finish_run()
+
+        self.generate_btn.config(state="disabled")
+        self.replay_btn.config(state="disabled")
+        self.job_runner.submit(
+            generate_worker, name='generate', group='generate',
+            on_success=self.on_generate_success,
+            on_error=self.on_generate_error,
+            on_cancel=self.on_generate_cancelled,
+            on_finish=self.on_generate_finished
+        )
+        self.update_job_buttons()
+
+    def on_generate_success(self, output_path):
+        messagebox.showinfo("Report Generated", f"Excel report generated successfully!\n\nOutput: {output_path}\n\nDo you want to open the report?")
+
+    def on_generate_error(self, error):
+        self.update_progress(0, "Report generation failed")
+        self.log_message(f"Report generation failed: {error}", "error")
+        messagebox.showerror("Generation Error", f"Failed to generate report: {error}")
 
-        thread = threading.Thread(target=generate_worker)
-        thread.daemon = True
-        thread.start()
+    def on_generate_cancelled(self):
+        self.update_progress(0, "Report generation cancelled")
+        self.log_message("Report generation cancelled", "warning")
+
+    def on_generate_finished(self, job):
+        self.generate_btn.config(state="normal")
+        self.replay_btn.config(state="normal")
+        self.update_job_buttons()
+
+    def report_profile(self, tracer):
+        """Tampilkan breakdown per stage di log dan simpan profil run ke etl_reports/"""
+        try:
+            for line in tracer.format_breakdown().splitlines():
+                if line.strip():
+                    self.log_message(line, "info")
+
+            json_path, folded_path = tracer.export("etl_reports")
+            self.log_message(f"Profile saved to: {json_path} (flame graph: {folded_path})", "success")
+        except Exception as e:
+            self.log_message(f"Failed to save profile: {e}", "error")
 
     def validate_template(self):
         """Validate selected template"""
@@ -1426,21 +1590,22 @@ RECOMMENDATIONS:
         close_btn = ttk.Button(help_window, text="Close", command=help_window.destroy)
         close_btn.pack(pady=20)
 
+    @gui_thread
     def log_message(self, message, level="info"):
-        """Log message to debug tab"""
+        """Log message to debug tab (aman dipanggil dari worker thread)"""
         timestamp = datetime.now().strftime("%H:%M:%S")
         log_entry = f"[{timestamp}] {message}\n"
 
         self.debug_text.insert(tk.END, log_entry, level)
         self.debug_text.see(tk.END)
 
+    @gui_thread
     def update_progress(self, value, message=""):
-        """Update progress bar and label"""
+        """Update progress bar and label (aman dipanggil dari worker thread)"""
         self.progress_var.set(value)
         if message:
             self.progress_label.config(text=message)
         self.status_label.config(text=f"Status: {message}")
-        self.root.update_idletasks()
 
     def clear_debug_log(self):
         """Clear debug log"""
@@ -1556,6 +1721,8 @@ def main():
     # Handle window closing
     def on_closing():
         if messagebox.askokcancel("Quit", "Do you want to quit the application?"):
+            # Job yang masih berjalan dibatalkan agar proses isql tidak tertinggal
+            app.job_runner.shutdown()
             root.destroy()
 
     root.protocol("WM_DELETE_WINDOW", on_closing)
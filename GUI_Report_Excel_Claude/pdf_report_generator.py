@@ -1,12 +1,24 @@
 """
 PDF Report Generator
 Mengkonversi Excel report ke format PDF dengan professional formatting
+
+Dua jalur:
+- generate_pdf_from_data(): render langsung dari data in-memory (hasil query dan
+  variable) memakai layout yang dikompilasi sekali; tabel besar ditulis oleh
+  PagedTableWriter sebagai Table per halaman. Dipakai saat Excel dan PDF dibuat
+  bersamaan dari data yang sama.
+- generate_pdf_report(): konversi file Excel yang sudah disimpan (fallback untuk
+  file lama)
 """
 
 import os
+import json
 import logging
-from datetime import datetime
-from typing import Dict, List, Any, Optional
+import threading
+from datetime import datetime, date
+from typing import Dict, List, Any, Optional, Iterator, Tuple
+from itertools import chain
+from xml.sax.saxutils import escape
 import tempfile
 import shutil
 
@@ -25,6 +37,7 @@ try:
     from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
     from reportlab.lib import colors
     from reportlab.lib.units import inch
+    from reportlab.lib.pagesizes import landscape
     REPORTLAB_AVAILABLE = True
 except ImportError:
     REPORTLAB_AVAILABLE = False
@@ -34,6 +47,437 @@ import pandas as pd
 import openpyxl
 from openpyxl.styles import Font, Alignment, Border, Side, PatternFill
 
+try:
+    from result_set import ResultSet
+except ImportError:
+    ResultSet = None
+
+# Jumlah row data maksimal per chunk Table (header diulang di setiap chunk);
+# dihitung ulang dari tinggi halaman saat layout dikompilasi
+DEFAULT_CHUNK_ROWS = 40
+
+# Font tabel data: plain string satu baris sehingga tinggi row tetap
+TABLE_FONT_SIZE = 7
+TABLE_ROW_PADDING = 2
+PAGE_MARGIN = 30
+
+_STYLES = None
+_STYLES_LOCK = threading.Lock()
+
+
+def get_pdf_styles() -> Dict[str, Any]:
+    """
+    ParagraphStyle / TableStyle dibuat sekali per proses lalu dipakai ulang oleh
+    semua report (getSampleStyleSheet dan TableStyle baru per tabel cukup mahal)
+    """
+    global _STYLES
+    if _STYLES is not None:
+        return _STYLES
+
+    with _STYLES_LOCK:
+        if _STYLES is None:
+            sample = getSampleStyleSheet()
+            _STYLES = {
+                'title': ParagraphStyle(
+                    'DataTitle', parent=sample['Heading1'], fontSize=16,
+                    spaceAfter=12, alignment=1, textColor=colors.darkblue
+                ),
+                'subtitle': ParagraphStyle(
+                    'DataSubtitle', parent=sample['Normal'], fontSize=10,
+                    spaceAfter=12, alignment=1, textColor=colors.HexColor('#4A5568')
+                ),
+                'heading': ParagraphStyle(
+                    'DataHeading', parent=sample['Heading2'], fontSize=12,
+                    spaceBefore=10, spaceAfter=6, textColor=colors.darkgreen
+                ),
+                'cell': ParagraphStyle(
+                    'DataCell', parent=sample['Normal'], fontSize=TABLE_FONT_SIZE,
+                    leading=TABLE_FONT_SIZE + 1, alignment=1
+                ),
+                'note': ParagraphStyle(
+                    'DataNote', parent=sample['Normal'], fontSize=7,
+                    textColor=colors.grey, spaceBefore=2
+                ),
+                'fields_table': TableStyle([
+                    ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#E2E8F0')),
+                    ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+                    ('FONTSIZE', (0, 0), (-1, -1), 9),
+                    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+                    ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+                    ('BOTTOMPADDING', (0, 0), (-1, -1), 4)
+                ]),
+                'data_table': TableStyle([
+                    ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+                    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+                    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+                    ('FONTSIZE', (0, 0), (-1, -1), TABLE_FONT_SIZE),
+                    ('LEADING', (0, 0), (-1, -1), TABLE_FONT_SIZE + 1),
+                    ('TOPPADDING', (0, 0), (-1, -1), TABLE_ROW_PADDING),
+                    ('BOTTOMPADDING', (0, 0), (-1, -1), TABLE_ROW_PADDING),
+                    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+                    ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#F5F5DC')]),
+                    ('GRID', (0, 0), (-1, -1), 0.5, colors.black)
+                ])
+            }
+    return _STYLES
+
+
+# Style per jenis row (summary divisi, grand total, row kerani/mandor/asisten); command dibuat
+# sekali per jenis dan hanya index row-nya yang diganti per chunk.
+# (command, nilai[, (kolom awal, kolom akhir)])
+ROW_KIND_STYLES = {
+    'summary': [
+        ('BACKGROUND', '#4299E1'),
+        ('TEXTCOLOR', '#FFFFFF'),
+        ('FONTNAME', 'Helvetica-Bold')
+    ],
+    'total': [
+        ('BACKGROUND', '#2E4057'),
+        ('TEXTCOLOR', '#FFFFFF'),
+        ('FONTNAME', 'Helvetica-Bold')
+    ],
+    'kerani': [
+        ('BACKGROUND', '#FFF5F5'),
+        ('TEXTCOLOR', '#E53E3E', (5, 6)),
+        ('FONTNAME', 'Helvetica-Bold', (5, 5))
+    ],
+    'mandor': [
+        ('BACKGROUND', '#F0FFF4'),
+        ('TEXTCOLOR', '#38A169', (5, 5)),
+        ('FONTNAME', 'Helvetica-Bold', (5, 5))
+    ],
+    'asisten': [
+        ('BACKGROUND', '#F0F9FF'),
+        ('TEXTCOLOR', '#3182CE', (5, 5)),
+        ('FONTNAME', 'Helvetica-Bold', (5, 5))
+    ]
+}
+
+# Layout laporan kinerja kerani/mandor/asisten (multi estate)
+EMPLOYEE_PERFORMANCE_LAYOUT = {
+    'title': 'LAPORAN KINERJA KERANI, MANDOR, DAN ASISTEN',
+    'orientation': 'landscape',
+    'sections': [
+        {'type': 'employee_performance', 'source': 'employee_performance'}
+    ]
+}
+
+EMPLOYEE_PERFORMANCE_COLUMNS = [
+    ('ESTATE', 'estate', 1.2),
+    ('DIVISI', 'division', 1.2),
+    ('KARYAWAN', 'employee', 2),
+    ('ROLE', 'role', 0.9),
+    ('JUMLAH<br/>TRANSAKSI', 'transactions', 1),
+    ('PERSENTASE<br/>TERVERIFIKASI', 'percentage', 1.4),
+    ('KETERANGAN<br/>PERBEDAAN', 'notes', 1.6)
+]
+
+
+class PagedTableWriter:
+    """
+    Menulis tabel besar sebagai rangkaian Table seukuran satu halaman dengan header
+    diulang, bukan satu Table raksasa yang harus dipecah ulang oleh reportlab:
+
+    - Cell berupa plain string (satu baris, dipotong sesuai lebar kolom); teks yang
+      mengandung '<' atau '&' tetap ditulis apa adanya. Paragraph hanya dipakai untuk
+      row yang ditandai markup=True oleh pemanggil
+    - Lebar kolom tetap, jadi reportlab tidak mengukur setiap cell
+    - Style per row (summary / total) dikumpulkan per chunk dari command yang sudah
+      dibuat sebelumnya; zebra row memakai ROWBACKGROUNDS di TableStyle bersama
+    - doc.build() membuang setiap chunk setelah digambar, sehingga memori puncak
+      sebanding dengan data string, bukan dengan objek flowable per cell
+
+        writer = PagedTableWriter(story, headers, col_widths, chunk_rows=45)
+        for row in rows:
+            writer.add_row([...], kind='summary' if row['is_total'] else None)
+        writer.close()
+    """
+
+    def __init__(self, story: List[Any], headers: List[str], col_widths: List[float],
+                 chunk_rows: int = DEFAULT_CHUNK_ROWS, table_style=None, cell_style=None):
+        styles = get_pdf_styles()
+        self.story = story
+        self.col_widths = col_widths
+        self.table_style = table_style or styles['data_table']
+        self.cell_style = cell_style or styles['cell']
+        self.limits = [max(4, int(width / (TABLE_FONT_SIZE * 0.5))) for width in col_widths]
+
+        # Header multi-baris ('JUMLAH<br/>TRANSAKSI') ditulis sebagai plain string '\n'
+        self.header_row = [str(header).replace('<br/>', '\n') for header in headers]
+        header_lines = max((header.count('\n') + 1 for header in self.header_row), default=1)
+        self.chunk_rows = max(1, chunk_rows - (header_lines - 1))
+
+        self._kind_commands = {}
+        for kind, commands in ROW_KIND_STYLES.items():
+            compiled = []
+            for command in commands:
+                name, value = command[0], command[1]
+                first, last = command[2] if len(command) > 2 else (0, -1)
+                compiled.append((name, first, last, colors.HexColor(value) if value.startswith('#') else value))
+            self._kind_commands[kind] = compiled
+        self._rows = []
+        self._commands = []
+        self.row_count = 0
+        self.chunk_count = 0
+
+    def add_row(self, cells: List[Any], kind: str = None, markup: bool = False):
+        """
+        Tambah satu row (nilai sudah diformat; non-string diformat dengan format_cell)
+
+        Args:
+            cells: Nilai cell
+            kind: Jenis row untuk style khusus ('summary', 'total') atau None
+            markup: True jika cell string berisi markup reportlab ('<b>', '<br/>');
+                    nilai non-string di row ini di-escape sebelum masuk Paragraph
+        """
+        row = []
+        for value, limit in zip(cells, self.limits):
+            text = value if isinstance(value, str) else format_cell(value)
+            if markup:
+                row.append(Paragraph(text if isinstance(value, str) else escape(text), self.cell_style))
+            elif len(text) > limit:
+                row.append(text[:limit - 1] + '…')
+            else:
+                row.append(text)
+        self._rows.append(row)
+
+        commands = self._kind_commands.get(kind) if kind else None
+        if commands:
+            index = len(self._rows)  # row 0 = header
+            self._commands.extend((name, (first, index), (last, index), value)
+                                  for name, first, last, value in commands)
+
+        self.row_count += 1
+        if len(self._rows) >= self.chunk_rows:
+            self.flush()
+
+    def flush(self):
+        """Tulis row yang terkumpul sebagai satu Table (tabel kosong tetap mendapat header)"""
+        if not self._rows and self.chunk_count:
+            return
+        table = Table([self.header_row] + self._rows, colWidths=self.col_widths,
+                      repeatRows=1, style=self.table_style)
+        if self._commands:
+            table.setStyle(self._commands)
+        self.story.append(table)
+        self.chunk_count += 1
+        self._rows = []
+        self._commands = []
+
+    def close(self) -> int:
+        """Flush sisa row; return jumlah row yang ditulis"""
+        if self._rows or not self.chunk_count:
+            self.flush()
+        return self.row_count
+
+
+def _lookup(data: Dict[str, Any], key: str) -> Any:
+    """Nilai data[key]; key bertitik ('total_summary.total_weight') masuk ke dict bersarang"""
+    if key in data:
+        return data[key]
+    value = data
+    for part in key.split('.'):
+        if not isinstance(value, dict) or part not in value:
+            return None
+        value = value[part]
+    return value
+
+
+def format_cell(value: Any, spec: Optional[str] = None) -> str:
+    """Nilai cell sebagai plain string (spec = format spec Python, mis. ',.2f')"""
+    if value is None:
+        return ''
+    if spec:
+        try:
+            return format(value, spec)
+        except (TypeError, ValueError):
+            pass
+    if isinstance(value, bool):
+        return str(value)
+    if isinstance(value, int):
+        return f"{value:,}"
+    if isinstance(value, float):
+        if value != value:  # NaN
+            return ''
+        return f"{value:,.0f}" if value.is_integer() else f"{value:,.2f}"
+    if isinstance(value, (datetime, date)):
+        return value.strftime('%Y-%m-%d')
+    if isinstance(value, (list, tuple, set)):
+        return ', '.join(str(item) for item in sorted(value, key=str))
+    return str(value)
+
+
+def table_rows(value: Any) -> Optional[Tuple[List[str], Iterator[Dict[str, Any]]]]:
+    """
+    (headers, iterator row dict) dari hasil tabular apa pun: DataFrame, ResultSet,
+    blok isql [{'headers', 'rows'}], list of dict atau dict of dict (summary per key).
+    None jika value bukan tabel.
+    """
+    if isinstance(value, pd.DataFrame):
+        headers = [str(column) for column in value.columns]
+        return headers, (dict(zip(headers, row)) for row in value.itertuples(index=False, name=None))
+    if ResultSet is not None and isinstance(value, ResultSet):
+        return list(value.headers), value.rows()
+    if isinstance(value, dict) and value and all(isinstance(row, dict) for row in value.values()):
+        value = list(value.values())
+    if isinstance(value, Iterator):
+        # Generator row dict: header dari row pertama, sisanya tetap lazy
+        first = next(value, None)
+        if not isinstance(first, dict):
+            return None
+        return list(first.keys()), chain([first], value)
+    if not isinstance(value, list) or not value:
+        return None
+    if len(value) == 1 and isinstance(value[0], dict) and 'headers' in value[0] and 'rows' in value[0]:
+        block = value[0]
+        rows = block['rows']
+        if ResultSet is not None and isinstance(rows, ResultSet):
+            return list(rows.headers), rows.rows()
+        return list(block.get('headers') or (rows[0].keys() if rows else [])), iter(rows)
+    if all(isinstance(row, dict) for row in value):
+        return list(value[0].keys()), iter(value)
+    return None
+
+
+class CompiledLayout:
+    """
+    Layout PDF yang sudah dikompilasi: ukuran halaman, lebar kolom, format cell dan
+    jumlah row per chunk dihitung sekali lalu dipakai untuk setiap render
+
+    Spec layout (dict, bisa disimpan di formula JSON sebagai 'pdf_layout'):
+
+        {
+            "title": "LAPORAN ANALISIS FFB",
+            "orientation": "landscape",
+            "sections": [
+                {"type": "fields", "title": "Ringkasan",
+                 "fields": [{"label": "Total Transaksi", "key": "total_summary.total_transactions"}]},
+                {"type": "table", "title": "Per Divisi", "source": "divisions", "max_rows": 5000,
+                 "columns": [{"header": "Divisi", "key": "division_name", "width": 2},
+                             {"header": "Berat", "key": "total_weight", "format": ",.2f"}]}
+            ]
+        }
+
+    Section table tanpa 'columns' memakai semua kolom sumber (lebar dibagi rata).
+    'row_kind_key' menunjuk field row yang berisi jenis row ('summary' / 'total')
+    untuk style khusus.
+    """
+
+    def __init__(self, spec: Dict[str, Any]):
+        self.spec = spec
+        self.title = spec.get('title', 'LAPORAN ANALISIS FFB')
+        self.pagesize = landscape(A4) if spec.get('orientation', 'portrait') == 'landscape' else A4
+        self.frame_width = self.pagesize[0] - 2 * PAGE_MARGIN
+        frame_height = self.pagesize[1] - 2 * PAGE_MARGIN
+
+        # Row plain string = satu baris font + padding; sisakan satu row untuk header
+        row_height = TABLE_FONT_SIZE + 1 + 2 * TABLE_ROW_PADDING
+        self.chunk_rows = spec.get('chunk_rows') or max(10, int(frame_height // row_height) - 2)
+        self.sections = [self._compile_section(section) for section in spec.get('sections', [])]
+
+    def _compile_section(self, section: Dict[str, Any]) -> Dict[str, Any]:
+        compiled = dict(section)
+        if section.get('type') == 'table' and section.get('columns'):
+            columns = section['columns']
+            compiled['headers'] = [column.get('header', column['key']) for column in columns]
+            compiled['keys'] = [column['key'] for column in columns]
+            compiled['formats'] = [column.get('format') for column in columns]
+            compiled['col_widths'] = self.column_widths([column.get('width', 1) for column in columns])
+        return compiled
+
+    def column_widths(self, weights: List[float]) -> List[float]:
+        """Lebar kolom tetap (reportlab tidak perlu mengukur setiap cell)"""
+        total = float(sum(weights)) or 1.0
+        return [self.frame_width * weight / total for weight in weights]
+
+
+def employee_performance_rows(results: List[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+    """
+    Row laporan kinerja per divisi: row summary divisi, lalu KERANI, MANDOR, ASISTEN,
+    dan grand total di akhir. Dibuat lazy (generator) agar laporan banyak estate
+    tidak menyimpan seluruh row sekaligus.
+
+    Args:
+        results: Hasil analisis per divisi: estate, division, kerani_total, mandor_total,
+                 asisten_total, verifikasi_total (opsional), employee_details
+                 {emp_id: {name, kerani, mandor, asisten, kerani_verified, kerani_differences}}
+    """
+    grand_kerani = 0
+    grand_verified = 0
+    has_verification = False
+
+    for result in results:
+        estate = result.get('estate', '')
+        division = result.get('division', '')
+        kerani_total = result.get('kerani_total', 0) or 0
+        verified_total = result.get('verifikasi_total')
+        grand_kerani += kerani_total
+
+        percentage = ''
+        if verified_total is not None:
+            has_verification = True
+            grand_verified += verified_total
+            rate = (verified_total / kerani_total * 100) if kerani_total > 0 else 0
+            percentage = f"{rate:.2f}% ({verified_total})"
+
+        yield {'estate': estate, 'division': division, 'employee': f"== {division} TOTAL ==",
+               'role': 'SUMMARY', 'transactions': kerani_total, 'percentage': percentage,
+               'notes': '', '_kind': 'summary'}
+
+        employees = list(result.get('employee_details', {}).values())
+        for role in ('kerani', 'mandor', 'asisten'):
+            for emp_data in employees:
+                count = emp_data.get(role, 0) or 0
+                if count <= 0:
+                    continue
+
+                percentage = ''
+                notes = ''
+                if role == 'kerani':
+                    if 'kerani_verified' in emp_data:
+                        verified = emp_data.get('kerani_verified', 0)
+                        differences = emp_data.get('kerani_differences', 0)
+                        percentage = f"{verified / count * 100:.2f}% ({verified})"
+                        difference_rate = (differences / verified * 100) if verified > 0 else 0
+                        notes = f"{differences} perbedaan ({difference_rate:.1f}%)"
+                elif kerani_total > 0:
+                    # Mandor/asisten: % transaksi yang ia buat per total kerani di divisi
+                    percentage = f"{count / kerani_total * 100:.2f}%"
+
+                yield {'estate': estate, 'division': division, 'employee': emp_data.get('name', ''),
+                       'role': role.upper(), 'transactions': count, 'percentage': percentage,
+                       'notes': notes, '_kind': role}
+
+    percentage = ''
+    if has_verification:
+        rate = (grand_verified / grand_kerani * 100) if grand_kerani > 0 else 0
+        percentage = f"{rate:.2f}% ({grand_verified})"
+    yield {'estate': '=== GRAND TOTAL ===', 'division': '', 'employee': '', 'role': '',
+           'transactions': grand_kerani, 'percentage': percentage, 'notes': '', '_kind': 'total'}
+
+
+def default_layout_spec(data: Dict[str, Any], title: str = None) -> Dict[str, Any]:
+    """
+    Spec layout otomatis: parameter dan nilai skalar sebagai tabel field, lalu satu
+    tabel per hasil tabular (urutan sesuai data)
+    """
+    fields = []
+    sections = []
+    for key, value in data.items():
+        if isinstance(value, (str, int, float, bool, datetime, date)) or value is None:
+            fields.append({'label': key.replace('_', ' ').title(), 'key': key})
+        elif isinstance(value, Iterator) or table_rows(value) is not None:
+            # Generator tidak diperiksa di sini (row pertamanya akan terpakai)
+            sections.append({'type': 'table', 'title': key.replace('_', ' ').upper(), 'source': key})
+
+    if fields:
+        sections.insert(0, {'type': 'fields', 'title': 'PARAMETER & VARIABLE', 'fields': fields})
+    return {
+        'title': title or 'LAPORAN ANALISIS FFB',
+        'orientation': 'landscape',
+        'sections': sections
+    }
+
 class PDFReportGenerator:
     """
     Generator untuk membuat PDF report dari Excel template dan data
@@ -42,6 +486,188 @@ class PDFReportGenerator:
     def __init__(self):
         """Initialize PDF report generator"""
         self.logger = logging.getLogger(__name__)
+        self._layout_cache = {}
+
+    def compile_layout(self, spec: Dict[str, Any]) -> CompiledLayout:
+        """Kompilasi spec layout (di-cache per spec, dipakai ulang antar estate/run)"""
+        key = json.dumps(spec, sort_keys=True, default=str)
+        layout = self._layout_cache.get(key)
+        if layout is None:
+            layout = CompiledLayout(spec)
+            self._layout_cache[key] = layout
+        return layout
+
+    def generate_pdf_from_data(self, data: Dict[str, Any], output_path: str,
+                               layout: Any = None, title: str = None, subtitle: str = None) -> str:
+        """
+        Render PDF langsung dari data in-memory (tanpa membuka ulang file Excel)
+
+        Args:
+            data: Data report (parameter, variable, hasil query / tabel summary)
+            output_path: Path output PDF
+            layout: CompiledLayout, spec layout (dict) atau None (layout otomatis)
+            title: Judul (override judul layout)
+            subtitle: Baris di bawah judul (mis. periode dan estate)
+
+        Returns:
+            Path ke generated PDF file
+        """
+        if not REPORTLAB_AVAILABLE:
+            raise ImportError("reportlab is required for PDF generation")
+
+        try:
+            if layout is None:
+                layout = default_layout_spec(data, title)
+            if not isinstance(layout, CompiledLayout):
+                layout = self.compile_layout(layout)
+
+            styles = get_pdf_styles()
+            story = [Paragraph(title or layout.title, styles['title'])]
+            if subtitle:
+                story.append(Paragraph(subtitle, styles['subtitle']))
+
+            table_count = 0
+            row_count = 0
+            for section in layout.sections:
+                if section.get('type') == 'fields':
+                    self._add_fields_section(section, data, story, styles, layout)
+                elif section.get('type') in ('table', 'employee_performance'):
+                    if section['type'] == 'table':
+                        rows = self._add_data_table_section(section, data, story, styles, layout)
+                    else:
+                        rows = self._add_employee_performance_section(section, data, story, styles, layout)
+                    if rows is not None:
+                        table_count += 1
+                        row_count += rows
+
+            output_dir = os.path.dirname(output_path)
+            if output_dir:
+                os.makedirs(output_dir, exist_ok=True)
+
+            doc = SimpleDocTemplate(
+                output_path, pagesize=layout.pagesize,
+                leftMargin=PAGE_MARGIN, rightMargin=PAGE_MARGIN,
+                topMargin=PAGE_MARGIN, bottomMargin=PAGE_MARGIN,
+                title=title or layout.title
+            )
+            doc.build(story)
+
+            self.logger.info(f"PDF rendered from data: {output_path} ({table_count} tables, {row_count} rows)")
+            return output_path
+
+        except Exception as e:
+            self.logger.error(f"Error rendering PDF from data: {e}")
+            raise
+
+    def _add_fields_section(self, section: Dict[str, Any], data: Dict[str, Any], story, styles,
+                            layout: CompiledLayout):
+        """Section label/nilai (parameter, variable skalar, total)"""
+        rows = []
+        for field in section.get('fields', []):
+            value = _lookup(data, field['key'])
+            if value is None and not field.get('show_empty', False):
+                continue
+            rows.append([field.get('label', field['key']), format_cell(value, field.get('format'))])
+
+        if not rows:
+            return
+        if section.get('title'):
+            story.append(Paragraph(section['title'], styles['heading']))
+        widths = layout.column_widths([1, 2]) if layout.frame_width < 600 else layout.column_widths([1, 3])
+        story.append(Table(rows, colWidths=widths, style=styles['fields_table'], hAlign='LEFT'))
+        story.append(Spacer(1, 8))
+
+    def _add_data_table_section(self, section: Dict[str, Any], data: Dict[str, Any], story, styles,
+                                layout: CompiledLayout) -> Optional[int]:
+        """
+        Section tabel: row sumber diformat ke plain string dan ditulis oleh
+        PagedTableWriter sebagai Table per halaman (header diulang)
+
+        Returns:
+            Jumlah row yang dirender, None jika sumber tidak ada / bukan tabel
+        """
+        source = table_rows(_lookup(data, section['source']))
+        if source is None:
+            return None
+
+        source_headers, rows = source
+        if 'keys' in section:
+            headers, keys, formats, widths = (section['headers'], section['keys'],
+                                              section['formats'], section['col_widths'])
+        else:
+            headers = keys = source_headers
+            formats = [None] * len(keys)
+            widths = layout.column_widths([1] * len(keys))
+        if not keys:
+            return None
+
+        max_rows = section.get('max_rows')
+        kind_key = section.get('row_kind_key')
+
+        if section.get('title'):
+            story.append(Paragraph(section['title'], styles['heading']))
+
+        writer = PagedTableWriter(story, headers, widths, section.get('chunk_rows') or layout.chunk_rows,
+                                  styles['data_table'], styles['cell'])
+        total = 0
+        for row in rows:
+            total += 1
+            if max_rows is not None and writer.row_count >= max_rows:
+                continue
+            writer.add_row([format_cell(row.get(key), spec) for key, spec in zip(keys, formats)],
+                           row.get(kind_key) if kind_key else None)
+        rendered = writer.close()
+
+        if total > rendered:
+            story.append(Paragraph(f"... {total - rendered:,} row lainnya tidak ditampilkan "
+                                   f"(maksimal {max_rows:,} row)", styles['note']))
+        story.append(Spacer(1, 8))
+        return rendered
+
+    def _add_employee_performance_section(self, section: Dict[str, Any], data: Dict[str, Any], story, styles,
+                                          layout: CompiledLayout) -> Optional[int]:
+        """Section kinerja kerani/mandor/asisten (lihat employee_performance_rows)"""
+        results = _lookup(data, section.get('source', 'employee_performance'))
+        if not results:
+            return None
+
+        if section.get('title'):
+            story.append(Paragraph(section['title'], styles['heading']))
+
+        estates = {result.get('estate') for result in results}
+        story.append(Paragraph(f"<b>RINGKASAN ANALISIS:</b> {len(estates)} Estate • {len(results)} Divisi",
+                               styles['subtitle']))
+
+        headers = [header for header, _, _ in EMPLOYEE_PERFORMANCE_COLUMNS]
+        keys = [key for _, key, _ in EMPLOYEE_PERFORMANCE_COLUMNS]
+        widths = layout.column_widths([width for _, _, width in EMPLOYEE_PERFORMANCE_COLUMNS])
+        writer = PagedTableWriter(story, headers, widths, section.get('chunk_rows') or layout.chunk_rows,
+                                  styles['data_table'], styles['cell'])
+        for row in employee_performance_rows(results):
+            writer.add_row([format_cell(row[key]) for key in keys], row['_kind'])
+        rendered = writer.close()
+        story.append(Spacer(1, 8))
+        return rendered
+
+    def generate_employee_performance_pdf(self, results: List[Dict[str, Any]], output_path: str,
+                                          start_date: Any = None, end_date: Any = None) -> str:
+        """
+        Laporan kinerja kerani, mandor dan asisten untuk banyak estate sekaligus
+
+        Args:
+            results: Hasil analisis per divisi (lihat employee_performance_rows)
+            output_path: Path output PDF
+            start_date: Awal periode (str / date)
+            end_date: Akhir periode (str / date)
+
+        Returns:
+            Path ke generated PDF file
+        """
+        subtitle = None
+        if start_date and end_date:
+            subtitle = f"Periode: {format_cell(start_date)} - {format_cell(end_date)}"
+        return self.generate_pdf_from_data({'employee_performance': results}, output_path,
+                                           EMPLOYEE_PERFORMANCE_LAYOUT, subtitle=subtitle)
 
     def generate_pdf_report(self, excel_file_path: str, output_path: str = None) -> str:
         """
@@ -0,0 +1,416 @@
+#!/usr/bin/env python3
+"""
+Render Session - incremental re-render untuk GUI preview
+Menyimpan hasil query, variables dan nilai cell dari render terakhir beserta
+dependency link cell -> variable -> query -> parameter, sehingga perubahan
+tanggal atau template hanya menghitung ulang bagian yang terpengaruh
+"""
+
+import re
+import time
+import logging
+from typing import Dict, List, Any, Optional, Set, Tuple
+
+import pandas as pd
+
+# Parameter yang membentuk suffix tabel bulanan (FFBSCANNERDATA{month})
+MONTH_SOURCE_PARAMETERS = ('start_date',)
+
+# Parameter predicate BETWEEN yang disisipkan engine untuk query dengan 'date_column'
+DATE_RANGE_PARAMETERS = ('start_date', 'end_date')
+
+TOKEN_PATTERN = re.compile(r'\{(\w+)(?::[^}]*)?\}')
+
+# Prefix query sumber di formula calculated_variables (SUM(raw_ffb_data.BUNCHES))
+SOURCE_PREFIX_PATTERN = re.compile(r'\b([A-Za-z_]\w*)\s*\.')
+
+
+def _values_equal(old: Any, new: Any) -> bool:
+    """Bandingkan dua nilai hasil query/variable (DataFrame dibandingkan isinya)"""
+    if isinstance(old, pd.DataFrame) or isinstance(new, pd.DataFrame):
+        if not (isinstance(old, pd.DataFrame) and isinstance(new, pd.DataFrame)):
+            return False
+        return old.equals(new)
+
+    try:
+        return bool(old == new)
+    except Exception:
+        return False
+
+
+class RenderSession:
+    """
+    Session render yang mengingat hasil run terakhir dan hanya menghitung ulang
+    query, variable dan cell yang dependensinya berubah
+    """
+
+    def __init__(self, formula_engine, template_processor=None):
+        """
+        Inisialisasi render session
+
+        Args:
+            formula_engine: FormulaEngineEnhanced atau EnhancedDynamicFormulaEngine
+            template_processor: TemplateProcessorEnhanced atau AdaptiveExcelProcessor (opsional)
+        """
+        self.formula_engine = formula_engine
+        self.template_processor = template_processor
+        self.logger = logging.getLogger(__name__)
+
+        # State dari render terakhir
+        self.parameters = {}
+        self.query_signatures = {}
+        self.query_results = {}
+        self.variables = {}
+        self.cells = {}  # (sheet, cell) -> value
+
+        # Dependency links
+        self.query_dependencies = self._build_query_dependencies()
+        self.variable_dependencies = self._build_variable_dependencies()
+        self.calculated_dependencies = self._build_calculated_dependencies()
+        self.cell_dependencies = self._build_cell_dependencies()
+
+        self.last_stats = {}
+
+    # ------------------------------------------------------------------
+    # Dependency graph
+    # ------------------------------------------------------------------
+
+    def _query_definitions(self) -> Dict[str, Dict]:
+        """Definisi query dari engine (format kedua engine berbeda)"""
+        engine = self.formula_engine
+        if hasattr(engine, 'dynamic_queries'):
+            return engine.dynamic_queries or {}
+        return getattr(engine, 'formulas', {}).get('queries', {})
+
+    def _variable_definitions(self) -> Dict[str, Dict]:
+        """Definisi variable dari engine, di-flatten dari kategori"""
+        categories = self._formula_config().get('variables', {})
+
+        definitions = {}
+        for category_vars in categories.values():
+            if isinstance(category_vars, dict):
+                for var_name, var_config in category_vars.items():
+                    if isinstance(var_config, dict):
+                        definitions[var_name] = var_config
+        return definitions
+
+    def _formula_config(self) -> Dict[str, Any]:
+        """Isi formula JSON dari engine"""
+        engine = self.formula_engine
+        if hasattr(engine, 'formula_data'):
+            return engine.formula_data or {}
+        return getattr(engine, 'formulas', {}) or {}
+
+    def _build_query_dependencies(self) -> Dict[str, Set[str]]:
+        """Query -> parameter yang dipakai di SQL (termasuk predicate dari 'date_column')"""
+        dependencies = {}
+        for query_name, query_config in self._query_definitions().items():
+            params = set(TOKEN_PATTERN.findall(query_config.get('sql', '')))
+            if 'month' in params:
+                params.update(MONTH_SOURCE_PARAMETERS)
+            if query_config.get('date_column'):
+                params.update(DATE_RANGE_PARAMETERS)
+            dependencies[query_name] = params
+        return dependencies
+
+    def _build_variable_dependencies(self) -> Dict[str, Set[str]]:
+        """Variable -> query/parameter yang dibaca (None = selalu dihitung ulang)"""
+        dependencies = {}
+        for var_name, var_config in self._variable_definitions().items():
+            var_type = var_config.get('type', 'static')
+
+            if var_type == 'static':
+                dependencies[var_name] = set()
+            elif var_type == 'dynamic':
+                dependencies[var_name] = None
+            elif var_type == 'parameter':
+                dependencies[var_name] = {var_config.get('value', var_name)}
+            elif var_type == 'formatting':
+                dependencies[var_name] = set(var_config.get('parameters', []))
+            elif var_type in ('query_result', 'query_aggregation'):
+                dependencies[var_name] = {var_config.get('query')}
+            elif var_type == 'calculation':
+                dependencies[var_name] = set(TOKEN_PATTERN.findall(var_config.get('expression', '')))
+            else:
+                dependencies[var_name] = None
+        return dependencies
+
+    def _build_calculated_dependencies(self) -> Dict[str, Set[str]]:
+        """
+        calculated_variables -> query sumber agregatnya dan parameter SQL sumber itu
+
+        Sumber yang di-pushdown (aggregate_only) tidak ada di query_results, jadi
+        perubahan tanggal hanya terlihat dari parameter query sumber.
+        """
+        formulas = self._formula_config()
+        queries = self._query_definitions()
+        default_source = formulas.get('calculated_variables_source')
+
+        dependencies = {}
+        for var_name, definition in (formulas.get('calculated_variables') or {}).items():
+            if isinstance(definition, dict):
+                formula = definition.get('formula', '')
+                sources = {definition.get('source', default_source)}
+            else:
+                formula = str(definition or '')
+                sources = {default_source}
+            sources.update(SOURCE_PREFIX_PATTERN.findall(formula))
+            sources = {source for source in sources if source in queries}
+
+            params = set()
+            for source in sources:
+                params |= self.query_dependencies.get(source, set())
+            dependencies[var_name] = sources | params
+        return dependencies
+
+    def _template_placeholders(self) -> Dict[str, List[Dict]]:
+        """Placeholder per sheet dari template processor"""
+        processor = self.template_processor
+        if processor is None:
+            return {}
+        if hasattr(processor, 'get_placeholders'):
+            return processor.get_placeholders()
+
+        sections = getattr(processor, 'template_info', {}).get('data_sections', {})
+        return {sheet_name: info.get('placeholders', []) for sheet_name, info in sections.items()}
+
+    def _build_cell_dependencies(self) -> Dict[Tuple[str, str], Tuple[str, str]]:
+        """(sheet, cell) -> (placeholder, key data yang dibaca)"""
+        dependencies = {}
+        for sheet_name, placeholders in self._template_placeholders().items():
+            for placeholder_info in placeholders:
+                placeholder = placeholder_info.get('placeholder')
+                cell = placeholder_info.get('cell')
+                if not placeholder or not cell:
+                    continue
+                data_key = placeholder.split('|')[0].split('.')[0].strip()
+                dependencies[(sheet_name, cell)] = (placeholder, data_key)
+        return dependencies
+
+    def _resolve_placeholder(self, placeholder: str, data: Dict[str, Any]) -> Any:
+        """Resolve nilai placeholder dengan lookup milik template processor"""
+        processor = self.template_processor
+        if hasattr(processor, '_get_placeholder_value'):
+            return processor._get_placeholder_value(placeholder, data)
+        return processor._find_placeholder_value(placeholder, data)
+
+    # ------------------------------------------------------------------
+    # Invalidation
+    # ------------------------------------------------------------------
+
+    def set_template_processor(self, template_processor):
+        """Ganti template: query dan variables tetap dipakai, semua cell dihitung ulang"""
+        self.template_processor = template_processor
+        self.cell_dependencies = self._build_cell_dependencies()
+        self.cells = {}
+        self.logger.info(f"Render session template changed: {len(self.cell_dependencies)} placeholder cells")
+
+    def invalidate(self):
+        """Buang semua hasil cache (mis. setelah ganti database atau formula)"""
+        self.parameters = {}
+        self.query_signatures = {}
+        self.query_results = {}
+        self.variables = {}
+        self.cells = {}
+        self.query_dependencies = self._build_query_dependencies()
+        self.variable_dependencies = self._build_variable_dependencies()
+        self.calculated_dependencies = self._build_calculated_dependencies()
+
+    def _query_signature(self, query_name: str, parameters: Dict[str, Any]) -> Tuple:
+        """Signature query = nilai parameter yang dipakai SQL-nya"""
+        params = self.query_dependencies.get(query_name, set())
+        return tuple((name, str(parameters.get(name))) for name in sorted(params))
+
+    def _changed_parameters(self, parameters: Dict[str, Any]) -> Set[str]:
+        """Parameter yang nilainya berbeda dari run terakhir"""
+        names = set(parameters) | set(self.parameters)
+        return {name for name in names if not _values_equal(self.parameters.get(name), parameters.get(name))}
+
+    # ------------------------------------------------------------------
+    # Refresh
+    # ------------------------------------------------------------------
+
+    def refresh(self, parameters: Dict[str, Any], force: bool = False) -> Dict[str, Any]:
+        """
+        Hitung ulang hanya bagian yang terpengaruh perubahan parameter/template
+
+        Args:
+            parameters: Parameter report (start_date, end_date, ...)
+            force: True untuk menjalankan ulang semua query
+
+        Returns:
+            Dictionary berisi query_results, variables, cells, data (gabungan
+            parameters + variables + query_results) dan stats perubahan
+        """
+        start_time = time.time()
+        parameters = dict(parameters)
+
+        changed_params = self._changed_parameters(parameters)
+        changed_queries = self._refresh_queries(parameters, force)
+        changed_variables = self._refresh_variables(parameters, changed_params, changed_queries, force)
+
+        data = {**parameters, **self.variables, **self.query_results}
+        changed_keys = changed_params | changed_queries | changed_variables
+        changed_cells = self._refresh_cells(data, changed_keys)
+
+        self.parameters = parameters
+
+        elapsed = time.time() - start_time
+        self.last_stats = {
+            'changed_parameters': sorted(changed_params),
+            'changed_queries': sorted(changed_queries),
+            'changed_variables': sorted(changed_variables),
+            'changed_cells': changed_cells,
+            'total_cells': len(self.cells),
+            'elapsed': elapsed
+        }
+        self.logger.info(
+            f"Render session refresh in {elapsed:.3f}s: {len(changed_queries)} queries, "
+            f"{len(changed_variables)} variables, {changed_cells} cells recomputed"
+        )
+
+        return {
+            'query_results': self.query_results,
+            'variables': self.variables,
+            'cells': self.cells,
+            'data': data,
+            'stats': self.last_stats
+        }
+
+    def _refresh_queries(self, parameters: Dict[str, Any], force: bool) -> Set[str]:
+        """Jalankan ulang query yang signature parameternya berubah"""
+        engine = self.formula_engine
+        changed = set()
+
+        for query_name in self._query_definitions():
+            signature = self._query_signature(query_name, parameters)
+            if not force and query_name in self.query_results and self.query_signatures.get(query_name) == signature:
+                continue
+
+            try:
+                self.logger.debug(f"Re-executing query '{query_name}' (signature {signature})")
+                # Salinan parameters: engine boleh menambah key turunan (mis. month:02d)
+                result = engine.execute_query(query_name, dict(parameters))
+            except Exception as e:
+                self.logger.error(f"Error executing query {query_name}: {e}")
+                result = None
+
+            if hasattr(engine, 'store_query_result'):
+                engine.store_query_result(query_name, result)
+
+            if query_name not in self.query_results or not _values_equal(self.query_results[query_name], result):
+                changed.add(query_name)
+            self.query_results[query_name] = result
+            self.query_signatures[query_name] = signature
+
+        # Hasil turunan (filter tanggal + grouping) dihitung ulang di memory tanpa query
+        if hasattr(engine, 'derive_processed_results'):
+            sources = set(getattr(engine, 'DERIVED_RESULT_SOURCES', ()))
+            date_changed = self._changed_parameters(parameters) & {'start_date', 'end_date'}
+            if force or not self.query_results or changed & sources or date_changed or not self.parameters:
+                for name, value in engine.derive_processed_results(parameters).items():
+                    if name not in self.query_results or not _values_equal(self.query_results[name], value):
+                        changed.add(name)
+                    self.query_results[name] = value
+
+        return changed
+
+    def _refresh_variables(self, parameters: Dict[str, Any], changed_params: Set[str],
+                           changed_queries: Set[str], force: bool) -> Set[str]:
+        """Hitung ulang variable yang membaca query/parameter yang berubah"""
+        engine = self.formula_engine
+        changed_inputs = changed_params | changed_queries
+
+        if hasattr(engine, '_process_variable'):
+            # Per-variable: hanya yang dependensinya kena
+            definitions = self._variable_definitions()
+            changed = set()
+            for var_name, var_config in definitions.items():
+                dependencies = self.variable_dependencies.get(var_name)
+                stale = (force or var_name not in self.variables or dependencies is None
+                         or bool(dependencies & changed_inputs))
+                if not stale:
+                    continue
+
+                try:
+                    value = engine._process_variable(var_name, var_config, self.query_results, parameters)
+                except Exception as e:
+                    self.logger.error(f"Error processing variable {var_name}: {e}")
+                    value = var_config.get('default', None)
+
+                if var_name not in self.variables or not _values_equal(self.variables[var_name], value):
+                    changed.add(var_name)
+                self.variables[var_name] = value
+
+            changed |= self._refresh_calculated_variables(parameters, changed_inputs, force)
+            return changed
+
+        # Engine yang menghitung variables sekaligus (summary dari data terfilter):
+        # jalankan jika ada input yang berubah, lalu diff untuk cari yang berubah
+        if not force and self.variables and not changed_inputs:
+            return set()
+
+        new_variables = engine.process_variables(self.query_results, parameters)
+        changed = {
+            name for name in set(new_variables) | set(self.variables)
+            if not _values_equal(self.variables.get(name), new_variables.get(name))
+        }
+        self.variables = new_variables
+        return changed
+
+    def _refresh_calculated_variables(self, parameters: Dict[str, Any], changed_inputs: Set[str],
+                                      force: bool) -> Set[str]:
+        """
+        Hitung ulang calculated_variables jika query sumber/parameternya berubah
+
+        Semua calculated_variables dihitung bersama (satu statement agregat per
+        sumber, variabel boleh merujuk variabel lain), lalu diff per variabel.
+        """
+        engine = self.formula_engine
+        dependencies = self.calculated_dependencies
+        if not dependencies or not hasattr(engine, 'compute_calculated_variables'):
+            return set()
+
+        stale = (force or any(name not in self.variables for name in dependencies)
+                 or any(deps & changed_inputs for deps in dependencies.values()))
+        if not stale:
+            return set()
+
+        try:
+            new_values = engine.compute_calculated_variables(self.query_results, parameters)
+        except Exception as e:
+            self.logger.error(f"Error computing calculated variables: {e}")
+            new_values = {}
+
+        changed = set()
+        for var_name in dependencies:
+            value = new_values.get(var_name)
+            if var_name not in self.variables or not _values_equal(self.variables[var_name], value):
+                changed.add(var_name)
+            self.variables[var_name] = value
+        return changed
+
+    def _refresh_cells(self, data: Dict[str, Any], changed_keys: Set[str]) -> int:
+        """Resolve ulang cell yang placeholder-nya membaca key yang berubah"""
+        if self.template_processor is None:
+            return 0
+
+        recomputed = 0
+        for cell_key, (placeholder, data_key) in self.cell_dependencies.items():
+            if cell_key in self.cells and data_key not in changed_keys:
+                continue
+
+            try:
+                self.cells[cell_key] = self._resolve_placeholder(placeholder, data)
+            except Exception as e:
+                self.logger.warning(f"Error resolving placeholder {placeholder} at {cell_key}: {e}")
+                self.cells[cell_key] = None
+            recomputed += 1
+
+        return recomputed
+
+    def get_cell_values(self, sheet_name: Optional[str] = None) -> Dict[Tuple[str, str], Any]:
+        """Nilai cell dari render terakhir (opsional untuk satu sheet)"""
+        if sheet_name is None:
+            return dict(self.cells)
+        return {key: value for key, value in self.cells.items() if key[0] == sheet_name}
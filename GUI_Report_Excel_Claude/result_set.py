@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+"""
+ResultSet - hasil query kolumnar untuk connector Firebird
+Setiap kolom disimpan sebagai satu array NumPy bertipe (int64/float64 + null mask,
+atau object untuk teks), bukan satu dict per row. Row diakses lewat RowView yang
+lazy, sehingga kode lama yang memakai result[0]['rows'] / row.get(...) tetap jalan
+"""
+
+from collections.abc import Mapping, Sequence
+from typing import Dict, List, Any, Optional, Iterator
+
+import numpy as np
+import pandas as pd
+
+# Nilai teks isql yang dianggap NULL
+NULL_TOKENS = ('', '<null>', 'NULL')
+
+
+def _typed_column(values: Sequence, kind: Optional[str] = None):
+    """
+    Konversi satu kolom teks isql ke array bertipe (None dan NULL_TOKENS menjadi NULL)
+
+    Args:
+        values: Nilai teks kolom
+        kind: Tipe yang sudah ditetapkan ('i', 'f' atau 'O', lihat ResultSet.column_kinds);
+            None = tebak dari nilai. Kolom 'O' tetap teks, kolom 'i' hanya melebar ke
+            float (atau teks) jika nilainya memang tidak bisa dibaca sebagai integer.
+
+    Returns:
+        Tuple (array, mask) - mask True untuk NULL, None jika kolom tidak punya NULL
+    """
+    strings = np.array(['' if value is None else value for value in values], dtype=str)
+    mask = np.isin(strings, NULL_TOKENS)
+    present = strings[~mask]
+
+    if not present.size and strings.size and kind in ('i', 'f'):
+        # Chunk yang seluruhnya NULL tetap memakai tipe yang sudah ditetapkan
+        array = np.zeros(len(strings), dtype=np.int64) if kind == 'i' else np.full(len(strings), np.nan)
+        return array, mask
+
+    if present.size and kind != 'O':
+        present_list = present.tolist()
+        candidates = ((np.float64, float),) if kind == 'f' else ((np.int64, int), (np.float64, float))
+        for dtype, convert in candidates:
+            try:
+                converted = np.fromiter(map(convert, present_list), dtype=dtype, count=len(present_list))
+            except (ValueError, OverflowError):
+                continue
+            if dtype is np.int64 and kind is None and _has_leading_zero(present):
+                break
+            if dtype is np.float64 and not np.isfinite(converted).all():
+                # 'nan'/'inf' diterima astype tapi bukan angka dari database
+                break
+            array = np.zeros(len(strings), dtype=dtype) if dtype is np.int64 else np.full(len(strings), np.nan)
+            array[~mask] = converted
+            return array, (mask if mask.any() else None)
+
+    # Teks: nilai yang sama berbagi satu objek string
+    unique_values, inverse = np.unique(strings, return_inverse=True)
+    objects = unique_values.astype(object)[inverse.reshape(-1)]
+    objects[mask] = None
+    return objects, None
+
+
+def _has_leading_zero(values: np.ndarray) -> bool:
+    """True jika ada kode seperti '01' yang harus tetap teks"""
+    leading_zero = (values.astype('U1') == '0') & (values != '0')
+    negative_zero = (values.astype('U2') == '-0') & (values != '-0')
+    return bool((leading_zero | negative_zero).any())
+
+
+class RowView(Mapping):
+    """View read-only satu row ResultSet (tidak menyalin data)"""
+
+    __slots__ = ('_result', '_index')
+
+    def __init__(self, result: 'ResultSet', index: int):
+        self._result = result
+        self._index = index
+
+    def __getitem__(self, column: str) -> Any:
+        return self._result._value(column, self._index)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._result.columns)
+
+    def __len__(self) -> int:
+        return len(self._result.columns)
+
+    def __contains__(self, column) -> bool:
+        return column in self._result._arrays
+
+    def __repr__(self) -> str:
+        return repr(dict(self.items()))
+
+
+class ResultSet(Sequence):
+    """
+    Hasil query kolumnar
+
+    Berperilaku sebagai sequence of row (RowView) untuk kompatibilitas,
+    dengan akses kolumnar lewat column() dan to_pandas()
+    """
+
+    def __init__(self, columns: List[str], arrays: Dict[str, np.ndarray],
+                 masks: Optional[Dict[str, np.ndarray]] = None, num_rows: Optional[int] = None):
+        """
+        Args:
+            columns: Nama kolom (urutan hasil query)
+            arrays: Nama kolom -> array nilai
+            masks: Nama kolom -> mask NULL (hanya untuk kolom numerik yang punya NULL)
+            num_rows: Jumlah row (default: panjang array pertama)
+        """
+        self.columns = list(dict.fromkeys(columns))
+        self._arrays = arrays
+        self._masks = masks or {}
+        if num_rows is None:
+            num_rows = len(next(iter(arrays.values()))) if arrays else 0
+        self.num_rows = num_rows
+
+    @classmethod
+    def from_text_columns(cls, headers: List[str], text_columns: List[Sequence],
+                          kinds: Optional[Dict[str, str]] = None) -> 'ResultSet':
+        """
+        Bangun ResultSet dari kolom teks hasil parsing output isql
+
+        Args:
+            headers: Nama kolom
+            text_columns: Nilai teks per kolom
+            kinds: Tipe kolom yang sudah ditetapkan (mis. dari chunk pertama streaming);
+                kolom yang tidak ada di sini ditebak dari nilainya
+        """
+        kinds = kinds or {}
+        arrays = {}
+        masks = {}
+        num_rows = len(text_columns[0]) if text_columns else 0
+        for header, values in zip(headers, text_columns):
+            array, mask = _typed_column(values, kinds.get(header))
+            arrays[header] = array
+            if mask is not None:
+                masks[header] = mask
+            elif header in masks:
+                del masks[header]
+        return cls(headers, arrays, masks, num_rows)
+
+    @classmethod
+    def from_records(cls, records: List[Dict]) -> 'ResultSet':
+        """Bangun ResultSet dari list of dict (nilai sudah bertipe)"""
+        frame = pd.DataFrame.from_records(records) if records else pd.DataFrame()
+        return cls.from_pandas(frame)
+
+    @classmethod
+    def from_pandas(cls, frame: pd.DataFrame) -> 'ResultSet':
+        """Bangun ResultSet dari DataFrame (kolom numerik tidak disalin jika memungkinkan)"""
+        arrays = {}
+        masks = {}
+        for column in frame.columns:
+            series = frame[column]
+            if pd.api.types.is_bool_dtype(series.dtype) or not pd.api.types.is_numeric_dtype(series.dtype):
+                values = series.to_numpy(dtype=object)
+                arrays[column] = np.where(pd.isna(values), None, values)
+            elif isinstance(series.dtype, np.dtype):
+                arrays[column] = series.to_numpy()
+                if series.dtype.kind == 'f' and series.isna().any():
+                    masks[column] = series.isna().to_numpy()
+            else:
+                # Nullable Int64/Float64
+                mask = series.isna().to_numpy()
+                kind = np.int64 if pd.api.types.is_integer_dtype(series.dtype) else np.float64
+                arrays[column] = series.to_numpy(dtype=kind, na_value=0)
+                if mask.any():
+                    masks[column] = mask
+        return cls(list(frame.columns), arrays, masks, len(frame))
+
+    # Sequence protocol (kompatibel dengan list of dict)
+
+    def __len__(self) -> int:
+        return self.num_rows
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self.take(np.arange(self.num_rows)[index])
+        if index < 0:
+            index += self.num_rows
+        if not 0 <= index < self.num_rows:
+            raise IndexError('ResultSet index out of range')
+        return RowView(self, index)
+
+    def __iter__(self) -> Iterator[RowView]:
+        for index in range(self.num_rows):
+            yield RowView(self, index)
+
+    def __repr__(self) -> str:
+        return f"ResultSet(columns={self.columns}, rows={self.num_rows})"
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, ResultSet):
+            return NotImplemented
+        if self.columns != other.columns or self.num_rows != other.num_rows:
+            return False
+        for column in self.columns:
+            mask = self._masks.get(column)
+            other_mask = other._masks.get(column)
+            if (mask is None) != (other_mask is None) or (mask is not None and not np.array_equal(mask, other_mask)):
+                return False
+            array, other_array = self._arrays[column], other._arrays[column]
+            if mask is not None:
+                array, other_array = array[~mask], other_array[~mask]
+            equal_nan = array.dtype.kind == 'f' and other_array.dtype.kind == 'f'
+            if not np.array_equal(array, other_array, equal_nan=equal_nan):
+                return False
+        return True
+
+    __hash__ = None
+
+    @property
+    def headers(self) -> List[str]:
+        """Alias columns (format lama {'headers': [...], 'rows': [...]})"""
+        return self.columns
+
+    def _value(self, column: str, index: int) -> Any:
+        """Nilai Python native satu cell"""
+        mask = self._masks.get(column)
+        if mask is not None and mask[index]:
+            return None
+        value = self._arrays[column][index]
+        return value.item() if isinstance(value, np.generic) else value
+
+    def column_kinds(self) -> Dict[str, str]:
+        """
+        Tipe kolom ('i' int64, 'f' float64, 'O' teks) untuk kolom yang punya nilai
+        non-NULL; kolom yang seluruhnya NULL belum punya tipe dan tidak ikut
+        """
+        kinds = {}
+        for column in self.columns:
+            array = self._arrays[column]
+            mask = self._masks.get(column)
+            if array.dtype.kind == 'O':
+                has_values = any(value is not None for value in array)
+            else:
+                has_values = mask is None or not mask.all()
+            if self.num_rows and has_values:
+                kinds[column] = array.dtype.kind if array.dtype.kind in ('i', 'f') else 'O'
+        return kinds
+
+    def column(self, name: str) -> np.ndarray:
+        """Array nilai satu kolom (NULL numerik bernilai 0/NaN, lihat null_mask)"""
+        return self._arrays[name]
+
+    def null_mask(self, name: str) -> Optional[np.ndarray]:
+        """Mask NULL kolom numerik (None jika kolom tidak punya NULL)"""
+        return self._masks.get(name)
+
+    def rows(self) -> Iterator[Dict[str, Any]]:
+        """Iterasi row sebagai dict biasa (kompatibilitas kode lama)"""
+        columns = self.columns
+        lists = [self._column_list(column) for column in columns]
+        for values in zip(*lists):
+            yield dict(zip(columns, values))
+
+    def to_records(self) -> List[Dict[str, Any]]:
+        """Semua row sebagai list of dict"""
+        return list(self.rows())
+
+    def _column_list(self, column: str) -> List[Any]:
+        """Kolom sebagai list nilai Python native (NULL -> None)"""
+        values = self._arrays[column].tolist()
+        mask = self._masks.get(column)
+        if mask is not None:
+            for index in np.flatnonzero(mask):
+                values[index] = None
+        return values
+
+    def to_pandas(self) -> pd.DataFrame:
+        """
+        DataFrame dari kolom yang sama; kolom numerik tanpa NULL tidak disalin,
+        kolom numerik dengan NULL menjadi nullable Int64/Float64
+        """
+        data = {}
+        for column in self.columns:
+            array = self._arrays[column]
+            mask = self._masks.get(column)
+            if mask is not None and array.dtype.kind == 'i':
+                data[column] = pd.arrays.IntegerArray(array, mask)
+            elif mask is not None and array.dtype.kind == 'f':
+                data[column] = pd.arrays.FloatingArray(array, mask)
+            else:
+                data[column] = array
+        return pd.DataFrame(data, columns=self.columns, copy=False)
+
+    def take(self, indices) -> 'ResultSet':
+        """ResultSet baru berisi row pada posisi indices"""
+        indices = np.asarray(indices, dtype=np.intp)
+        arrays = {column: array[indices] for column, array in self._arrays.items()}
+        masks = {column: mask[indices] for column, mask in self._masks.items()}
+        return ResultSet(self.columns, arrays, masks, len(indices))
+
+    def nbytes(self) -> int:
+        """Perkiraan memori array kolom (tanpa isi string)"""
+        return sum(array.nbytes for array in self._arrays.values()) + sum(mask.nbytes for mask in self._masks.values())
+
+
+def to_frame(data) -> pd.DataFrame:
+    """DataFrame dari ResultSet atau list of dict"""
+    if isinstance(data, ResultSet):
+        return data.to_pandas()
+    return pd.DataFrame.from_records(data) if data else pd.DataFrame()
+
+
+def json_default(value: Any) -> Any:
+    """
+    default= untuk json.dumps: ResultSet menjadi list of dict, RowView menjadi dict,
+    DataFrame menjadi records, numpy scalar menjadi nilai Python, lainnya str()
+    """
+    if isinstance(value, ResultSet):
+        return value.to_records()
+    if isinstance(value, RowView):
+        return dict(value.items())
+    if isinstance(value, pd.DataFrame):
+        return value.to_dict('records')
+    if isinstance(value, np.generic):
+        return value.item()
+    return str(value)
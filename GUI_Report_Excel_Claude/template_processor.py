@@ -12,6 +12,11 @@ from typing import Dict, List, Any, Tuple, Optional
 import pandas as pd
 from datetime import datetime, date
 import logging
+import sys
+
+# Modul bersama (report_common) ada di root repository
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from report_common.sheet_extents import compute_row_extents
 
 class TemplateProcessor:
     """
@@ -32,6 +37,7 @@ class TemplateProcessor:
         self.formulas = {}
         self.placeholders = {}
         self.repeating_sections = {}
+        self.row_extents = {}
 
         # Setup logging
         self.logger = logging.getLogger(__name__)
@@ -40,6 +46,7 @@ class TemplateProcessor:
         self._load_template()
         self._load_formulas()
         self._scan_placeholders()
+        self._scan_row_extents()
         self._parse_repeating_sections()
 
     def _load_template(self):
@@ -88,6 +95,15 @@ class TemplateProcessor:
 
         self.logger.info(f"Found {sum(len(p) for p in self.placeholders.values())} placeholders")
 
+    def _scan_row_extents(self):
+        """Hitung rentang kolom (first, last) yang berisi value atau style per row"""
+        self.row_extents = {}
+
+        for sheet_name in self.workbook.sheetnames:
+            self.row_extents[sheet_name] = compute_row_extents(self.workbook[sheet_name])
+
+        self.logger.debug(f"Row extents computed for {len(self.row_extents)} sheets")
+
     def _parse_repeating_sections(self):
         """Parse repeating sections dari formula definitions"""
         repeating_config = self.formulas.get('repeating_sections', {})
@@ -188,6 +204,7 @@ class TemplateProcessor:
             start_row = repeating_section['start_row']
             template_rows = repeating_section['template_rows']
             columns = repeating_section['columns']
+            column_span = self._get_column_span(columns)
 
             # Delete existing template rows (keep one for template)
             sheet.delete_rows(start_row + template_rows, sheet.max_row - start_row - template_rows + 1)
@@ -198,7 +215,7 @@ class TemplateProcessor:
 
                 # Copy template row if needed
                 if i > 0:
-                    self._copy_template_row(sheet, start_row, target_row, template_rows)
+                    self._copy_template_row(sheet, start_row, target_row, template_rows, column_span)
 
                 # Fill data in columns
                 for col_letter, column_config in columns.items():
@@ -349,13 +366,34 @@ class TemplateProcessor:
         else:
             cell.alignment = Alignment(horizontal='left', vertical='center')
 
-    def _copy_template_row(self, sheet, source_row: int, target_row: int, row_count: int = 1):
+    def _get_column_span(self, columns: Dict) -> Optional[Tuple[int, int]]:
+        """Get rentang kolom (first, last) dari column mapping repeating section"""
+        column_indexes = []
+        for col_letter in columns.keys():
+            try:
+                column_indexes.append(openpyxl.utils.column_index_from_string(col_letter))
+            except ValueError:
+                continue
+
+        if not column_indexes:
+            return None
+        return min(column_indexes), max(column_indexes)
+
+    def _copy_template_row(self, sheet, source_row: int, target_row: int, row_count: int = 1,
+                           column_span: Optional[Tuple[int, int]] = None):
         """Copy template row dengan formatting"""
         for row_offset in range(row_count):
             source_row_num = source_row + row_offset
             target_row_num = target_row + row_offset
 
-            for col in range(1, sheet.max_column + 1):
+            # Hanya kolom dalam rentang terpakai template row (plus kolom data section)
+            extent = self.row_extents.get(sheet.title, {}).get(source_row_num)
+            if column_span:
+                extent = (min(extent[0], column_span[0]), max(extent[1], column_span[1])) if extent else column_span
+            if not extent:
+                continue
+
+            for col in range(extent[0], extent[1] + 1):
                 source_cell = sheet.cell(row=source_row_num, column=col)
                 target_cell = sheet.cell(row=target_row_num, column=col)
 
@@ -12,6 +12,13 @@ from typing import Dict, List, Any, Tuple, Optional
 import pandas as pd
 from datetime import datetime, date
 import logging
+import sys
+
+# Modul bersama (report_common) ada di root repository
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from report_common.sheet_extents import compute_row_extents
+
+import tracing
 
 class TemplateProcessorEnhanced:
     """
@@ -32,6 +39,7 @@ class TemplateProcessorEnhanced:
         self.formulas = {}
         self.placeholders = {}
         self.repeating_sections = {}
+        self.row_extents = {}
 
         # Setup enhanced logging
         self._setup_enhanced_logging()
@@ -40,6 +48,7 @@ class TemplateProcessorEnhanced:
         self._load_template()
         self._load_formulas()
         self._scan_placeholders()
+        self._scan_row_extents()
         self._parse_repeating_sections()
 
     def _setup_enhanced_logging(self):
@@ -160,6 +169,15 @@ class TemplateProcessorEnhanced:
             for ph in placeholders:
                 self.logger.debug(f"  {ph['placeholder']} at {ph['cell']}")
 
+    def _scan_row_extents(self):
+        """Hitung rentang kolom (first, last) yang berisi value atau style per row"""
+        self.row_extents = {}
+
+        for sheet_name in self.workbook.sheetnames:
+            self.row_extents[sheet_name] = compute_row_extents(self.workbook[sheet_name])
+
+        self.logger.debug(f"Row extents computed for {len(self.row_extents)} sheets")
+
     def _parse_repeating_sections(self):
         """Parse repeating sections dari formula definitions dengan debug"""
         repeating_config = self.formulas.get('repeating_sections', {})
@@ -211,6 +229,7 @@ class TemplateProcessorEnhanced:
             self.logger.debug(f"No repeating section found for sheet '{sheet_name}'")
         return section
 
+    @tracing.traced(stage='render')
     def process_sheet_placeholders(self, sheet_name: str, data: Dict[str, Any]) -> bool:
         """
         Process placeholders pada sheet tertentu dengan enhanced debugging
@@ -395,6 +414,7 @@ class TemplateProcessorEnhanced:
         except Exception as e:
             self.logger.error(f"Error applying cell style for placeholder '{placeholder}': {e}")
 
+    @tracing.traced(stage='render')
     def process_repeating_section(self, sheet_name: str, data: List[Dict[str, Any]]) -> bool:
         """
         Process repeating section pada sheet dengan data array dan debug
@@ -424,6 +444,7 @@ class TemplateProcessorEnhanced:
             start_row = repeating_section['start_row']
             template_rows = repeating_section['template_rows']
             columns = repeating_section['columns']
+            column_span = self._get_column_span(columns)
 
             self.logger.debug(f"Start row: {start_row}, Template rows: {template_rows}")
             self.logger.debug(f"Columns to process: {list(columns.keys())}")
@@ -443,7 +464,7 @@ class TemplateProcessorEnhanced:
 
                 # Copy template row if needed
                 if i > 0:
-                    self._copy_template_row(sheet, start_row, target_row, template_rows)
+                    self._copy_template_row(sheet, start_row, target_row, template_rows, column_span)
 
                 # Fill data in columns
                 for col_letter, column_config in columns.items():
@@ -554,7 +575,21 @@ class TemplateProcessorEnhanced:
         except Exception as e:
             self.logger.error(f"Error applying column style: {e}")
 
-    def _copy_template_row(self, sheet, source_row: int, target_row: int, row_count: int = 1):
+    def _get_column_span(self, columns: Dict) -> Optional[Tuple[int, int]]:
+        """Get rentang kolom (first, last) dari column mapping repeating section"""
+        column_indexes = []
+        for col_letter in columns.keys():
+            try:
+                column_indexes.append(openpyxl.utils.column_index_from_string(col_letter))
+            except ValueError:
+                continue
+
+        if not column_indexes:
+            return None
+        return min(column_indexes), max(column_indexes)
+
+    def _copy_template_row(self, sheet, source_row: int, target_row: int, row_count: int = 1,
+                           column_span: Optional[Tuple[int, int]] = None):
         """Copy template row dengan formatting dan debug"""
         try:
             self.logger.debug(f"Copying template row {source_row} to {target_row} ({row_count} rows)")
@@ -563,7 +598,14 @@ class TemplateProcessorEnhanced:
                 source_row_num = source_row + row_offset
                 target_row_num = target_row + row_offset
 
-                for col in range(1, sheet.max_column + 1):
+                # Hanya kolom dalam rentang terpakai template row (plus kolom data section)
+                extent = self.row_extents.get(sheet.title, {}).get(source_row_num)
+                if column_span:
+                    extent = (min(extent[0], column_span[0]), max(extent[1], column_span[1])) if extent else column_span
+                if not extent:
+                    continue
+
+                for col in range(extent[0], extent[1] + 1):
                     source_cell = sheet.cell(row=source_row_num, column=col)
                     target_cell = sheet.cell(row=target_row_num, column=col)
 
@@ -582,6 +624,7 @@ class TemplateProcessorEnhanced:
         except Exception as e:
             self.logger.error(f"Error copying template row: {e}")
 
+    @tracing.traced(stage='save')
     def save_processed_template(self, output_path: str) -> bool:
         """Save processed template ke file baru dengan debug"""
         try:
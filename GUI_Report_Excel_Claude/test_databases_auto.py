@@ -73,7 +73,7 @@ def test_database_for_ffb(db_path):
         
         for table in ffb_scanner_tables:
             try:
-                count = connector.get_row_count(table)
+                count = connector.get_row_count(table, approximate=True)
                 if count > 0:
                     ffb_data[table] = count
                     total_records += count
@@ -0,0 +1,3 @@
+"""
+Test modules for GUI Report Excel
+"""
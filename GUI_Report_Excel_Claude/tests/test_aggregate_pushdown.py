@@ -0,0 +1,119 @@
+"""
+Aggregate Pushdown Tests
+Test planning calculated_variables into one aggregate statement per source
+"""
+
+import unittest
+import os
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import aggregate_pushdown
+from aggregate_pushdown import (
+    AGGREGATE_RESULT_SUFFIX, evaluate_expressions, plan_calculated_variables, pushdown_supported
+)
+
+QUERIES = {'raw_ffb_data': {'sql': "SELECT * FROM FFBSCANNERDATA01 ORDER BY TRANSDATE;"}}
+
+DEFINITIONS = {
+    'total_bunches': {'formula': 'SUM(raw_ffb_data.BUNCHES)'},
+    'unique_operators': 'COUNT(DISTINCT(raw_ffb_data.OPERATORID))',
+    'transactions': 'SUM(raw_ffb_data.length)',
+    'bunches_per_operator': 'total_bunches / unique_operators',
+    'orphan': 'SUM(missing_query.X)',
+    'orphan_ratio': 'orphan / transactions'
+}
+
+ROWS = [{'BUNCHES': 10, 'OPERATORID': 'A'}, {'BUNCHES': 20, 'OPERATORID': 'B'}, {'BUNCHES': 6, 'OPERATORID': 'A'}]
+
+EXPECTED = {'total_bunches': 36, 'unique_operators': 2, 'transactions': 3, 'bunches_per_operator': 18.0}
+
+
+class TestAggregatePushdown(unittest.TestCase):
+    """Test plan_calculated_variables and AggregatePlan"""
+
+    def setUp(self):
+        self.plan = plan_calculated_variables(DEFINITIONS, QUERIES)
+
+    def test_unknown_sources_are_not_planned(self):
+        self.assertEqual(set(self.plan.expressions), set(EXPECTED))
+        self.assertEqual(set(self.plan.unplanned), {'orphan', 'orphan_ratio'})
+
+    def test_one_statement_per_source(self):
+        self.assertEqual(
+            self.plan.build_sql('raw_ffb_data', QUERIES['raw_ffb_data']['sql']),
+            "SELECT SUM(SRC.BUNCHES) AS A0,\n"
+            "       COUNT(DISTINCT SRC.OPERATORID) AS A1,\n"
+            "       COUNT(*) AS A2\n"
+            "FROM (\nSELECT * FROM FFBSCANNERDATA01\n) SRC")
+
+    def test_order_by_is_kept_with_row_limit(self):
+        sql = self.plan.build_sql('raw_ffb_data', "SELECT FIRST 10 * FROM T ORDER BY A")
+        self.assertIn("ORDER BY A", sql)
+
+    def test_pushdown_runs_once_and_is_reused(self):
+        statements = []
+
+        def run_sql(source, sql):
+            statements.append(sql)
+            return [{'A0': 36, 'A1': 2, 'A2': 3}]
+
+        query_results = {}
+        source_sql = lambda source: QUERIES[source]['sql']
+        self.assertEqual(self.plan.execute(source_sql, run_sql, query_results), EXPECTED)
+        self.assertIn('raw_ffb_data' + AGGREGATE_RESULT_SUFFIX, query_results)
+        self.assertEqual(self.plan.execute(source_sql, run_sql, query_results), EXPECTED)
+        self.assertEqual(len(statements), 1)
+
+    def test_failed_pushdown_falls_back_to_memory(self):
+        statements = []
+
+        def run_sql(source, sql):
+            statements.append(sql)
+            raise Exception("Dynamic SQL Error")
+
+        query_results = {'raw_ffb_data': ROWS}
+        self.assertEqual(self.plan.execute(lambda source: QUERIES[source]['sql'], run_sql, query_results), EXPECTED)
+        self.assertEqual(self.plan.execute(lambda source: None, None, {'raw_ffb_data': ROWS}), EXPECTED)
+
+        # Statement yang gagal tidak diulang pada run berikutnya
+        self.assertEqual(self.plan.execute(lambda source: QUERIES[source]['sql'], run_sql, query_results), EXPECTED)
+        self.assertEqual(len(statements), 1)
+
+
+class Connector:
+    """Connector stub exposing only server_version()"""
+
+    def __init__(self, db_path, version):
+        self.db_path = db_path
+        self.version = version
+
+    def server_version(self):
+        return self.version
+
+
+class TestPushdownSupported(unittest.TestCase):
+    """Test skipping pushdown on servers without derived tables"""
+
+    def test_firebird_2_supports_pushdown(self):
+        self.assertTrue(pushdown_supported(Connector('PTRJ_P2B.FDB', (2, 5))))
+
+    def test_legacy_server_is_logged_once(self):
+        connector = Connector('PTRJ_P1A_TEST.FDB', None)
+        with self.assertLogs(aggregate_pushdown.logger, level='WARNING') as logs:
+            self.assertFalse(pushdown_supported(connector))
+            self.assertFalse(pushdown_supported(connector))
+            self.assertFalse(pushdown_supported(Connector('PTRJ_P1A_TEST.FDB', (1, 5))))
+            aggregate_pushdown.logger.warning('end of test')
+        self.assertEqual(len([line for line in logs.output if 'PTRJ_P1A_TEST.FDB' in line]), 1)
+
+    def test_evaluate_expressions(self):
+        self.assertEqual(evaluate_expressions({'a': 'b / c', 'b': '4', 'c': '0'}, {}), {'b': 4, 'c': 0, 'a': 0})
+        self.assertEqual(evaluate_expressions({'a': 'x + 1'}, {'x': None}), {'a': None})
+        self.assertEqual(evaluate_expressions({'x': 'y', 'y': 'x'}, {}), {'x': None, 'y': None})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,120 @@
+"""
+Batch Query Tests
+Test splitting one isql batch output back into per-statement results
+"""
+
+import unittest
+import os
+import sys
+import shutil
+import tempfile
+import subprocess
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from firebird_connector_enhanced import FirebirdConnectorEnhanced
+
+
+def marker(index):
+    return f"\nBATCH_MARKER\n============\n@@BATCH {index}@@\n\n"
+
+
+ROWS_OUTPUT = ("\nFIELDNO RIPEBCH\n"
+               "======= ============\n"
+               "001               10\n"
+               "002               20\n\n")
+
+ERROR_OUTPUT = ("Statement failed, SQLCODE = -204\n"
+                "Dynamic SQL Error\n"
+                "-Table unknown\n"
+                "-NOPE\n")
+
+
+class TestBatchQueries(unittest.TestCase):
+    """Test execute_batch_queries without a real isql process"""
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        isql_path = os.path.join(self.test_dir, 'isql')
+        db_path = os.path.join(self.test_dir, 'PTRJ_P2B.FDB')
+        for path in (isql_path, db_path):
+            open(path, 'w').close()
+        self.connector = FirebirdConnectorEnhanced(db_path=db_path, isql_path=isql_path)
+        self.scripts = []
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def _fake_isql(self, stdout, stderr=''):
+        def execute_script(script, extra_args=None, timeout=None):
+            self.scripts.append(script)
+            return subprocess.CompletedProcess(['isql'], 0, stdout, stderr)
+        self.connector._execute_script = execute_script
+
+    def test_script_wraps_statements_in_markers(self):
+        script = self.connector._build_batch_script(['SELECT 1 FROM A', 'SELECT 2 FROM B'])
+        lines = script.splitlines()
+        self.assertEqual(lines[1], 'SELECT 1 FROM A;')
+        self.assertEqual(lines[3], 'SELECT 2 FROM B;')
+        self.assertEqual([line for line in lines if 'BATCH_MARKER' in line],
+                         [self.connector.BATCH_MARKER_SQL.format(index=i) + ';' for i in range(3)])
+        self.assertEqual(lines[-1], 'EXIT;')
+
+    def test_split_batch_output(self):
+        output = marker(0) + ROWS_OUTPUT + marker(1) + ERROR_OUTPUT + marker(2)
+        segments = self.connector._split_batch_output(output, 2)
+        self.assertEqual(sorted(segments), [0, 1])
+        self.assertIn('001               10', segments[0])
+        self.assertNotIn('BATCH_MARKER', segments[0])
+        self.assertTrue(self.connector._batch_error(segments[1]).startswith('Statement failed, SQLCODE = -204'))
+        self.assertIsNone(self.connector._batch_error(segments[0]))
+
+    def test_statement_without_closing_marker_is_not_used(self):
+        output = marker(0) + ROWS_OUTPUT + marker(1) + "\nFIELDNO\n=======\n00"
+        self.assertEqual(sorted(self.connector._split_batch_output(output, 2)), [0])
+
+    def test_execute_batch_queries_reports_each_statement(self):
+        self._fake_isql(marker(0) + ROWS_OUTPUT + marker(1) + ERROR_OUTPUT + marker(2) + ROWS_OUTPUT,
+                        stderr='connection lost')
+        results = self.connector.execute_batch_queries(
+            ['SELECT FIELDNO, RIPEBCH FROM T', 'SELECT * FROM NOPE', 'SELECT * FROM LAST'])
+
+        self.assertEqual(len(self.scripts), 1)
+        self.assertTrue(results[0]['success'])
+        rows = results[0]['data'][0]['rows']
+        self.assertEqual([dict(row) for row in rows], [{'FIELDNO': '001', 'RIPEBCH': 10},
+                                                       {'FIELDNO': '002', 'RIPEBCH': 20}])
+        self.assertFalse(results[1]['success'])
+        self.assertIn('Table unknown', results[1]['error'])
+        # Statement terakhir tanpa marker penutup: error dari stderr
+        self.assertEqual(results[2], {'query_index': 2, 'query': 'SELECT * FROM LAST',
+                                      'success': False, 'error': 'connection lost'})
+
+    def test_preview_mode_rewrites_batch_statements(self):
+        self._fake_isql(marker(0) + ROWS_OUTPUT + marker(1))
+        self.connector.preview_limit = 5
+        self.connector.execute_batch_queries(['SELECT * FROM T ROWS 100;'])
+        self.assertIn('SELECT * FROM T ROWS 5;', self.scripts[-1])
+
+    def test_preview_sampling_follows_server_version(self):
+        """Aggregates are sampled through a derived table only on Firebird 2.0+"""
+        self._fake_isql(marker(0) + ROWS_OUTPUT + marker(1))
+        self.connector.preview_limit = 5
+        self.connector.preview_sample_size = 50
+        sql = 'SELECT FIELDNO, COUNT(*) FROM T GROUP BY FIELDNO'
+
+        # Output tanpa ENGINE_VERSION (Firebird 1.5): FIRST n biasa, versi dicek sekali
+        self.connector.execute_batch_queries([sql])
+        self.connector.execute_batch_queries([sql])
+        self.assertEqual(sum('ENGINE_VERSION' in script for script in self.scripts), 1)
+        self.assertIn('SELECT FIRST 5 FIELDNO, COUNT(*) FROM T GROUP BY FIELDNO;', self.scripts[-1])
+
+        self._fake_isql("\nENGINE_VERSION\n==============\n2.5.9\n\n")
+        self.connector._server_version_checked = False
+        self.assertEqual(self.connector.server_version(), (2, 5))
+        self.assertIn('FROM (SELECT FIRST 50 * FROM T) T', self.connector._preview_query(sql))
+
+
+if __name__ == '__main__':
+    unittest.main()
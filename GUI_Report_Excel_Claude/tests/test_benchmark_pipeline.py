@@ -0,0 +1,106 @@
+"""
+Benchmark Pipeline Tests
+Test the synthetic FFB generator and a tiny end-to-end benchmark run
+"""
+
+import unittest
+import os
+import sys
+import json
+import shutil
+import sqlite3
+import tempfile
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmark_pipeline import (
+    FFB_COLUMNS, STAGES, PipelineBenchmark, SyntheticFFBGenerator, compare_results, save_results
+)
+
+
+class TestSyntheticFFBGenerator(unittest.TestCase):
+    """Test SyntheticFFBGenerator"""
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_same_seed_same_data(self):
+        generator = SyntheticFFBGenerator(rows=50, divisions=2, seed=7)
+        rows = generator.generate_month(0, 1)
+
+        self.assertEqual(rows, SyntheticFFBGenerator(rows=50, divisions=2, seed=7).generate_month(0, 1))
+        self.assertNotEqual(rows, SyntheticFFBGenerator(rows=50, divisions=2, seed=8).generate_month(0, 1))
+        self.assertNotEqual(rows, generator.generate_month(1, 1))
+        self.assertEqual(len(rows), 50)
+        self.assertTrue(all(len(row) == len(FFB_COLUMNS) for row in rows))
+
+    def test_verifier_rows_point_at_kerani_transactions(self):
+        rows = SyntheticFFBGenerator(rows=200, divisions=2).generate_month(0, 2)
+        tag_index = [name for name, _ in FFB_COLUMNS].index('RECORDTAG')
+        transno_index = [name for name, _ in FFB_COLUMNS].index('TRANSNO')
+
+        kerani = {row[transno_index] for row in rows if row[tag_index] == 'PM'}
+        verified = {row[transno_index] for row in rows if row[tag_index] != 'PM'}
+        self.assertTrue(verified)
+        self.assertTrue(verified <= kerani)
+        self.assertTrue(all(row[15].startswith('2025-02-') for row in rows))
+
+    def test_estate_database_tables(self):
+        db_path = os.path.join(self.test_dir, 'estate.db')
+        counts = SyntheticFFBGenerator(rows=30, divisions=2, months=2).create_estate_database(db_path, 0)
+
+        self.assertEqual(counts['FFBSCANNERDATA01'], 30)
+        self.assertEqual(counts['FFBSCANNERDATA02'], 30)
+        self.assertEqual(counts['CRDIVISION'], 2)
+        connection = sqlite3.connect(db_path)
+        try:
+            self.assertEqual(connection.execute("SELECT COUNT(*) FROM OCFIELD").fetchone()[0], counts['OCFIELD'])
+        finally:
+            connection.close()
+
+
+class TestPipelineBenchmark(unittest.TestCase):
+    """Test a tiny PipelineBenchmark run through the fake isql"""
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_tiny_run_reports_every_stage(self):
+        generator = SyntheticFFBGenerator(rows=40, divisions=2, months=2)
+        workdir = os.path.join(self.test_dir, 'work')
+        results = PipelineBenchmark(generator, workdir=workdir).run()
+
+        self.assertEqual(results['rows'], 80)
+        self.assertEqual(set(results['stages']), set(STAGES))
+        self.assertEqual([partition['month'] for partition in results['partitions']], [1, 2])
+        self.assertTrue(all(partition['rows'] == 40 for partition in results['partitions']))
+        self.assertGreater(results['stages']['extract']['min_seconds'], 0)
+        self.assertIn('raw_ffb_data', results['partitions'][0]['queries'])
+        # workdir yang diberikan pemanggil tidak dihapus
+        self.assertTrue(os.path.isdir(workdir))
+
+        path = save_results(results, os.path.join(self.test_dir, 'out', 'result.json'))
+        with open(path, 'r', encoding='utf-8') as f:
+            saved = json.load(f)
+        self.assertEqual(saved['config']['seed'], 42)
+        self.assertEqual(compare_results(saved, saved)['extract'], 1.0)
+
+    def test_temporary_workdir_is_removed(self):
+        benchmark = PipelineBenchmark(SyntheticFFBGenerator(rows=10, divisions=1),
+                                      template_path=os.path.join(self.test_dir, 'missing.xlsx'))
+        results = benchmark.run()
+
+        self.assertFalse(benchmark.workdir.exists())
+        self.assertIsNone(results['config']['template'])
+        self.assertEqual(results['stages']['render']['min_seconds'], 0.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,119 @@
+"""
+Database Catalog Tests
+Test folder scan, probe caching and invalidation on file change
+"""
+
+import unittest
+import os
+import sys
+import shutil
+import tempfile
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database_catalog import DatabaseCatalog
+
+TABLE_ROWS = {
+    'PGE_2B.FDB': {'FFBSCANNERDATA01': 120, 'FFBSCANNERDATA02': 0, 'OCFIELD': 40},
+    'EMPTY.FDB': {'FFBSCANNERDATA01': 0},
+}
+
+
+class FakeConnector:
+    """Connector palsu: daftar tabel dan row count dari TABLE_ROWS"""
+
+    opened = []
+
+    def __init__(self, db_path, isql_path=None):
+        self.db_path = db_path
+        self.isql_path = '/opt/firebird/bin/isql'
+        self.tables = TABLE_ROWS.get(os.path.basename(db_path))
+        FakeConnector.opened.append(os.path.basename(db_path))
+
+    def test_connection(self):
+        return self.tables is not None
+
+    def get_table_list(self):
+        return list(self.tables)
+
+    def estimate_row_counts(self, tables):
+        return {table.upper(): {'rows': self.tables[table], 'exact': False} for table in tables}
+
+    def exact_row_counts(self, tables):
+        return {table.upper(): self.tables[table] for table in tables}
+
+
+class TestDatabaseCatalog(unittest.TestCase):
+    """Test DatabaseCatalog with a fake connector"""
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.data_dir = os.path.join(self.test_dir, 'databases')
+        os.makedirs(os.path.join(self.data_dir, 'estate', 'backup'))
+        self.paths = {}
+        for name, subdir, size in (('PGE_2B.FDB', 'estate', 2048), ('EMPTY.FDB', 'estate/backup', 1024),
+                                   ('BROKEN.FDB', '', 4096)):
+            path = os.path.join(self.data_dir, subdir, name)
+            with open(path, 'wb') as f:
+                f.write(b'x' * size)
+            self.paths[name] = path
+        with open(os.path.join(self.data_dir, 'notes.txt'), 'w') as f:
+            f.write('not a database')
+        self.index_path = os.path.join(self.test_dir, 'catalog.json')
+        FakeConnector.opened = []
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def _catalog(self):
+        return DatabaseCatalog(self.data_dir, index_path=self.index_path, connector_factory=FakeConnector)
+
+    def test_scan_finds_databases_recursively(self):
+        databases = self._catalog().scan()
+        self.assertEqual(sorted(db['name'] for db in databases), ['BROKEN.FDB', 'EMPTY.FDB', 'PGE_2B.FDB'])
+        self.assertEqual([db['name'] for db in self._catalog().scan(min_size=2000)], ['BROKEN.FDB', 'PGE_2B.FDB'])
+        relative = {db['name']: db['relative_path'] for db in databases}
+        self.assertEqual(relative['EMPTY.FDB'], os.path.join('estate', 'backup', 'EMPTY.FDB'))
+
+    def test_probe_counts_ffb_tables_and_caches(self):
+        catalog = self._catalog()
+        catalog.scan()
+        probes = catalog.probe()
+
+        pge = probes[self.paths['PGE_2B.FDB']]
+        self.assertEqual(pge['tables'], {'FFBSCANNERDATA01': 120, 'FFBSCANNERDATA02': 0})
+        self.assertEqual(pge['total_records'], 120)
+        self.assertFalse(probes[self.paths['EMPTY.FDB']]['has_data'])
+        self.assertEqual(probes[self.paths['BROKEN.FDB']]['error'], 'Connection failed')
+        self.assertEqual([db['name'] for db in catalog.databases_with_data()], ['PGE_2B.FDB'])
+
+        # Indeks persisten: probe berikutnya tidak membuka database lagi
+        opened = len(FakeConnector.opened)
+        reloaded = self._catalog()
+        self.assertEqual(reloaded.probe()[self.paths['PGE_2B.FDB']]['total_records'], 120)
+        self.assertEqual(len(FakeConnector.opened), opened)
+
+    def test_changed_file_is_probed_again(self):
+        catalog = self._catalog()
+        catalog.scan()
+        catalog.probe()
+        with open(self.paths['PGE_2B.FDB'], 'ab') as f:
+            f.write(b'more')
+
+        catalog.scan()
+        self.assertIsNone(catalog.describe(self.paths['PGE_2B.FDB'])['probe'])
+        opened = len(FakeConnector.opened)
+        catalog.probe()
+        self.assertEqual(FakeConnector.opened[opened:], ['PGE_2B.FDB'])
+
+    def test_removed_file_leaves_index(self):
+        catalog = self._catalog()
+        catalog.scan()
+        os.remove(self.paths['BROKEN.FDB'])
+        catalog.scan()
+        self.assertNotIn(self.paths['BROKEN.FDB'], catalog.entries)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+"""
+Date Predicate Tests
+Test pushing the 'date_column' BETWEEN predicate into the outer WHERE clause
+"""
+
+import unittest
+import os
+import sys
+
+# Add parent directory to path
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_DIR)
+
+from dynamic_formula_engine_enhanced import EnhancedDynamicFormulaEngine
+
+FORMULA_PATH = os.path.join(APP_DIR, 'pge2b_final_formula.json')
+
+PARAMETERS = {'start_date': '2025-01-01', 'end_date': '2025-01-31', 'month': 1}
+
+PREDICATE = "a.TRANSDATE BETWEEN '{start_date}' AND '{end_date}'"
+
+
+class TestPushDatePredicate(unittest.TestCase):
+    """Test EnhancedDynamicFormulaEngine._push_date_predicate"""
+
+    def setUp(self):
+        self.engine = EnhancedDynamicFormulaEngine(FORMULA_PATH)
+        self.query_def = {'date_column': 'a.TRANSDATE'}
+
+    def push(self, sql):
+        return self.engine._push_date_predicate('q', self.query_def, sql, PARAMETERS)
+
+    def test_no_where(self):
+        sql = "SELECT a.TRANSDATE, COUNT(*) FROM FFBSCANNERDATA01 a GROUP BY a.TRANSDATE ORDER BY a.TRANSDATE"
+        self.assertEqual(
+            self.push(sql),
+            f"SELECT a.TRANSDATE, COUNT(*) FROM FFBSCANNERDATA01 a WHERE {PREDICATE} "
+            "GROUP BY a.TRANSDATE ORDER BY a.TRANSDATE"
+        )
+        self.assertEqual(self.engine.sql_date_ranges['q'], ('2025-01-01', '2025-01-31'))
+
+    def test_existing_where_is_parenthesised(self):
+        sql = "SELECT * FROM FFBSCANNERDATA01 a WHERE a.RECORDTAG = 'PM' OR a.RECORDTAG = 'P1' ORDER BY a.ID"
+        self.assertEqual(
+            self.push(sql),
+            "SELECT * FROM FFBSCANNERDATA01 a WHERE (a.RECORDTAG = 'PM' OR a.RECORDTAG = 'P1') "
+            f"AND {PREDICATE} ORDER BY a.ID"
+        )
+
+    def test_subquery_clauses_are_ignored(self):
+        sql = ("SELECT a.ID, (SELECT MAX(e.NAME) FROM EMP e WHERE e.ID = a.SCANUSERID GROUP BY e.ID) AS NAME "
+               "FROM FFBSCANNERDATA01 a ORDER BY a.ID")
+        self.assertEqual(
+            self.push(sql),
+            "SELECT a.ID, (SELECT MAX(e.NAME) FROM EMP e WHERE e.ID = a.SCANUSERID GROUP BY e.ID) AS NAME "
+            f"FROM FFBSCANNERDATA01 a WHERE {PREDICATE} ORDER BY a.ID"
+        )
+
+    def test_keywords_inside_strings_are_ignored(self):
+        sql = "SELECT * FROM FFBSCANNERDATA01 a WHERE a.NOTE <> 'ORDER BY' -- GROUP BY\n"
+        self.assertEqual(
+            self.push(sql),
+            f"SELECT * FROM FFBSCANNERDATA01 a WHERE (a.NOTE <> 'ORDER BY') AND {PREDICATE} -- GROUP BY"
+        )
+
+    def test_top_level_union_is_filtered_in_memory(self):
+        sql = "SELECT ID FROM FFBSCANNERDATA01 a UNION SELECT ID FROM FFBSCANNERDATA02 a"
+        self.assertEqual(self.push(sql), sql)
+        self.assertNotIn('q', self.engine.sql_date_ranges)
+
+    def test_formula_date_column(self):
+        """raw_ffb_data in pge2b_final_formula.json declares its date_column"""
+        sql = self.engine._prepare_sql('raw_ffb_data', dict(PARAMETERS))
+        self.assertIn("FROM FFBLOADINGCROP01 WHERE \"DATE PROCESSFL\" BETWEEN '2025-01-01' AND '2025-01-31' "
+                      "ORDER BY", sql)
+
+
+if __name__ == '__main__':
+    unittest.main()
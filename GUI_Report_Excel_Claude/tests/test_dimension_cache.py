@@ -0,0 +1,80 @@
+"""
+Dimension Cache Tests
+Test the on-disk dimension cache and restoring column types on load
+"""
+
+import unittest
+import os
+import sys
+import shutil
+import tempfile
+from datetime import date, datetime
+from decimal import Decimal
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dimension_cache import DimensionCache, get_dimension_cache
+
+EMPLOYEES = [
+    {'ID': 'E01', 'NAME': 'BUDI', 'RATE': Decimal('1250.50'), 'JOINDATE': date(2020, 3, 1),
+     'UPDATEDAT': datetime(2025, 1, 2, 7, 30)},
+    {'ID': 'E02', 'NAME': 'SITI', 'RATE': None, 'JOINDATE': date(2021, 7, 15),
+     'UPDATEDAT': datetime(2025, 1, 3, 8, 0)}
+]
+
+
+class TestDimensionCache(unittest.TestCase):
+    """Test DimensionCache persistence across instances"""
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.test_dir, 'PTRJ_TEST.FDB')
+        with open(self.db_path, 'wb') as f:
+            f.write(b'snapshot-1')
+        self.cache_dir = os.path.join(self.test_dir, 'cache')
+        self.queries = []
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def run_query(self, sql):
+        self.queries.append(sql)
+        return [dict(record) for record in EMPLOYEES]
+
+    def test_column_types_survive_reload(self):
+        """Decimal/date/datetime values come back with their original types from disk"""
+        DimensionCache(self.db_path, self.cache_dir).get_records('employees', 'SELECT * FROM EMP', self.run_query)
+
+        records = DimensionCache(self.db_path, self.cache_dir).get_records(
+            'employees', 'SELECT * FROM EMP', self.run_query)
+
+        self.assertEqual(len(self.queries), 1)
+        self.assertEqual(records, EMPLOYEES)
+        self.assertIsInstance(records[0]['RATE'], Decimal)
+        self.assertIsInstance(records[0]['JOINDATE'], date)
+        self.assertNotIsInstance(records[0]['JOINDATE'], datetime)
+        self.assertIsInstance(records[1]['UPDATEDAT'], datetime)
+
+    def test_database_change_reads_again(self):
+        cache = DimensionCache(self.db_path, self.cache_dir)
+        cache.get_records('employees', 'SELECT * FROM EMP', self.run_query)
+
+        with open(self.db_path, 'wb') as f:
+            f.write(b'snapshot-2 (larger)')
+        cache.get_records('employees', 'SELECT * FROM EMP', self.run_query)
+
+        self.assertEqual(len(self.queries), 2)
+        self.assertEqual(len(os.listdir(self.cache_dir)), 1)
+
+    def test_lookup_and_missing_database(self):
+        cache = get_dimension_cache(self.db_path, self.cache_dir)
+        names = cache.lookup('employees', 'ID', 'NAME', self.run_query)
+
+        self.assertEqual(names.to_dict(), {'E01': 'BUDI', 'E02': 'SITI'})
+        self.assertIs(get_dimension_cache(self.db_path, self.cache_dir), cache)
+        self.assertIsNone(get_dimension_cache(os.path.join(self.test_dir, 'MISSING.FDB'), self.cache_dir))
+
+
+if __name__ == '__main__':
+    unittest.main()
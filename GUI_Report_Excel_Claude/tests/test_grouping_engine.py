@@ -0,0 +1,78 @@
+"""
+Grouping Engine Tests
+Test the default FFB views and chunked (streaming) computation
+"""
+
+import unittest
+import os
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from grouping_engine import GroupingEngine
+from result_set import ResultSet
+
+
+def ffb_row(date, user, tag, division, field, ripe, unripe, black=0, rotten=0):
+    return {'TRANSDATE': date, 'SCANUSERID': user, 'RECORDTAG': tag, 'DIVID': division,
+            'FIELDNAME': field, 'RIPEBCH': ripe, 'UNRIPEBCH': unripe, 'BLACKBCH': black,
+            'ROTTENBCH': rotten, 'RATDMGBCH': 0}
+
+
+class TestGroupingEngine(unittest.TestCase):
+    """Test GroupingEngine with DEFAULT_GROUPING_VIEWS"""
+
+    def setUp(self):
+        self.data = [
+            ffb_row('2025-01-01', 'U1', 'PM', 'D1', 'F-A', 10, 1),
+            ffb_row('2025-01-01', 'U2', 'P1', 'D1', 'F-B', 5, 0, black=1),
+            ffb_row('2025-01-02', 'U1', 'PM', 'D2', None, 7, 2, rotten=1),
+        ]
+        self.lookups = {'employee_mapping': {'U1': 'Budi'}}
+        self.engine = GroupingEngine()
+
+    def test_daily_view(self):
+        views = self.engine.compute(self.data, self.lookups)
+        self.assertEqual(views['daily_performance'], [
+            {'TRANSDATE': '2025-01-01', 'JUMLAH_TRANSAKSI': 2, 'RIPE_BUNCHES': 15, 'UNRIPE_BUNCHES': 1,
+             'BLACK_BUNCHES': 1, 'ROTTEN_BUNCHES': 0, 'RAT_DAMAGE_BUNCHES': 0},
+            {'TRANSDATE': '2025-01-02', 'JUMLAH_TRANSAKSI': 1, 'RIPE_BUNCHES': 7, 'UNRIPE_BUNCHES': 2,
+             'BLACK_BUNCHES': 0, 'ROTTEN_BUNCHES': 1, 'RAT_DAMAGE_BUNCHES': 0},
+        ])
+        self.assertIs(views['processed_daily_data'], views['daily_performance'])
+
+    def test_lookups_conditionals_and_defaults(self):
+        views = self.engine.compute(self.data, self.lookups)
+        self.assertEqual(views['employee_performance'], [
+            {'EMPLOYEE_NAME': 'Budi', 'RECORDTAG': 'PM', 'JUMLAH_TRANSAKSI': 2, 'TOTAL_RIPE': 17,
+             'TOTAL_UNRIPE': 3, 'VERIFICATION_RATE': 0},
+            {'EMPLOYEE_NAME': 'EMP_U2', 'RECORDTAG': 'P1', 'JUMLAH_TRANSAKSI': 1, 'TOTAL_RIPE': 5,
+             'TOTAL_UNRIPE': 0, 'VERIFICATION_RATE': 100},
+        ])
+        self.assertEqual([row['FIELDNAME'] for row in views['field_performance']], ['F-B', 'D2'])
+
+    def test_verification_ratio(self):
+        views = self.engine.compute(self.data, self.lookups)
+        self.assertEqual(views['verification_data'], [
+            {'total_transactions': 3, 'pm_transactions': 2, 'verified_transactions': 1, 'verification_rate': 33.33}
+        ])
+
+    def test_chunks_match_single_pass(self):
+        chunks = [ResultSet.from_records(self.data[:2]), ResultSet.from_records(self.data[2:])]
+        self.assertEqual(self.engine.compute_chunks(chunks, self.lookups),
+                         self.engine.compute(self.data, self.lookups))
+
+    def test_empty_data(self):
+        views = self.engine.compute([], self.lookups)
+        self.assertEqual(views['daily_performance'], [])
+
+    def test_custom_view(self):
+        engine = GroupingEngine({'by_division': {'group_by': ['DIVID'], 'count_as': 'N',
+                                                 'sum': {'RIPE': 'RIPEBCH'}, 'columns': ['DIVID', 'N', 'RIPE']}})
+        self.assertEqual(engine.compute(self.data)['by_division'],
+                         [{'DIVID': 'D1', 'N': 2, 'RIPE': 15}, {'DIVID': 'D2', 'N': 1, 'RIPE': 7}])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+"""
+Iter Query Tests
+Test streaming isql output in ResultSet chunks through a fake isql executable
+"""
+
+import unittest
+import os
+import sys
+import shutil
+import tempfile
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from firebird_connector_enhanced import FirebirdConnectorEnhanced
+
+# isql palsu: membaca script dari stdin lalu mencetak output gaya isql
+FAKE_ISQL = """#!{python}
+import sys
+
+script = sys.stdin.read()
+if 'NOPE' in script:
+    sys.stderr.write("Statement failed, SQLCODE = -204\\nTable unknown\\n")
+    sys.exit(1)
+
+print("SQL> ")
+print("FIELDNO RIPEBCH")
+print("======= ============")
+for index in range(1, {rows} + 1):
+    ripe = '<null>' if index == 3 else str(index * 10)
+    print("%-7s %12s" % ('%04d' % index, ripe))
+print("")
+"""
+
+
+class TestIterQuery(unittest.TestCase):
+    """Test FirebirdConnectorEnhanced.iter_query"""
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.test_dir, 'PTRJ_P2B.FDB')
+        open(self.db_path, 'w').close()
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def connector(self, rows):
+        isql_path = os.path.join(self.test_dir, f'isql_{rows}')
+        with open(isql_path, 'w') as f:
+            f.write(FAKE_ISQL.format(python=sys.executable, rows=rows))
+        os.chmod(isql_path, 0o755)
+        return FirebirdConnectorEnhanced(db_path=self.db_path, isql_path=isql_path)
+
+    def test_rows_arrive_in_chunks(self):
+        chunks = list(self.connector(7).iter_query("SELECT FIELDNO, RIPEBCH FROM FFBSCANNERDATA01", chunk_size=3))
+
+        self.assertEqual([len(chunk) for chunk in chunks], [3, 3, 1])
+        rows = [dict(row) for chunk in chunks for row in chunk]
+        self.assertEqual(rows[0], {'FIELDNO': '0001', 'RIPEBCH': 10})
+        self.assertIsNone(rows[2]['RIPEBCH'])
+        self.assertEqual(rows[-1], {'FIELDNO': '0007', 'RIPEBCH': 70})
+
+    def test_column_types_are_stable_across_chunks(self):
+        """A chunk holding only NULLs keeps the column type of the earlier chunks"""
+        chunks = list(self.connector(4).iter_query("SELECT FIELDNO, RIPEBCH FROM T", chunk_size=1))
+
+        self.assertEqual([str(chunk.column('RIPEBCH').dtype) for chunk in chunks], ['int64'] * 4)
+        self.assertEqual([str(chunk.column('FIELDNO').dtype) for chunk in chunks], ['object'] * 4)
+        self.assertIsNone(chunks[2][0]['RIPEBCH'])
+
+    def test_consumer_can_stop_early(self):
+        connector = self.connector(50)
+        stream = connector.iter_query("SELECT FIELDNO, RIPEBCH FROM T", chunk_size=5)
+        first = next(stream)
+        stream.close()
+
+        self.assertEqual(len(first), 5)
+        self.assertEqual(connector._processes, set())
+
+    def test_isql_error_is_raised(self):
+        with self.assertRaises(Exception) as context:
+            list(self.connector(1).iter_query("SELECT * FROM NOPE"))
+        self.assertIn('Table unknown', str(context.exception))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,208 @@
+"""
+PDF Report Generator Tests
+Test PagedTableWriter chunking, plain-text cells, layouts and rendering PDFs from report data
+"""
+
+import unittest
+import os
+import sys
+import shutil
+import tempfile
+from datetime import date
+from unittest import mock
+
+import pandas as pd
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pdf_report_generator
+from pdf_report_generator import REPORTLAB_AVAILABLE, format_cell, table_rows
+
+if REPORTLAB_AVAILABLE:
+    from reportlab.lib.pagesizes import A4, landscape
+    from reportlab.platypus import Paragraph, SimpleDocTemplate, Table
+    from pdf_report_generator import (
+        PDFReportGenerator, PagedTableWriter, default_layout_spec, employee_performance_rows
+    )
+
+RESULTS = [{
+    'estate': 'PGE 2B', 'division': 'AIR KANDIS', 'kerani_total': 10, 'mandor_total': 4,
+    'asisten_total': 2, 'verifikasi_total': 8,
+    'employee_details': {
+        'E01': {'name': 'BUDI <SPV> & CO', 'kerani': 10, 'mandor': 0, 'asisten': 0,
+                'kerani_verified': 8, 'kerani_differences': 2},
+        'E02': {'name': 'SITI', 'kerani': 0, 'mandor': 4, 'asisten': 2}
+    }
+}]
+
+
+@unittest.skipUnless(REPORTLAB_AVAILABLE, "reportlab not installed")
+class TestPagedTableWriter(unittest.TestCase):
+    """Test PagedTableWriter without building a whole report"""
+
+    def setUp(self):
+        self.story = []
+        self.writer = PagedTableWriter(self.story, ['NAMA', 'NILAI<br/>AKHIR'], [200, 200], chunk_rows=3)
+
+    def cells(self, table_index, row):
+        return self.story[table_index]._cellvalues[row]
+
+    def test_rows_are_split_per_chunk_with_header(self):
+        for index in range(7):
+            self.writer.add_row([f"row {index}", index])
+        self.assertEqual(self.writer.close(), 7)
+
+        self.assertTrue(all(isinstance(table, Table) for table in self.story))
+        # Header dua baris memakan satu row data per chunk
+        self.assertEqual([len(table._cellvalues) for table in self.story], [3, 3, 3, 2])
+        self.assertEqual(self.cells(0, 0), ['NAMA', 'NILAI\nAKHIR'])
+
+    def test_plain_text_with_markup_characters_stays_plain(self):
+        self.writer.add_row(['A < B & C', '<b>not bold</b>'])
+        self.writer.close()
+        self.assertEqual(self.cells(0, 1), ['A < B & C', '<b>not bold</b>'])
+
+    def test_markup_rows_use_paragraphs_and_escape_values(self):
+        self.writer.add_row(['<b>TOTAL</b>', 3.5], markup=True)
+        self.writer.close()
+
+        cells = self.cells(0, 1)
+        self.assertTrue(all(isinstance(cell, Paragraph) for cell in cells))
+        self.assertEqual(cells[0].getPlainText(), 'TOTAL')
+        self.assertEqual(cells[1].getPlainText(), '3.50')
+
+    def test_employee_names_with_markup_characters_build(self):
+        """Plain names containing '<' and '&' used to break Paragraph parsing"""
+        test_dir = tempfile.mkdtemp()
+        try:
+            story = []
+            writer = PagedTableWriter(story, ['ESTATE', 'DIVISI', 'KARYAWAN', 'ROLE', 'TRX', '%', 'KET'],
+                                      [90, 90, 140, 70, 80, 110, 120])
+            kinds = []
+            for row in employee_performance_rows(RESULTS):
+                kinds.append(row['_kind'])
+                writer.add_row([row[key] for key in ('estate', 'division', 'employee', 'role',
+                                                     'transactions', 'percentage', 'notes')], row['_kind'])
+            writer.close()
+
+            self.assertEqual(kinds, ['summary', 'kerani', 'mandor', 'asisten', 'total'])
+            self.assertEqual(story[0]._cellvalues[2][2], 'BUDI <SPV> & CO')
+
+            path = os.path.join(test_dir, 'report.pdf')
+            SimpleDocTemplate(path, pagesize=landscape(A4)).build(story)
+            self.assertGreater(os.path.getsize(path), 0)
+        finally:
+            shutil.rmtree(test_dir)
+
+
+class TestCellHelpers(unittest.TestCase):
+    """Test format_cell and table_rows"""
+
+    def test_format_cell(self):
+        self.assertEqual(format_cell(None), '')
+        self.assertEqual(format_cell(1234567), '1,234,567')
+        self.assertEqual(format_cell(2.0), '2')
+        self.assertEqual(format_cell(float('nan')), '')
+        self.assertEqual(format_cell(1234.5, ',.1f'), '1,234.5')
+        self.assertEqual(format_cell('x', ',.1f'), 'x')
+        self.assertEqual(format_cell(date(2025, 1, 31)), '2025-01-31')
+        self.assertEqual(format_cell({'P1', 'PM'}), 'P1, PM')
+
+    def test_table_rows_shapes(self):
+        frame = pd.DataFrame({'A': [1, 2], 'B': ['x', 'y']})
+        headers, rows = table_rows(frame)
+        self.assertEqual((headers, list(rows)), (['A', 'B'], [{'A': 1, 'B': 'x'}, {'A': 2, 'B': 'y'}]))
+
+        headers, rows = table_rows([{'headers': ['ID'], 'rows': [{'ID': 1}]}])
+        self.assertEqual((headers, list(rows)), (['ID'], [{'ID': 1}]))
+
+        headers, rows = table_rows({'D1': {'name': 'A'}, 'D2': {'name': 'B'}})
+        self.assertEqual((headers, [row['name'] for row in rows]), (['name'], ['A', 'B']))
+
+        headers, rows = table_rows(row for row in [{'ID': 1}, {'ID': 2}])
+        self.assertEqual((headers, len(list(rows))), (['ID'], 2))
+
+        self.assertIsNone(table_rows([]))
+        self.assertIsNone(table_rows([1, 2]))
+        self.assertIsNone(table_rows('text'))
+
+
+@unittest.skipUnless(REPORTLAB_AVAILABLE, "reportlab not installed")
+class TestGeneratePdfFromData(unittest.TestCase):
+    """Test PDFReportGenerator.generate_pdf_from_data and the employee performance report"""
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.generator = PDFReportGenerator()
+        self.stories = []
+        stories = self.stories
+
+        class RecordingDocTemplate(SimpleDocTemplate):
+            def build(self, flowables, *args, **kwargs):
+                stories.append(list(flowables))
+                return super().build(flowables, *args, **kwargs)
+
+        patcher = mock.patch.object(pdf_report_generator, 'SimpleDocTemplate', RecordingDocTemplate)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def tables(self):
+        return [flowable for flowable in self.stories[-1] if isinstance(flowable, Table)]
+
+    def test_default_layout_renders_fields_and_tables(self):
+        data = {
+            'estate_name': 'PGE 2B',
+            'total_transactions': 1250,
+            'divisions': [{'DIVISION': 'AIR KANDIS', 'TOTAL': 10}, {'DIVISION': 'AIR BATU', 'TOTAL': 5}],
+            'notes': ['not', 'a', 'table']
+        }
+        spec = default_layout_spec(data, 'Laporan Uji')
+        self.assertEqual([section['type'] for section in spec['sections']], ['fields', 'table'])
+
+        path = self.generator.generate_pdf_from_data(data, os.path.join(self.test_dir, 'out', 'report.pdf'),
+                                                     title='Laporan Uji', subtitle='Periode: Januari 2025')
+
+        self.assertGreater(os.path.getsize(path), 0)
+        fields, divisions = self.tables()
+        self.assertEqual(fields._cellvalues, [['Estate Name', 'PGE 2B'], ['Total Transactions', '1,250']])
+        self.assertEqual(divisions._cellvalues[1:], [['AIR KANDIS', '10'], ['AIR BATU', '5']])
+
+    def test_compiled_layout_columns_and_max_rows(self):
+        layout = {
+            'orientation': 'portrait',
+            'sections': [{'type': 'table', 'title': 'Per Divisi', 'source': 'summary.divisions', 'max_rows': 2,
+                          'columns': [{'header': 'Divisi', 'key': 'name', 'width': 2},
+                                      {'header': 'Berat', 'key': 'weight', 'format': ',.2f'}]}]
+        }
+        data = {'summary': {'divisions': [{'name': f"D{index}", 'weight': 1000.5 * index} for index in range(5)]}}
+
+        self.generator.generate_pdf_from_data(data, os.path.join(self.test_dir, 'report.pdf'), layout)
+
+        (table,) = self.tables()
+        self.assertEqual(table._cellvalues, [['Divisi', 'Berat'], ['D0', '0.00'], ['D1', '1,000.50']])
+        self.assertGreater(table._colWidths[0], table._colWidths[1])
+        notes = [flowable.getPlainText() for flowable in self.stories[-1] if isinstance(flowable, Paragraph)]
+        self.assertIn('... 3 row lainnya tidak ditampilkan (maksimal 2 row)', notes)
+        # Layout yang sama dipakai ulang dari cache
+        self.assertIs(self.generator.compile_layout(layout), self.generator.compile_layout(dict(layout)))
+
+    def test_employee_performance_pdf(self):
+        path = self.generator.generate_employee_performance_pdf(
+            RESULTS, os.path.join(self.test_dir, 'kinerja.pdf'), date(2025, 1, 1), '2025-01-31')
+
+        self.assertGreater(os.path.getsize(path), 0)
+        paragraphs = [flowable.getPlainText() for flowable in self.stories[-1] if isinstance(flowable, Paragraph)]
+        self.assertIn('Periode: 2025-01-01 - 2025-01-31', paragraphs)
+        self.assertIn('RINGKASAN ANALISIS: 1 Estate • 1 Divisi', paragraphs)
+        rows = self.tables()[0]._cellvalues[1:]
+        self.assertEqual([row[3] for row in rows], ['SUMMARY', 'KERANI', 'MANDOR', 'ASISTEN', ''])
+        self.assertEqual(rows[1][5:], ['80.00% (8)', '2 perbedaan (25.0%)'])
+        self.assertEqual(rows[-1][0], '=== GRAND TOTAL ===')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+"""
+Render Session Tests
+Test incremental refresh of queries, variables and calculated_variables
+"""
+
+import unittest
+import os
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aggregate_pushdown import plan_calculated_variables
+from render_session import RenderSession
+
+ROWS = [
+    {'TRANSDATE': '2025-01-01', 'BUNCHES': 10},
+    {'TRANSDATE': '2025-01-02', 'BUNCHES': 20},
+    {'TRANSDATE': '2025-02-01', 'BUNCHES': 6}
+]
+
+
+class PerVariableEngine:
+    """Minimal engine with the FormulaEngineEnhanced per-variable interface"""
+
+    def __init__(self):
+        self.formulas = {
+            'queries': {
+                'raw_ffb_data': {'sql': "SELECT * FROM FFB WHERE TRANSDATE BETWEEN '{start_date}' AND '{end_date}'"}
+            },
+            'variables': {
+                'report': {
+                    'estate_name': {'type': 'parameter', 'value': 'estate_name'},
+                    'row_count': {'type': 'query_result', 'query': 'raw_ffb_data'}
+                }
+            },
+            'calculated_variables': {
+                'total_bunches': 'SUM(raw_ffb_data.BUNCHES)',
+                'average_bunches': 'total_bunches / transactions',
+                'transactions': 'SUM(raw_ffb_data.length)'
+            }
+        }
+        self.plan = plan_calculated_variables(self.formulas['calculated_variables'], self.formulas['queries'])
+        self.calculated_calls = 0
+
+    def execute_query(self, query_name, parameters):
+        return [row for row in ROWS if parameters['start_date'] <= row['TRANSDATE'] <= parameters['end_date']]
+
+    def _process_variable(self, var_name, var_config, query_results, parameters):
+        if var_config['type'] == 'parameter':
+            return parameters.get(var_config['value'])
+        return len(query_results.get(var_config['query']) or [])
+
+    def compute_calculated_variables(self, query_results, parameters):
+        self.calculated_calls += 1
+        return self.plan.execute(lambda source: None, None, query_results)
+
+
+class TestCalculatedVariableRefresh(unittest.TestCase):
+    """Test that the per-variable path also refreshes calculated_variables"""
+
+    def setUp(self):
+        self.engine = PerVariableEngine()
+        self.session = RenderSession(self.engine)
+        self.parameters = {'start_date': '2025-01-01', 'end_date': '2025-01-31', 'estate_name': 'PGE 2B'}
+
+    def test_dependencies_include_source_query_and_its_parameters(self):
+        self.assertEqual(self.session.calculated_dependencies['total_bunches'],
+                         {'raw_ffb_data', 'start_date', 'end_date'})
+        # Variabel turunan tanpa prefix sumber tetap ikut dihitung bersama
+        self.assertEqual(self.session.calculated_dependencies['average_bunches'], set())
+
+    def test_first_refresh_computes_calculated_variables(self):
+        result = self.session.refresh(self.parameters)
+
+        self.assertEqual(result['variables']['total_bunches'], 30)
+        self.assertEqual(result['variables']['average_bunches'], 15.0)
+        self.assertEqual(result['data']['transactions'], 2)
+
+    def test_date_change_recomputes_calculated_variables(self):
+        self.session.refresh(self.parameters)
+        result = self.session.refresh(dict(self.parameters, end_date='2025-02-28'))
+
+        self.assertEqual(self.engine.calculated_calls, 2)
+        self.assertEqual(result['variables']['total_bunches'], 36)
+        self.assertIn('total_bunches', result['stats']['changed_variables'])
+        self.assertIn('average_bunches', result['stats']['changed_variables'])
+
+    def test_unrelated_parameter_change_keeps_calculated_variables(self):
+        self.session.refresh(self.parameters)
+        result = self.session.refresh(dict(self.parameters, estate_name='PGE 1A'))
+
+        self.assertEqual(self.engine.calculated_calls, 1)
+        self.assertEqual(result['stats']['changed_variables'], ['estate_name'])
+        self.assertEqual(result['variables']['total_bunches'], 30)
+
+
+if __name__ == '__main__':
+    unittest.main()
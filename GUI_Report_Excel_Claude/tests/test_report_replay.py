@@ -0,0 +1,72 @@
+"""
+Report Replay Tests
+Test ExcelReportGeneratorEnhanced.generate_report(from_snapshot=...) without a database
+"""
+
+import unittest
+import os
+import sys
+import shutil
+import tempfile
+
+# Add parent directory to path
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_DIR)
+
+from excel_report_generator_enhanced import ExcelReportGeneratorEnhanced
+from report_common.etl_artifacts import ArtifactStore
+
+TEMPLATE_PATH = os.path.join(APP_DIR, 'templates', 'Template_Laporan_FFB_Analysis.xlsx')
+FORMULA_PATH = os.path.join(APP_DIR, 'laporan_ffb_analysis_formula.json')
+
+PARAMETERS = {'start_date': '2025-01-01', 'end_date': '2025-01-31',
+              'estate_name': 'PGE 2B', 'estate_code': 'PGE_2B'}
+
+
+class TestReportReplay(unittest.TestCase):
+    """Test replaying estate reports from extraction snapshots"""
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.snapshot_dir = os.path.join(self.test_dir, 'etl_reports')
+        self.output_dir = os.path.join(self.test_dir, 'reports')
+        self.run_dir = str(ArtifactStore(self.snapshot_dir).write_run(
+            {'employee_mapping': [{'ID': 'E01', 'NAME': 'BUDI'}]}, PARAMETERS, mode='run'))
+        self.generator = ExcelReportGeneratorEnhanced(
+            template_path=TEMPLATE_PATH, formula_path=FORMULA_PATH,
+            snapshot_dir=os.path.join(self.test_dir, 'captured'))
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_run_folder_supplies_estate_and_period(self):
+        success, outputs = self.generator.generate_report(None, None, [], output_dir=self.output_dir,
+                                                          from_snapshot=self.run_dir)
+
+        self.assertTrue(success)
+        self.assertEqual([os.path.basename(path) for path in outputs],
+                         ['Laporan_FFB_Analysis_PGE_2B_2025-01-01_2025-01-31.xlsx'])
+        self.assertIsNone(self.generator.db_connector)
+        # Replay tidak menyimpan snapshot baru
+        self.assertFalse(os.path.exists(os.path.join(self.test_dir, 'captured')))
+
+    def test_snapshot_folder_uses_latest_run_for_period(self):
+        success, outputs = self.generator.generate_report('2025-01-01', '2025-01-31', ['PGE 2B'],
+                                                          output_dir=self.output_dir,
+                                                          from_snapshot=self.snapshot_dir)
+        self.assertTrue(success)
+        self.assertEqual(len(outputs), 1)
+
+        success, errors = self.generator.generate_report('2025-02-01', '2025-02-28', ['PGE 2B'],
+                                                         output_dir=self.output_dir,
+                                                         from_snapshot=self.snapshot_dir)
+        self.assertFalse(success)
+        self.assertIn('No snapshot found for estate PGE 2B', errors[0])
+
+    def test_run_folder_for_other_estate_is_rejected(self):
+        self.assertIsNone(self.generator._resolve_snapshot(self.run_dir, 'PGE 2A', '2025-01-01', '2025-01-31'))
+        self.assertEqual(self.generator._resolve_snapshot(self.run_dir, 'PGE 2B', None, None), self.run_dir)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+"""
+Result Set Tests
+Test typed columns from isql text, NULL handling and conversions
+"""
+
+import unittest
+import os
+import sys
+import json
+
+import numpy as np
+import pandas as pd
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from result_set import ResultSet, json_default, to_frame
+
+
+class TestResultSet(unittest.TestCase):
+    """Test ResultSet"""
+
+    def setUp(self):
+        self.result = ResultSet.from_text_columns(
+            ['FIELDNO', 'RIPEBCH', 'WEIGHT', 'NOTE'],
+            [['001', '002', '010'], ['10', '<null>', '30'], ['1.5', '2', '<null>'], ['a', 'b', 'a']])
+
+    def test_text_columns_are_typed(self):
+        self.assertEqual(self.result.column('FIELDNO').dtype, object)
+        self.assertEqual(self.result.column('RIPEBCH').dtype, np.int64)
+        self.assertEqual(self.result.column('WEIGHT').dtype, np.float64)
+        self.assertEqual(self.result.column_kinds(), {'FIELDNO': 'O', 'RIPEBCH': 'i', 'WEIGHT': 'f', 'NOTE': 'O'})
+
+    def test_rows_behave_like_dicts(self):
+        self.assertEqual(len(self.result), 3)
+        self.assertEqual(dict(self.result[0]), {'FIELDNO': '001', 'RIPEBCH': 10, 'WEIGHT': 1.5, 'NOTE': 'a'})
+        self.assertIsNone(self.result[1]['RIPEBCH'])
+        self.assertIsNone(self.result[-1]['WEIGHT'])
+        self.assertEqual([row['FIELDNO'] for row in self.result[1:]], ['002', '010'])
+        with self.assertRaises(IndexError):
+            self.result[3]
+
+    def test_kinds_keep_types_stable_across_chunks(self):
+        kinds = self.result.column_kinds()
+        chunk = ResultSet.from_text_columns(['FIELDNO', 'RIPEBCH', 'WEIGHT', 'NOTE'],
+                                            [['5'], ['7'], ['3'], ['12']], kinds)
+        self.assertEqual(chunk.column_kinds(), kinds)
+        self.assertEqual(chunk.to_records(), [{'FIELDNO': '5', 'RIPEBCH': 7, 'WEIGHT': 3.0, 'NOTE': '12'}])
+
+    def test_pandas_round_trip_keeps_nulls(self):
+        frame = self.result.to_pandas()
+        self.assertEqual(str(frame['RIPEBCH'].dtype), 'Int64')
+        self.assertTrue(pd.isna(frame['RIPEBCH'][1]))
+        self.assertEqual(ResultSet.from_pandas(frame), self.result)
+        self.assertEqual(ResultSet.from_records(self.result.to_records()).to_records(), self.result.to_records())
+
+    def test_take_and_to_frame(self):
+        subset = self.result.take([2, 0])
+        self.assertEqual([row['FIELDNO'] for row in subset], ['010', '001'])
+        self.assertEqual(list(to_frame(subset).columns), self.result.columns)
+        self.assertTrue(to_frame([]).empty)
+
+    def test_json_default(self):
+        payload = json.loads(json.dumps({'rows': self.result, 'row': self.result[0], 'n': np.int64(3)},
+                                        default=json_default))
+        self.assertEqual(payload['rows'][1]['RIPEBCH'], None)
+        self.assertEqual(payload['row']['FIELDNO'], '001')
+        self.assertEqual(payload['n'], 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,160 @@
+"""
+Tracing Tests
+Test nested spans, the disabled no-op path, profile export and per-job tracers
+"""
+
+import unittest
+import os
+import sys
+import json
+import time
+import shutil
+import tempfile
+import threading
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import tracing
+from tracing import Tracer
+
+
+class TestTracer(unittest.TestCase):
+    """Test Tracer span bookkeeping"""
+
+    def test_nested_spans_inherit_and_split_self_time(self):
+        tracer = Tracer('run', enabled=True, estate='PGE 2B')
+        with tracer.span('raw_ffb_data', stage='extract', estate='PGE 2B', query='raw_ffb_data'):
+            time.sleep(0.01)
+            with tracer.span('parse_output', stage='parse') as child:
+                time.sleep(0.01)
+                child.set(rows=10)
+        tracer.finish()
+
+        root = tracer.roots[0]
+        child = root.children[0]
+        self.assertEqual((child.estate, child.query), ('PGE 2B', 'raw_ffb_data'))
+        self.assertEqual(child.attrs, {'rows': 10})
+        self.assertAlmostEqual(root.self_time + child.duration, root.duration, places=6)
+
+        totals = tracer.stage_totals()
+        self.assertAlmostEqual(totals['extract'], root.self_time, places=6)
+        self.assertAlmostEqual(totals['parse'], child.self_time, places=6)
+        # Query dihitung sekali (span teratas), bukan ditambah child
+        self.assertAlmostEqual(tracer.query_totals()['raw_ffb_data'], root.duration, places=6)
+
+    def test_error_is_recorded_and_propagates(self):
+        tracer = Tracer(enabled=True)
+        with self.assertRaises(ValueError):
+            with tracer.span('render', stage='render'):
+                raise ValueError('boom')
+        self.assertEqual(tracer.roots[0].attrs['error'], 'ValueError')
+
+    def test_disabled_tracer_records_nothing(self):
+        tracer = Tracer()
+        with tracer.span('a', stage='extract') as active:
+            active.set(rows=1)
+        self.assertIs(tracer.span('b'), tracing._NULL_SPAN)
+        self.assertEqual(tracer.roots, [])
+
+        tracer = Tracer(enabled=True)
+        tracer.finish()
+        ended = tracer.total_seconds
+        with tracer.span('after_finish'):
+            pass
+        tracer.finish()
+        self.assertEqual(tracer.roots, [])
+        self.assertEqual(tracer.total_seconds, ended)
+
+    def test_folded_stacks(self):
+        tracer = Tracer('ETL Preview', enabled=True)
+        with tracer.span('load data', stage='extract'):
+            with tracer.span('parse;rows', stage='parse'):
+                time.sleep(0.002)
+
+        lines = tracer.to_folded()
+        paths = [line.rsplit(' ', 1)[0] for line in lines]
+        self.assertIn('ETL_Preview;extract:load_data;parse:parse_rows', paths)
+        self.assertTrue(all(int(line.rsplit(' ', 1)[1]) > 0 for line in lines))
+
+
+class TestExport(unittest.TestCase):
+    """Test Tracer.export"""
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_export_writes_json_and_folded(self):
+        tracer = Tracer('ETL', enabled=True, estate='PGE 2B')
+        with tracer.span('employee_mapping', stage='extract', query='employee_mapping'):
+            time.sleep(0.002)
+        tracer.finish()
+
+        json_path, folded_path = tracer.export(self.test_dir)
+
+        self.assertIn('PGE 2B', os.path.basename(json_path))
+        with open(json_path, 'r', encoding='utf-8') as f:
+            profile = json.load(f)
+        self.assertEqual(profile['metadata'], {'estate': 'PGE 2B'})
+        self.assertEqual(profile['spans'][0]['query'], 'employee_mapping')
+        self.assertIn('employee_mapping', profile['queries'])
+        with open(folded_path, 'r', encoding='utf-8') as f:
+            self.assertTrue(f.read().startswith('ETL;extract:employee_mapping '))
+        self.assertIn('Slowest queries:', tracer.format_breakdown())
+
+
+class TestRunContext(unittest.TestCase):
+    """Test the module-level run helpers"""
+
+    def run_job(self, name, results):
+        tracer = tracing.start_run(name)
+        for index in range(3):
+            with tracing.span(f"{name}_{index}", stage='analyze'):
+                time.sleep(0.001)
+        results[name] = (tracer, tracing.finish_run())
+
+    def test_concurrent_jobs_keep_separate_tracers(self):
+        results = {}
+        threads = [threading.Thread(target=self.run_job, args=(name, results)) for name in ('job_a', 'job_b')]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        for name in ('job_a', 'job_b'):
+            started, finished = results[name]
+            self.assertIs(finished, started)
+            names = [span.name for span in finished.roots]
+            self.assertEqual(names, [f"{name}_{index}" for index in range(3)])
+        # Thread utama tetap memakai tracer default yang tidak aktif
+        self.assertFalse(tracing.get_tracer().enabled)
+
+    def test_bind_carries_the_run_into_helper_threads(self):
+        done = []
+
+        def job():
+            tracer = tracing.start_run('job')
+            helper = threading.Thread(target=tracing.bind(render))
+            helper.start()
+            helper.join()
+            done.append((tracer, tracing.finish_run()))
+
+        @tracing.traced(stage='render')
+        def render():
+            time.sleep(0.001)
+
+        thread = threading.Thread(target=job)
+        thread.start()
+        thread.join()
+
+        started, finished = done[0]
+        self.assertIs(finished, started)
+        self.assertEqual([span.name for span in finished.roots], ['render'])
+        self.assertNotEqual(finished.roots[0].thread, thread.name)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,370 @@
+#!/usr/bin/env python3
+"""
+Tracing - span ringan untuk profil waktu per stage pipeline laporan
+Span punya nama, stage (extract/parse/analyze/render/save), estate dan query, dan
+bisa bersarang. Saat tracer tidak aktif span() mengembalikan context manager kosong
+yang sama, sehingga instrumentasi di hot path hampir tanpa biaya.
+
+Satu run menghasilkan profil JSON dan file folded stack (format flamegraph.pl /
+speedscope) di etl_reports/:
+
+    tracer = tracing.start_run('ETL Preview', estate='PGE 2B')
+    with tracing.span('raw_ffb_data', stage='extract', query='raw_ffb_data'):
+        ...
+    tracing.finish_run()
+    tracer.export()
+
+Tracer aktif disimpan per context (contextvars), bukan satu global: setiap job
+(thread) punya run sendiri, sehingga dua job yang berjalan bersamaan tidak saling
+menimpa span. Pekerjaan yang dilempar ke thread pembantu dibungkus tracing.bind().
+"""
+
+import os
+import json
+import time
+import logging
+import functools
+import threading
+import contextvars
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Tuple
+
+STAGES = ('extract', 'parse', 'analyze', 'render', 'save')
+OTHER_STAGE = 'other'
+
+DEFAULT_PROFILE_DIR = 'etl_reports'
+
+logger = logging.getLogger(__name__)
+
+
+class Span:
+    """Satu interval waktu dalam run (waktu dalam detik relatif terhadap awal run)"""
+
+    __slots__ = ('name', 'stage', 'estate', 'query', 'attrs', 'start', 'end', 'children', 'thread')
+
+    def __init__(self, name: str, stage: Optional[str], estate: Optional[str], query: Optional[str],
+                 attrs: Dict[str, Any], start: float, thread: str):
+        self.name = name
+        self.stage = stage
+        self.estate = estate
+        self.query = query
+        self.attrs = attrs
+        self.start = start
+        self.end = None
+        self.children = []
+        self.thread = thread
+
+    @property
+    def duration(self) -> float:
+        return (self.end if self.end is not None else self.start) - self.start
+
+    @property
+    def self_time(self) -> float:
+        """Durasi di luar child span"""
+        return max(0.0, self.duration - sum(child.duration for child in self.children))
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {
+            'name': self.name,
+            'stage': self.stage,
+            'start': round(self.start, 6),
+            'duration': round(self.duration, 6),
+            'self_time': round(self.self_time, 6)
+        }
+        if self.estate:
+            data['estate'] = self.estate
+        if self.query:
+            data['query'] = self.query
+        if self.attrs:
+            data['attrs'] = self.attrs
+        if self.thread != 'MainThread':
+            data['thread'] = self.thread
+        if self.children:
+            data['children'] = [child.to_dict() for child in self.children]
+        return data
+
+
+class _NullSpan:
+    """Context manager kosong untuk tracer yang tidak aktif"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        return False
+
+    def set(self, **attrs):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _ActiveSpan:
+    """Context manager yang membuka dan menutup Span pada tracer aktif"""
+
+    __slots__ = ('_tracer', '_span')
+
+    def __init__(self, tracer: 'Tracer', span: Span):
+        self._tracer = tracer
+        self._span = span
+
+    def __enter__(self):
+        self._tracer._push(self._span)
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._span.end = time.perf_counter() - self._tracer._origin
+        if exc_type is not None:
+            self._span.attrs['error'] = exc_type.__name__
+        self._tracer._pop(self._span)
+        return False
+
+    def set(self, **attrs):
+        """Tambah atribut ke span (mis. jumlah row setelah query selesai)"""
+        self._span.attrs.update(attrs)
+
+
+class Tracer:
+    """
+    Pengumpul span untuk satu run
+    """
+
+    def __init__(self, name: str = 'run', enabled: bool = False, **metadata):
+        """
+        Args:
+            name: Nama run (dipakai untuk nama file profil)
+            enabled: Aktifkan pencatatan span
+            metadata: Info run (estate, parameter, dsb.)
+        """
+        self.name = name
+        self.enabled = enabled
+        self.metadata = metadata
+        self.started_at = datetime.now()
+        self.roots = []
+        self.ended = None
+        self._origin = time.perf_counter()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def span(self, name: str, stage: Optional[str] = None, estate: Optional[str] = None,
+             query: Optional[str] = None, **attrs):
+        """
+        Context manager span; stage dan estate diwarisi dari parent jika tidak diisi
+        """
+        if not self.enabled:
+            return _NULL_SPAN
+
+        parent = self._current()
+        if parent is not None:
+            stage = stage or parent.stage
+            estate = estate or parent.estate
+            query = query or parent.query
+        span = Span(name, stage, estate, query, attrs, time.perf_counter() - self._origin,
+                    threading.current_thread().name)
+        return _ActiveSpan(self, span)
+
+    def _stack(self) -> List[Span]:
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _current(self) -> Optional[Span]:
+        stack = self._stack()
+        return stack[-1] if stack else None
+
+    def _push(self, span: Span):
+        stack = self._stack()
+        if stack:
+            stack[-1].children.append(span)
+        else:
+            with self._lock:
+                self.roots.append(span)
+        stack.append(span)
+
+    def _pop(self, span: Span):
+        stack = self._stack()
+        if stack and stack[-1] is span:
+            stack.pop()
+
+    def finish(self):
+        """Tutup run (span berikutnya tidak dicatat); pemanggilan berikutnya tidak mengubah durasi"""
+        self.enabled = False
+        if self.ended is None:
+            self.ended = time.perf_counter() - self._origin
+
+    @property
+    def total_seconds(self) -> float:
+        """Durasi run (sampai finish(), atau sampai sekarang jika masih berjalan)"""
+        return self.ended if self.ended is not None else time.perf_counter() - self._origin
+
+    def iter_spans(self):
+        """Semua span (depth-first)"""
+        pending = list(reversed(self.roots))
+        while pending:
+            span = pending.pop()
+            yield span
+            pending.extend(reversed(span.children))
+
+    def stage_totals(self) -> Dict[str, float]:
+        """Waktu per stage dari self-time span (span bersarang tidak dihitung dua kali)"""
+        totals = {stage: 0.0 for stage in STAGES}
+        for span in self.iter_spans():
+            stage = span.stage or OTHER_STAGE
+            totals[stage] = totals.get(stage, 0.0) + span.self_time
+        return totals
+
+    def query_totals(self) -> Dict[str, float]:
+        """Waktu per query (span teratas untuk setiap query)"""
+        totals = {}
+        pending = [(span, None) for span in self.roots]
+        while pending:
+            span, parent_query = pending.pop()
+            if span.query and span.query != parent_query:
+                totals[span.query] = totals.get(span.query, 0.0) + span.duration
+            pending.extend((child, span.query or parent_query) for child in span.children)
+        return totals
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Profil run sebagai dict (siap ditulis ke JSON)"""
+        return {
+            'run': self.name,
+            'started_at': self.started_at.isoformat(timespec='seconds'),
+            'total_seconds': round(self.total_seconds, 6),
+            'metadata': self.metadata,
+            'stages': {stage: round(seconds, 6) for stage, seconds in self.stage_totals().items()},
+            'queries': {query: round(seconds, 6) for query, seconds in self.query_totals().items()},
+            'spans': [span.to_dict() for span in self.roots]
+        }
+
+    def to_folded(self) -> List[str]:
+        """
+        Folded stacks ("run;stage:span;child <mikrodetik>") untuk flamegraph.pl / speedscope
+        """
+        lines = []
+        root_name = self.name.replace(';', '_').replace(' ', '_')
+        pending = [(span, root_name) for span in reversed(self.roots)]
+        while pending:
+            span, prefix = pending.pop()
+            label = span.name if span.stage is None else f"{span.stage}:{span.name}"
+            path = f"{prefix};{label.replace(';', '_').replace(' ', '_')}"
+            micros = int(round(span.self_time * 1_000_000))
+            if micros > 0:
+                lines.append(f"{path} {micros}")
+            pending.extend((child, path) for child in reversed(span.children))
+        return lines
+
+    def format_breakdown(self) -> str:
+        """Ringkasan teks per stage untuk ditampilkan di GUI"""
+        totals = self.stage_totals()
+        total = self.total_seconds
+        lines = ["STAGE BREAKDOWN:", "-" * 40]
+        for stage, seconds in totals.items():
+            if stage == OTHER_STAGE and seconds <= 0:
+                continue
+            percentage = (seconds / total * 100) if total > 0 else 0
+            lines.append(f"{stage.capitalize():<10} {seconds:8.3f}s ({percentage:5.1f}%)")
+        untraced = max(0.0, total - sum(totals.values()))
+        if untraced > 0:
+            percentage = (untraced / total * 100) if total > 0 else 0
+            lines.append(f"{'Untraced':<10} {untraced:8.3f}s ({percentage:5.1f}%)")
+        lines.append(f"{'Total':<10} {total:8.3f}s")
+
+        queries = sorted(self.query_totals().items(), key=lambda item: item[1], reverse=True)
+        if queries:
+            lines.append("")
+            lines.append("Slowest queries:")
+            for query, seconds in queries[:10]:
+                lines.append(f"   {query}: {seconds:.3f}s")
+        return "\n".join(lines)
+
+    def export(self, directory: str = DEFAULT_PROFILE_DIR, prefix: str = 'Profile') -> Tuple[str, str]:
+        """
+        Tulis profil JSON dan folded stack ke directory
+
+        Returns:
+            (path JSON, path folded)
+        """
+        Path(directory).mkdir(parents=True, exist_ok=True)
+        label = self.metadata.get('estate') or self.name
+        timestamp = self.started_at.strftime('%Y%m%d_%H%M%S')
+        base = os.path.join(directory, f"{prefix}_{label}_{timestamp}")
+
+        json_path = f"{base}.json"
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, indent=2, ensure_ascii=False, default=str)
+
+        folded_path = f"{base}.folded"
+        with open(folded_path, 'w', encoding='utf-8') as f:
+            f.write("\n".join(self.to_folded()) + "\n")
+
+        logger.info(f"Profile saved to {json_path} and {folded_path}")
+        return json_path, folded_path
+
+
+# Tracer run aktif per context (thread/job); default tracer yang tidak aktif
+_current_tracer = contextvars.ContextVar('tracer', default=Tracer())
+
+
+def get_tracer() -> Tracer:
+    return _current_tracer.get()
+
+
+def span(name: str, stage: Optional[str] = None, estate: Optional[str] = None,
+         query: Optional[str] = None, **attrs):
+    """Span pada tracer run aktif (context manager kosong jika tracing tidak aktif)"""
+    tracer = _current_tracer.get()
+    if not tracer.enabled:
+        return _NULL_SPAN
+    return tracer.span(name, stage, estate, query, **attrs)
+
+
+def traced(stage: Optional[str] = None, name: Optional[str] = None):
+    """Decorator: jalankan fungsi di dalam span (nama default: nama fungsi)"""
+    def decorator(func):
+        span_name = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            tracer = _current_tracer.get()
+            if not tracer.enabled:
+                return func(*args, **kwargs)
+            with tracer.span(span_name, stage):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def start_run(name: str = 'run', **metadata) -> Tracer:
+    """Mulai run baru dengan tracer aktif untuk context (thread/job) ini"""
+    tracer = Tracer(name, enabled=True, **metadata)
+    _current_tracer.set(tracer)
+    return tracer
+
+
+def finish_run() -> Tracer:
+    """Selesaikan run aktif context ini dan kembalikan tracer-nya (untuk export / breakdown)"""
+    tracer = _current_tracer.get()
+    tracer.finish()
+    return tracer
+
+
+def bind(func):
+    """
+    Bungkus func agar berjalan dengan tracer run saat ini, untuk pekerjaan yang
+    dijalankan di thread pembantu (executor.submit(tracing.bind(render_pdf)))
+    """
+    tracer = _current_tracer.get()
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        token = _current_tracer.set(tracer)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _current_tracer.reset(token)
+    return wrapper
@@ -0,0 +1,354 @@
+#!/usr/bin/env python3
+"""
+Data Validator - validasi kolumnar untuk validation_rules formula
+READ-ONLY ACCESS - No data modification
+
+Setiap rule dievaluasi sebagai mask satu kolom (pandas), bukan float()/strptime
+per cell. Hasilnya jumlah pelanggaran per rule plus sampel row (dibatasi), bukan
+satu pesan per cell, sehingga data kotor 100k row tetap cepat dan ringkas.
+
+Rule yang didukung (format validations / validation_rules formula):
+- required_fields: ["TRANSDATE", ...]           nilai kosong / NULL / kolom tidak ada
+- numeric_fields: ["BUNCHES", ...]               nilai tidak bisa dibaca sebagai angka
+- date_fields: ["TRANSDATE", ...]                string bukan format date_format (%Y-%m-%d)
+- data_quality_checks: ["BUNCHES >= 0", "FIELDID IS NOT NULL", "X BETWEEN 0 AND 100"]
+- data_validation: {"FIELD": {"type": "integer|decimal|date", "min_value": 0, "max_value": 100}}
+  (atau data_validation berisi required_fields / numeric_fields seperti di atas)
+
+    report = validate_records(rows, formula['validation_rules'])
+    # {'total_rows': 100000, 'failed_rows': 12, 'valid': False,
+    #  'rules': [{'rule': "BUNCHES >= 0", 'field': 'BUNCHES', 'failed': 12, 'samples': [...]}]}
+    for message in validation_messages(report):
+        logger.warning(message)
+
+Version: 1.0.0
+"""
+
+import re
+import logging
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_DATE_FORMAT = '%Y-%m-%d'
+
+# Sampel row pelanggaran per rule
+DEFAULT_SAMPLE_SIZE = 20
+
+RULE_REQUIRED = 'required'
+RULE_NUMERIC = 'numeric'
+RULE_INTEGER = 'integer'
+RULE_DATE = 'date'
+RULE_RANGE = 'range'
+RULE_CHECK = 'check'
+
+COMPARISON_PATTERN = re.compile(r'^\s*(\w+)\s*(>=|<=|<>|!=|=|>|<)\s*(.+?)\s*$')
+NULL_CHECK_PATTERN = re.compile(r'^\s*(\w+)\s+IS\s+(NOT\s+)?NULL\s*$', re.IGNORECASE)
+BETWEEN_PATTERN = re.compile(r'^\s*(\w+)\s+BETWEEN\s+(.+?)\s+AND\s+(.+?)\s*$', re.IGNORECASE)
+
+logger = logging.getLogger(__name__)
+
+
+def records_frame(data: Any) -> pd.DataFrame:
+    """DataFrame dari list of dict / ResultSet / DataFrame"""
+    if isinstance(data, pd.DataFrame):
+        return data
+    if hasattr(data, 'to_pandas'):
+        return data.to_pandas()
+    return pd.DataFrame(list(data or []))
+
+
+def _literal(text: str) -> Any:
+    """Literal SQL sederhana: angka atau string dengan tanda kutip"""
+    text = text.strip()
+    if len(text) >= 2 and text[0] == text[-1] == "'":
+        return text[1:-1].replace("''", "'")
+    try:
+        return float(text)
+    except ValueError:
+        return text
+
+
+def parse_rules(validations: Optional[Dict]) -> List[Dict[str, Any]]:
+    """
+    Normalisasi validations / validation_rules formula ke daftar rule
+
+    Returns:
+        [{'rule', 'type', 'field', ...parameter rule}]
+    """
+    rules = []
+    if not validations:
+        return rules
+
+    date_format = validations.get('date_format', DEFAULT_DATE_FORMAT)
+
+    for field in validations.get('required_fields', []):
+        rules.append({'rule': f"{field} required", 'type': RULE_REQUIRED, 'field': field})
+    for field in validations.get('numeric_fields', []):
+        rules.append({'rule': f"{field} numeric", 'type': RULE_NUMERIC, 'field': field})
+    for field in validations.get('date_fields', []):
+        rules.append({'rule': f"{field} date ({date_format})", 'type': RULE_DATE,
+                      'field': field, 'format': date_format})
+
+    for check in validations.get('data_quality_checks', []):
+        rule = parse_check(check)
+        if rule:
+            rules.append(rule)
+        else:
+            logger.warning(f"Unsupported data quality check skipped: {check!r}")
+
+    data_validation = validations.get('data_validation') or {}
+    if any(key in data_validation for key in ('required_fields', 'numeric_fields', 'date_fields')):
+        rules.extend(parse_rules(data_validation))
+    else:
+        for field, spec in data_validation.items():
+            if isinstance(spec, dict):
+                rules.extend(_field_spec_rules(field, spec, date_format))
+
+    return rules
+
+
+def _field_spec_rules(field: str, spec: Dict[str, Any], date_format: str) -> List[Dict[str, Any]]:
+    """Rule dari {"type": "integer|decimal|date", "min_value", "max_value", "required"}"""
+    rules = []
+    if spec.get('required'):
+        rules.append({'rule': f"{field} required", 'type': RULE_REQUIRED, 'field': field})
+
+    field_type = spec.get('type')
+    if field_type == 'integer':
+        rules.append({'rule': f"{field} integer", 'type': RULE_INTEGER, 'field': field})
+    elif field_type in ('decimal', 'numeric', 'number', 'float'):
+        rules.append({'rule': f"{field} numeric", 'type': RULE_NUMERIC, 'field': field})
+    elif field_type == 'date':
+        date_format = spec.get('format', date_format)
+        rules.append({'rule': f"{field} date ({date_format})", 'type': RULE_DATE,
+                      'field': field, 'format': date_format})
+
+    min_value, max_value = spec.get('min_value'), spec.get('max_value')
+    if min_value is not None or max_value is not None:
+        bounds = [f">= {min_value}" if min_value is not None else None,
+                  f"<= {max_value}" if max_value is not None else None]
+        rules.append({'rule': f"{field} " + " and ".join(b for b in bounds if b), 'type': RULE_RANGE,
+                      'field': field, 'min': min_value, 'max': max_value})
+    return rules
+
+
+def parse_check(check: str) -> Optional[Dict[str, Any]]:
+    """Rule dari ekspresi data_quality_checks (None jika tidak didukung)"""
+    match = NULL_CHECK_PATTERN.match(check)
+    if match:
+        if match.group(2):
+            return {'rule': check, 'type': RULE_REQUIRED, 'field': match.group(1)}
+        return {'rule': check, 'type': RULE_CHECK, 'field': match.group(1), 'operator': 'IS NULL'}
+
+    match = BETWEEN_PATTERN.match(check)
+    if match:
+        return {'rule': check, 'type': RULE_RANGE, 'field': match.group(1),
+                'min': _literal(match.group(2)), 'max': _literal(match.group(3))}
+
+    match = COMPARISON_PATTERN.match(check)
+    if match:
+        return {'rule': check, 'type': RULE_CHECK, 'field': match.group(1),
+                'operator': match.group(2), 'value': _literal(match.group(3))}
+    return None
+
+
+def _numeric(column: pd.Series) -> pd.Series:
+    if pd.api.types.is_numeric_dtype(column):
+        return column.astype(float)
+    return pd.to_numeric(column, errors='coerce')
+
+
+def _missing(column: pd.Series) -> pd.Series:
+    """Mask NULL / string kosong"""
+    mask = column.isna()
+    if column.dtype == object or pd.api.types.is_string_dtype(column):
+        mask |= column.astype(str).str.strip().eq('') & column.notna()
+    return mask
+
+
+def _compare(values: pd.Series, operator: str, value: Any) -> pd.Series:
+    if operator == '>=':
+        return values >= value
+    if operator == '<=':
+        return values <= value
+    if operator == '>':
+        return values > value
+    if operator == '<':
+        return values < value
+    if operator == '=':
+        return values == value
+    return values != value
+
+
+def failure_mask(frame: pd.DataFrame, rule: Dict[str, Any], cache: Dict = None) -> pd.Series:
+    """
+    Mask row yang melanggar rule (NULL hanya melanggar rule required)
+
+    cache: konversi kolom (mask kosong, nilai numerik) dipakai ulang antar rule
+    """
+    cache = {} if cache is None else cache
+    field = rule['field']
+    rule_type = rule['type']
+
+    if field not in frame.columns:
+        # Kolom tidak ada: semua row melanggar required, rule lain tidak bisa dicek
+        return pd.Series(rule_type == RULE_REQUIRED, index=frame.index)
+
+    column = frame[field]
+    if (field, 'present') not in cache:
+        cache[(field, 'present')] = ~_missing(column)
+    present = cache[(field, 'present')]
+
+    def numeric():
+        if (field, 'numeric') not in cache:
+            cache[(field, 'numeric')] = _numeric(column)
+        return cache[(field, 'numeric')]
+
+    if rule_type == RULE_REQUIRED:
+        return ~present
+
+    if rule_type in (RULE_NUMERIC, RULE_INTEGER):
+        numbers = numeric()
+        invalid = column.notna() & numbers.isna()
+        if rule_type == RULE_INTEGER:
+            invalid |= numbers.notna() & (np.floor(numbers) != numbers)
+        return invalid
+
+    if rule_type == RULE_DATE:
+        # Hanya string yang diparse (date/datetime dari database dianggap valid)
+        is_text = column.map(type).eq(str) & present
+        if not is_text.any():
+            return pd.Series(False, index=frame.index)
+        parsed = pd.to_datetime(column.where(is_text), format=rule.get('format', DEFAULT_DATE_FORMAT),
+                                errors='coerce')
+        return is_text & parsed.isna()
+
+    if rule_type == RULE_RANGE:
+        numbers = numeric()
+        invalid = pd.Series(False, index=frame.index)
+        if rule.get('min') is not None:
+            invalid |= numbers < float(rule['min'])
+        if rule.get('max') is not None:
+            invalid |= numbers > float(rule['max'])
+        return invalid & numbers.notna()
+
+    if rule_type == RULE_CHECK:
+        if rule['operator'] == 'IS NULL':
+            return present
+        value = rule['value']
+        if isinstance(value, float):
+            values = numeric()
+            # Nilai non-angka dilaporkan oleh rule numeric, NULL lolos (semantik CHECK SQL)
+            return values.notna() & ~_compare(values, rule['operator'], value)
+        values = column.astype(str).str.strip()
+        return present & ~_compare(values, rule['operator'], value)
+
+    return pd.Series(False, index=frame.index)
+
+
+def _sample_value(value: Any) -> Any:
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return None
+    if isinstance(value, np.generic):
+        return value.item()
+    return value if isinstance(value, (int, float, str, bool)) else str(value)
+
+
+def validate_frame(frame: pd.DataFrame, rules: List[Dict[str, Any]],
+                   sample_size: int = DEFAULT_SAMPLE_SIZE,
+                   skip_missing_columns: bool = False) -> Dict[str, Any]:
+    """
+    Evaluasi rule terhadap DataFrame
+
+    Args:
+        frame: Data yang divalidasi
+        rules: Hasil parse_rules
+        sample_size: Sampel row pelanggaran per rule
+        skip_missing_columns: Lewati rule yang kolomnya tidak ada (validasi semua query)
+
+    Returns:
+        {'total_rows', 'failed_rows', 'valid', 'rules': [{'rule', 'type', 'field',
+         'failed', 'samples': [{'row', 'value'}]}]}
+    """
+    total = len(frame)
+    cache = {}
+    any_failed = pd.Series(False, index=frame.index)
+    results = []
+
+    for rule in rules:
+        if skip_missing_columns and rule['field'] not in frame.columns:
+            continue
+        mask = failure_mask(frame, rule, cache)
+        failed = int(mask.sum())
+        any_failed |= mask
+
+        samples = []
+        if failed:
+            positions = np.flatnonzero(mask.to_numpy())[:sample_size]
+            column = frame[rule['field']] if rule['field'] in frame.columns else None
+            for position in positions:
+                value = column.iloc[position] if column is not None else None
+                samples.append({'row': int(position) + 1, 'value': _sample_value(value)})
+
+        results.append({
+            'rule': rule['rule'],
+            'type': rule['type'],
+            'field': rule['field'],
+            'failed': failed,
+            'samples': samples
+        })
+
+    failed_rows = int(any_failed.sum())
+    return {
+        'total_rows': total,
+        'failed_rows': failed_rows,
+        'valid': failed_rows == 0,
+        'rules': results
+    }
+
+
+def validate_records(data: Any, validations: Optional[Dict],
+                     sample_size: int = DEFAULT_SAMPLE_SIZE) -> Dict[str, Any]:
+    """validate_frame untuk list of dict / ResultSet / DataFrame dengan validations formula"""
+    return validate_frame(records_frame(data), parse_rules(validations), sample_size)
+
+
+def validate_query_results(query_results: Dict[str, Any], validations: Optional[Dict],
+                           sample_size: int = DEFAULT_SAMPLE_SIZE) -> Dict[str, Dict[str, Any]]:
+    """
+    Pre-flight validasi semua hasil query sebelum render
+
+    Rule hanya diterapkan ke hasil query yang memiliki kolomnya.
+
+    Returns:
+        {query_name: report} untuk query yang terkena minimal satu rule
+    """
+    rules = parse_rules(validations)
+    reports = {}
+    if not rules:
+        return reports
+
+    for query_name, data in (query_results or {}).items():
+        if not isinstance(data, (list, pd.DataFrame)) or not len(data):
+            continue
+        frame = records_frame(data)
+        report = validate_frame(frame, rules, sample_size, skip_missing_columns=True)
+        if report['rules']:
+            reports[query_name] = report
+    return reports
+
+
+def validation_messages(report: Dict[str, Any], source: str = None) -> List[str]:
+    """Satu pesan per rule yang dilanggar"""
+    messages = []
+    prefix = f"{source}: " if source else ""
+    for result in report.get('rules', []):
+        if not result['failed']:
+            continue
+        rows = ", ".join(str(sample['row']) for sample in result['samples'][:5])
+        more = ", ..." if result['failed'] > 5 else ""
+        messages.append(f"{prefix}Rule '{result['rule']}' failed for {result['failed']:,} of "
+                        f"{report['total_rows']:,} rows (rows {rows}{more})")
+    return messages
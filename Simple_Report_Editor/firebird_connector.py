@@ -2,16 +2,35 @@
 Modul koneksi ke database Firebird menggunakan isql.
 """
 import os
+import sys
 import subprocess
 import json
 import tempfile
 import re
+import threading
 import pandas as pd
 
+# Modul bersama (report_common) ada di root repository
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from report_common.table_statistics import get_table_statistics
+from report_common.isql_policy import get_execution_policy
+from report_common.sql_preview import engine_version
+
+
+class QueryCancelledError(Exception):
+    """Query dihentikan lewat FirebirdConnector.cancel()"""
+
+
 class FirebirdConnector:
     """
     Utilitas untuk koneksi ke database Firebird menggunakan isql
     """
+    # Prompt isql yang ikut tercetak saat script dikirim lewat stdin
+    ISQL_PROMPT_PATTERN = re.compile(r'^(?:(?:SQL|CON)> ?)+', re.MULTILINE)
+
+    # Bentuk pemanggilan isql: script lewat stdin, file -i dengan file -o, file -i dengan stdout
+    INVOCATION_FORMS = ('stdin', 'input_file', 'input_file_stdout')
+
     def __init__(self, db_path=None, username='sysdba', password='masterkey', isql_path=None, use_localhost=False):
         """
         Inisialisasi koneksi Firebird
@@ -27,6 +46,15 @@ class FirebirdConnector:
         self.password = password
         self.use_localhost = use_localhost
 
+        # Proses isql yang sedang berjalan (untuk cancel)
+        self._processes = set()
+        self._process_lock = threading.Lock()
+        self._cancelled = threading.Event()
+
+        # Versi engine server (dibaca sekali, lihat server_version)
+        self._server_version = None
+        self._server_version_checked = False
+
         # Auto-detect isql_path jika tidak disediakan
         if isql_path is None:
             self.isql_path = self._detect_isql_path()
@@ -93,14 +121,19 @@ class FirebirdConnector:
         """
         Menjalankan query SQL dan mengembalikan hasilnya
 
+        Script SQL dikirim lewat stdin dan output dibaca dari pipe stdout (tanpa
+        file sementara); file .sql/.txt hanya dipakai jika isql tidak menerima
+        script dari stdin. Bentuk pemanggilan dan timeout diatur ExecutionPolicy
+        (isql_policy).
+
         :param query: Query SQL yang akan dijalankan
         :param params: Parameter untuk query (not used in current implementation)
         :param as_dict: Jika True, hasil dikembalikan sebagai list dari dictionaries
         :return: Hasil query dalam format JSON
         """
-        # Buat file SQL untuk query
-        fd, sql_path = tempfile.mkstemp(suffix='.sql')
-        output_fd, output_path = tempfile.mkstemp(suffix='.txt')
+        # Untuk Firebird 1.5, hindari menggunakan SET commands yang mungkin tidak didukung
+        # Langsung tulis query saja
+        script = f"{query};\nCOMMIT;\nEXIT;\n"
 
         try:
             # Pastikan file executable isql ada
@@ -118,184 +151,28 @@ class FirebirdConnector:
             else:
                 connection_string = self.db_path
 
-            with os.fdopen(fd, 'w') as sql_file:
-                # Jangan gunakan CONNECT untuk Firebird 1.5, gunakan parameter koneksi dari command line
-                # sql_file.write(f"CONNECT \"{connection_string}\" USER {self.username} PASSWORD {self.password};\n")
-
-                # Untuk Firebird 1.5, hindari menggunakan SET commands yang mungkin tidak didukung
-                # Langsung tulis query saja
-                sql_file.write(f"{query};\n")
-                sql_file.write("COMMIT;\n")
-                sql_file.write("EXIT;\n")
-
             print(f"Executing query via ISQL: {query[:100]}...")
             print(f"Database path: {self.db_path}")
 
-            # Debug info - tampilkan file SQL
-            with open(sql_path, 'r') as f:
-                print(f"SQL File Contents:\n{f.read()}")
-
-            # Close the output file handle to prevent access errors
-            os.close(output_fd)
-
-            # Untuk Firebird 1.5, gunakan format yang lebih sederhana
-            # Gunakan format parameter yang sesuai berdasarkan mode koneksi
-            if self.use_localhost:
-                # Format untuk localhost:path
-                cmd = [
-                    self.isql_path,
-                    "-u", self.username,
-                    "-p", self.password,
-                    connection_string,
-                    "-i", sql_path,
-                    "-o", output_path
-                ]
-            else:
-                # Format untuk path langsung dengan -database
-                cmd = [
-                    self.isql_path,
-                    "-u", self.username,
-                    "-p", self.password,
-                    "-d", connection_string,
-                    "-i", sql_path,
-                    "-o", output_path
-                ]
-            print(f"Running command: {' '.join(cmd)}")
-
-            process_result = subprocess.run(cmd, check=False, capture_output=True, timeout=300)  # Increased timeout to 5 minutes
-            print(f"ISQL process completed with return code: {process_result.returncode}")
-
-            # Log informasi debug
-            if process_result.stdout:
-                print(f"STDOUT: {process_result.stdout}")
-            if process_result.stderr:
-                print(f"STDERR: {process_result.stderr}")
-
-            # Jika proses gagal, coba dengan argumen koneksi alternatif
-            if process_result.returncode != 0:
-                print("Command gagal, mencoba metode alternatif...")
-
-                # Coba metode alternatif yang lebih sederhana
-                if self.use_localhost:
-                    alt_cmd = [
-                        self.isql_path,
-                        connection_string,
-                        "-u", self.username,
-                        "-p", self.password
-                    ]
-                else:
-                    alt_cmd = [
-                        self.isql_path,
-                        "-d", connection_string,
-                        "-u", self.username,
-                        "-p", self.password
-                    ]
-
-                # Tambahkan file input
-                alt_cmd.extend(["-i", sql_path])
-                print(f"Running alternative command: {' '.join(alt_cmd)}")
-
-                process_result = subprocess.run(alt_cmd, check=False, capture_output=True, timeout=300)  # Increased timeout to 5 minutes
-                print(f"Alternative command completed with return code: {process_result.returncode}")
-
-                if process_result.stdout:
-                    print(f"STDOUT: {process_result.stdout}")
-                if process_result.stderr:
-                    print(f"STDERR: {process_result.stderr}")
-
-                # Jika masih gagal, coba tanpa parameter output
-                if process_result.returncode != 0:
-                    print("Alternatif pertama gagal, mencoba metode ketiga...")
-
-                    # Coba dengan format yang sangat sederhana
-                    if self.use_localhost:
-                        simpler_cmd = [
-                            self.isql_path,
-                            connection_string,
-                            "-u", self.username,
-                            "-p", self.password,
-                            "-i", sql_path
-                        ]
-                    else:
-                        simpler_cmd = [
-                            self.isql_path,
-                            "-d", connection_string,
-                            "-u", self.username,
-                            "-p", self.password,
-                            "-i", sql_path
-                        ]
-                    print(f"Running simpler command: {' '.join(simpler_cmd)}")
-
-                    # Redirect output langsung ke file
-                    with open(output_path, 'w') as output_file:
-                        process_result = subprocess.run(simpler_cmd, check=False,
-                                                     stdout=output_file, stderr=subprocess.PIPE,
-                                                     text=True, timeout=300)  # Increased timeout to 5 minutes
-
-                    print(f"Simpler command completed with return code: {process_result.returncode}")
-                    if process_result.stderr:
-                        print(f"STDERR: {process_result.stderr}")
-
-            # Baca hasil dari file output
-            if os.path.exists(output_path):
-                try:
-                    with open(output_path, 'r') as output_file:
-                        output_text = output_file.read()
-
-                    print(f"ISQL output: {len(output_text)} bytes")
-                    if output_text:
-                        print("First 500 chars of output:")
-                        print(output_text[:500])
-                    else:
-                        print("WARNING: Output file kosong!")
-                except Exception as e:
-                    print(f"Error reading output file: {e}")
-                    output_text = ""
-            else:
-                print("WARNING: Output file tidak ditemukan")
-                output_text = ""
-
-            # Jika output masih kosong, coba jalankan langsung tanpa file
-            if len(output_text) == 0:
-                print("WARNING: Output masih kosong! Mencoba gunakan cara alternatif...")
-                # Gunakan cara alternatif tanpa file output
-                # Coba dengan format yang paling sederhana - gunakan localhost format
-                # Untuk Firebird 1.5, localhost format lebih reliable
-                connection_string_local = f"localhost:{self.db_path}"
-                direct_cmd = [
-                    self.isql_path,
-                    connection_string_local,
-                    "-u", self.username,
-                    "-p", self.password
-                ]
-
-                # Buat file SQL sederhana untuk dibaca dari stdin
-                simple_sql_fd, simple_sql_path = tempfile.mkstemp(suffix='.sql')
-                with os.fdopen(simple_sql_fd, 'w') as simple_sql:
-                    # Untuk Firebird 1.5, gunakan query yang sangat sederhana
-                    # Tidak lagi membatasi jumlah baris yang diambil
-                    simple_sql.write(f"{query};\n")
-                    # Add EXIT command to properly terminate the session
-                    simple_sql.write("EXIT;\n")
-
-                try:
-                    with open(simple_sql_path, 'r') as sql_input:
-                        direct_process = subprocess.run(
-                            direct_cmd,
-                            stdin=sql_input,
-                            stdout=subprocess.PIPE,
-                            stderr=subprocess.PIPE,
-                            text=True,
-                            check=True,
-                            timeout=600  # Increased timeout to 10 minutes
-                        )
-                        output_text = direct_process.stdout
-                        if output_text:
-                            print(f"Direct command output: {len(output_text)} bytes")
-                            print(output_text[:500])
-                finally:
-                    if os.path.exists(simple_sql_path):
-                        os.unlink(simple_sql_path)
+            # Debug info - tampilkan script SQL
+            print(f"SQL Script:\n{script}")
+
+            # Bentuk pemanggilan yang sudah terbukti dipakai langsung; timeout dari
+            # latensi historis query, straggler diulang dengan timeout lebih besar
+            policy = get_execution_policy(self.isql_path)
+            output_text = ""
+            failed_forms = []
+            for form in policy.forms(self.INVOCATION_FORMS):
+                output_text = policy.run_with_retries(
+                    query, lambda timeout: self._run_form(form, connection_string, script, timeout))
+                if output_text.strip():
+                    policy.record_form(form, failed_forms)
+                    break
+                if policy.form_verified:
+                    # Bentuk terbukti: output kosong adalah hasil/error query itu sendiri
+                    break
+                print(f"WARNING: Output kosong dengan bentuk '{form}', mencoba bentuk berikutnya...")
+                failed_forms.append(form)
 
             # Parse hasil ke JSON
             result = self._parse_isql_output(output_text, as_dict)
@@ -308,6 +185,9 @@ class FirebirdConnector:
             else:
                 return []
 
+        except QueryCancelledError:
+            print(f"Query dibatalkan: {query[:100]}...")
+            raise
         except subprocess.CalledProcessError as cpe:
             print(f"ISQL command failed with return code {cpe.returncode}")
             print(f"STDOUT: {cpe.stdout}")
@@ -321,12 +201,181 @@ class FirebirdConnector:
             import traceback
             traceback.print_exc()
             raise
+
+    def _execute_via_stdin(self, connection_string, script, timeout=300):
+        """
+        Jalankan script lewat stdin isql dan baca output dari pipe stdout
+
+        :return: Output isql tanpa prompt SQL>/CON> ('' jika tidak ada output)
+        """
+        if self.use_localhost:
+            cmd = [
+                self.isql_path,
+                "-u", self.username,
+                "-p", self.password,
+                connection_string
+            ]
+        else:
+            cmd = [
+                self.isql_path,
+                "-u", self.username,
+                "-p", self.password,
+                "-d", connection_string
+            ]
+        print(f"Running command (stdin, timeout {timeout:.0f}s): {' '.join(cmd)}")
+
+        process_result = self._run_process(cmd, input=script, text=True, timeout=timeout)
+        print(f"ISQL process completed with return code: {process_result.returncode}")
+        if process_result.stderr:
+            print(f"STDERR: {process_result.stderr}")
+
+        output_text = self.ISQL_PROMPT_PATTERN.sub('', process_result.stdout or '')
+        if output_text.strip():
+            print(f"ISQL output: {len(output_text)} bytes")
+            print("First 500 chars of output:")
+            print(output_text[:500])
+        return output_text
+
+    def _execute_via_files(self, script, connection_string, timeout=300, use_output_file=True):
+        """
+        Jalankan script lewat file .sql (-i); output lewat file -o atau pipe stdout
+        (untuk versi isql yang tidak membaca script dari stdin)
+
+        :return: Output isql ('' jika tidak ada output)
+        """
+        fd, sql_path = tempfile.mkstemp(suffix='.sql')
+        output_path = None
+        if use_output_file:
+            output_fd, output_path = tempfile.mkstemp(suffix='.txt')
+            # Close the output file handle to prevent access errors
+            os.close(output_fd)
+
+        try:
+            with os.fdopen(fd, 'w') as sql_file:
+                # Jangan gunakan CONNECT untuk Firebird 1.5, gunakan parameter koneksi dari command line
+                sql_file.write(script)
+
+            # Gunakan format parameter yang sesuai berdasarkan mode koneksi
+            if self.use_localhost:
+                connection_args = [connection_string]
+            else:
+                connection_args = ["-d", connection_string]
+
+            if use_output_file:
+                cmd = [self.isql_path, "-u", self.username, "-p", self.password] + connection_args
+                cmd += ["-i", sql_path, "-o", output_path]
+            else:
+                # Urutan argumen alternatif (koneksi sebelum user/password), output ke stdout
+                cmd = [self.isql_path] + connection_args + ["-u", self.username, "-p", self.password]
+                cmd += ["-i", sql_path]
+            print(f"Running command (timeout {timeout:.0f}s): {' '.join(cmd)}")
+
+            process_result = self._run_process(cmd, text=True, timeout=timeout)
+            print(f"ISQL process completed with return code: {process_result.returncode}")
+            if process_result.stderr:
+                print(f"STDERR: {process_result.stderr}")
+
+            if not use_output_file:
+                output_text = process_result.stdout or ''
+            else:
+                # Baca hasil dari file output
+                try:
+                    with open(output_path, 'r') as output_file:
+                        output_text = output_file.read()
+                except Exception as e:
+                    print(f"Error reading output file: {e}")
+                    output_text = ""
+
+            print(f"ISQL output: {len(output_text)} bytes")
+            if output_text:
+                print("First 500 chars of output:")
+                print(output_text[:500])
+            return output_text
+
         finally:
             # Cleanup
-            if os.path.exists(sql_path):
-                os.unlink(sql_path)
-            if os.path.exists(output_path):
-                os.unlink(output_path)
+            for path in (sql_path, output_path):
+                try:
+                    if path and os.path.exists(path):
+                        os.unlink(path)
+                except OSError as e:
+                    print(f"Error cleaning up file {path}: {e}")
+
+    def _run_form(self, form, connection_string, script, timeout):
+        """Jalankan script dengan satu bentuk pemanggilan isql (lihat INVOCATION_FORMS)"""
+        if form == 'stdin':
+            return self._execute_via_stdin(connection_string, script, timeout)
+        return self._execute_via_files(script, connection_string, timeout,
+                                       use_output_file=(form == 'input_file'))
+
+    def _run_process(self, cmd, stdin=None, stdout=subprocess.PIPE, text=False, check=False, timeout=300, input=None):
+        """
+        Jalankan isql seperti subprocess.run, tetapi prosesnya terdaftar sehingga
+        bisa dihentikan lewat cancel(). input dikirim lewat stdin (pipe).
+
+        :return: subprocess.CompletedProcess
+        """
+        if self._cancelled.is_set():
+            raise QueryCancelledError("Query dibatalkan")
+
+        if input is not None:
+            stdin = subprocess.PIPE
+        process = subprocess.Popen(cmd, stdin=stdin, stdout=stdout, stderr=subprocess.PIPE, text=text)
+        with self._process_lock:
+            self._processes.add(process)
+
+        try:
+            output, errors = process.communicate(input=input, timeout=timeout)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.communicate()
+            raise
+        finally:
+            with self._process_lock:
+                self._processes.discard(process)
+
+        if self._cancelled.is_set():
+            raise QueryCancelledError("Query dibatalkan")
+
+        if check and process.returncode != 0:
+            raise subprocess.CalledProcessError(process.returncode, cmd, output, errors)
+        return subprocess.CompletedProcess(cmd, process.returncode, output, errors)
+
+    def cancel(self):
+        """
+        Hentikan query yang sedang berjalan; query berikutnya pada connector ini
+        langsung gagal dengan QueryCancelledError sampai reset_cancel() dipanggil
+        """
+        self._cancelled.set()
+        with self._process_lock:
+            processes = list(self._processes)
+        for process in processes:
+            try:
+                process.kill()
+            except OSError:
+                pass
+
+    def reset_cancel(self):
+        """Izinkan connector menjalankan query lagi setelah cancel()"""
+        self._cancelled.clear()
+
+    def server_version(self):
+        """
+        Versi engine server (major, minor), dibaca sekali per connector
+
+        :return: Tuple (major, minor), atau None untuk Firebird 1.5 (RDB$GET_CONTEXT
+                 belum ada) / versi tidak terbaca
+        """
+        if not self._server_version_checked:
+            try:
+                self._server_version = engine_version(self.execute_query)
+            except QueryCancelledError:
+                raise
+            except Exception as e:
+                print(f"Versi engine tidak terbaca, dianggap Firebird 1.5: {e}")
+                self._server_version = None
+            self._server_version_checked = True
+        return self._server_version
 
     def _parse_isql_output(self, output_text, as_dict=True):
         """
@@ -701,6 +750,48 @@ class FirebirdConnector:
 
         return tables
 
+    def get_row_count(self, table_name, where_clause=None):
+        """
+        Mendapatkan jumlah row dalam tabel
+
+        :param table_name: Nama tabel
+        :param where_clause: Kondisi WHERE opsional (tanpa kata WHERE)
+        :return: Jumlah row (0 jika gagal)
+        """
+        query = f"SELECT COUNT(*) FROM {table_name}"
+        if where_clause:
+            query += f" WHERE {where_clause}"
+
+        result = self.execute_query(query)
+        if not result:
+            return 0
+
+        # execute_query mengembalikan list row; format lama [{"headers", "rows"}] tetap didukung
+        row = result[0]
+        if isinstance(row, dict) and "rows" in row:
+            if not row["rows"]:
+                return 0
+            row = row["rows"][0]
+
+        value = next(iter(row.values())) if isinstance(row, dict) else row[0]
+        try:
+            return int(str(value).strip())
+        except ValueError:
+            return 0
+
+    def estimate_row_counts(self, tables):
+        """
+        Estimasi row count tanpa COUNT(*) full scan (metadata index unik, cache
+        exact count per snapshot database, cek EXISTS untuk tabel kosong)
+
+        :param tables: List nama tabel
+        :return: Dict TABLE -> {'rows': int atau None, 'exact': bool, 'source': str}
+        """
+        statistics = get_table_statistics(self.db_path)
+        if statistics is None:
+            return {}
+        return statistics.estimate_row_counts(tables, self.execute_query)
+
     def get_example_query(self, table_name=None):
         """Mendapatkan contoh query untuk testing"""
         if not table_name:
@@ -10,14 +10,23 @@ Author: Claude AI Assistant
 Version: 1.0.0
 """
 
+import os
+import sys
 import json
 import logging
 import re
+import time
 from datetime import datetime, timedelta
 from typing import Dict, List, Any, Optional
 import pandas as pd
 from pathlib import Path
 
+# Modul bersama (report_common) ada di root repository
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from firebird_connector import QueryCancelledError
+from report_common.sql_preview import preview_sql, month_partitions, connector_supports_derived_tables
+from data_validator import validate_records, validation_messages
+
 class FormulaEngine:
     """
     Engine untuk memproses formula JSON dan mengeksekusi query database.
@@ -41,6 +50,7 @@ class FormulaEngine:
         self.db_connector = None
         self.query_results = {}
         self.processed_variables = {}
+        self.query_metrics = {}
 
     def load_formula(self, formula_path: str) -> Dict:
         """
@@ -72,13 +82,15 @@ class FormulaEngine:
         """
         self.db_connector = db_connector
 
-    def execute_queries(self, formula_data: Dict, params: Dict = None) -> Dict:
+    def execute_queries(self, formula_data: Dict, params: Dict = None,
+                        progress_callback=None) -> Dict:
         """
         Eksekusi semua queries yang didefinisikan dalam formula
 
         Args:
             formula_data: Formula data dictionary
             params: Parameters untuk substitution
+            progress_callback: Dipanggil (query_name, selesai, total) setiap query selesai
 
         Returns:
             Dictionary hasil query
@@ -89,10 +101,12 @@ class FormulaEngine:
         params = params or {}
         queries = formula_data.get('queries', {})
         results = {}
+        self.query_metrics = {}
 
         self.logger.info(f"Executing {len(queries)} queries")
 
-        for query_name, query_config in queries.items():
+        for index, (query_name, query_config) in enumerate(queries.items(), 1):
+            started = time.perf_counter()
             try:
                 self.logger.info(f"Executing query: {query_name}")
 
@@ -105,25 +119,151 @@ class FormulaEngine:
                 # Execute query
                 query_result = self.db_connector.execute_query(sql)
 
-                # Process result based on return format
-                return_format = query_config.get('return_format', 'dict')
+                # Metrik waktu untuk estimasi proses berikutnya
+                self.query_metrics[query_name] = {
+                    'sql': sql,
+                    'seconds': time.perf_counter() - started,
+                    'records': self._count_records(query_result)
+                }
 
-                if return_format == 'dict':
-                    results[query_name] = query_result
-                elif return_format == 'dataframe':
-                    results[query_name] = pd.DataFrame(query_result)
-                elif return_format == 'single_value':
-                    results[query_name] = query_result[0] if query_result else None
+                # Process result based on return format
+                self._store_result(results, query_name, query_result, query_config.get('return_format', 'dict'))
 
                 self.logger.info(f"Query {query_name} completed: {len(query_result) if query_result else 0} records")
 
+            except QueryCancelledError:
+                # Run dibatalkan: query berikutnya tidak dijalankan
+                raise
+
             except Exception as e:
                 self.logger.error(f"Error executing query {query_name}: {e}")
                 results[query_name] = None
 
+            if progress_callback:
+                progress_callback(query_name, index, len(queries))
+
         self.query_results = results
         return results
 
+    def _store_result(self, results: Dict, query_name: str, query_result: Any, return_format: str) -> None:
+        """Simpan hasil query sesuai return_format (dict, dataframe, single_value)"""
+        if return_format == 'dict':
+            results[query_name] = query_result
+        elif return_format == 'dataframe':
+            results[query_name] = pd.DataFrame(query_result)
+        elif return_format == 'single_value':
+            results[query_name] = query_result[0] if query_result else None
+
+    def execute_preview_queries(self, formula_data: Dict, params: Dict = None, limit: int = 100,
+                                sample_size: int = None, cancel_event=None,
+                                progress_callback=None) -> Dict:
+        """
+        Eksekusi queries dalam mode preview
+
+        - FIRST n dipasang di projection terluar setiap query
+        - Query agregasi dihitung dari sampel tabel sumber (server Firebird 2.0+;
+          di Firebird 1.5 hanya FIRST n)
+        - Query yang membaca partisi bulanan ({table_name}/{month}) dijalankan per
+          bulan dalam rentang tanggal dengan limit dibagi rata, sehingga semua bulan
+          ikut tersampel
+        - cancel_event (threading.Event) diperiksa sebelum setiap query; jika di-set
+          QueryCancelledError dari connector diteruskan ke pemanggil
+
+        Args:
+            formula_data: Formula data dictionary
+            params: Parameters untuk substitution
+            limit: Jumlah row maksimal per query
+            sample_size: Row sampel tabel sumber untuk query agregasi
+            cancel_event: Event pembatalan (opsional)
+            progress_callback: Dipanggil (query_name, selesai, total) setiap query selesai
+
+        Returns:
+            Dictionary hasil query
+        """
+        if not self.db_connector:
+            raise ValueError("Database connector not set")
+
+        params = params or {}
+        queries = formula_data.get('queries', {})
+        partitions = self._preview_partitions(params)
+        derived_tables = connector_supports_derived_tables(self.db_connector)
+        results = {}
+
+        self.logger.info(f"Executing {len(queries)} preview queries (limit {limit}, {len(partitions)} partitions)")
+
+        for index, (query_name, query_config) in enumerate(queries.items(), 1):
+            sql_template = query_config.get('sql', '')
+            partitioned = '{table_name}' in sql_template or '{month}' in sql_template
+            query_params = partitions if partitioned and partitions else [params]
+            partition_limit = max(1, -(-limit // len(query_params)))
+            sql_template = preview_sql(sql_template, partition_limit, sample_size, derived_tables)
+
+            rows = []
+            try:
+                for partition_params in query_params:
+                    if cancel_event is not None and cancel_event.is_set():
+                        self._cancel_connector()
+                    sql = self._substitute_parameters(sql_template, partition_params)
+                    query_result = self.db_connector.execute_query(sql)
+                    rows.extend(query_result or [])
+            except Exception as e:
+                if cancel_event is not None and cancel_event.is_set():
+                    raise
+                self.logger.error(f"Error executing preview query {query_name}: {e}")
+                rows = None
+
+            self._store_result(results, query_name, rows[:limit] if rows is not None else None,
+                               query_config.get('return_format', 'dict'))
+
+            if progress_callback:
+                progress_callback(query_name, index, len(queries))
+
+        self.query_results = results
+        return results
+
+    def _cancel_connector(self) -> None:
+        """Hentikan connector dan naikkan error pembatalan dari connector"""
+        if hasattr(self.db_connector, 'cancel'):
+            self.db_connector.cancel()
+        raise QueryCancelledError("Preview cancelled")
+
+    def _preview_partitions(self, params: Dict) -> List[Dict]:
+        """
+        Parameter per partisi bulanan dalam rentang start_date..end_date
+
+        table_name FFBSCANNERDATAnn diganti sesuai bulan; format quote tanggal
+        mengikuti parameter asli
+        """
+        partitions = []
+        start_date = params.get('start_date')
+        end_date = params.get('end_date')
+        if not start_date or not end_date:
+            return partitions
+
+        quote = "'" if str(start_date).startswith("'") else ''
+        table_name = str(params.get('table_name', ''))
+
+        for partition in month_partitions(start_date, end_date):
+            partition_params = dict(params)
+            partition_params['start_date'] = f"{quote}{partition['start_date']}{quote}"
+            partition_params['end_date'] = f"{quote}{partition['end_date']}{quote}"
+            partition_params['month'] = partition['month']
+            if re.fullmatch(r'\w*?\d{2}', table_name):
+                partition_params['table_name'] = table_name[:-2] + partition['month']
+            partitions.append(partition_params)
+
+        return partitions
+
+    def _count_records(self, query_result: Any) -> int:
+        """
+        Hitung jumlah record hasil query (format connector [{'headers', 'rows'}] atau list biasa)
+        """
+        if not query_result:
+            return 0
+        if isinstance(query_result, list) and isinstance(query_result[0], dict) and 'rows' in query_result[0]:
+            return sum(len(part.get('rows') or []) for part in query_result)
+        return len(query_result)
+
     def _substitute_parameters(self, template: str, params: Dict) -> str:
         """
         Substitute parameters dalam SQL template
@@ -459,49 +599,20 @@ class FormulaEngine:
 
     def validate_data(self, data: List[Dict], validations: Dict) -> List[str]:
         """
-        Validate data against validation rules
+        Validate data against validation rules (kolumnar, lihat data_validator)
 
         Args:
             data: Data to validate
             validations: Validation rules
 
         Returns:
-            List of validation errors
+            List of validation errors (satu pesan per rule yang dilanggar)
         """
-        errors = []
-
         if not validations or not data:
-            return errors
-
-        required_fields = validations.get('required_fields', [])
-        numeric_fields = validations.get('numeric_fields', [])
-        date_fields = validations.get('date_fields', [])
-
-        for i, row in enumerate(data):
-            # Check required fields
-            for field in required_fields:
-                if field not in row or row[field] is None or row[field] == '':
-                    errors.append(f"Row {i+1}: Missing required field '{field}'")
-
-            # Check numeric fields
-            for field in numeric_fields:
-                if field in row and row[field] is not None:
-                    try:
-                        float(row[field])
-                    except (ValueError, TypeError):
-                        errors.append(f"Row {i+1}: Field '{field}' should be numeric")
-
-            # Check date fields
-            for field in date_fields:
-                if field in row and row[field] is not None:
-                    try:
-                        # Try to parse as date
-                        if isinstance(row[field], str):
-                            datetime.strptime(row[field], '%Y-%m-%d')
-                    except ValueError:
-                        errors.append(f"Row {i+1}: Field '{field}' has invalid date format")
+            return []
 
-        return errors
+        report = validate_records(data, validations)
+        return validation_messages(report)
 
     def get_summary_statistics(self, data: List[Dict]) -> Dict:
         """
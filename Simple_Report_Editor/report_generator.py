@@ -10,21 +10,38 @@ Mengkoordinasikan keseluruhan proses pembuatan laporan dari template:
 4. Render template dengan data
 5. Export ke Excel/PDF
 
+Hasil query setiap run disimpan sebagai snapshot (etl_artifacts); mode replay
+(generate_report(from_snapshot=...)) memuat snapshot tersebut dan hanya menjalankan
+proses variable, render template dan export, tanpa koneksi database.
+
 Author: Claude AI Assistant
 Version: 1.0.0
 """
 
 import logging
-import json
 import os
+import sys
+import copy
+import time
+import threading
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, List, Any, Optional
 
+# Modul bersama (report_common) ada di root repository
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
 # Import modules
-from firebird_connector import FirebirdConnector
+from firebird_connector import FirebirdConnector, QueryCancelledError
 from formula_engine import FormulaEngine
 from template_processor import TemplateProcessor
+from report_common.sql_preview import preview_sql, connector_supports_derived_tables
+from report_common.etl_artifacts import ArtifactStore, RetentionPolicy, load_artifact, queries_fingerprint
+from time_estimator import ProcessingTimeEstimator, extract_tables, date_range_days, format_duration
+from data_validator import DEFAULT_SAMPLE_SIZE, validate_query_results, validate_records, validation_messages
+
+# Urutan stage untuk progress berbobot estimasi waktu
+PROGRESS_STAGES = ('initialization', 'queries', 'processing', 'template', 'output')
 
 class ReportGenerator:
     """
@@ -53,9 +70,32 @@ class ReportGenerator:
         self.formula_engine = FormulaEngine(config)
         self.template_processor = TemplateProcessor()
 
+        # Estimasi waktu dari riwayat run
+        performance = self.config.get('performance_settings', {})
+        self.time_estimator = ProcessingTimeEstimator(
+            history_path=performance.get('timing_history_file'),
+            warning_seconds=performance.get('long_run_warning_minutes', 60) * 60
+        )
+
         # Status tracking
         self.current_step = ""
         self.progress_callback = None
+        self.current_estimate = None
+        self.stage_timings = {}
+        self.run_started = None
+        self.preview_cancel = threading.Event()
+        self.cancel_event = threading.Event()
+
+        # Snapshot hasil query untuk replay (render ulang tanpa database)
+        self.capture_snapshots = performance.get('capture_snapshots', True)
+        self.snapshot_store = ArtifactStore(
+            performance.get('snapshot_dir', 'etl_reports'),
+            retention=RetentionPolicy.from_config(performance.get('snapshot_retention'))
+        )
+        self.last_snapshot = None
+
+        # Ringkasan pre-flight validation run terakhir ({dataset: report})
+        self.validation_report = {}
 
     def set_progress_callback(self, callback):
         """
@@ -66,6 +106,19 @@ class ReportGenerator:
         """
         self.progress_callback = callback
 
+    def cancel(self) -> None:
+        """
+        Hentikan generate_report yang sedang berjalan (aman dipanggil dari thread lain):
+        query isql yang berjalan di-kill dan langkah berikutnya tidak dijalankan
+        """
+        self.cancel_event.set()
+        self.cancel_preview()
+
+    def check_cancelled(self) -> None:
+        """Lempar QueryCancelledError jika cancel() sudah dipanggil"""
+        if self.cancel_event.is_set():
+            raise QueryCancelledError("Report generation cancelled")
+
     def update_progress(self, step: str, progress: float) -> None:
         """
         Update progress dengan callback
@@ -82,7 +135,8 @@ class ReportGenerator:
 
     def generate_report(self, template_path: str, formula_data: Dict,
                        db_params: Dict, report_params: Dict,
-                       output_path: str = None, output_format: str = 'excel') -> str:
+                       output_path: str = None, output_format: str = 'excel',
+                       from_snapshot: str = None) -> str:
         """
         Generate laporan lengkap
 
@@ -93,11 +147,20 @@ class ReportGenerator:
             report_params: Report-specific parameters
             output_path: Output file path (optional)
             output_format: Output format ('excel' atau 'pdf')
+            from_snapshot: Folder snapshot (atau manifest.json); jika diisi query tidak
+                           dijalankan dan db_params tidak dipakai (mode replay)
 
         Returns:
             Path ke file yang di-generate
         """
+        if from_snapshot:
+            return self.generate_report_from_snapshot(template_path, formula_data, from_snapshot,
+                                                      report_params, output_path, output_format)
+
         try:
+            self.run_started = time.perf_counter()
+            self.stage_timings = {}
+            self.current_estimate = None
             self.update_progress("Initializing report generation", 5)
 
             # Step 1: Validate inputs
@@ -105,27 +168,154 @@ class ReportGenerator:
 
             # Step 2: Setup database connection
             self.setup_database_connection(db_params)
-            self.update_progress("Database connected", 15)
+            self.check_cancelled()
+            self.stage_timings['initialization'] = time.perf_counter() - self.run_started
+
+            # Estimasi dipakai untuk bobot progress dan ETA
+            self.current_estimate = self.get_estimated_processing_time(
+                formula_data, db_params, report_params, template_path
+            )
+            self.update_progress(self.with_eta("Database connected"), self.stage_progress('queries', 0.0, 15))
 
             # Step 3: Execute queries dan process data
             processed_data = self.process_data(formula_data, report_params)
-            self.update_progress("Data processing completed", 60)
+            self.check_cancelled()
+            self.update_progress(self.with_eta("Data processing completed"), self.stage_progress('template', 0.0, 60))
 
             # Step 4: Process template dengan data
+            stage_started = time.perf_counter()
             self.process_template_with_data(template_path, formula_data, processed_data)
-            self.update_progress("Template processing completed", 80)
+            self.stage_timings['template'] = time.perf_counter() - stage_started
+            self.check_cancelled()
+            self.update_progress(self.with_eta("Template processing completed"), self.stage_progress('output', 0.0, 80))
 
             # Step 5: Generate output file
+            stage_started = time.perf_counter()
             output_file = self.generate_output_file(output_path, output_format)
+            self.stage_timings['output'] = time.perf_counter() - stage_started
             self.update_progress("Report generation completed", 100)
 
+            self.record_run_metrics(db_params, report_params)
+
             self.logger.info(f"Report generated successfully: {output_file}")
             return output_file
 
+        except QueryCancelledError:
+            self.logger.info("Report generation cancelled")
+            raise
+
         except Exception as e:
             self.logger.error(f"Error generating report: {e}")
             raise
 
+    def generate_report_from_snapshot(self, template_path: str, formula_data: Dict, snapshot_path: str,
+                                      report_params: Dict = None, output_path: str = None,
+                                      output_format: str = 'excel') -> str:
+        """
+        Mode replay: render laporan dari snapshot hasil query tanpa menyentuh database
+
+        Args:
+            template_path: Path ke template Excel
+            formula_data: Formula configuration data
+            snapshot_path: Folder snapshot (ETL_Run_...) atau manifest.json-nya
+            report_params: Parameter tambahan (parameter snapshot tetap dipakai untuk data)
+            output_path: Output file path (optional)
+            output_format: Output format ('excel' atau 'pdf')
+
+        Returns:
+            Path ke file yang di-generate
+        """
+        try:
+            self.run_started = time.perf_counter()
+            self.stage_timings = {}
+            self.current_estimate = None
+            self.update_progress("Loading extraction snapshot", 5)
+
+            self.validate_template_inputs(template_path, formula_data)
+            snapshot = load_artifact(snapshot_path, as_records=True)
+            manifest = snapshot['manifest']
+            if manifest.get('queries_fingerprint') != queries_fingerprint(formula_data.get('queries', {})):
+                self.logger.warning("Snapshot was captured with different query definitions; "
+                                    "variables may not match the current formula")
+            if manifest.get('mode') == 'preview':
+                self.logger.warning("Snapshot comes from a preview run (sampled rows)")
+
+            report_params = {**(report_params or {}), **snapshot['parameters']}
+            query_results = snapshot['query_results']
+            self.formula_engine.query_results = query_results
+            self.stage_timings['initialization'] = time.perf_counter() - self.run_started
+            self.logger.info(f"Replaying snapshot {snapshot['path']} ({len(query_results)} query results)")
+            self.check_cancelled()
+
+            self.update_progress("Processing variables and calculations", 30)
+            stage_started = time.perf_counter()
+            processed_variables = self.formula_engine.process_variables(formula_data, query_results)
+            processed_data = {**query_results, **processed_variables}
+            self.validate_processed_data(processed_data, formula_data)
+            self.stage_timings['processing'] = time.perf_counter() - stage_started
+            self.check_cancelled()
+
+            self.update_progress("Data processing completed", 60)
+            stage_started = time.perf_counter()
+            self.process_template_with_data(template_path, formula_data, processed_data)
+            self.stage_timings['template'] = time.perf_counter() - stage_started
+            self.check_cancelled()
+            self.update_progress("Template processing completed", 80)
+
+            stage_started = time.perf_counter()
+            output_file = self.generate_output_file(output_path, output_format)
+            self.stage_timings['output'] = time.perf_counter() - stage_started
+            self.update_progress("Report generation completed", 100)
+
+            # Run replay tidak dicatat ke riwayat estimator (tanpa waktu query)
+            self.logger.info(f"Report replayed from snapshot: {output_file}")
+            return output_file
+
+        except QueryCancelledError:
+            self.logger.info("Report replay cancelled")
+            raise
+
+        except Exception as e:
+            self.logger.error(f"Error replaying report from snapshot: {e}")
+            raise
+
+    def stage_progress(self, stage: str, fraction: float, default: float) -> float:
+        """
+        Progress (0-100) berbobot estimasi waktu per stage
+
+        Args:
+            stage: Nama stage (lihat PROGRESS_STAGES)
+            fraction: Bagian stage yang sudah selesai (0-1)
+            default: Progress tetap jika belum ada estimasi
+
+        Returns:
+            Progress percentage
+        """
+        breakdown = (self.current_estimate or {}).get('breakdown', {})
+        total = sum(breakdown.get(name, 0.0) for name in PROGRESS_STAGES)
+        if total <= 0:
+            return default
+
+        done = 0.0
+        for name in PROGRESS_STAGES:
+            if name == stage:
+                done += breakdown.get(name, 0.0) * min(max(fraction, 0.0), 1.0)
+                break
+            done += breakdown.get(name, 0.0)
+
+        # Sisakan ruang di awal dan akhir untuk step inisialisasi / penyelesaian
+        return 5 + (done / total) * 94
+
+    def with_eta(self, step: str) -> str:
+        """Tambahkan sisa waktu perkiraan ke deskripsi step"""
+        if not self.current_estimate or self.run_started is None:
+            return step
+        elapsed = time.perf_counter() - self.run_started
+        remaining = self.current_estimate.get('total_seconds', 0.0) - elapsed
+        if remaining < 1:
+            return step
+        return f"{step} (ETA {format_duration(remaining)})"
+
     def validate_inputs(self, template_path: str, formula_data: Dict, db_params: Dict) -> None:
         """
         Validate input parameters
@@ -135,6 +325,25 @@ class ReportGenerator:
             formula_data: Formula configuration
             db_params: Database parameters
         """
+        self.validate_template_inputs(template_path, formula_data)
+
+        # Validate database parameters
+        required_db_keys = ['database_path', 'username', 'password']
+        for key in required_db_keys:
+            if key not in db_params:
+                raise ValueError(f"Missing required database parameter: {key}")
+
+        if not os.path.exists(db_params['database_path']):
+            raise FileNotFoundError(f"Database file not found: {db_params['database_path']}")
+
+    def validate_template_inputs(self, template_path: str, formula_data: Dict) -> None:
+        """
+        Validate template dan formula (tanpa database, juga dipakai mode replay)
+
+        Args:
+            template_path: Path ke template
+            formula_data: Formula configuration
+        """
         # Validate template file
         if not os.path.exists(template_path):
             raise FileNotFoundError(f"Template file not found: {template_path}")
@@ -148,15 +357,6 @@ class ReportGenerator:
             if key not in formula_data:
                 raise ValueError(f"Missing required key in formula data: {key}")
 
-        # Validate database parameters
-        required_db_keys = ['database_path', 'username', 'password']
-        for key in required_db_keys:
-            if key not in db_params:
-                raise ValueError(f"Missing required database parameter: {key}")
-
-        if not os.path.exists(db_params['database_path']):
-            raise FileNotFoundError(f"Database file not found: {db_params['database_path']}")
-
     def setup_database_connection(self, db_params: Dict) -> None:
         """
         Setup database connection
@@ -166,7 +366,7 @@ class ReportGenerator:
         """
         try:
             self.db_connector = FirebirdConnector(
-                database_path=db_params['database_path'],
+                db_path=db_params['database_path'],
                 username=db_params['username'],
                 password=db_params['password']
             )
@@ -197,11 +397,18 @@ class ReportGenerator:
         """
         try:
             # Execute queries
-            self.update_progress("Executing database queries", 20)
-            query_results = self.formula_engine.execute_queries(formula_data, report_params)
+            self.update_progress(self.with_eta("Executing database queries"), self.stage_progress('queries', 0.0, 20))
+            stage_started = time.perf_counter()
+            query_results = self.formula_engine.execute_queries(
+                formula_data, report_params, progress_callback=self.on_query_completed
+            )
+            self.stage_timings['queries'] = time.perf_counter() - stage_started
+            self.save_snapshot(formula_data, report_params, query_results)
 
             # Process variables
-            self.update_progress("Processing variables and calculations", 40)
+            self.update_progress(self.with_eta("Processing variables and calculations"),
+                                 self.stage_progress('processing', 0.0, 40))
+            stage_started = time.perf_counter()
             processed_variables = self.formula_engine.process_variables(formula_data, query_results)
 
             # Combine results
@@ -209,6 +416,7 @@ class ReportGenerator:
 
             # Validate data
             self.validate_processed_data(processed_data, formula_data)
+            self.stage_timings['processing'] = time.perf_counter() - stage_started
 
             return processed_data
 
@@ -216,25 +424,88 @@ class ReportGenerator:
             self.logger.error(f"Error processing data: {e}")
             raise
 
+    def save_snapshot(self, formula_data: Dict, report_params: Dict, query_results: Dict) -> Optional[str]:
+        """
+        Simpan hasil query run ini sebagai snapshot untuk replay (kegagalan hanya di-log)
+
+        Returns:
+            Folder snapshot atau None
+        """
+        if not self.capture_snapshots:
+            return None
+        try:
+            run_dir = self.snapshot_store.write_run(
+                query_results, report_params,
+                timings={'queries': round(self.stage_timings.get('queries', 0.0), 4)},
+                queries=formula_data.get('queries', {}),
+                database=getattr(self.db_connector, 'db_path', None),
+                mode='run'
+            )
+            self.last_snapshot = str(run_dir)
+            return self.last_snapshot
+        except Exception as e:
+            self.logger.warning(f"Error saving extraction snapshot: {e}")
+            return None
+
+    def on_query_completed(self, query_name: str, completed: int, total: int) -> None:
+        """
+        Progress per query, berbobot estimasi waktu masing-masing query
+
+        Args:
+            query_name: Query yang baru selesai
+            completed: Jumlah query selesai
+            total: Jumlah query
+        """
+        estimates = (self.current_estimate or {}).get('queries', {})
+        names = list(estimates.keys())
+        total_estimate = sum(estimates.values())
+
+        if total_estimate > 0 and query_name in estimates:
+            fraction = sum(estimates[name] for name in names[:names.index(query_name) + 1]) / total_estimate
+        else:
+            fraction = completed / total if total else 1.0
+
+        self.update_progress(self.with_eta(f"Query {query_name} completed ({completed}/{total})"),
+                             self.stage_progress('queries', fraction, 20 + fraction * 20))
+
     def validate_processed_data(self, data: Dict, formula_data: Dict) -> None:
         """
-        Validate processed data
+        Validate processed data (pre-flight sebelum render)
+
+        validations / validation_rules formula dievaluasi kolumnar terhadap main_data
+        dan setiap hasil query yang memiliki kolom rule. Ringkasan per rule disimpan di
+        self.validation_report; dengan formula_settings.strict_validation render
+        dihentikan jika ada pelanggaran.
 
         Args:
             data: Processed data
             formula_data: Formula configuration
         """
-        validations = formula_data.get('validations', {})
+        validations = formula_data.get('validations') or formula_data.get('validation_rules') or {}
+        settings = self.config.get('formula_settings', {})
+        self.validation_report = {}
 
-        # Validate main data if exists
-        if 'main_data' in data and data['main_data']:
-            validation_errors = self.formula_engine.validate_data(
-                data['main_data'],
-                validations
-            )
+        if validations and settings.get('validation_enabled', True):
+            started = time.perf_counter()
+            sample_size = settings.get('validation_sample_rows', DEFAULT_SAMPLE_SIZE)
+
+            datasets = {name: value for name, value in data.items() if name != 'main_data'}
+            self.validation_report = validate_query_results(datasets, validations, sample_size)
+
+            # main_data: kolom rule yang tidak ada juga dilaporkan (required)
+            if 'main_data' in data and data['main_data']:
+                self.validation_report['main_data'] = validate_records(data['main_data'], validations, sample_size)
+
+            messages = []
+            for name, report in self.validation_report.items():
+                messages.extend(validation_messages(report, name))
+            for message in messages:
+                self.logger.warning(f"Data validation warning: {message}")
+            self.logger.info(f"Pre-flight validation of {len(self.validation_report)} datasets: "
+                             f"{len(messages)} rule violations ({time.perf_counter() - started:.2f}s)")
 
-            if validation_errors:
-                self.logger.warning(f"Data validation warnings: {validation_errors}")
+            if messages and settings.get('strict_validation', False):
+                raise ValueError(f"Data validation failed: {'; '.join(messages[:5])}")
 
         # Check required variables
         variables = formula_data.get('variables', {})
@@ -263,7 +534,7 @@ class ReportGenerator:
             repeating_sections = formula_data.get('repeating_sections', {})
 
             # Process template
-            self.update_progress("Rendering template with data", 70)
+            self.update_progress(self.with_eta("Rendering template with data"), self.stage_progress('template', 0.0, 70))
             if not self.template_processor.process_template(data, repeating_sections):
                 raise RuntimeError("Failed to process template")
 
@@ -364,28 +635,28 @@ class ReportGenerator:
 
     def get_template_preview(self, template_path: str, formula_data: Dict,
                            db_params: Dict, report_params: Dict,
-                           limit: int = 100) -> Dict:
+                           limit: int = 100, sample_size: int = None) -> Dict:
         """
         Get preview data untuk template
 
+        Query dijalankan dalam mode preview (FIRST n di projection terluar,
+        agregasi dari sampel, sampel per partisi bulanan) dan bisa dihentikan
+        lewat cancel_preview().
+
         Args:
             template_path: Path ke template
             formula_data: Formula configuration
             db_params: Database parameters
             report_params: Report parameters
             limit: Maximum records untuk preview
+            sample_size: Row sampel tabel sumber untuk query agregasi
 
         Returns:
             Preview data dictionary
         """
         try:
-            # Setup database connection
-            if not self.db_connector:
-                self.setup_database_connection(db_params)
-
-            # Execute queries dengan limit
-            modified_formula = self.apply_preview_limit(formula_data, limit)
-            processed_data = self.process_data(modified_formula, report_params)
+            processed_data = self.run_preview_queries(formula_data, db_params, report_params,
+                                                      limit, sample_size)
 
             # Get template info
             template_info = self.get_template_information(template_path)
@@ -400,30 +671,71 @@ class ReportGenerator:
             self.logger.error(f"Error getting template preview: {e}")
             raise
 
-    def apply_preview_limit(self, formula_data: Dict, limit: int) -> Dict:
+    def run_preview_queries(self, formula_data: Dict, db_params: Dict, report_params: Dict,
+                            limit: int = 100, sample_size: int = None) -> Dict:
+        """
+        Eksekusi queries dan variables dalam mode preview
+
+        Args:
+            formula_data: Formula configuration
+            db_params: Database parameters
+            report_params: Report parameters
+            limit: Maximum records per query
+            sample_size: Row sampel tabel sumber untuk query agregasi
+
+        Returns:
+            Dictionary hasil query dan variables
+        """
+        self.preview_cancel.clear()
+
+        # Setup database connection
+        if not self.db_connector:
+            self.setup_database_connection(db_params)
+        elif hasattr(self.db_connector, 'reset_cancel'):
+            self.db_connector.reset_cancel()
+
+        self.update_progress("Executing preview queries", 20)
+        query_results = self.formula_engine.execute_preview_queries(
+            formula_data, report_params, limit=limit, sample_size=sample_size,
+            cancel_event=self.preview_cancel,
+            progress_callback=lambda name, done, total: self.update_progress(
+                f"Preview query {name} completed ({done}/{total})", 20 + done / max(total, 1) * 60)
+        )
+
+        self.update_progress("Processing preview variables", 85)
+        processed_variables = self.formula_engine.process_variables(formula_data, query_results)
+        self.update_progress("Preview completed", 100)
+
+        return {**query_results, **processed_variables}
+
+    def cancel_preview(self) -> None:
+        """Hentikan preview yang sedang berjalan (mis. karena parameter berubah)"""
+        self.preview_cancel.set()
+        if self.db_connector and hasattr(self.db_connector, 'cancel'):
+            self.db_connector.cancel()
+
+    def apply_preview_limit(self, formula_data: Dict, limit: int, sample_size: int = None) -> Dict:
         """
         Apply limit ke queries untuk preview
 
+        FIRST n dipasang di projection terluar; query agregasi membaca sampel
+        tabel sumber jika server Firebird 2.0+ (lihat sql_preview.preview_sql).
+
         Args:
             formula_data: Original formula data
             limit: Record limit
+            sample_size: Row sampel tabel sumber untuk query agregasi
 
         Returns:
             Modified formula data
         """
-        modified_formula = json.loads(json.dumps(formula_data))  # Deep copy
-
-        queries = modified_formula.get('queries', {})
+        modified_formula = copy.deepcopy(formula_data)
+        derived_tables = connector_supports_derived_tables(self.db_connector)
 
-        for query_name, query_config in queries.items():
+        for query_config in modified_formula.get('queries', {}).values():
             sql = query_config.get('sql', '')
-
-            # Add FIRST {limit} to SELECT statements
-            if sql.upper().startswith('SELECT '):
-                # Simple addition - might need more sophisticated SQL parsing
-                if 'FIRST' not in sql.upper():
-                    sql = sql.replace('SELECT', f'SELECT FIRST {limit}', 1)
-                    query_config['sql'] = sql
+            if sql:
+                query_config['sql'] = preview_sql(sql, limit, sample_size, derived_tables)
 
         return modified_formula
 
@@ -529,40 +841,159 @@ class ReportGenerator:
 
         return issues
 
-    def get_estimated_processing_time(self, formula_data: Dict, db_params: Dict) -> Dict:
+    def get_estimated_processing_time(self, formula_data: Dict, db_params: Dict,
+                                      report_params: Dict = None, template_path: str = None,
+                                      estates: int = 1) -> Dict:
         """
-        Estimate processing time berdasarkan configuration
+        Estimate processing time berdasarkan riwayat run
+
+        Biaya query dipelajari dari jumlah row tabel yang dibaca dan panjang rentang
+        tanggal; biaya render dari jumlah cell template. Tanpa riwayat, estimasi
+        memakai konstanta default.
 
         Args:
             formula_data: Formula configuration
             db_params: Database parameters
+            report_params: Report parameters (start_date/end_date, table_name)
+            template_path: Path ke template (untuk ukuran template)
+            estates: Jumlah estate yang akan diproses dengan konfigurasi sama
 
         Returns:
-            Estimation dictionary
+            Estimation dictionary (total_seconds, breakdown, queries_count, eta,
+            long_run dan warning jika estimasi melebihi batas)
         """
         try:
-            queries = formula_data.get('queries', {})
-            num_queries = len(queries)
+            report_params = report_params or {}
+            days = date_range_days(report_params)
+
+            # Tabel per query setelah substitusi parameter
+            query_tables = {}
+            for query_name, query_config in formula_data.get('queries', {}).items():
+                sql = self.formula_engine._substitute_parameters(query_config.get('sql', ''), report_params)
+                query_tables[query_name] = extract_tables(sql)
+
+            all_tables = sorted({table for tables in query_tables.values() for table in tables})
+            table_rows = self.time_estimator.get_table_rows(
+                self.get_estimation_connector(db_params),
+                db_params.get('database_path', ''),
+                all_tables
+            )
 
-            # Base estimation (seconds)
-            base_time = 2.0
-            query_time = num_queries * 1.5
-            processing_time = 1.0
-            template_time = 2.0
+            # Tabel terbesar mendominasi biaya scan
+            query_rows = {
+                query_name: max((table_rows.get(table, 0) for table in tables), default=0)
+                for query_name, tables in query_tables.items()
+            }
 
-            total_estimated = base_time + query_time + processing_time + template_time
+            template_cells = self.get_template_size(template_path)
 
-            return {
-                'total_seconds': total_estimated,
-                'breakdown': {
-                    'initialization': base_time,
-                    'queries': query_time,
-                    'processing': processing_time,
-                    'template': template_time
-                },
-                'queries_count': num_queries
-            }
+            estimate = self.time_estimator.estimate(
+                [{'name': name, 'rows': rows} for name, rows in query_rows.items()],
+                template_cells=template_cells,
+                days=days,
+                estates=estates
+            )
+            estimate['query_rows'] = query_rows
+            estimate['template_cells'] = template_cells
+
+            self.logger.info(f"Estimated processing time: {estimate['eta']} "
+                             f"({estimate['history_runs']} runs in history)")
+            if estimate.get('warning'):
+                self.logger.warning(estimate['warning'])
+
+            return estimate
 
         except Exception as e:
             self.logger.error(f"Error estimating processing time: {e}")
-            return {'total_seconds': 30.0, 'breakdown': {}, 'queries_count': 0}
\ No newline at end of file
+            return {'total_seconds': 30.0, 'breakdown': {}, 'queries_count': 0}
+
+    def get_estimation_connector(self, db_params: Dict):
+        """
+        Connector untuk row count estimasi (None jika database tidak bisa dibuka;
+        estimasi lalu hanya memakai cache row count)
+        """
+        if self.db_connector:
+            return self.db_connector
+
+        database_path = db_params.get('database_path', '')
+        if not database_path or not os.path.exists(database_path):
+            return None
+
+        try:
+            return FirebirdConnector(
+                db_path=database_path,
+                username=db_params.get('username', 'sysdba'),
+                password=db_params.get('password', 'masterkey')
+            )
+        except Exception as e:
+            self.logger.warning(f"Row counts unavailable for estimation: {e}")
+            return None
+
+    def get_template_size(self, template_path: str = None) -> int:
+        """
+        Jumlah cell template untuk estimasi render (0 jika template tidak terbaca)
+        """
+        if not template_path or not os.path.exists(template_path):
+            return 0
+
+        try:
+            temp_processor = TemplateProcessor()
+            if not temp_processor.load_template(template_path):
+                return 0
+            return self.count_cells(temp_processor.template_workbook)
+        except Exception as e:
+            self.logger.warning(f"Error reading template size: {e}")
+            return 0
+
+    def count_cells(self, workbook) -> int:
+        """
+        Jumlah cell (max_row x max_column per sheet) dalam workbook
+        """
+        if workbook is None:
+            return 0
+        return sum(sheet.max_row * sheet.max_column for sheet in workbook.worksheets)
+
+    def record_run_metrics(self, db_params: Dict, report_params: Dict) -> None:
+        """
+        Simpan metrik run ini ke riwayat estimator (kegagalan hanya di-log)
+
+        Args:
+            db_params: Database parameters
+            report_params: Report parameters
+        """
+        try:
+            days = date_range_days(report_params)
+            query_rows = (self.current_estimate or {}).get('query_rows', {})
+
+            queries = [
+                {
+                    'name': query_name,
+                    'rows': query_rows.get(query_name, 0),
+                    'days': days,
+                    'records': metrics.get('records', 0),
+                    'seconds': round(metrics.get('seconds', 0.0), 4)
+                }
+                for query_name, metrics in self.formula_engine.query_metrics.items()
+            ]
+
+            rendered_cells = self.count_cells(self.template_processor.workbook)
+
+            run = {
+                'database': os.path.basename(db_params.get('database_path', '')),
+                'days': days,
+                'queries': queries,
+                'template_cells': (self.current_estimate or {}).get('template_cells', 0),
+                'rendered_cells': rendered_cells,
+                'estimated_seconds': (self.current_estimate or {}).get('total_seconds'),
+                'total_seconds': round(time.perf_counter() - self.run_started, 4)
+            }
+            # Waktu query dicatat per query, stage lain sebagai total stage
+            for stage in ('initialization', 'processing', 'template', 'output'):
+                if stage in self.stage_timings:
+                    key = 'render' if stage == 'template' else stage
+                    run[key] = round(self.stage_timings[stage], 4)
+
+            self.time_estimator.record_run(run)
+
+        except Exception as e:
+            self.logger.warning(f"Error recording run metrics: {e}")
@@ -20,12 +20,15 @@ import threading
 import logging
 from pathlib import Path
 
+# Modul bersama (report_common) ada di root repository
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
 # Import modules
 try:
     from firebird_connector import FirebirdConnector
     from template_processor import TemplateProcessor
-    from formula_engine import FormulaEngine
     from report_generator import ReportGenerator
+    from report_common.job_runner import JobRunner, JobCancelledError, gui_thread
 except ImportError as e:
     print(f"Error importing modules: {e}")
     print("Make sure all required modules are in the same directory")
@@ -36,6 +39,11 @@ class SimpleReportEditor:
         self.root = tk.Tk()
         self.setup_logging()
         self.load_config()
+
+        # Preview dan generate berjalan sebagai job background yang bisa dibatalkan
+        max_jobs = self.config.get('performance_settings', {}).get('max_concurrent_jobs', 2)
+        self.job_runner = JobRunner(self.root, max_workers=max_jobs)
+
         self.setup_ui()
         self.init_components()
 
@@ -201,7 +209,13 @@ class SimpleReportEditor:
         self.generate_btn = ttk.Button(action_frame, text="Generate Report", command=self.generate_report)
         self.generate_btn.grid(row=1, column=0, padx=(0, 5), pady=5)
 
-        ttk.Button(action_frame, text="Clear", command=self.clear_all).grid(row=2, column=0, padx=(0, 5), pady=5)
+        self.replay_btn = ttk.Button(action_frame, text="Replay Snapshot", command=self.replay_snapshot)
+        self.replay_btn.grid(row=2, column=0, padx=(0, 5), pady=5)
+
+        self.cancel_btn = ttk.Button(action_frame, text="Cancel", command=self.cancel_jobs, state=tk.DISABLED)
+        self.cancel_btn.grid(row=3, column=0, padx=(0, 5), pady=5)
+
+        ttk.Button(action_frame, text="Clear", command=self.clear_all).grid(row=4, column=0, padx=(0, 5), pady=5)
 
     def create_right_panel(self, parent):
         """Create right panel for preview and results"""
@@ -254,6 +268,10 @@ class SimpleReportEditor:
         self.preview_data = None
         self.formula_engine = None
 
+        # Preview yang sedang berjalan dibatalkan jika parameter berubah
+        for variable in (self.start_date_var, self.end_date_var, self.db_var):
+            variable.trace_add('write', self.on_parameters_changed)
+
         # Load available templates
         self.refresh_templates()
 
@@ -397,72 +415,90 @@ class SimpleReportEditor:
                 messagebox.showerror("Error", "Please fill in all required parameters")
                 return
 
-            # Run preview in background thread
-            threading.Thread(
-                target=self._preview_data_thread,
-                args=(start_date, end_date, db_path, username, password),
-                daemon=True
-            ).start()
+            # Preview sebelumnya (jika masih berjalan) digantikan preview baru
+            self.job_runner.submit(
+                self._preview_data_job, start_date, end_date, db_path, username, password,
+                name='preview', group='preview', replace=True,
+                on_success=self.on_preview_success,
+                on_error=self.on_preview_error,
+                on_cancel=self.on_preview_cancelled,
+                on_finish=self.on_job_finished
+            )
+            self.update_job_buttons()
 
         except Exception as e:
             self.logger.error(f"Error starting preview: {e}")
             messagebox.showerror("Error", f"Failed to start preview: {e}")
 
-    def _preview_data_thread(self, start_date, end_date, db_path, username, password):
-        """Background thread for data preview"""
-        try:
-            # Initialize formula engine
-            self.formula_engine = FormulaEngine()
-
-            # Connect to database
-            self.update_status("Connecting to database...")
-            self.progress_var.set(20)
+    def _preview_data_job(self, job, start_date, end_date, db_path, username, password):
+        """Job preview data (berjalan di worker thread)"""
+        generator = ReportGenerator(self.config)
+        generator.set_progress_callback(self.on_report_progress)
 
-            # Create database connection
-            from firebird_connector import FirebirdConnector
-            db_connector = FirebirdConnector(db_path, username, password)
+        # Cancel: query preview yang sedang berjalan di-kill
+        job.add_cancel_callback(generator.cancel_preview)
 
-            # Execute queries
-            self.update_status("Executing queries...")
-            self.progress_var.set(40)
+        self.set_progress(20, "Connecting to database...")
 
-            # Process parameters
-            params = {
-                'start_date': f"'{start_date}'",
-                'end_date': f"'{end_date}'",
-                'table_name': 'FFBSCANNERDATA04'  # Default table
-            }
+        try:
+            limit = int(self.preview_limit_var.get())
+        except ValueError:
+            limit = 100
+
+        # Process parameters; table_name diganti per bulan oleh preview mode
+        params = {
+            'start_date': f"'{start_date}'",
+            'end_date': f"'{end_date}'",
+            'table_name': 'FFBSCANNERDATA04'  # Default table
+        }
 
-            results = {}
-            queries = self.current_formula.get('queries', {})
+        job.check_cancelled()
+        return generator.run_preview_queries(
+            self.current_formula,
+            {
+                'database_path': db_path,
+                'username': username,
+                'password': password
+            },
+            params,
+            limit=limit
+        )
 
-            for query_name, query_data in queries.items():
-                self.update_status(f"Executing query: {query_name}")
-                self.progress_var.set(40 + (len(results) / len(queries)) * 40)
+    def on_preview_success(self, results):
+        self.preview_data = results
+        self.display_preview()
+        self.set_progress(100, "Preview completed")
 
-                sql = query_data.get('sql', '')
+    def on_preview_error(self, error):
+        self.logger.error(f"Error in preview job: {error}")
+        messagebox.showerror("Error", f"Preview failed: {error}")
+        self.set_progress(0, "Preview failed")
 
-                # Replace placeholders in SQL
-                for param_name, param_value in params.items():
-                    sql = sql.replace(f'{{{param_name}}}', str(param_value))
+    def on_preview_cancelled(self):
+        self.logger.info("Preview cancelled")
+        self.set_progress(0, "Preview cancelled")
 
-                # Execute query
-                query_result = db_connector.execute_query(sql)
-                results[query_name] = query_result
+    def cancel_preview(self):
+        """Batalkan preview yang sedang berjalan"""
+        self.job_runner.cancel_group('preview')
 
-            self.preview_data = results
+    def on_parameters_changed(self, *args):
+        """Parameter berubah: hasil preview yang sedang berjalan tidak lagi relevan"""
+        if self.job_runner.is_busy('preview'):
+            self.cancel_preview()
+            self.set_progress(0, "Preview cancelled (parameters changed)")
 
-            # Display preview
-            self.root.after(0, self.display_preview)
+    def cancel_jobs(self):
+        """Batalkan preview / generate yang sedang berjalan (proses isql di-kill)"""
+        self.job_runner.cancel_all()
+        self.update_job_buttons()
 
-            self.progress_var.set(100)
-            self.update_status("Preview completed")
+    def on_job_finished(self, job):
+        self.update_job_buttons()
 
-        except Exception as e:
-            self.logger.error(f"Error in preview thread: {e}")
-            self.root.after(0, lambda: messagebox.showerror("Error", f"Preview failed: {e}"))
-            self.root.after(0, lambda: self.update_status("Preview failed"))
-            self.progress_var.set(0)
+    def update_job_buttons(self):
+        """Tombol Cancel aktif selama ada job yang berjalan"""
+        self.cancel_btn.config(state=tk.NORMAL if self.job_runner.is_busy() else tk.DISABLED)
 
     def display_preview(self):
         """Display preview data"""
@@ -555,84 +591,209 @@ class SimpleReportEditor:
             return
 
         try:
-            # Check for template file
-            template_info = self.current_formula.get('template_info', {})
-            template_file = template_info.get('template_file', '')
-
-            if template_file:
-                template_path = Path(self.config.get('template_settings', {}).get('default_template_dir', './templates')) / template_file
-            else:
-                # Browse for template file
-                template_path = filedialog.askopenfilename(
-                    title="Select Excel Template",
-                    filetypes=[("Excel Files", "*.xlsx;*.xls"), ("All Files", "*.*")]
-                )
-
-            if not template_path or not os.path.exists(template_path):
-                messagebox.showerror("Error", "Template file not found")
+            template_path = self.resolve_template_path()
+            if not template_path:
                 return
 
-            # Run report generation in background thread
-            threading.Thread(
-                target=self._generate_report_thread,
-                args=(str(template_path),),
-                daemon=True
-            ).start()
+            if self.job_runner.is_busy('generate'):
+                messagebox.showwarning("In Progress", "Report generation is already in progress")
+                return
+
+            # Run report generation as background job
+            self.generate_btn.config(state=tk.DISABLED)
+            self.job_runner.submit(
+                self._generate_report_job, str(template_path),
+                name='generate', group='generate',
+                on_success=self.on_generate_success,
+                on_error=self.on_generate_error,
+                on_cancel=self.on_generate_cancelled,
+                on_finish=self.on_generate_finished
+            )
+            self.update_job_buttons()
 
         except Exception as e:
             self.logger.error(f"Error starting report generation: {e}")
             messagebox.showerror("Error", f"Failed to start report generation: {e}")
 
-    def _generate_report_thread(self, template_path):
-        """Background thread for report generation"""
+    def resolve_template_path(self):
+        """Path template Excel dari formula aktif (atau pilih manual); None jika tidak ada"""
+        template_info = self.current_formula.get('template_info', {})
+        template_file = template_info.get('template_file', '')
+
+        if template_file:
+            template_path = Path(self.config.get('template_settings', {}).get('default_template_dir', './templates')) / template_file
+        else:
+            # Browse for template file
+            template_path = filedialog.askopenfilename(
+                title="Select Excel Template",
+                filetypes=[("Excel Files", "*.xlsx;*.xls"), ("All Files", "*.*")]
+            )
+
+        if not template_path or not os.path.exists(template_path):
+            messagebox.showerror("Error", "Template file not found")
+            return None
+        return template_path
+
+    def replay_snapshot(self):
+        """Render ulang laporan dari snapshot hasil query tersimpan (tanpa database)"""
+        if not self.current_formula:
+            messagebox.showerror("Error", "Please select a template first")
+            return
+
+        if self.job_runner.is_busy('generate'):
+            messagebox.showwarning("In Progress", "Report generation is already in progress")
+            return
+
+        snapshot_dir = self.config.get('performance_settings', {}).get('snapshot_dir', 'etl_reports')
+        snapshot_path = filedialog.askopenfilename(
+            title="Select Extraction Snapshot",
+            initialdir=snapshot_dir if os.path.isdir(snapshot_dir) else None,
+            filetypes=[("Snapshot Manifest", "manifest.json"), ("All Files", "*.*")]
+        )
+        if not snapshot_path:
+            return
+
         try:
-            self.update_status("Generating report...")
-            self.progress_var.set(10)
+            template_path = self.resolve_template_path()
+            if not template_path:
+                return
 
-            # Initialize report generator
-            from report_generator import ReportGenerator
-            generator = ReportGenerator()
+            self.generate_btn.config(state=tk.DISABLED)
+            self.replay_btn.config(state=tk.DISABLED)
+            self.job_runner.submit(
+                self._replay_report_job, str(template_path), snapshot_path,
+                name='replay', group='generate',
+                on_success=self.on_generate_success,
+                on_error=self.on_generate_error,
+                on_cancel=self.on_generate_cancelled,
+                on_finish=self.on_generate_finished
+            )
+            self.update_job_buttons()
 
-            # Get parameters
-            start_date = self.start_date_var.get()
-            end_date = self.end_date_var.get()
-            db_path = self.db_var.get()
-            username = self.username_var.get()
-            password = self.password_var.get()
+        except Exception as e:
+            self.logger.error(f"Error starting snapshot replay: {e}")
+            messagebox.showerror("Error", f"Failed to start snapshot replay: {e}")
+
+    def _replay_report_job(self, job, template_path, snapshot_path):
+        """Job replay snapshot (berjalan di worker thread)"""
+        self.set_progress(5, "Replaying snapshot...")
+
+        generator = ReportGenerator(self.config)
+        generator.set_progress_callback(self.on_report_progress)
+        job.add_cancel_callback(generator.cancel)
+
+        return generator.generate_report(
+            template_path=template_path,
+            formula_data=self.current_formula,
+            db_params={},
+            report_params={},
+            from_snapshot=snapshot_path
+        )
 
-            # Process parameters
-            params = {
-                'start_date': start_date,
-                'end_date': end_date,
-                'table_name': 'FFBSCANNERDATA04'
-            }
+    def _generate_report_job(self, job, template_path):
+        """Job report generation (berjalan di worker thread)"""
+        self.set_progress(10, "Generating report...")
+
+        # Initialize report generator
+        generator = ReportGenerator(self.config)
+        generator.set_progress_callback(self.on_report_progress)
+
+        # Cancel: query isql yang berjalan di-kill, langkah berikutnya dilewati
+        job.add_cancel_callback(generator.cancel)
+
+        # Get parameters
+        start_date = self.start_date_var.get()
+        end_date = self.end_date_var.get()
+        db_path = self.db_var.get()
+        username = self.username_var.get()
+        password = self.password_var.get()
+
+        # Process parameters
+        params = {
+            'start_date': start_date,
+            'end_date': end_date,
+            'table_name': 'FFBSCANNERDATA04'
+        }
+
+        db_params = {
+            'database_path': db_path,
+            'username': username,
+            'password': password
+        }
+
+        # Estimasi waktu dari riwayat run; konfirmasi dulu untuk run panjang
+        self.update_status("Estimating processing time...")
+        estimate = generator.get_estimated_processing_time(
+            self.current_formula, db_params, params, template_path
+        )
+        if estimate.get('long_run') and not self.confirm_long_run(estimate):
+            raise JobCancelledError("Long running report declined")
 
+        job.check_cancelled()
+        if estimate.get('eta'):
+            self.update_status(f"Processing template... (estimated {estimate['eta']})")
+        else:
             self.update_status("Processing template...")
-            self.progress_var.set(30)
-
-            # Generate report
-            output_path = generator.generate_report(
-                template_path=template_path,
-                formula_data=self.current_formula,
-                db_params={
-                    'database_path': db_path,
-                    'username': username,
-                    'password': password
-                },
-                report_params=params
-            )
 
-            self.progress_var.set(100)
-            self.update_status(f"Report generated: {os.path.basename(output_path)}")
+        # Generate report
+        return generator.generate_report(
+            template_path=template_path,
+            formula_data=self.current_formula,
+            db_params=db_params,
+            report_params=params
+        )
 
-            # Ask to open the report
-            self.root.after(0, lambda: messagebox.showinfo("Success", f"Report generated successfully!\n\nSaved as: {output_path}"))
+    def on_generate_success(self, output_path):
+        self.set_progress(100, f"Report generated: {os.path.basename(output_path)}")
 
-        except Exception as e:
-            self.logger.error(f"Error generating report: {e}")
-            self.root.after(0, lambda: messagebox.showerror("Error", f"Report generation failed: {e}"))
-            self.root.after(0, lambda: self.update_status("Report generation failed"))
-            self.progress_var.set(0)
+        # Ask to open the report
+        messagebox.showinfo("Success", f"Report generated successfully!\n\nSaved as: {output_path}")
+
+    def on_generate_error(self, error):
+        self.logger.error(f"Error generating report: {error}")
+        messagebox.showerror("Error", f"Report generation failed: {error}")
+        self.set_progress(0, "Report generation failed")
+
+    def on_generate_cancelled(self):
+        self.set_progress(0, "Report generation cancelled")
+
+    def on_generate_finished(self, job):
+        self.generate_btn.config(state=tk.NORMAL)
+        self.replay_btn.config(state=tk.NORMAL)
+        self.update_job_buttons()
+
+    def on_report_progress(self, step, progress):
+        """Progress callback dari ReportGenerator (dipanggil dari background thread)"""
+        self.set_progress(progress, step)
+
+    def confirm_long_run(self, estimate):
+        """
+        Tanya user sebelum menjalankan run yang diperkirakan lama.
+        Dipanggil dari background thread; dialog ditampilkan di main thread.
+        """
+        answer = {'value': False}
+        done = threading.Event()
+
+        breakdown = estimate.get('breakdown', {})
+        details = "\n".join(
+            f"  {stage.capitalize()}: {seconds:.0f}s" for stage, seconds in breakdown.items() if seconds
+        )
+        message = (
+            f"{estimate.get('warning', 'This report is expected to take a long time.')}\n\n"
+            f"{details}\n\n"
+            f"Based on {estimate.get('history_runs', 0)} previous run(s).\n"
+            "Continue?"
+        )
+
+        def ask():
+            try:
+                answer['value'] = messagebox.askyesno("Long Running Report", message)
+            finally:
+                done.set()
+
+        self.job_runner.call_soon(ask)
+        done.wait()
+        return answer['value']
 
     def clear_all(self):
         """Clear all fields and data"""
@@ -696,14 +857,27 @@ Created: 2025-11-01"""
 
         messagebox.showinfo("About", about_text)
 
+    @gui_thread
     def update_status(self, message):
-        """Update status bar"""
+        """Update status bar (aman dipanggil dari worker thread)"""
         self.status_var.set(message)
-        self.root.update_idletasks()
+
+    @gui_thread
+    def set_progress(self, value, message=None):
+        """Update progress bar dan status (aman dipanggil dari worker thread)"""
+        self.progress_var.set(value)
+        if message:
+            self.status_var.set(message)
+
+    def on_closing(self):
+        """Tutup aplikasi; job yang masih berjalan dibatalkan agar proses isql tidak tertinggal"""
+        self.job_runner.shutdown()
+        self.root.destroy()
 
     def run(self):
         """Run the application"""
         self.logger.info("Starting Simple Report Editor")
+        self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
         self.root.mainloop()
 
 if __name__ == "__main__":
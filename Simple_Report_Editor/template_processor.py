@@ -20,6 +20,12 @@ from openpyxl import load_workbook
 from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
 from openpyxl.utils import get_column_letter
 import copy
+import os
+import sys
+
+# Modul bersama (report_common) ada di root repository
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from report_common.sheet_extents import compute_row_extents, shift_row_extents
 
 class TemplateProcessor:
     """
@@ -41,6 +47,8 @@ class TemplateProcessor:
         self.placeholders = {}
         self.repeating_sections = {}
         self.processed_data = {}
+        self.template_row_extents = {}
+        self.row_extents = {}
 
     def load_template(self, template_path: str) -> bool:
         """
@@ -78,10 +86,14 @@ class TemplateProcessor:
 
         self.placeholders = {}
         self.repeating_sections = {}
+        self.template_row_extents = {}
 
         for sheet_name in self.template_workbook.sheetnames:
             sheet = self.template_workbook[sheet_name]
 
+            # Rentang kolom terpakai per row, dihitung sekali per template
+            self.template_row_extents[sheet_name] = compute_row_extents(sheet)
+
             # Scan untuk placeholders
             for row in sheet.iter_rows():
                 for cell in row:
@@ -94,6 +106,17 @@ class TemplateProcessor:
 
         self.logger.info(f"Found {sum(len(sheet_places) for sheet_places in self.placeholders.values())} placeholders")
 
+    def shift_row_extents(self, sheet_name: str, from_row: int, amount: int) -> None:
+        """
+        Geser row extents working sheet setelah insert_rows
+
+        Args:
+            sheet_name: Nama sheet
+            from_row: Row pertama yang ikut bergeser
+            amount: Jumlah row yang disisipkan
+        """
+        self.row_extents[sheet_name] = shift_row_extents(self.row_extents.get(sheet_name, {}), from_row, amount)
+
     def extract_placeholders(self, text: str) -> List[str]:
         """
         Extract placeholders dari text
@@ -132,6 +155,10 @@ class TemplateProcessor:
             # Create working copy
             self.workbook = copy.deepcopy(self.template_workbook)
             self.processed_data = data
+            self.row_extents = {
+                sheet_name: dict(extents)
+                for sheet_name, extents in self.template_row_extents.items()
+            }
 
             # Process repeating sections first
             if repeating_sections_config:
@@ -253,10 +280,18 @@ class TemplateProcessor:
         if max_col == 0:
             return start_row
 
+        row_extents = self.row_extents.get(sheet.title)
+        if row_extents is None:
+            row_extents = compute_row_extents(sheet)
+
         # Look for empty row after start_row
         for row in range(start_row + 1, sheet.max_row + 2):
+            extent = row_extents.get(row)
+            if not extent or extent[0] > max_col:
+                return row - 1
+
             has_content = False
-            for col in range(1, max_col + 1):
+            for col in range(extent[0], min(extent[1], max_col) + 1):
                 cell_value = sheet.cell(row=row, column=col).value
                 if cell_value is not None and str(cell_value).strip() != '':
                     has_content = True
@@ -296,11 +331,26 @@ class TemplateProcessor:
         if rows_to_insert > 0:
             # Insert new rows
             sheet.insert_rows(end_row + 1, rows_to_insert)
+            self.shift_row_extents(sheet.title, end_row + 1, rows_to_insert)
+
+        # Rentang kolom yang ditulis oleh section ini, untuk memperbarui row extents
+        written_cols = []
+        for col_letter in columns.keys():
+            try:
+                written_cols.append(openpyxl.utils.column_index_from_string(col_letter))
+            except ValueError:
+                continue
+        written_cols.sort()
+        row_extents = self.row_extents.setdefault(sheet.title, {})
 
         # Process each data row
         for i, row_data in enumerate(data):
             target_row = start_row + i
 
+            if written_cols:
+                first_col, last_col = row_extents.get(target_row, (written_cols[0], written_cols[-1]))
+                row_extents[target_row] = (min(first_col, written_cols[0]), max(last_col, written_cols[-1]))
+
             # Apply formatting if preserving
             if preserve_formatting and i == 0:  # Apply template formatting to first row
                 self.apply_row_styles(sheet, target_row, template_row_styles)
@@ -370,7 +420,15 @@ class TemplateProcessor:
         """
         styles = {}
 
-        for col in range(1, sheet.max_column + 1):
+        row_extents = self.row_extents.get(sheet.title)
+        if row_extents is None:
+            row_extents = compute_row_extents(sheet)
+
+        extent = row_extents.get(row_num)
+        if not extent:
+            return styles
+
+        for col in range(extent[0], extent[1] + 1):
             cell = sheet.cell(row=row_num, column=col)
             styles[col] = {
                 'font': copy.copy(cell.font),
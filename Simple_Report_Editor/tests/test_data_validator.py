@@ -0,0 +1,97 @@
+"""
+Data Validator Tests
+Test columnar validation_rules: parsing, violation counts and messages
+"""
+
+import unittest
+import os
+import sys
+
+import pandas as pd
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data_validator import (
+    RULE_CHECK, RULE_RANGE, RULE_REQUIRED, parse_check, parse_rules,
+    validate_query_results, validate_records, validation_messages
+)
+
+
+class TestDataValidator(unittest.TestCase):
+    """Test data_validator"""
+
+    def setUp(self):
+        self.rows = [
+            {'TRANSDATE': '2025-01-01', 'FIELDID': 'F01', 'BUNCHES': 10, 'RIPE_PCT': 95},
+            {'TRANSDATE': '2025-13-01', 'FIELDID': None, 'BUNCHES': -2, 'RIPE_PCT': 50},
+            {'TRANSDATE': '2025-01-03', 'FIELDID': 'F03', 'BUNCHES': 'x', 'RIPE_PCT': 120},
+            {'TRANSDATE': '', 'FIELDID': 'F04', 'BUNCHES': 4, 'RIPE_PCT': 0},
+        ]
+
+    def _rule(self, report, name):
+        return next(result for result in report['rules'] if result['rule'] == name)
+
+    def test_parse_check(self):
+        self.assertEqual(parse_check('FIELDID IS NOT NULL'),
+                         {'rule': 'FIELDID IS NOT NULL', 'type': RULE_REQUIRED, 'field': 'FIELDID'})
+        self.assertEqual(parse_check("RIPE_PCT BETWEEN 0 AND 100")['type'], RULE_RANGE)
+        self.assertEqual(parse_check("RECORDTAG <> 'PM'"),
+                         {'rule': "RECORDTAG <> 'PM'", 'type': RULE_CHECK, 'field': 'RECORDTAG',
+                          'operator': '<>', 'value': 'PM'})
+        self.assertIsNone(parse_check('LENGTH(FIELDID) > 2'))
+
+    def test_parse_rules_formats(self):
+        rules = parse_rules({
+            'required_fields': ['TRANSDATE'],
+            'data_quality_checks': ['BUNCHES >= 0', 'UPPER(X) = 1'],
+            'data_validation': {'RIPE_PCT': {'type': 'integer', 'min_value': 0, 'max_value': 100}}
+        })
+        self.assertEqual([rule['rule'] for rule in rules],
+                         ['TRANSDATE required', 'BUNCHES >= 0', 'RIPE_PCT integer', 'RIPE_PCT >= 0 and <= 100'])
+
+    def test_violations_are_counted_per_rule(self):
+        report = validate_records(self.rows, {
+            'required_fields': ['TRANSDATE'],
+            'numeric_fields': ['BUNCHES'],
+            'date_fields': ['TRANSDATE'],
+            'data_quality_checks': ['FIELDID IS NOT NULL', 'BUNCHES >= 0', 'RIPE_PCT BETWEEN 0 AND 100']
+        })
+        self.assertEqual(report['total_rows'], 4)
+        self.assertEqual(self._rule(report, 'TRANSDATE required')['failed'], 1)
+        self.assertEqual(self._rule(report, 'BUNCHES numeric')['samples'], [{'row': 3, 'value': 'x'}])
+        self.assertEqual(self._rule(report, 'TRANSDATE date (%Y-%m-%d)')['samples'][0],
+                         {'row': 2, 'value': '2025-13-01'})
+        self.assertEqual(self._rule(report, 'FIELDID IS NOT NULL')['failed'], 1)
+        self.assertEqual(self._rule(report, 'BUNCHES >= 0')['samples'][0]['row'], 2)
+        self.assertEqual(self._rule(report, 'RIPE_PCT BETWEEN 0 AND 100')['failed'], 1)
+        self.assertFalse(report['valid'])
+        self.assertEqual(report['failed_rows'], 3)
+
+    def test_missing_column_fails_required(self):
+        report = validate_records(self.rows, {'required_fields': ['DIVID']})
+        self.assertEqual(self._rule(report, 'DIVID required')['failed'], 4)
+
+    def test_sample_size_limits_samples_not_counts(self):
+        rows = [{'BUNCHES': -1}] * 50
+        report = validate_records(rows, {'data_quality_checks': ['BUNCHES >= 0']}, sample_size=3)
+        self.assertEqual(report['rules'][0]['failed'], 50)
+        self.assertEqual(len(report['rules'][0]['samples']), 3)
+        self.assertEqual(validation_messages(report, 'ffb_data'),
+                         ["ffb_data: Rule 'BUNCHES >= 0' failed for 50 of 50 rows (rows 1, 2, 3, ...)"])
+
+    def test_valid_data(self):
+        report = validate_records(pd.DataFrame({'BUNCHES': [1, 2]}), {'numeric_fields': ['BUNCHES']})
+        self.assertTrue(report['valid'])
+        self.assertEqual(validation_messages(report), [])
+
+    def test_query_results_only_checked_where_column_exists(self):
+        reports = validate_query_results(
+            {'ffb_data': self.rows, 'divisions': [{'DIVID': 'D1'}], 'total': 5},
+            {'data_quality_checks': ['BUNCHES >= 0']})
+        self.assertEqual(list(reports), ['ffb_data'])
+        self.assertEqual(reports['ffb_data']['rules'][0]['failed'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+"""
+Report Replay Tests
+Test capturing query results as snapshots and re-rendering them without a database
+"""
+
+import unittest
+import os
+import sys
+import shutil
+import tempfile
+
+from openpyxl import Workbook
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from report_generator import ReportGenerator
+
+FORMULA = {
+    'queries': {'summary': {'sql': 'SELECT COUNT(*) AS TOTAL FROM FFBSCANNERDATA01', 'return_format': 'dict'}},
+    'variables': {
+        'total': {'type': 'direct', 'source': 'summary.TOTAL'},
+        'title': {'type': 'constant', 'value': 'LAPORAN FFB'}
+    }
+}
+
+PARAMETERS = {'estate_name': 'PGE 2B', 'start_date': '2025-01-01', 'end_date': '2025-01-31'}
+
+
+class TestReportReplay(unittest.TestCase):
+    """Test ReportGenerator snapshot capture and generate_report(from_snapshot=...)"""
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.template_path = os.path.join(self.test_dir, 'template.xlsx')
+        workbook = Workbook()
+        sheet = workbook.active
+        sheet['A1'] = '{{title}}'
+        sheet['B2'] = '{{total}}'
+        workbook.save(self.template_path)
+
+        self.generator = ReportGenerator({'performance_settings': {
+            'snapshot_dir': os.path.join(self.test_dir, 'snapshots'),
+            'timing_history_file': os.path.join(self.test_dir, 'timing_history.json')
+        }})
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def capture(self, total):
+        """Jalankan process_data dengan hasil query tetap (tanpa Firebird)"""
+        self.generator.formula_engine.execute_queries = lambda *args, **kwargs: {'summary': [{'TOTAL': total}]}
+        self.generator.process_data(FORMULA, dict(PARAMETERS))
+        return self.generator.last_snapshot
+
+    def test_replay_renders_captured_results_without_database(self):
+        snapshot = self.capture(42)
+        self.assertTrue(os.path.isfile(os.path.join(snapshot, 'manifest.json')))
+
+        replay = ReportGenerator(self.generator.config)
+        output = replay.generate_report(self.template_path, FORMULA, db_params=None, report_params={},
+                                        output_path=os.path.join(self.test_dir, 'replay.xlsx'),
+                                        from_snapshot=snapshot)
+
+        self.assertIsNone(replay.db_connector)
+        self.assertTrue(os.path.isfile(output))
+        sheet = replay.template_processor.workbook.active
+        self.assertEqual(sheet['A1'].value, 'LAPORAN FFB')
+        self.assertEqual(str(sheet['B2'].value), '42')
+        # Replay tidak masuk riwayat estimasi waktu
+        self.assertEqual(replay.time_estimator.history['runs'], [])
+
+    def test_changed_formula_queries_are_reported(self):
+        snapshot = self.capture(7)
+        formula = {**FORMULA, 'queries': {'summary': {'sql': 'SELECT 7 AS TOTAL FROM RDB$DATABASE'}}}
+
+        replay = ReportGenerator(self.generator.config)
+        with self.assertLogs('report_generator', level='WARNING') as logs:
+            replay.generate_report(self.template_path, formula, None, {},
+                                   output_path=os.path.join(self.test_dir, 'replay.xlsx'), from_snapshot=snapshot)
+
+        self.assertTrue(any('different query definitions' in line for line in logs.output))
+        self.assertEqual(str(replay.template_processor.workbook.active['B2'].value), '7')
+
+    def test_capture_can_be_disabled(self):
+        generator = ReportGenerator({'performance_settings': {
+            'capture_snapshots': False,
+            'snapshot_dir': os.path.join(self.test_dir, 'snapshots'),
+            'timing_history_file': os.path.join(self.test_dir, 'timing_history.json')
+        }})
+        generator.formula_engine.execute_queries = lambda *args, **kwargs: {'summary': [{'TOTAL': 1}]}
+        generator.process_data(FORMULA, dict(PARAMETERS))
+
+        self.assertIsNone(generator.last_snapshot)
+        self.assertFalse(os.path.exists(os.path.join(self.test_dir, 'snapshots')))
+
+    def test_missing_snapshot_raises(self):
+        with self.assertRaises(Exception):
+            self.generator.generate_report(self.template_path, FORMULA, None, {},
+                                           from_snapshot=os.path.join(self.test_dir, 'missing'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,138 @@
+"""
+Time Estimator Tests
+Test history-based processing time estimates and the row count cache
+"""
+
+import unittest
+import os
+import sys
+import json
+import shutil
+import tempfile
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from time_estimator import (
+    DEFAULT_QUERY_SECONDS, ProcessingTimeEstimator, date_range_days, extract_tables, format_duration
+)
+
+
+class FakeConnector:
+    """Connector dengan estimasi statistik untuk sebagian tabel"""
+
+    def __init__(self):
+        self.counted = []
+
+    def estimate_row_counts(self, tables):
+        return {'FFBSCANNERDATA01': {'rows': 120000}}
+
+    def get_row_count(self, table):
+        self.counted.append(table)
+        return 40
+
+
+class TestHelpers(unittest.TestCase):
+    """Test module-level helpers"""
+
+    def test_extract_tables(self):
+        sql = ("SELECT a.ID FROM FFBSCANNERDATA01 a JOIN emp e ON e.ID = a.SCANUSERID "
+               "JOIN EMP x ON 1 = 1 WHERE EXISTS (SELECT 1 FROM RDB$DATABASE)")
+        self.assertEqual(extract_tables(sql), ['FFBSCANNERDATA01', 'EMP'])
+
+    def test_date_range_days(self):
+        self.assertEqual(date_range_days({'start_date': "'2025-01-01'", 'end_date': '2025-01-31'}), 31)
+        self.assertEqual(date_range_days({'start_date': '2025-02-01'}), 0)
+        self.assertEqual(date_range_days({'start_date': 'x', 'end_date': '2025-01-31'}), 0)
+
+    def test_format_duration(self):
+        self.assertEqual(format_duration(45), '45s')
+        self.assertEqual(format_duration(200), '3m 20s')
+        self.assertEqual(format_duration(7500), '2h 05m')
+
+
+class TestProcessingTimeEstimator(unittest.TestCase):
+    """Test ProcessingTimeEstimator"""
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.history_path = os.path.join(self.test_dir, 'config', 'timing_history.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def record(self, estimator, rows, days, seconds):
+        estimator.record_run({
+            'initialization': 1.0, 'processing': 0.5, 'render': 0.001 * (100 + 10 * days),
+            'template_cells': 100, 'rendered_cells': 100 + 10 * days, 'days': days,
+            'queries': [{'name': 'raw_ffb_data', 'rows': rows, 'days': days, 'records': 50 * days,
+                         'seconds': seconds}]
+        })
+
+    def test_defaults_without_history(self):
+        estimate = ProcessingTimeEstimator(self.history_path).estimate(
+            [{'name': 'raw_ffb_data', 'rows': 1000}], template_cells=100, days=31)
+
+        self.assertEqual(estimate['source'], 'default')
+        self.assertEqual(estimate['queries'], {'raw_ffb_data': DEFAULT_QUERY_SECONDS})
+        self.assertFalse(estimate['long_run'])
+
+    def test_query_model_is_learned_from_history(self):
+        estimator = ProcessingTimeEstimator(self.history_path)
+        # seconds = 0.5 + 2 per juta row + 0.1 per hari
+        for rows, days in ((1_000_000, 10), (2_000_000, 10), (1_000_000, 30), (3_000_000, 20)):
+            self.record(estimator, rows, days, 0.5 + 2 * rows / 1e6 + 0.1 * days)
+
+        reloaded = ProcessingTimeEstimator(self.history_path)
+        seconds, source = reloaded.estimate_query('raw_ffb_data', 4_000_000, 31)
+        self.assertEqual(source, 'query')
+        self.assertAlmostEqual(seconds, 0.5 + 8 + 3.1, places=3)
+        # Query lain memakai fit gabungan
+        self.assertEqual(reloaded.estimate_query('employee_mapping', 0, 0)[1], 'global')
+
+        self.assertEqual(reloaded.estimate_records('raw_ffb_data', 31), 50 * 31)
+        self.assertEqual(reloaded.estimate_rendered_cells(100, 50 * 31), 100 + 31 * 10)
+        self.assertAlmostEqual(reloaded.estimate_render(410), 0.41, places=3)
+
+    def test_long_run_warning_scales_with_estates(self):
+        estimator = ProcessingTimeEstimator(self.history_path, warning_seconds=60)
+        for rows, days in ((1_000_000, 10), (2_000_000, 20), (3_000_000, 30)):
+            self.record(estimator, rows, days, 10.0 * rows / 1e6)
+
+        single = estimator.estimate([{'name': 'raw_ffb_data', 'rows': 3_000_000}], 100, 30)
+        multi = estimator.estimate([{'name': 'raw_ffb_data', 'rows': 3_000_000}], 100, 30, estates=3)
+
+        self.assertAlmostEqual(multi['total_seconds'], single['total_seconds'] * 3, places=2)
+        self.assertFalse(single['long_run'])
+        self.assertTrue(multi['long_run'])
+        self.assertIn('3 estate(s)', multi['warning'])
+
+    def test_history_is_capped(self):
+        estimator = ProcessingTimeEstimator(self.history_path, max_runs=2)
+        for seconds in (1.0, 2.0, 3.0):
+            self.record(estimator, 1000, 1, seconds)
+
+        with open(self.history_path, 'r', encoding='utf-8') as f:
+            runs = json.load(f)['runs']
+        self.assertEqual([run['queries'][0]['seconds'] for run in runs], [2.0, 3.0])
+
+    def test_row_counts_are_cached_until_database_changes(self):
+        db_path = os.path.join(self.test_dir, 'PTRJ.FDB')
+        with open(db_path, 'w') as f:
+            f.write('v1')
+        estimator = ProcessingTimeEstimator(self.history_path)
+        connector = FakeConnector()
+
+        tables = ['FFBSCANNERDATA01', 'EMP']
+        self.assertEqual(estimator.get_table_rows(connector, db_path, tables),
+                         {'FFBSCANNERDATA01': 120000, 'EMP': 40})
+        self.assertEqual(ProcessingTimeEstimator(self.history_path).get_table_rows(None, db_path, tables),
+                         {'FFBSCANNERDATA01': 120000, 'EMP': 40})
+        self.assertEqual(connector.counted, ['EMP'])
+
+        os.utime(db_path, (0, 0))
+        self.assertEqual(estimator.get_table_rows(None, db_path, tables), {})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,396 @@
+#!/usr/bin/env python3
+"""
+Time Estimator - Estimasi Waktu Proses dari Riwayat Run
+======================================================
+
+Menyimpan metrik setiap run laporan (waktu per query, jumlah row tabel, panjang
+rentang tanggal, jumlah cell yang di-render) dan mempelajari biaya per query dan
+per cell dari riwayat tersebut. Selama riwayat belum ada, estimasi memakai
+konstanta default yang sama dengan versi lama.
+
+Model:
+- Query: seconds = overhead + per_million_rows * (row tabel / 1e6) + per_day * hari
+  (dipelajari per nama query; fallback ke fit gabungan semua query)
+- Render: seconds = overhead + per_cell * jumlah cell
+
+Version: 1.0.0
+"""
+
+import json
+import logging
+import os
+import re
+from datetime import datetime
+from pathlib import Path
+from statistics import median
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+DEFAULT_HISTORY_FILE = 'config/timing_history.json'
+DEFAULT_MAX_RUNS = 200
+DEFAULT_WARNING_SECONDS = 3600
+
+# Konstanta lama, dipakai selama riwayat belum cukup
+DEFAULT_INITIALIZATION_SECONDS = 2.0
+DEFAULT_QUERY_SECONDS = 1.5
+DEFAULT_PROCESSING_SECONDS = 1.0
+DEFAULT_TEMPLATE_SECONDS = 2.0
+
+# Minimal sampel sebelum regresi dipakai
+MIN_SAMPLES_FOR_FIT = 3
+
+TABLE_PATTERN = re.compile(r'\b(?:FROM|JOIN)\s+([A-Za-z_][\w$]*)', re.IGNORECASE)
+
+
+def extract_tables(sql: str) -> List[str]:
+    """
+    Ambil nama tabel dari klausa FROM/JOIN (tanpa duplikat, urutan dipertahankan)
+    """
+    tables = []
+    for name in TABLE_PATTERN.findall(sql or ''):
+        name = name.upper()
+        if name not in tables and not name.startswith('RDB$'):
+            tables.append(name)
+    return tables
+
+
+def date_range_days(params: Dict) -> int:
+    """
+    Panjang rentang start_date..end_date dalam hari (inklusif); 0 jika tidak ada
+    """
+    params = params or {}
+    try:
+        start = str(params.get('start_date', '')).strip("'\" ")
+        end = str(params.get('end_date', '')).strip("'\" ")
+        if not start or not end:
+            return 0
+        start_date = datetime.strptime(start[:10], '%Y-%m-%d')
+        end_date = datetime.strptime(end[:10], '%Y-%m-%d')
+        return max(0, (end_date - start_date).days + 1)
+    except ValueError:
+        return 0
+
+
+def format_duration(seconds: float) -> str:
+    """Format detik menjadi teks singkat ('45s', '3m 20s', '2h 05m')"""
+    seconds = max(0, int(round(seconds)))
+    if seconds < 60:
+        return f"{seconds}s"
+    minutes, seconds = divmod(seconds, 60)
+    if minutes < 60:
+        return f"{minutes}m {seconds:02d}s"
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}h {minutes:02d}m"
+
+
+def _fit_linear(features: List[List[float]], targets: List[float]) -> Optional[List[float]]:
+    """
+    Least squares dengan intercept dan koefisien non-negatif; fitur yang
+    menghasilkan koefisien negatif dibuang lalu di-fit ulang
+    """
+    if len(targets) < MIN_SAMPLES_FOR_FIT:
+        return None
+
+    X = np.asarray(features, dtype=float)
+    y = np.asarray(targets, dtype=float)
+    active = list(range(X.shape[1]))
+
+    while True:
+        design = np.column_stack([np.ones(len(y))] + [X[:, i] for i in active])
+        coef, _, _, _ = np.linalg.lstsq(design, y, rcond=None)
+        negative = [active[i] for i, value in enumerate(coef[1:]) if value < 0]
+        if not negative:
+            break
+        active = [i for i in active if i not in negative]
+
+    result = [0.0] * (X.shape[1] + 1)
+    result[0] = max(0.0, float(coef[0]))
+    for i, feature in enumerate(active):
+        result[feature + 1] = float(coef[i + 1])
+    return result
+
+
+class ProcessingTimeEstimator:
+    """
+    Estimator waktu proses berbasis riwayat run.
+
+    Features:
+    - Riwayat run dalam JSON (dibatasi max_runs)
+    - Biaya per query dari row tabel dan panjang rentang tanggal
+    - Biaya render per cell dari ukuran template
+    - Cache row count per database (invalid jika file database berubah)
+    """
+
+    def __init__(self, history_path: str = None, max_runs: int = DEFAULT_MAX_RUNS,
+                 warning_seconds: float = DEFAULT_WARNING_SECONDS):
+        """
+        Initialize estimator
+
+        Args:
+            history_path: Path file riwayat JSON
+            max_runs: Jumlah run terakhir yang disimpan
+            warning_seconds: Batas estimasi sebelum run dianggap panjang
+        """
+        self.logger = logging.getLogger(__name__)
+        self.history_path = history_path or DEFAULT_HISTORY_FILE
+        self.max_runs = max_runs
+        self.warning_seconds = warning_seconds
+        self.history = self.load_history()
+
+    def load_history(self) -> Dict:
+        """Load riwayat dari file (riwayat kosong jika belum ada / rusak)"""
+        history = {'runs': [], 'row_counts': {}}
+        try:
+            if os.path.exists(self.history_path):
+                with open(self.history_path, 'r', encoding='utf-8') as f:
+                    loaded = json.load(f)
+                history['runs'] = loaded.get('runs', [])
+                history['row_counts'] = loaded.get('row_counts', {})
+        except Exception as e:
+            self.logger.warning(f"Error loading timing history {self.history_path}: {e}")
+        return history
+
+    def save_history(self) -> bool:
+        """Simpan riwayat ke file"""
+        try:
+            directory = os.path.dirname(self.history_path)
+            if directory:
+                Path(directory).mkdir(parents=True, exist_ok=True)
+            with open(self.history_path, 'w', encoding='utf-8') as f:
+                json.dump(self.history, f, indent=2)
+            return True
+        except Exception as e:
+            self.logger.warning(f"Error saving timing history {self.history_path}: {e}")
+            return False
+
+    # ------------------------------------------------------------------
+    # Row counts
+    # ------------------------------------------------------------------
+
+    def get_table_rows(self, db_connector, database_path: str, tables: List[str]) -> Dict[str, int]:
+        """
+        Row count per tabel; memakai cache selama file database tidak berubah
+
+        Args:
+            db_connector: Connector dengan estimate_row_counts / get_row_count
+                          (boleh None: hanya cache); COUNT(*) hanya untuk tabel
+                          yang tidak bisa diestimasi
+            database_path: Path database (key cache)
+            tables: Nama tabel
+
+        Returns:
+            Dictionary tabel -> row count (tabel yang gagal dihitung dilewati)
+        """
+        key = os.path.abspath(database_path) if database_path else ''
+        try:
+            mtime = os.path.getmtime(database_path) if database_path else 0
+        except OSError:
+            mtime = 0
+
+        cache = self.history['row_counts'].get(key)
+        if not cache or cache.get('mtime') != mtime:
+            cache = {'mtime': mtime, 'tables': {}}
+            self.history['row_counts'][key] = cache
+
+        counts = {}
+        changed = False
+
+        # Estimasi semua tabel yang belum di-cache sekaligus (tanpa COUNT(*) full scan)
+        missing = [table for table in tables if table not in cache['tables']]
+        estimates = {}
+        if missing and db_connector is not None and hasattr(db_connector, 'estimate_row_counts'):
+            try:
+                estimates = db_connector.estimate_row_counts(missing)
+            except Exception as e:
+                self.logger.warning(f"Error estimating row counts: {e}")
+
+        for table in tables:
+            if table in cache['tables']:
+                counts[table] = cache['tables'][table]
+                continue
+            estimate = estimates.get(table.upper(), {})
+            if estimate.get('rows') is not None:
+                cache['tables'][table] = int(estimate['rows'])
+                counts[table] = cache['tables'][table]
+                changed = True
+                continue
+            if db_connector is None or not hasattr(db_connector, 'get_row_count'):
+                continue
+            try:
+                count = int(db_connector.get_row_count(table))
+                cache['tables'][table] = count
+                counts[table] = count
+                changed = True
+            except Exception as e:
+                self.logger.warning(f"Error counting rows for {table}: {e}")
+
+        if changed:
+            self.save_history()
+        return counts
+
+    # ------------------------------------------------------------------
+    # Recording
+    # ------------------------------------------------------------------
+
+    def record_run(self, metrics: Dict) -> None:
+        """
+        Tambah metrik satu run ke riwayat
+
+        Args:
+            metrics: Dictionary dengan keys initialization, processing, render
+                     (detik), template_cells, days, queries (list dict name,
+                     rows, days, records, seconds)
+        """
+        run = dict(metrics)
+        run.setdefault('timestamp', datetime.now().isoformat(timespec='seconds'))
+        self.history['runs'].append(run)
+        self.history['runs'] = self.history['runs'][-self.max_runs:]
+        self.save_history()
+
+    # ------------------------------------------------------------------
+    # Models
+    # ------------------------------------------------------------------
+
+    def _query_samples(self, query_name: str = None) -> List[Dict]:
+        samples = []
+        for run in self.history['runs']:
+            for query in run.get('queries', []):
+                if query_name is None or query.get('name') == query_name:
+                    samples.append(query)
+        return samples
+
+    def _fit_query_model(self, samples: List[Dict]) -> Optional[List[float]]:
+        features = [[q.get('rows', 0) / 1e6, q.get('days', 0)] for q in samples]
+        targets = [q.get('seconds', 0.0) for q in samples]
+        return _fit_linear(features, targets)
+
+    def estimate_query(self, query_name: str, rows: int, days: int) -> Tuple[float, str]:
+        """
+        Estimasi detik untuk satu query
+
+        Returns:
+            (detik, sumber) dengan sumber 'query', 'global', 'history' atau 'default'
+        """
+        own_samples = self._query_samples(query_name)
+        model = self._fit_query_model(own_samples)
+        source = 'query'
+
+        if model is None:
+            model = self._fit_query_model(self._query_samples())
+            source = 'global'
+
+        if model is None:
+            # Riwayat belum cukup untuk regresi: pakai median sampel yang ada
+            samples = own_samples or self._query_samples()
+            if samples:
+                return median(q.get('seconds', 0.0) for q in samples), 'history'
+            return DEFAULT_QUERY_SECONDS, 'default'
+
+        overhead, per_million_rows, per_day = model
+        seconds = overhead + per_million_rows * rows / 1e6 + per_day * days
+        return max(0.0, seconds), source
+
+    def estimate_records(self, query_name: str, days: int) -> int:
+        """Perkiraan jumlah record hasil query dari rata-rata record per hari"""
+        rates = []
+        for query in self._query_samples(query_name):
+            query_days = query.get('days', 0) or 1
+            rates.append(query.get('records', 0) / query_days)
+        if not rates:
+            return 0
+        return int(median(rates) * max(days, 1))
+
+    def _stage_seconds(self, stage: str, default: float) -> float:
+        values = [run[stage] for run in self.history['runs'] if stage in run]
+        return median(values) if values else default
+
+    def estimate_rendered_cells(self, template_cells: int, records: int) -> int:
+        """
+        Perkiraan cell hasil render: cell template ditambah cell per record hasil
+        query (dipelajari dari riwayat; 0 jika template tanpa section berulang)
+        """
+        ratios = []
+        for run in self.history['runs']:
+            if 'rendered_cells' not in run:
+                continue
+            run_records = sum(query.get('records', 0) for query in run.get('queries', []))
+            extra = max(0, run['rendered_cells'] - run.get('template_cells', 0))
+            ratios.append(extra / max(run_records, 1))
+        if not ratios:
+            return template_cells
+        return int(template_cells + median(ratios) * records)
+
+    def estimate_render(self, cells: int) -> float:
+        """Estimasi detik render template untuk jumlah cell tertentu"""
+        runs = [run for run in self.history['runs'] if 'render' in run and 'rendered_cells' in run]
+        model = _fit_linear([[run['rendered_cells']] for run in runs], [run['render'] for run in runs])
+        if model is None:
+            if runs:
+                per_cell = median(run['render'] / max(run['rendered_cells'], 1) for run in runs)
+                return per_cell * cells
+            return DEFAULT_TEMPLATE_SECONDS
+        overhead, per_cell = model
+        return overhead + per_cell * cells
+
+    def estimate(self, queries: List[Dict], template_cells: int = 0,
+                 days: int = 0, estates: int = 1) -> Dict:
+        """
+        Estimasi waktu proses satu laporan
+
+        Args:
+            queries: List dict name dan rows (row tabel terbesar yang dibaca query)
+            template_cells: Jumlah cell di template
+            days: Panjang rentang tanggal
+            estates: Jumlah estate (database) yang diproses dengan konfigurasi sama
+
+        Returns:
+            Estimation dictionary (format sama dengan versi lama plus detail)
+        """
+        estates = max(1, int(estates or 1))
+
+        query_estimates = {}
+        expected_records = 0
+        for query in queries:
+            seconds, _ = self.estimate_query(query['name'], query.get('rows', 0), days)
+            query_estimates[query['name']] = round(seconds, 3)
+            expected_records += self.estimate_records(query['name'], days)
+
+        rendered_cells = self.estimate_rendered_cells(template_cells, expected_records)
+
+        initialization = self._stage_seconds('initialization', DEFAULT_INITIALIZATION_SECONDS)
+        query_time = sum(query_estimates.values())
+        processing = self._stage_seconds('processing', DEFAULT_PROCESSING_SECONDS)
+        template_time = self.estimate_render(rendered_cells)
+        output = self._stage_seconds('output', 0.0)
+
+        per_estate = initialization + query_time + processing + template_time + output
+        total = per_estate * estates
+
+        estimate = {
+            'total_seconds': round(total, 3),
+            'breakdown': {
+                'initialization': round(initialization * estates, 3),
+                'queries': round(query_time * estates, 3),
+                'processing': round(processing * estates, 3),
+                'template': round(template_time * estates, 3),
+                'output': round(output * estates, 3)
+            },
+            'queries_count': len(queries),
+            'queries': query_estimates,
+            'days': days,
+            'estates': estates,
+            'rendered_cells': rendered_cells,
+            'history_runs': len(self.history['runs']),
+            'source': 'history' if self.history['runs'] else 'default',
+            'eta': format_duration(total),
+            'long_run': total >= self.warning_seconds
+        }
+
+        if estimate['long_run']:
+            estimate['warning'] = (
+                f"Estimated processing time is {format_duration(total)} "
+                f"({days} days, {estates} estate(s), {len(queries)} queries)"
+            )
+
+        return estimate
@@ -182,7 +182,7 @@ class ExcelReportGenerator:
         start_str = start_date.strftime('%Y-%m-%d')
         end_str = end_date.strftime('%Y-%m-%d')
 
-        all_data_df = pd.DataFrame()
+        monthly_frames = []
 
         for ffb_table in month_tables:
             query = f"""
@@ -201,12 +201,13 @@ class ExcelReportGenerator:
                 result = connector.execute_query(query)
                 df_monthly = connector.to_pandas(result)
                 if not df_monthly.empty:
-                    all_data_df = pd.concat([all_data_df, df_monthly], ignore_index=True)
+                    monthly_frames.append(df_monthly)
             except Exception as e:
                 print(f"Warning getting data from {ffb_table}: {e}")
                 continue
 
-        df = all_data_df
+        # Gabungkan sekali (bukan concat per bulan yang menyalin ulang semua data)
+        df = pd.concat(monthly_frames, ignore_index=True) if monthly_frames else pd.DataFrame()
         if df.empty:
             return None
 
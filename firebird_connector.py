@@ -12,6 +12,9 @@ class FirebirdConnector:
     """
     Utilitas untuk koneksi ke database Firebird menggunakan isql
     """
+    # Prompt isql yang ikut tercetak saat script dikirim lewat stdin
+    ISQL_PROMPT_PATTERN = re.compile(r'^(?:(?:SQL|CON)> ?)+', re.MULTILINE)
+
     def __init__(self, db_path=None, username='sysdba', password='masterkey', isql_path=None, use_localhost=False):
         """
         Inisialisasi koneksi Firebird
@@ -27,6 +30,9 @@ class FirebirdConnector:
         self.password = password
         self.use_localhost = use_localhost
 
+        # Script lewat stdin (None: belum terbukti, False: pakai file sementara)
+        self.stdin_io = None
+
         # Auto-detect isql_path jika tidak disediakan
         if isql_path is None:
             self.isql_path = self._detect_isql_path()
@@ -93,14 +99,18 @@ class FirebirdConnector:
         """
         Menjalankan query SQL dan mengembalikan hasilnya
 
+        Script SQL dikirim lewat stdin dan output dibaca dari pipe stdout (tanpa
+        file sementara); file .sql/.txt hanya dipakai jika isql tidak menerima
+        script dari stdin.
+
         :param query: Query SQL yang akan dijalankan
         :param params: Parameter untuk query (not used in current implementation)
         :param as_dict: Jika True, hasil dikembalikan sebagai list dari dictionaries
         :return: Hasil query dalam format JSON
         """
-        # Buat file SQL untuk query
-        fd, sql_path = tempfile.mkstemp(suffix='.sql')
-        output_fd, output_path = tempfile.mkstemp(suffix='.txt')
+        # Untuk Firebird 1.5, hindari menggunakan SET commands yang mungkin tidak didukung
+        # Langsung tulis query saja
+        script = f"{query};\nCOMMIT;\nEXIT;\n"
 
         try:
             # Pastikan file executable isql ada
@@ -118,25 +128,98 @@ class FirebirdConnector:
             else:
                 connection_string = self.db_path
 
-            with os.fdopen(fd, 'w') as sql_file:
-                # Jangan gunakan CONNECT untuk Firebird 1.5, gunakan parameter koneksi dari command line
-                # sql_file.write(f"CONNECT \"{connection_string}\" USER {self.username} PASSWORD {self.password};\n")
-
-                # Untuk Firebird 1.5, hindari menggunakan SET commands yang mungkin tidak didukung
-                # Langsung tulis query saja
-                sql_file.write(f"{query};\n")
-                sql_file.write("COMMIT;\n")
-                sql_file.write("EXIT;\n")
-
             print(f"Executing query via ISQL: {query[:100]}...")
             print(f"Database path: {self.db_path}")
 
-            # Debug info - tampilkan file SQL
-            with open(sql_path, 'r') as f:
-                print(f"SQL File Contents:\n{f.read()}")
+            # Debug info - tampilkan script SQL
+            print(f"SQL Script:\n{script}")
+
+            output_text = ""
+            if self.stdin_io is not False:
+                output_text = self._execute_via_stdin(connection_string, script)
+
+            # Kompatibilitas: isql yang belum terbukti membaca stdin dicoba lewat file
+            if not output_text.strip() and not self.stdin_io:
+                output_text = self._execute_via_files(query, script, connection_string)
+
+            # Parse hasil ke JSON
+            result = self._parse_isql_output(output_text, as_dict)
+
+            # For backward compatibility, convert to list of dictionaries
+            if as_dict and result and len(result) > 0:
+                return result[0].get("rows", [])
+            elif result and len(result) > 0:
+                return result[0].get("rows", [])
+            else:
+                return []
+
+        except subprocess.CalledProcessError as cpe:
+            print(f"ISQL command failed with return code {cpe.returncode}")
+            print(f"STDOUT: {cpe.stdout}")
+            print(f"STDERR: {cpe.stderr}")
+            stderr_msg = cpe.stderr
+            if isinstance(stderr_msg, bytes):
+                stderr_msg = stderr_msg.decode()
+            raise Exception(f"Error executing query: {stderr_msg if stderr_msg else 'Unknown error'}")
+        except Exception as e:
+            print(f"Error executing query: {e}")
+            import traceback
+            traceback.print_exc()
+            raise
+
+    def _execute_via_stdin(self, connection_string, script):
+        """
+        Jalankan script lewat stdin isql dan baca output dari pipe stdout
+
+        :return: Output isql tanpa prompt SQL>/CON> ('' jika tidak ada output)
+        """
+        if self.use_localhost:
+            cmd = [
+                self.isql_path,
+                "-u", self.username,
+                "-p", self.password,
+                connection_string
+            ]
+        else:
+            cmd = [
+                self.isql_path,
+                "-u", self.username,
+                "-p", self.password,
+                "-d", connection_string
+            ]
+        print(f"Running command (stdin): {' '.join(cmd)}")
+
+        process_result = subprocess.run(cmd, input=script, capture_output=True, text=True, timeout=300)
+        print(f"ISQL process completed with return code: {process_result.returncode}")
+        if process_result.stderr:
+            print(f"STDERR: {process_result.stderr}")
+
+        output_text = self.ISQL_PROMPT_PATTERN.sub('', process_result.stdout or '')
+        if output_text.strip():
+            self.stdin_io = True
+            print(f"ISQL output: {len(output_text)} bytes")
+            print("First 500 chars of output:")
+            print(output_text[:500])
+        elif not self.stdin_io:
+            print("WARNING: Output stdin kosong, mencoba dengan file sementara...")
+        return output_text
+
+    def _execute_via_files(self, query, script, connection_string):
+        """
+        Jalankan query lewat file .sql (-i) dan file output (-o), dengan metode
+        alternatif untuk versi isql yang berbeda
+
+        :return: Output isql ('' jika tidak ada output)
+        """
+        fd, sql_path = tempfile.mkstemp(suffix='.sql')
+        output_fd, output_path = tempfile.mkstemp(suffix='.txt')
+        # Close the output file handle to prevent access errors
+        os.close(output_fd)
 
-            # Close the output file handle to prevent access errors
-            os.close(output_fd)
+        try:
+            with os.fdopen(fd, 'w') as sql_file:
+                # Jangan gunakan CONNECT untuk Firebird 1.5, gunakan parameter koneksi dari command line
+                sql_file.write(script)
 
             # Untuk Firebird 1.5, gunakan format yang lebih sederhana
             # Gunakan format parameter yang sesuai berdasarkan mode koneksi
@@ -171,162 +254,66 @@ class FirebirdConnector:
             if process_result.stderr:
                 print(f"STDERR: {process_result.stderr}")
 
-            # Jika proses gagal, coba dengan argumen koneksi alternatif
+            # Jika proses gagal, coba tanpa parameter output (output ke file lewat stdout)
             if process_result.returncode != 0:
                 print("Command gagal, mencoba metode alternatif...")
 
-                # Coba metode alternatif yang lebih sederhana
                 if self.use_localhost:
                     alt_cmd = [
                         self.isql_path,
                         connection_string,
                         "-u", self.username,
-                        "-p", self.password
+                        "-p", self.password,
+                        "-i", sql_path
                     ]
                 else:
                     alt_cmd = [
                         self.isql_path,
                         "-d", connection_string,
                         "-u", self.username,
-                        "-p", self.password
+                        "-p", self.password,
+                        "-i", sql_path
                     ]
-
-                # Tambahkan file input
-                alt_cmd.extend(["-i", sql_path])
                 print(f"Running alternative command: {' '.join(alt_cmd)}")
 
-                process_result = subprocess.run(alt_cmd, check=False, capture_output=True, timeout=300)  # Increased timeout to 5 minutes
-                print(f"Alternative command completed with return code: {process_result.returncode}")
+                # Redirect output langsung ke file
+                with open(output_path, 'w') as output_file:
+                    process_result = subprocess.run(alt_cmd, check=False,
+                                                    stdout=output_file, stderr=subprocess.PIPE,
+                                                    text=True, timeout=300)  # Increased timeout to 5 minutes
 
-                if process_result.stdout:
-                    print(f"STDOUT: {process_result.stdout}")
+                print(f"Alternative command completed with return code: {process_result.returncode}")
                 if process_result.stderr:
                     print(f"STDERR: {process_result.stderr}")
 
-                # Jika masih gagal, coba tanpa parameter output
-                if process_result.returncode != 0:
-                    print("Alternatif pertama gagal, mencoba metode ketiga...")
-
-                    # Coba dengan format yang sangat sederhana
-                    if self.use_localhost:
-                        simpler_cmd = [
-                            self.isql_path,
-                            connection_string,
-                            "-u", self.username,
-                            "-p", self.password,
-                            "-i", sql_path
-                        ]
-                    else:
-                        simpler_cmd = [
-                            self.isql_path,
-                            "-d", connection_string,
-                            "-u", self.username,
-                            "-p", self.password,
-                            "-i", sql_path
-                        ]
-                    print(f"Running simpler command: {' '.join(simpler_cmd)}")
-
-                    # Redirect output langsung ke file
-                    with open(output_path, 'w') as output_file:
-                        process_result = subprocess.run(simpler_cmd, check=False,
-                                                     stdout=output_file, stderr=subprocess.PIPE,
-                                                     text=True, timeout=300)  # Increased timeout to 5 minutes
-
-                    print(f"Simpler command completed with return code: {process_result.returncode}")
-                    if process_result.stderr:
-                        print(f"STDERR: {process_result.stderr}")
-
             # Baca hasil dari file output
-            if os.path.exists(output_path):
-                try:
-                    with open(output_path, 'r') as output_file:
-                        output_text = output_file.read()
-
-                    print(f"ISQL output: {len(output_text)} bytes")
-                    if output_text:
-                        print("First 500 chars of output:")
-                        print(output_text[:500])
-                    else:
-                        print("WARNING: Output file kosong!")
-                except Exception as e:
-                    print(f"Error reading output file: {e}")
-                    output_text = ""
-            else:
-                print("WARNING: Output file tidak ditemukan")
+            try:
+                with open(output_path, 'r') as output_file:
+                    output_text = output_file.read()
+
+                print(f"ISQL output: {len(output_text)} bytes")
+                if output_text:
+                    print("First 500 chars of output:")
+                    print(output_text[:500])
+                    if self.stdin_io is None:
+                        print("isql tidak membaca script dari stdin, selanjutnya memakai file sementara")
+                        self.stdin_io = False
+                else:
+                    print("WARNING: Output file kosong!")
+            except Exception as e:
+                print(f"Error reading output file: {e}")
                 output_text = ""
 
-            # Jika output masih kosong, coba jalankan langsung tanpa file
-            if len(output_text) == 0:
-                print("WARNING: Output masih kosong! Mencoba gunakan cara alternatif...")
-                # Gunakan cara alternatif tanpa file output
-                # Coba dengan format yang paling sederhana - gunakan localhost format
-                # Untuk Firebird 1.5, localhost format lebih reliable
-                connection_string_local = f"localhost:{self.db_path}"
-                direct_cmd = [
-                    self.isql_path,
-                    connection_string_local,
-                    "-u", self.username,
-                    "-p", self.password
-                ]
-
-                # Buat file SQL sederhana untuk dibaca dari stdin
-                simple_sql_fd, simple_sql_path = tempfile.mkstemp(suffix='.sql')
-                with os.fdopen(simple_sql_fd, 'w') as simple_sql:
-                    # Untuk Firebird 1.5, gunakan query yang sangat sederhana
-                    # Tidak lagi membatasi jumlah baris yang diambil
-                    simple_sql.write(f"{query};\n")
-                    # Add EXIT command to properly terminate the session
-                    simple_sql.write("EXIT;\n")
-
-                try:
-                    with open(simple_sql_path, 'r') as sql_input:
-                        direct_process = subprocess.run(
-                            direct_cmd,
-                            stdin=sql_input,
-                            stdout=subprocess.PIPE,
-                            stderr=subprocess.PIPE,
-                            text=True,
-                            check=True,
-                            timeout=600  # Increased timeout to 10 minutes
-                        )
-                        output_text = direct_process.stdout
-                        if output_text:
-                            print(f"Direct command output: {len(output_text)} bytes")
-                            print(output_text[:500])
-                finally:
-                    if os.path.exists(simple_sql_path):
-                        os.unlink(simple_sql_path)
-
-            # Parse hasil ke JSON
-            result = self._parse_isql_output(output_text, as_dict)
+            return output_text
 
-            # For backward compatibility, convert to list of dictionaries
-            if as_dict and result and len(result) > 0:
-                return result[0].get("rows", [])
-            elif result and len(result) > 0:
-                return result[0].get("rows", [])
-            else:
-                return []
-
-        except subprocess.CalledProcessError as cpe:
-            print(f"ISQL command failed with return code {cpe.returncode}")
-            print(f"STDOUT: {cpe.stdout}")
-            print(f"STDERR: {cpe.stderr}")
-            stderr_msg = cpe.stderr
-            if isinstance(stderr_msg, bytes):
-                stderr_msg = stderr_msg.decode()
-            raise Exception(f"Error executing query: {stderr_msg if stderr_msg else 'Unknown error'}")
-        except Exception as e:
-            print(f"Error executing query: {e}")
-            import traceback
-            traceback.print_exc()
-            raise
         finally:
             # Cleanup
-            if os.path.exists(sql_path):
-                os.unlink(sql_path)
-            if os.path.exists(output_path):
-                os.unlink(output_path)
+            for path in (sql_path, output_path):
+                try:
+                    if os.path.exists(path):
+                        os.unlink(path)
+                except OSError as e:
+                    print(f"Error cleaning up file {path}: {e}")
 
     def _parse_isql_output(self, output_text, as_dict=True):
         """
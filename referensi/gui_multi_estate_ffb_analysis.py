@@ -10,15 +10,25 @@ from tkcalendar import DateEntry
 import pandas as pd
 import os
 from datetime import datetime, date
-import threading
+import sys
 from firebird_connector import FirebirdConnector
 from reportlab.lib.pagesizes import A4, landscape
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, Image
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Image
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
 from reportlab.lib import colors
 import json
 
+# Modul bersama (report_common, GUI_Report_Excel_Claude) ada di root repository
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(REPO_ROOT)
+sys.path.append(os.path.join(REPO_ROOT, 'GUI_Report_Excel_Claude'))
+from report_common.job_runner import JobRunner, gui_thread
+from dimension_cache import get_dimension_cache, DEFAULT_DIMENSIONS
+from pdf_report_generator import (
+    PagedTableWriter, EMPLOYEE_PERFORMANCE_COLUMNS, employee_performance_rows, format_cell
+)
+
 class MultiEstateFFBAnalysisGUI:
     CONFIG_FILE = "config.json"
     
@@ -28,6 +38,9 @@ class MultiEstateFFBAnalysisGUI:
         self.root.geometry("1100x800") # Lebarkan window untuk path
         self.root.configure(bg='#f0f0f0')
         
+        # Analisis berjalan di worker thread; update widget lewat thread Tk
+        self.job_runner = JobRunner(self.root, max_workers=1)
+        
         self.ESTATES = self.load_config()
         
         self.setup_ui()
@@ -229,58 +242,71 @@ class MultiEstateFFBAnalysisGUI:
             messagebox.showerror("Error Tanggal", "Tanggal mulai tidak boleh lebih besar dari tanggal akhir.")
             return
         
-        thread = threading.Thread(target=self.run_analysis)
-        thread.daemon = True
-        thread.start()
+        if self.job_runner.is_busy('analysis'):
+            messagebox.showinfo("Analisis", "Analisis masih berjalan")
+            return
+        
+        # Widget dibaca di thread Tk; worker hanya menerima nilainya
+        selected_estates = []
+        for item_id in selected_indices:
+            values = self.estate_tree.item(item_id, 'values')
+            selected_estates.append((values[0], values[1]))
+        
+        self.progress_bar['maximum'] = len(selected_estates)
+        self.progress_bar['value'] = 0
+        self.job_runner.submit(
+            self.run_analysis, selected_estates, start_date, end_date,
+            name='analysis', group='analysis',
+            on_progress=self._analysis_progress,
+            on_success=self._analysis_complete,
+            on_error=self._analysis_error,
+            on_cancel=lambda: self.progress_var.set("Analisis dibatalkan")
+        )
     
-    def run_analysis(self):
-        try:
-            selected_items = self.estate_tree.selection()
-            selected_estates = []
-            for item_id in selected_items:
-                values = self.estate_tree.item(item_id, 'values')
-                estate_name = values[0]
-                db_path = values[1]
-                selected_estates.append((estate_name, db_path))
-            
-            if not selected_estates:
-                messagebox.showerror("Error", "Silakan pilih minimal satu estate dari daftar.")
-                return
-
-            start_date = self.start_date.get_date()
-            end_date = self.end_date.get_date()
-            
-            self.log_message("=== LAPORAN KINERJA KERANI, MANDOR, DAN ASISTEN MULTI-ESTATE ===")
-            self.log_message(f"Periode: {start_date.strftime('%d %B %Y')} - {end_date.strftime('%d %B %Y')}")
-            self.log_message(f"Jumlah Estate: {len(selected_estates)}")
-            
-            self.progress_bar['maximum'] = len(selected_estates)
-            all_results = []
-            
-            for i, (estate_name, db_path) in enumerate(selected_estates):
-                self.progress_var.set(f"Menganalisis {estate_name}")
-                self.progress_bar['value'] = i
-                self.root.update_idletasks()
-                
-                try:
-                    estate_results = self.analyze_estate(estate_name, db_path, start_date, end_date)
-                    if estate_results:
-                        all_results.extend(estate_results)
-                        self.log_message(f"{estate_name}: {len(estate_results)} divisi")
-                    else:
-                        self.log_message(f"{estate_name}: Tidak ada data")
-                except Exception as e:
-                    self.log_message(f"{estate_name}: {str(e)}")
-            
-            if all_results:
-                self.log_message("Membuat laporan kinerja PDF...")
-                pdf_path = self.create_pdf_report(all_results, start_date, end_date)
-                self.log_message(f"Laporan kinerja PDF: {pdf_path}")
-            
-            self.progress_var.set("Analisis selesai")
+    def run_analysis(self, job, selected_estates, start_date, end_date):
+        """Job analisis multi-estate (worker thread): progress dan log dikirim ke thread Tk"""
+        self.log_message("=== LAPORAN KINERJA KERANI, MANDOR, DAN ASISTEN MULTI-ESTATE ===")
+        self.log_message(f"Periode: {start_date.strftime('%d %B %Y')} - {end_date.strftime('%d %B %Y')}")
+        self.log_message(f"Jumlah Estate: {len(selected_estates)}")
+        
+        all_results = []
+        
+        for i, (estate_name, db_path) in enumerate(selected_estates):
+            job.check_cancelled()
+            job.progress(i, f"Menganalisis {estate_name}")
             
-        except Exception as e:
-            self.log_message(f"ERROR: {str(e)}")
+            try:
+                estate_results = self.analyze_estate(estate_name, db_path, start_date, end_date)
+                if estate_results:
+                    all_results.extend(estate_results)
+                    self.log_message(f"{estate_name}: {len(estate_results)} divisi")
+                else:
+                    self.log_message(f"{estate_name}: Tidak ada data")
+            except Exception as e:
+                self.log_message(f"{estate_name}: {str(e)}")
+        
+        pdf_path = None
+        if all_results:
+            job.check_cancelled()
+            self.log_message("Membuat laporan kinerja PDF...")
+            pdf_path = self.create_pdf_report(all_results, start_date, end_date)
+            self.log_message(f"Laporan kinerja PDF: {pdf_path}")
+        
+        job.progress(len(selected_estates), "Analisis selesai")
+        return pdf_path
+    
+    def _analysis_progress(self, value, message):
+        if value is not None:
+            self.progress_bar['value'] = value
+        if message:
+            self.progress_var.set(message)
+    
+    def _analysis_complete(self, pdf_path):
+        self.progress_var.set("Analisis selesai")
+    
+    def _analysis_error(self, error):
+        self.progress_var.set("Analisis gagal")
+        self.log_message(f"ERROR: {str(error)}")
     
     def analyze_estate(self, estate_name, db_path, start_date, end_date):
         # Handle path that is a folder (like PGE 2A)
@@ -363,17 +389,21 @@ class MultiEstateFFBAnalysisGUI:
             return None
     
     def get_employee_mapping(self, connector):
-        query = "SELECT ID, NAME FROM EMP"
+        """Mapping ID -> nama karyawan; EMP dibaca sekali per snapshot database lewat DimensionCache"""
+        def read_employees(sql):
+            df = connector.to_pandas(connector.execute_query(sql))
+            if df.empty:
+                return []
+            # Header isql bisa terpotong, jadi kolom diambil berdasarkan posisi
+            return [{'ID': emp_id, 'NAME': emp_name} for emp_id, emp_name in zip(df.iloc[:, 0], df.iloc[:, 1])]
+
         try:
-            result = connector.execute_query(query)
-            df = connector.to_pandas(result)
-            mapping = {}
-            if not df.empty:
-                for _, row in df.iterrows():
-                    emp_id = str(row.iloc[0]).strip()
-                    emp_name = str(row.iloc[1]).strip()
-                    mapping[emp_id] = emp_name
-            return mapping
+            dimension_cache = get_dimension_cache(connector.db_path)
+            if dimension_cache is not None:
+                names = dimension_cache.lookup('employees', 'ID', 'NAME', read_employees)
+            else:
+                names = {row['ID']: row['NAME'] for row in read_employees(DEFAULT_DIMENSIONS['employees'])}
+            return {str(emp_id).strip(): str(emp_name).strip() for emp_id, emp_name in names.items()}
         except:
             return {}
     
@@ -424,7 +454,7 @@ class MultiEstateFFBAnalysisGUI:
         start_str = start_date.strftime('%Y-%m-%d')
         end_str = end_date.strftime('%Y-%m-%d')
         
-        all_data_df = pd.DataFrame()
+        monthly_frames = []
         
         for ffb_table in month_tables:
             # Query untuk mendapatkan data granular untuk analisis duplikat
@@ -444,14 +474,15 @@ class MultiEstateFFBAnalysisGUI:
                 result = connector.execute_query(query)
                 df_monthly = connector.to_pandas(result)
                 if not df_monthly.empty:
-                    all_data_df = pd.concat([all_data_df, df_monthly], ignore_index=True)
+                    monthly_frames.append(df_monthly)
             except Exception as e:
                 self.log_message(f"  Peringatan saat mengambil data dari {ffb_table}: {e}")
                 continue
 
-        df = all_data_df
-        if df.empty:
+        # Satu concat di akhir (concat di dalam loop menyalin ulang data setiap bulan)
+        if not monthly_frames:
             return None
+        df = pd.concat(monthly_frames, ignore_index=True)
         
         # Hapus duplikat jika ada data yang tumpang tindih
         df.drop_duplicates(subset=['ID'], inplace=True)
@@ -692,237 +723,15 @@ class MultiEstateFFBAnalysisGUI:
             story.append(summary_box)
             story.append(Spacer(1, 15))
             
-            # Create table data with enhanced columns
-            table_data = []
-            
-            # Enhanced Header with White Text (No Boxes)
-            header_style = ParagraphStyle('HeaderStyle', parent=styles['Normal'], fontSize=8, alignment=1, fontName='Helvetica-Bold', textColor=colors.white)
-            header = [
-                Paragraph('ESTATE', header_style),
-                Paragraph('DIVISI', header_style),
-                Paragraph('KARYAWAN', header_style),
-                Paragraph('ROLE', header_style),
-                Paragraph('JUMLAH<br/>TRANSAKSI', header_style),
-                Paragraph('PERSENTASE<br/>TERVERIFIKASI', header_style),
-                Paragraph('KETERANGAN<br/>PERBEDAAN', header_style)
-            ]
-            table_data.append(header)
-            
-            # Grand totals
-            grand_kerani = 0
-            grand_mandor = 0
-            grand_asisten = 0
-            grand_kerani_verified = 0 # FIX: Accumulator for verified kerani transactions
-            
-            # Process each result
-            for result in all_results:
-                estate = result['estate']
-                division = result['division']
-                kerani_total = result['kerani_total']
-                mandor_total = result['mandor_total']
-                asisten_total = result['asisten_total']
-                verifikasi_total = result['verifikasi_total']
-                verification_rate = result['verification_rate']
-                employee_details = result['employee_details']
-                
-                # Add division summary row
-                # Total transaksi = hanya dari Kerani (tanpa Asisten/Mandor)
-                # Persentase terverifikasi = Verified Kerani Transactions / Total Kerani
-                total_kerani_only = kerani_total
-                total_verified_kerani = verifikasi_total  # Use actual verified kerani transactions
-                division_verification_rate = (total_verified_kerani / total_kerani_only * 100) if total_kerani_only > 0 else 0
-                
-                # Create paragraph styles for table cells
-                cell_style = ParagraphStyle('CellStyle', parent=styles['Normal'], fontSize=8, alignment=1)
-                cell_style_left = ParagraphStyle('CellStyleLeft', parent=styles['Normal'], fontSize=8, alignment=0)
-                
-                table_data.append([
-                    Paragraph(estate, cell_style),
-                    Paragraph(division, cell_style),
-                    Paragraph(f"== {division} TOTAL ==", cell_style),
-                    Paragraph('SUMMARY', cell_style),
-                    Paragraph(str(total_kerani_only), cell_style),
-                    Paragraph(f"{division_verification_rate:.2f}% ({total_verified_kerani})", cell_style),
-                    Paragraph("", cell_style)
-                ])
-                
-                # Collect employee rows by role type for proper grouping
-                kerani_rows = []
-                mandor_rows = []
-                asisten_rows = []
-                
-                for emp_id, emp_data in employee_details.items():
-                    # KERANI row - Persentase = % transaksi yang sudah diverifikasi dari total yang ia buat
-                    if emp_data['kerani'] > 0:
-                        # Untuk KERANI: % transaksi yang sudah diverifikasi dari total yang ia buat
-                        kerani_verification_rate = (emp_data.get('kerani_verified', 0) / emp_data['kerani'] * 100) if emp_data['kerani'] > 0 else 0
-                        
-                        # Format dengan jumlah terverifikasi dalam tanda kurung
-                        verified_count = emp_data.get('kerani_verified', 0)
-                        differences_count = emp_data.get('kerani_differences', 0)
-                        percentage_text = f"{kerani_verification_rate:.2f}% ({verified_count})"
-                        
-                        # Hitung persentase perbedaan = Total perbedaan / Total transaksi terverifikasi Kerani
-                        difference_percentage = (differences_count / verified_count * 100) if verified_count > 0 else 0
-                        keterangan_text = f"{differences_count} perbedaan ({difference_percentage:.1f}%)"
-                        
-                        kerani_rows.append([
-                            Paragraph(estate, cell_style),
-                            Paragraph(division, cell_style),
-                            Paragraph(emp_data['name'], cell_style_left),
-                            Paragraph('KERANI', cell_style),
-                            Paragraph(str(emp_data['kerani']), cell_style),
-                            Paragraph(percentage_text, cell_style),
-                            Paragraph(keterangan_text, cell_style)
-                        ])
-                    
-                    # MANDOR row - Persentase = % transaksi yang ia buat per total Kerani di divisi
-                    if emp_data['mandor'] > 0:
-                        # Untuk MANDOR: % transaksi yang ia buat per total Kerani di divisi
-                        mandor_percentage = (emp_data['mandor'] / kerani_total * 100) if kerani_total > 0 else 0
-                        mandor_rows.append([
-                            Paragraph(estate, cell_style),
-                            Paragraph(division, cell_style),
-                            Paragraph(emp_data['name'], cell_style_left),
-                            Paragraph('MANDOR', cell_style),
-                            Paragraph(str(emp_data['mandor']), cell_style),
-                            Paragraph(f"{mandor_percentage:.2f}%", cell_style),
-                            Paragraph("", cell_style)
-                        ])
-                    
-                    # ASISTEN row - Persentase = % transaksi yang ia buat per total Kerani di divisi
-                    if emp_data['asisten'] > 0:
-                        # Untuk ASISTEN: % transaksi yang ia buat per total Kerani di divisi
-                        asisten_percentage = (emp_data['asisten'] / kerani_total * 100) if kerani_total > 0 else 0
-                        asisten_rows.append([
-                            Paragraph(estate, cell_style),
-                            Paragraph(division, cell_style),
-                            Paragraph(emp_data['name'], cell_style_left),
-                            Paragraph('ASISTEN', cell_style),
-                            Paragraph(str(emp_data['asisten']), cell_style),
-                            Paragraph(f"{asisten_percentage:.2f}%", cell_style),
-                            Paragraph("", cell_style)
-                        ])
-                
-                # Add rows in proper order: KERANI first, then MANDOR, then ASISTEN
-                for row in kerani_rows:
-                    table_data.append(row)
-                for row in mandor_rows:
-                    table_data.append(row)
-                for row in asisten_rows:
-                    table_data.append(row)
-                
-                # Add separator
-                table_data.append([
-                    Paragraph('', cell_style), Paragraph('', cell_style), Paragraph('', cell_style),
-                    Paragraph('', cell_style), Paragraph('', cell_style), Paragraph('', cell_style), Paragraph('', cell_style)
-                ])
-                
-                # Add to grand totals
-                grand_kerani += kerani_total
-                grand_mandor += mandor_total
-                grand_asisten += asisten_total
-                grand_kerani_verified += verifikasi_total # FIX: Accumulate verified totals
-            
-            # Add grand total row
-            # Total transaksi = hanya dari Kerani (tanpa Asisten/Mandor)
-            # Persentase terverifikasi = Verified Kerani Transactions / Total Kerani
-            grand_total_kerani_only = grand_kerani
-            grand_total_verified_kerani = grand_kerani_verified  # Use actual verified kerani transactions
-            grand_verification_rate = (grand_total_verified_kerani / grand_total_kerani_only * 100) if grand_total_kerani_only > 0 else 0
-            
-            # Create paragraph styles for grand total (outside the loop)
-            cell_style = ParagraphStyle('CellStyle', parent=styles['Normal'], fontSize=8, alignment=1)
-            
-            table_data.append([
-                Paragraph('=== GRAND TOTAL ===', cell_style),
-                Paragraph('', cell_style),
-                Paragraph('', cell_style),
-                Paragraph('', cell_style),
-                Paragraph(str(grand_total_kerani_only), cell_style),
-                Paragraph(f"{grand_verification_rate:.2f}% ({grand_total_verified_kerani})", cell_style),
-                Paragraph("", cell_style)
-            ])
-            
-            # Create table with custom column widths for better layout and text wrapping
-            col_widths = [90, 90, 140, 70, 80, 110, 120]  # Optimized column widths for better text wrapping
-            table = Table(table_data, repeatRows=1, colWidths=col_widths)
-            
-            # Enhanced Modern Table Styling
-            style = TableStyle([
-                # Header styling - clean header without boxes
-                ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2C5282')),  # Deep blue header
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 10),
-                ('TOPPADDING', (0, 0), (-1, 0), 12),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                
-                # Body styling with alternating colors
-                ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-                ('FONTSIZE', (0, 1), (-1, -1), 8),
-                ('TOPPADDING', (0, 1), (-1, -1), 8),
-                ('BOTTOMPADDING', (0, 1), (-1, -1), 8),
-                ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-                
-                # Grid styling - ONLY for body rows (excluding header)
-                ('GRID', (0, 1), (-1, -1), 0.5, colors.HexColor('#E2E8F0')),  # Light gray grid for body only
-                
-                # Alternating row colors for better readability
-                ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.HexColor('#F7FAFC'), colors.white]),
-            ])
-            
-            # Enhanced row highlighting with modern color schemes
-            for i, row in enumerate(table_data):
-                # Skip header row
-                if i == 0:
-                    continue
-                    
-                # Highlight SUMMARY and GRAND TOTAL rows with premium styling
-                if 'TOTAL' in str(row[2]) or 'GRAND TOTAL' in str(row[0]):
-                    style.add('BACKGROUND', (0, i), (-1, i), colors.HexColor('#4299E1'))  # Professional blue
-                    style.add('TEXTCOLOR', (0, i), (-1, i), colors.white)
-                    style.add('FONTNAME', (0, i), (-1, i), 'Helvetica-Bold')
-                    style.add('FONTSIZE', (0, i), (-1, i), 9)
-                    style.add('TOPPADDING', (0, i), (-1, i), 10)
-                    style.add('BOTTOMPADDING', (0, i), (-1, i), 10)
-                
-                # Enhanced KERANI row styling
-                elif len(row) > 3 and hasattr(row[3], 'text') and 'KERANI' in str(row[3].text):
-                    # Highlight entire KERANI row with subtle background
-                    style.add('BACKGROUND', (0, i), (-1, i), colors.HexColor('#FFF5F5'))  # Light red background
-                    
-                    # Percentage column with attention-grabbing color
-                    style.add('TEXTCOLOR', (5, i), (5, i), colors.HexColor('#E53E3E'))  # Strong red
-                    style.add('FONTNAME', (5, i), (5, i), 'Helvetica-Bold')
-                    
-                    # Keterangan column with warning styling
-                    if len(row) > 6 and row[6]:
-                        style.add('BACKGROUND', (6, i), (6, i), colors.HexColor('#FED7D7'))  # Light red highlight
-                        style.add('TEXTCOLOR', (6, i), (6, i), colors.HexColor('#C53030'))  # Dark red text
-                        style.add('FONTNAME', (6, i), (6, i), 'Helvetica-Bold')
-                
-                # Enhanced MANDOR row styling
-                elif len(row) > 3 and hasattr(row[3], 'text') and 'MANDOR' in str(row[3].text):
-                    style.add('BACKGROUND', (0, i), (-1, i), colors.HexColor('#F0FFF4'))  # Light green background
-                    style.add('TEXTCOLOR', (5, i), (5, i), colors.HexColor('#38A169'))  # Professional green
-                    style.add('FONTNAME', (5, i), (5, i), 'Helvetica-Bold')
-                
-                # Enhanced ASISTEN row styling
-                elif len(row) > 3 and hasattr(row[3], 'text') and 'ASISTEN' in str(row[3].text):
-                    style.add('BACKGROUND', (0, i), (-1, i), colors.HexColor('#F0F9FF'))  # Light blue background
-                    style.add('TEXTCOLOR', (5, i), (5, i), colors.HexColor('#3182CE'))  # Professional blue
-                    style.add('FONTNAME', (5, i), (5, i), 'Helvetica-Bold')
-                
-                # Empty separator rows
-                elif all(not str(cell).strip() for cell in row):
-                    style.add('BACKGROUND', (0, i), (-1, i), colors.HexColor('#EDF2F7'))  # Light separator
-                    style.add('TOPPADDING', (0, i), (-1, i), 3)
-                    style.add('BOTTOMPADDING', (0, i), (-1, i), 3)
-            
-            table.setStyle(style)
-            story.append(table)
+            # Tabel kinerja ditulis per halaman oleh PagedTableWriter (header diulang,
+            # cell plain string); urutan row dan style per role dari employee_performance_rows
+            col_widths = [90, 90, 140, 70, 80, 110, 120]
+            headers = [header for header, _, _ in EMPLOYEE_PERFORMANCE_COLUMNS]
+            keys = [key for _, key, _ in EMPLOYEE_PERFORMANCE_COLUMNS]
+            writer = PagedTableWriter(story, headers, col_widths)
+            for row in employee_performance_rows(all_results):
+                writer.add_row([format_cell(row[key]) for key in keys], row['_kind'])
+            writer.close()
             
             story.append(Spacer(1, 20))
             
@@ -1009,11 +818,12 @@ class MultiEstateFFBAnalysisGUI:
             self.log_message(f"Error creating PDF: {str(e)}")
             return None
     
+    @gui_thread
     def log_message(self, message):
+        """Tambah baris log (aman dipanggil dari worker thread)"""
         timestamp = datetime.now().strftime("%H:%M:%S")
         self.results_text.insert(tk.END, f"[{timestamp}] {message}\n")
         self.results_text.see(tk.END)
-        self.root.update_idletasks()
     
     def clear_results(self):
         self.results_text.delete(1.0, tk.END)
@@ -1026,6 +836,13 @@ class MultiEstateFFBAnalysisGUI:
 def main():
     root = tk.Tk()
     app = MultiEstateFFBAnalysisGUI(root)
+    
+    def on_closing():
+        # Analisis yang masih berjalan dibatalkan agar proses isql tidak tertinggal
+        app.job_runner.shutdown()
+        root.destroy()
+    
+    root.protocol("WM_DELETE_WINDOW", on_closing)
     root.mainloop()
 
 if __name__ == "__main__":
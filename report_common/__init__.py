@@ -0,0 +1,11 @@
+"""
+Report Common - modul bersama GUI_Report_Excel_Claude, Simple_Report_Editor
+dan modul root
+
+Satu salinan untuk kode yang dipakai lebih dari satu aplikasi, sehingga
+perbaikan tidak perlu disalin (dan tidak bisa berbeda) antar folder.
+Aplikasi di sub-folder menambahkan root repository ke sys.path sebelum import:
+
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from report_common.sheet_extents import compute_row_extents
+"""
@@ -0,0 +1,553 @@
+#!/usr/bin/env python3
+"""
+ETL Artifacts - simpan hasil ekstraksi per run secara kolumnar dan terkompresi
+Setiap run preview/generate disimpan sebagai satu folder di etl_reports/:
+
+    etl_reports/ETL_Run_PGE_2B_20251101_094613/
+        manifest.json              parameter, etl_stats, timing, daftar tabel, fingerprint
+        summary.txt                ringkasan teks (preview + 10 row pertama per query)
+        ffb_scanner_data.parquet   satu file per hasil query (Parquet jika pyarrow ada,
+        ...                        fallback NDJSON gzip dengan dtype kolom di manifest)
+
+Hasil query ditulis sekali (bukan JSON indent=2 seluruh row), folder lama dirotasi
+oleh RetentionPolicy, dan load_artifact() membuka kembali folder run sebagai
+query_results dengan bentuk yang sama (DataFrame, ResultSet, list of dict atau
+blok isql [{'headers', 'rows'}]) untuk render ulang tanpa database (mode replay).
+
+Dipakai GUI_Report_Excel_Claude dan Simple_Report_Editor; jika result_set.py tidak
+ada di sys.path (Simple_Report_Editor) hasil bertipe ResultSet dibaca kembali
+sebagai list of dict.
+"""
+
+import os
+import re
+import json
+import gzip
+import shutil
+import hashlib
+import logging
+from datetime import datetime, timedelta, date
+from pathlib import Path
+from typing import Dict, List, Any, Optional
+
+import pandas as pd
+
+try:
+    from result_set import ResultSet
+except ImportError:
+    ResultSet = None
+
+try:
+    import pyarrow  # noqa: F401
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
+DEFAULT_ARTIFACT_DIR = 'etl_reports'
+MANIFEST_NAME = 'manifest.json'
+SUMMARY_NAME = 'summary.txt'
+RUN_PREFIX = 'ETL_Run'
+# File laporan format lama (JSON indent=2 + teks) yang ikut dirotasi
+LEGACY_PATTERNS = ('ETL_Report_*.json', 'ETL_Report_*.txt')
+
+FORMAT_PARQUET = 'parquet'
+FORMAT_NDJSON = 'ndjson.gz'
+
+# Bentuk hasil query (disimpan di manifest agar load_artifact mengembalikan bentuk yang sama)
+KIND_DATAFRAME = 'dataframe'
+KIND_RESULTSET = 'resultset'
+KIND_RECORDS = 'records'
+KIND_ISQL = 'isql'
+
+SUMMARY_SAMPLE_ROWS = 10
+MANIFEST_VERSION = 1
+
+SAFE_NAME_PATTERN = re.compile(r'[^\w.-]+')
+
+logger = logging.getLogger(__name__)
+
+
+def _safe_name(name: Any) -> str:
+    return SAFE_NAME_PATTERN.sub('_', str(name)).strip('_') or 'unknown'
+
+
+def _json_default(value: Any) -> Any:
+    """Serializer JSON untuk datetime, numpy scalar dan ResultSet"""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if ResultSet is not None and isinstance(value, ResultSet):
+        return value.to_records()
+    if hasattr(value, 'item'):
+        try:
+            return value.item()
+        except (ValueError, TypeError):
+            pass
+    return str(value)
+
+
+def _table_kind(value: Any) -> Optional[str]:
+    """Bentuk hasil query tabular, None untuk nilai lain (disimpan di manifest)"""
+    if isinstance(value, pd.DataFrame):
+        return KIND_DATAFRAME
+    if ResultSet is not None and isinstance(value, ResultSet):
+        return KIND_RESULTSET
+    if not isinstance(value, list):
+        return None
+    if len(value) == 1 and isinstance(value[0], dict) and 'headers' in value[0] and 'rows' in value[0]:
+        return KIND_ISQL
+    if all(isinstance(row, dict) for row in value):
+        return KIND_RECORDS
+    return None
+
+
+def _to_frame(value: Any, kind: str) -> pd.DataFrame:
+    """DataFrame dari hasil query tabular"""
+    if kind == KIND_DATAFRAME:
+        return value
+    if kind == KIND_ISQL:
+        block = value[0]
+        rows = block['rows']
+        if ResultSet is not None and isinstance(rows, ResultSet):
+            return rows.to_pandas()
+        return pd.DataFrame.from_records(rows, columns=block.get('headers') or None) if rows \
+            else pd.DataFrame(columns=block.get('headers') or [])
+    if kind == KIND_RESULTSET:
+        return value.to_pandas()
+    return pd.DataFrame.from_records(value) if value else pd.DataFrame()
+
+
+def _frame_records(frame: pd.DataFrame) -> List[Dict[str, Any]]:
+    """List of dict dengan nilai Python native (NULL/NaN -> None)"""
+    if not len(frame):
+        return []
+    objects = frame.astype(object)
+    return objects.where(frame.notna(), None).to_dict('records')
+
+
+def queries_fingerprint(queries: Optional[Dict[str, Any]]) -> str:
+    """Fingerprint definisi query saja (untuk cek snapshot masih cocok dengan formula)"""
+    raw = json.dumps(queries or {}, sort_keys=True, default=_json_default)
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+def extraction_fingerprint(parameters: Dict[str, Any], queries: Optional[Dict[str, str]] = None,
+                           database: Optional[str] = None) -> str:
+    """
+    Fingerprint ekstraksi: sama jika parameter, SQL query dan snapshot database sama
+
+    Args:
+        parameters: Parameter run (estate, tanggal, ...)
+        queries: Nama query -> SQL (opsional)
+        database: Path database; ukuran dan mtime file ikut di-hash jika file ada
+    """
+    payload = {'parameters': parameters or {}, 'queries': queries or {}}
+    if database:
+        payload['database'] = os.path.abspath(database)
+        try:
+            stat = os.stat(database)
+            payload['database_snapshot'] = [stat.st_size, stat.st_mtime_ns]
+        except OSError:
+            pass
+    raw = json.dumps(payload, sort_keys=True, default=_json_default)
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+class RetentionPolicy:
+    """
+    Aturan rotasi folder run di etl_reports/ (None = aturan tidak dipakai)
+    """
+
+    def __init__(self, max_runs_per_estate: Optional[int] = 20, max_age_days: Optional[float] = 30,
+                 max_total_mb: Optional[float] = 200, include_legacy: bool = True):
+        """
+        Args:
+            max_runs_per_estate: Jumlah run terbaru yang disimpan per estate
+            max_age_days: Run yang lebih tua dari ini dihapus
+            max_total_mb: Batas ukuran total folder; run tertua dihapus lebih dulu
+            include_legacy: Ikut rotasi file ETL_Report_*.json/.txt format lama
+        """
+        self.max_runs_per_estate = max_runs_per_estate
+        self.max_age_days = max_age_days
+        self.max_total_mb = max_total_mb
+        self.include_legacy = include_legacy
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict[str, Any]]) -> 'RetentionPolicy':
+        """RetentionPolicy dari dict konfigurasi (key sama dengan argumen __init__)"""
+        config = config or {}
+        keys = ('max_runs_per_estate', 'max_age_days', 'max_total_mb', 'include_legacy')
+        return cls(**{key: config[key] for key in keys if key in config})
+
+
+def _entry_size(path: Path) -> int:
+    if path.is_dir():
+        return sum(child.stat().st_size for child in path.rglob('*') if child.is_file())
+    return path.stat().st_size
+
+
+def _remove_entry(path: Path):
+    if path.is_dir():
+        shutil.rmtree(path)
+    else:
+        path.unlink()
+
+
+class ArtifactStore:
+    """
+    Folder artefak ETL: tulis run baru, daftar run, rotasi
+    """
+
+    def __init__(self, directory: str = DEFAULT_ARTIFACT_DIR, storage_format: Optional[str] = None,
+                 retention: Optional[RetentionPolicy] = None):
+        """
+        Args:
+            directory: Folder artefak (default etl_reports)
+            storage_format: 'parquet' atau 'ndjson.gz' (default parquet jika pyarrow tersedia)
+            retention: Aturan rotasi (default RetentionPolicy())
+        """
+        self.directory = Path(directory)
+        if storage_format is None:
+            storage_format = FORMAT_PARQUET if PARQUET_AVAILABLE else FORMAT_NDJSON
+        if storage_format == FORMAT_PARQUET and not PARQUET_AVAILABLE:
+            logger.warning("pyarrow not installed, storing ETL artifacts as gzip NDJSON")
+            storage_format = FORMAT_NDJSON
+        self.storage_format = storage_format
+        self.retention = retention or RetentionPolicy()
+
+    # ==================== WRITE ====================
+
+    def write_run(self, query_results: Dict[str, Any], parameters: Dict[str, Any],
+                  etl_stats: Optional[Dict[str, Any]] = None, timings: Optional[Dict[str, float]] = None,
+                  summary_text: Optional[str] = None, queries: Optional[Dict[str, str]] = None,
+                  database: Optional[str] = None, mode: str = 'run', name: str = RUN_PREFIX) -> Path:
+        """
+        Simpan satu run sebagai folder artefak dan jalankan rotasi
+
+        Args:
+            query_results: Nama query -> ResultSet / list of dict / nilai lain
+            parameters: Parameter run
+            etl_stats: Statistik ETL (datetime disimpan sebagai ISO string)
+            timings: Durasi per fase dalam detik
+            summary_text: Teks ringkasan untuk summary.txt
+            queries: Nama query -> SQL (untuk fingerprint)
+            database: Path database (untuk fingerprint dan manifest)
+            mode: 'run' atau 'preview' (preview = hasil query tersampel / FIRST n)
+            name: Prefix nama folder
+
+        Returns:
+            Path folder run
+        """
+        created = datetime.now()
+        estate = parameters.get('estate_name') or parameters.get('estate') or 'Unknown'
+        run_name = f"{name}_{_safe_name(estate)}_{created.strftime('%Y%m%d_%H%M%S_%f')}"
+        run_dir = self.directory / run_name
+        partial_dir = self.directory / f".{run_name}.partial"
+        partial_dir.mkdir(parents=True, exist_ok=True)
+
+        try:
+            tables = {}
+            values = {}
+            for query_name, result in query_results.items():
+                kind = _table_kind(result)
+                if kind is not None:
+                    tables[query_name] = self._write_table(partial_dir, query_name, result, kind)
+                else:
+                    values[query_name] = result
+
+            manifest = {
+                'version': MANIFEST_VERSION,
+                'created_at': created.isoformat(),
+                'estate': estate,
+                'database': database,
+                'fingerprint': extraction_fingerprint(parameters, queries, database),
+                'queries_fingerprint': queries_fingerprint(queries),
+                'mode': mode,
+                'storage_format': self.storage_format,
+                'parameters': parameters,
+                'etl_stats': etl_stats or {},
+                'timings': timings or {},
+                'order': list(query_results.keys()),
+                'tables': tables,
+                'values': values
+            }
+            with open(partial_dir / MANIFEST_NAME, 'w', encoding='utf-8') as f:
+                json.dump(manifest, f, indent=2, ensure_ascii=False, default=_json_default)
+
+            if summary_text is not None:
+                with open(partial_dir / SUMMARY_NAME, 'w', encoding='utf-8') as f:
+                    f.write(summary_text)
+                    f.write(format_sample(query_results))
+
+            partial_dir.rename(run_dir)
+        except Exception:
+            shutil.rmtree(partial_dir, ignore_errors=True)
+            raise
+
+        logger.info(f"ETL artifact saved to {run_dir}")
+        self.apply_retention(keep=run_dir)
+        return run_dir
+
+    def _write_table(self, run_dir: Path, query_name: str, result: Any, kind: str) -> Dict[str, Any]:
+        """Tulis satu hasil query; kembalikan entri manifest (file, row, kolom, dtype, bentuk)"""
+        frame = _to_frame(result, kind)
+        frame = frame.rename(columns=str)
+        entry = {
+            'kind': kind,
+            'rows': len(frame),
+            'columns': list(frame.columns),
+            'dtypes': {column: str(dtype) for column, dtype in frame.dtypes.items()}
+        }
+        if kind == KIND_ISQL:
+            entry['headers'] = list(result[0].get('headers') or frame.columns)
+
+        file_name = f"{_safe_name(query_name)}.{self.storage_format}"
+        path = run_dir / file_name
+        suffix = 1
+        while path.exists():
+            # Nama query berbeda yang menjadi nama file sama setelah _safe_name
+            suffix += 1
+            file_name = f"{_safe_name(query_name)}_{suffix}.{self.storage_format}"
+            path = run_dir / file_name
+        if self.storage_format == FORMAT_PARQUET:
+            frame.to_parquet(path, index=False, compression='zstd')
+        else:
+            with gzip.open(path, 'wt', encoding='utf-8') as f:
+                if len(frame):
+                    frame.to_json(f, orient='records', lines=True, date_format='iso',
+                                  force_ascii=False, default_handler=str)
+        entry['file'] = file_name
+        entry['format'] = self.storage_format
+        return entry
+
+    # ==================== LIST / RETENTION ====================
+
+    def list_runs(self, estate: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Manifest semua run (terbaru dulu), opsional hanya untuk satu estate;
+        setiap manifest diberi key 'path'
+        """
+        runs = []
+        if not self.directory.exists():
+            return runs
+        for run_dir in self.directory.iterdir():
+            if not run_dir.is_dir() or run_dir.name.startswith('.'):
+                continue
+            manifest = read_manifest(run_dir)
+            if manifest is None:
+                continue
+            if estate is not None and manifest.get('estate') != estate:
+                continue
+            manifest['path'] = str(run_dir)
+            runs.append(manifest)
+        runs.sort(key=lambda run: run.get('created_at', ''), reverse=True)
+        return runs
+
+    def find_run(self, fingerprint: str) -> Optional[str]:
+        """Folder run terbaru dengan fingerprint ekstraksi tertentu"""
+        for run in self.list_runs():
+            if run.get('fingerprint') == fingerprint:
+                return run['path']
+        return None
+
+    def latest_run(self, estate: Optional[str] = None, mode: Optional[str] = None,
+                   **parameters) -> Optional[str]:
+        """
+        Folder run terbaru untuk estate (dan nilai parameter tertentu, mis.
+        start_date/end_date); None jika tidak ada
+
+        Args:
+            estate: Nama estate
+            mode: 'run' atau 'preview' (None = semua)
+            **parameters: Parameter yang harus sama dengan parameter run
+        """
+        for run in self.list_runs(estate):
+            if mode is not None and run.get('mode') != mode:
+                continue
+            run_parameters = run.get('parameters', {})
+            if all(str(run_parameters.get(key)) == str(value) for key, value in parameters.items()):
+                return run['path']
+        return None
+
+    def apply_retention(self, keep: Optional[Path] = None) -> List[str]:
+        """
+        Hapus run (dan file format lama) yang melanggar RetentionPolicy
+
+        Args:
+            keep: Folder yang tidak boleh dihapus (run yang baru ditulis)
+
+        Returns:
+            Path yang dihapus
+        """
+        policy = self.retention
+        removed = []
+        if not self.directory.exists():
+            return removed
+
+        try:
+            entries = []  # (mtime, path, estate)
+            for run in self.list_runs():
+                path = Path(run['path'])
+                entries.append((path.stat().st_mtime, path, run.get('estate')))
+            if policy.include_legacy:
+                for pattern in LEGACY_PATTERNS:
+                    for path in self.directory.glob(pattern):
+                        entries.append((path.stat().st_mtime, path, None))
+            entries.sort(key=lambda entry: entry[0], reverse=True)
+
+            doomed = set()
+            if policy.max_runs_per_estate is not None:
+                seen = {}
+                for _, path, estate in entries:
+                    if estate is None:
+                        continue
+                    seen[estate] = seen.get(estate, 0) + 1
+                    if seen[estate] > policy.max_runs_per_estate:
+                        doomed.add(path)
+
+            if policy.max_age_days is not None:
+                cutoff = (datetime.now() - timedelta(days=policy.max_age_days)).timestamp()
+                doomed.update(path for mtime, path, _ in entries if mtime < cutoff)
+
+            if policy.max_total_mb is not None:
+                budget = policy.max_total_mb * 1024 * 1024
+                total = 0
+                for _, path, _ in entries:
+                    if path in doomed:
+                        continue
+                    total += _entry_size(path)
+                    if total > budget:
+                        doomed.add(path)
+
+            for _, path, _ in entries:
+                if path not in doomed or path == keep:
+                    continue
+                try:
+                    _remove_entry(path)
+                    removed.append(str(path))
+                except OSError as e:
+                    logger.warning(f"Could not remove old ETL artifact {path}: {e}")
+        except Exception as e:
+            logger.warning(f"ETL artifact retention failed: {e}")
+
+        if removed:
+            logger.info(f"Removed {len(removed)} old ETL artifacts from {self.directory}")
+        return removed
+
+
+def format_sample(query_results: Dict[str, Any], sample_rows: int = SUMMARY_SAMPLE_ROWS) -> str:
+    """Blok teks 'DETAILED QUERY RESULTS' (beberapa row pertama per query)"""
+    lines = ["", "", "=" * 80, "DETAILED QUERY RESULTS", "=" * 80, ""]
+    for query_name, results in query_results.items():
+        lines.append(f"\n{query_name.upper()}:")
+        lines.append("-" * 40)
+        kind = _table_kind(results)
+        frame = _to_frame(results, kind) if kind is not None else None
+        if frame is not None and len(frame):
+            lines.append(f"Total Rows: {len(frame)}\n")
+            for index, row in enumerate(_frame_records(frame.head(sample_rows))):
+                lines.append(f"Row {index + 1}: {row}")
+            if len(frame) > sample_rows:
+                lines.append(f"... and {len(frame) - sample_rows} more rows")
+        elif frame is None and results:
+            lines.append(str(results)[:500])
+        else:
+            lines.append("No data returned")
+    return "\n".join(lines) + "\n"
+
+
+def resolve_run_dir(path) -> Path:
+    """Folder run dari path folder run atau path manifest.json di dalamnya"""
+    path = Path(path)
+    if path.name == MANIFEST_NAME:
+        return path.parent
+    return path
+
+
+def read_manifest(run_dir) -> Optional[Dict[str, Any]]:
+    """Manifest folder run (None jika tidak ada / rusak)"""
+    path = resolve_run_dir(run_dir) / MANIFEST_NAME
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _read_table(run_dir: Path, entry: Dict[str, Any]) -> pd.DataFrame:
+    """Baca satu tabel artefak sebagai DataFrame dengan dtype seperti saat ditulis"""
+    path = run_dir / entry['file']
+    columns = entry.get('columns', [])
+
+    if entry.get('format') == FORMAT_PARQUET:
+        return pd.read_parquet(path)
+
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        records = [json.loads(line) for line in f if line.strip()]
+    frame = pd.DataFrame.from_records(records, columns=columns) if records else pd.DataFrame(columns=columns)
+
+    # NDJSON tidak menyimpan tipe: kembalikan dtype numerik dari manifest
+    for column, dtype in entry.get('dtypes', {}).items():
+        if column not in frame.columns:
+            continue
+        try:
+            if dtype in ('int64', 'float64', 'Int64', 'Float64', 'bool', 'boolean'):
+                frame[column] = frame[column].astype(dtype)
+            elif dtype.startswith('datetime64'):
+                frame[column] = pd.to_datetime(frame[column])
+        except (ValueError, TypeError) as e:
+            logger.warning(f"Could not restore dtype {dtype} for column {column}: {e}")
+    return frame
+
+
+def _restore_result(frame: pd.DataFrame, entry: Dict[str, Any], as_records: bool) -> Any:
+    """Kembalikan DataFrame tabel artefak ke bentuk hasil query aslinya"""
+    kind = entry.get('kind', KIND_RECORDS)
+    if kind == KIND_DATAFRAME and not as_records:
+        return frame
+
+    if kind in (KIND_RESULTSET, KIND_ISQL) and ResultSet is not None and not as_records:
+        rows = ResultSet.from_pandas(frame)
+    else:
+        rows = _frame_records(frame)
+
+    if kind == KIND_ISQL:
+        return [{'headers': entry.get('headers', list(frame.columns)), 'rows': rows}]
+    return rows
+
+
+def load_artifact(run_dir, as_records: bool = False) -> Dict[str, Any]:
+    """
+    Buka kembali folder run sebagai query_results untuk render ulang offline
+
+    Args:
+        run_dir: Folder run (ETL_Run_...) atau path manifest.json
+        as_records: True = semua hasil query sebagai list of dict; False = bentuk
+                    yang sama seperti saat ditulis (DataFrame / ResultSet / list of dict)
+
+    Returns:
+        Dict dengan key 'query_results', 'parameters', 'etl_stats', 'timings',
+        'manifest' dan 'path'
+    """
+    run_dir = resolve_run_dir(run_dir)
+    manifest = read_manifest(run_dir)
+    if manifest is None:
+        raise FileNotFoundError(f"No ETL artifact manifest in {run_dir}")
+
+    tables = manifest.get('tables', {})
+    values = manifest.get('values', {})
+    query_results = {}
+    for query_name in manifest.get('order') or list(tables) + list(values):
+        if query_name in values:
+            query_results[query_name] = values[query_name]
+        elif query_name in tables:
+            entry = tables[query_name]
+            query_results[query_name] = _restore_result(_read_table(run_dir, entry), entry, as_records)
+
+    return {
+        'query_results': query_results,
+        'parameters': manifest.get('parameters', {}),
+        'etl_stats': manifest.get('etl_stats', {}),
+        'timings': manifest.get('timings', {}),
+        'manifest': manifest,
+        'path': str(run_dir)
+    }
@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+"""
+ISQL Execution Policy - bentuk pemanggilan, timeout adaptif dan retry isql
+READ-ONLY ACCESS - No data modification
+
+Timeout tetap (300/600 detik) ditambah beberapa bentuk command line yang dicoba
+berurutan membuat satu query bermasalah bisa memblokir 20+ menit. Policy ini:
+- Mengingat bentuk pemanggilan isql yang berhasil per instalasi isql (disimpan di
+  cache) sehingga bentuk yang tidak cocok tidak dicoba lagi di setiap query
+- Menurunkan timeout dari latensi historis per query: kelipatan p95, dibatasi
+  min/max timeout. Query sama dengan tanggal / angka berbeda berbagi riwayat selama
+  panjang rentang tanggalnya sama (1 hari dan 1 tahun tidak dicampur)
+- Query yang melewati batas (straggler) dihentikan lalu diulang dengan timeout
+  lebih besar dan jeda backoff; batas yang sudah pernah terlewati langsung dinaikkan
+  untuk query sama berikutnya di sesi ini (tail latency tidak terulang dalam batch);
+  percobaan terakhir selalu memakai max timeout
+- Latensi disimpan ke cache paling sering tiap SAVE_INTERVAL detik (dan saat exit),
+  bukan setiap query
+
+    policy = get_execution_policy(isql_path)
+    for form in policy.forms(('stdin', 'input_file')):
+        ...
+    output = policy.run_with_retries(query, lambda timeout: run_isql(..., timeout))
+
+Version: 1.0.0
+"""
+
+import os
+import re
+import json
+import atexit
+import time
+import hashlib
+import logging
+import subprocess
+import threading
+from datetime import datetime, date
+from pathlib import Path
+from typing import Any, Callable, Iterable, List, Optional
+
+DEFAULT_CACHE_DIR = Path(__file__).parent / 'cache' / 'isql_policy'
+
+# Batas timeout per percobaan (detik)
+MIN_TIMEOUT = 30
+MAX_TIMEOUT = 300
+
+# Timeout = TIMEOUT_MULTIPLIER x p95 latensi historis query
+TIMEOUT_MULTIPLIER = 4.0
+
+# Riwayat latensi yang disimpan per query dan minimum sampel untuk timeout adaptif
+HISTORY_SIZE = 20
+MIN_SAMPLES = 3
+
+# Percobaan maksimal per query; timeout dan jeda dikali BACKOFF_FACTOR tiap retry
+MAX_ATTEMPTS = 3
+BACKOFF_FACTOR = 2.0
+BACKOFF_DELAY = 0.5
+
+# Jeda minimum antar penyimpanan riwayat latensi ke cache (detik)
+SAVE_INTERVAL = 30.0
+
+DATE_LITERAL_PATTERN = re.compile(r"'(\d{4})-(\d{2})-(\d{2})")
+STRING_LITERAL_PATTERN = re.compile(r"'(?:[^']|'')*'")
+NUMBER_PATTERN = re.compile(r'\b\d+(?:\.\d+)?\b')
+WHITESPACE_PATTERN = re.compile(r'\s+')
+
+_POLICIES = {}
+_POLICIES_LOCK = threading.Lock()
+
+logger = logging.getLogger(__name__)
+
+
+def get_execution_policy(isql_path: str, cache_dir: Optional[str] = None) -> 'ExecutionPolicy':
+    """ExecutionPolicy bersama per instalasi isql"""
+    key = (os.path.abspath(isql_path or ''), str(cache_dir or DEFAULT_CACHE_DIR))
+    with _POLICIES_LOCK:
+        if key not in _POLICIES:
+            _POLICIES[key] = ExecutionPolicy(isql_path, cache_dir)
+        return _POLICIES[key]
+
+
+def _date_span(sql: str) -> Optional[int]:
+    """Jumlah hari antara literal tanggal terkecil dan terbesar di SQL (None jika < 2 tanggal)"""
+    dates = []
+    for year, month, day in DATE_LITERAL_PATTERN.findall(sql or ''):
+        try:
+            dates.append(date(int(year), int(month), int(day)))
+        except ValueError:
+            continue
+    if len(dates) < 2:
+        return None
+    return (max(dates) - min(dates)).days
+
+
+def query_key(sql: str) -> str:
+    """
+    Kunci riwayat latensi: SQL tanpa literal string/angka dan spasi berlebih, ditambah
+    panjang rentang tanggal (nama tabel, termasuk partisi bulanan, tetap bagian dari SQL)
+    """
+    normalized = STRING_LITERAL_PATTERN.sub('?', sql or '')
+    normalized = NUMBER_PATTERN.sub('?', normalized)
+    normalized = WHITESPACE_PATTERN.sub(' ', normalized).strip().upper()
+    span = _date_span(sql)
+    if span is not None:
+        normalized = f"{normalized} |DAYS={span}"
+    return hashlib.sha1(normalized.encode('utf-8')).hexdigest()[:16]
+
+
+def _percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(fraction * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+class ExecutionPolicy:
+    """
+    Bentuk pemanggilan dan timeout adaptif untuk satu instalasi isql
+    """
+
+    def __init__(self, isql_path: str, cache_dir: Optional[str] = None,
+                 min_timeout: float = MIN_TIMEOUT, max_timeout: float = MAX_TIMEOUT):
+        """
+        Args:
+            isql_path: Path executable isql
+            cache_dir: Folder penyimpanan cache (default: cache/isql_policy)
+            min_timeout: Timeout minimum per percobaan (detik)
+            max_timeout: Timeout maksimum per percobaan (detik)
+        """
+        self.isql_path = isql_path
+        self.cache_dir = Path(cache_dir) if cache_dir else DEFAULT_CACHE_DIR
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+
+        self.preferred_form = None  # bentuk pemanggilan yang terbukti berhasil
+        self.failed_forms = []      # bentuk yang gagal sementara bentuk lain berhasil
+        self.latencies = {}         # query_key -> [detik, ...]
+        self.escalated = {}         # query_key -> timeout minimum (sesi ini, tidak disimpan)
+        self._loaded = False
+        self._dirty = False         # latensi baru yang belum disimpan
+        self._last_save = time.monotonic()
+        atexit.register(self.flush)
+
+    @property
+    def cache_file(self) -> Path:
+        """Satu file per instalasi isql"""
+        path = os.path.abspath(self.isql_path or '')
+        path_hash = hashlib.sha1(path.encode('utf-8')).hexdigest()[:8]
+        return self.cache_dir / f"{Path(path).stem or 'isql'}_{path_hash}.json"
+
+    def _ensure_loaded(self):
+        """Muat cache sekali (panggil dengan lock)"""
+        if self._loaded:
+            return
+        self._loaded = True
+        try:
+            if not self.cache_file.exists():
+                return
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                payload = json.load(f)
+            self.preferred_form = payload.get('preferred_form')
+            self.failed_forms = payload.get('failed_forms', [])
+            self.latencies = payload.get('latencies', {})
+        except Exception as e:
+            self.logger.warning(f"Could not read isql policy {self.cache_file}: {e}")
+
+    def _save(self):
+        """Simpan cache (tulis ke file sementara lalu rename; panggil dengan lock)"""
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            payload = {
+                'isql_path': os.path.abspath(self.isql_path or ''),
+                'saved_at': datetime.now().isoformat(),
+                'preferred_form': self.preferred_form,
+                'failed_forms': self.failed_forms,
+                'latencies': self.latencies
+            }
+            temp_path = self.cache_file.with_name(self.cache_file.name + '.tmp')
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(payload, f, indent=2)
+            os.replace(temp_path, self.cache_file)
+            self._dirty = False
+        except Exception as e:
+            self.logger.warning(f"Could not save isql policy {self.cache_file}: {e}")
+        self._last_save = time.monotonic()
+
+    def flush(self):
+        """Simpan latensi yang belum tersimpan (dipanggil otomatis saat exit)"""
+        with self._lock:
+            if self._dirty:
+                self._save()
+
+    # ------------------------------------------------------------- forms
+
+    @property
+    def form_verified(self) -> bool:
+        with self._lock:
+            self._ensure_loaded()
+            return self.preferred_form is not None
+
+    def forms(self, available: Iterable[str]) -> List[str]:
+        """
+        Urutan bentuk pemanggilan yang dicoba: bentuk terbukti saja jika ada,
+        selain itu semua bentuk dengan yang pernah gagal di akhir
+        """
+        available = list(available)
+        with self._lock:
+            self._ensure_loaded()
+            if self.preferred_form in available:
+                return [self.preferred_form]
+            return ([form for form in available if form not in self.failed_forms] +
+                    [form for form in available if form in self.failed_forms])
+
+    def record_form(self, form: str, failed_forms: Iterable[str] = ()):
+        """Catat bentuk yang berhasil dan bentuk yang gagal sebelum bentuk tsb berhasil"""
+        with self._lock:
+            self._ensure_loaded()
+            failed = [name for name in failed_forms if name != form]
+            if self.preferred_form == form and not failed:
+                return
+            self.preferred_form = form
+            self.failed_forms = sorted(set(self.failed_forms) | set(failed))
+            if form in self.failed_forms:
+                self.failed_forms.remove(form)
+            self._save()
+        self.logger.info(f"isql invocation form '{form}' selected for {self.isql_path}")
+
+    # ------------------------------------------------------------- timeouts
+
+    def timeout_for(self, sql: str, max_timeout: float = None) -> float:
+        """Timeout percobaan pertama dari latensi historis query"""
+        max_timeout = max_timeout or self.max_timeout
+        key = query_key(sql)
+        with self._lock:
+            self._ensure_loaded()
+            history = self.latencies.get(key, [])
+            if len(history) >= MIN_SAMPLES:
+                timeout = TIMEOUT_MULTIPLIER * _percentile(history, 0.95)
+            else:
+                timeout = max_timeout
+            timeout = max(timeout, self.escalated.get(key, 0))
+        return min(max_timeout, max(self.min_timeout, timeout))
+
+    def attempt_timeouts(self, sql: str, max_timeout: float = None) -> List[float]:
+        """
+        Timeout tiap percobaan: naik BACKOFF_FACTOR kali, percobaan terakhir selalu
+        max_timeout (30 -> 60 -> 300, bukan 30 -> 60 -> 120)
+        """
+        max_timeout = max_timeout or self.max_timeout
+        timeouts = [self.timeout_for(sql, max_timeout)]
+        while len(timeouts) < MAX_ATTEMPTS - 1 and timeouts[-1] * BACKOFF_FACTOR < max_timeout:
+            timeouts.append(timeouts[-1] * BACKOFF_FACTOR)
+        if timeouts[-1] < max_timeout:
+            timeouts.append(max_timeout)
+        return timeouts
+
+    def record_latency(self, sql: str, seconds: float):
+        key = query_key(sql)
+        with self._lock:
+            self._ensure_loaded()
+            history = self.latencies.setdefault(key, [])
+            history.append(round(seconds, 3))
+            del history[:-HISTORY_SIZE]
+            self._dirty = True
+            if time.monotonic() - self._last_save >= SAVE_INTERVAL:
+                self._save()
+
+    def record_timeout(self, sql: str, timeout: float):
+        """Query melewati timeout: percobaan berikutnya (sesi ini) mulai dari batas lebih besar"""
+        key = query_key(sql)
+        with self._lock:
+            self.escalated[key] = max(self.escalated.get(key, 0), timeout * BACKOFF_FACTOR)
+
+    def run_with_retries(self, sql: str, run: Callable[[float], Any], max_timeout: float = None) -> Any:
+        """
+        Jalankan run(timeout) dengan timeout adaptif; straggler (TimeoutExpired)
+        diulang dengan timeout lebih besar setelah jeda backoff
+
+        Args:
+            sql: SQL query (kunci riwayat latensi)
+            run: Callable(timeout) yang menjalankan isql
+            max_timeout: Batas timeout per percobaan (default: max_timeout policy)
+
+        Raises:
+            subprocess.TimeoutExpired jika semua percobaan melewati timeout
+        """
+        timeouts = self.attempt_timeouts(sql, max_timeout)
+        for attempt, timeout in enumerate(timeouts):
+            started = time.monotonic()
+            try:
+                result = run(timeout)
+            except subprocess.TimeoutExpired:
+                self.record_timeout(sql, timeout)
+                if attempt + 1 >= len(timeouts):
+                    raise
+                delay = BACKOFF_DELAY * (BACKOFF_FACTOR ** attempt)
+                self.logger.warning(f"Query exceeded {timeout:.1f}s, retrying in {delay:.1f}s "
+                                    f"with timeout {timeouts[attempt + 1]:.1f}s")
+                time.sleep(delay)
+                continue
+            self.record_latency(sql, time.monotonic() - started)
+            return result
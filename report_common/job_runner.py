@@ -0,0 +1,376 @@
+#!/usr/bin/env python3
+"""
+Job Runner - Background Job untuk GUI Tkinter
+=============================================
+
+Pekerjaan panjang (query isql, render laporan) dijalankan di worker thread, tetapi
+semua callback GUI dijalankan di thread Tk:
+- Worker mengirim progress, log dan hasil lewat queue; runner mem-poll queue
+  dengan root.after() sehingga widget tidak pernah disentuh dari worker thread
+- Pembatalan kooperatif: job.cancel() men-set cancel_event dan memanggil cancel
+  callback (mis. connector.cancel() yang mematikan proses isql yang sedang jalan)
+- Jumlah job yang berjalan bersamaan dibatasi max_workers; sisanya antre
+
+    runner = JobRunner(root, max_workers=2)
+
+    def work(job):
+        connector = FirebirdConnectorEnhanced(db_path)
+        job.add_cancel_callback(connector.cancel)
+        job.progress(10, "Executing queries...")
+        job.check_cancelled()
+        return connector.execute_query(sql)
+
+    runner.submit(work, name='preview', group='preview', replace=True,
+                  on_success=show_result, on_progress=update_progress)
+
+Version: 1.0.0
+"""
+
+import queue
+import logging
+import functools
+import threading
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional
+
+DEFAULT_MAX_WORKERS = 2
+DEFAULT_POLL_INTERVAL = 100  # ms
+
+# Status job
+PENDING = 'pending'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+
+logger = logging.getLogger(__name__)
+
+
+class JobCancelledError(Exception):
+    """Job dibatalkan (dilempar oleh Job.check_cancelled di worker thread)"""
+    pass
+
+
+class Job:
+    """
+    Satu pekerjaan background. Fungsi job menerima objek ini sebagai argumen pertama
+    untuk melaporkan progress/log dan mengecek pembatalan.
+    """
+
+    def __init__(self, runner: 'JobRunner', func: Callable, name: str, group: Optional[str],
+                 args: tuple, kwargs: Dict[str, Any], callbacks: Dict[str, Optional[Callable]]):
+        self.runner = runner
+        self.func = func
+        self.name = name
+        self.group = group
+        self.args = args
+        self.kwargs = kwargs
+        self.callbacks = callbacks
+        self.state = PENDING
+        self.result = None
+        self.error = None
+        self.cancel_event = threading.Event()
+        self.thread = None
+        self._cancel_callbacks = []
+        self._lock = threading.Lock()
+
+    @property
+    def cancelled(self) -> bool:
+        return self.cancel_event.is_set()
+
+    @property
+    def finished(self) -> bool:
+        return self.state in (DONE, FAILED, CANCELLED)
+
+    def cancel(self):
+        """Minta job berhenti: set cancel_event dan jalankan cancel callback (kill isql)"""
+        with self._lock:
+            if self.cancel_event.is_set() or self.finished:
+                return
+            self.cancel_event.set()
+            callbacks = list(self._cancel_callbacks)
+
+        logger.info(f"Cancelling job '{self.name}'")
+        for callback in callbacks:
+            self._call_cancel_callback(callback)
+
+    def add_cancel_callback(self, callback: Callable[[], Any]):
+        """
+        Daftarkan callback pembatalan (mis. connector.cancel); dipanggil langsung
+        jika job sudah dibatalkan
+        """
+        with self._lock:
+            if not self.cancel_event.is_set():
+                self._cancel_callbacks.append(callback)
+                return
+        self._call_cancel_callback(callback)
+
+    def remove_cancel_callback(self, callback: Callable[[], Any]):
+        with self._lock:
+            if callback in self._cancel_callbacks:
+                self._cancel_callbacks.remove(callback)
+
+    def _call_cancel_callback(self, callback: Callable[[], Any]):
+        try:
+            callback()
+        except Exception as e:
+            logger.warning(f"Cancel callback for job '{self.name}' failed: {e}")
+
+    def check_cancelled(self):
+        """Lempar JobCancelledError jika job sudah dibatalkan (panggil di antara langkah)"""
+        if self.cancel_event.is_set():
+            raise JobCancelledError(f"Job '{self.name}' cancelled")
+
+    def progress(self, value: Optional[float] = None, message: Optional[str] = None):
+        """Kirim progress (0-100) dan/atau pesan status ke thread GUI"""
+        if not self.cancel_event.is_set():
+            self.runner._post(self, 'progress', (value, message))
+
+    def log(self, message: str, level: str = 'info'):
+        """Kirim baris log ke thread GUI"""
+        self.runner._post(self, 'log', (message, level))
+
+    def call_in_gui(self, func: Callable, *args):
+        """Jalankan func(*args) di thread GUI (untuk update widget khusus dari worker)"""
+        self.runner.call_soon(func, *args)
+
+
+def gui_thread(method):
+    """
+    Decorator untuk method GUI (log_message, update_progress, indikator status):
+    jika dipanggil dari worker thread, pemanggilan dijadwalkan ke thread Tk lewat
+    self.job_runner dan method langsung kembali (return None)
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        runner = getattr(self, 'job_runner', None)
+        if runner is None or threading.current_thread() is threading.main_thread():
+            return method(self, *args, **kwargs)
+        runner.call_soon(functools.partial(method, self, *args, **kwargs))
+        return None
+    return wrapper
+
+
+class JobRunner:
+    """
+    Menjalankan Job di worker thread dengan batas concurrency; event dari worker
+    dikirim lewat queue dan di-dispatch di thread Tk oleh poll()
+    """
+
+    def __init__(self, root=None, max_workers: int = DEFAULT_MAX_WORKERS,
+                 poll_interval: int = DEFAULT_POLL_INTERVAL):
+        """
+        Args:
+            root: Widget Tk untuk root.after(); None = poll() dipanggil manual
+            max_workers: Jumlah job maksimal yang berjalan bersamaan
+            poll_interval: Interval polling queue (ms)
+        """
+        self.root = root
+        self.max_workers = max(1, int(max_workers))
+        self.poll_interval = poll_interval
+        self._events = queue.Queue()
+        self._pending = deque()
+        self._running = []
+        self._poll_id = None
+        self._closed = False
+
+        if self.root is not None:
+            self._schedule_poll()
+
+    def submit(self, func: Callable, *args, name: str = None, group: str = None,
+               replace: bool = False, on_success: Callable = None, on_error: Callable = None,
+               on_cancel: Callable = None, on_progress: Callable = None, on_log: Callable = None,
+               on_finish: Callable = None, **kwargs) -> Job:
+        """
+        Jadwalkan func(job, *args, **kwargs) di worker thread
+
+        Args:
+            func: Fungsi job
+            name: Nama job (untuk log)
+            group: Kelompok job (mis. 'preview', 'generate')
+            replace: Batalkan job lain di group yang sama (preview lama digantikan yang baru)
+            on_success: on_success(result)
+            on_error: on_error(exception)
+            on_cancel: on_cancel()
+            on_progress: on_progress(value, message)
+            on_log: on_log(message, level)
+            on_finish: on_finish(job) setelah callback lain, apa pun hasilnya
+
+        Returns:
+            Job
+        """
+        if self._closed:
+            raise RuntimeError("JobRunner is shut down")
+
+        if replace and group is not None:
+            self.cancel_group(group)
+
+        callbacks = {
+            'success': on_success,
+            'error': on_error,
+            'cancel': on_cancel,
+            'progress': on_progress,
+            'log': on_log,
+            'finish': on_finish
+        }
+        job = Job(self, func, name or getattr(func, '__name__', 'job'), group, args, kwargs, callbacks)
+        self._pending.append(job)
+        self._start_pending()
+        return job
+
+    def _start_pending(self):
+        while self._pending and len(self._running) < self.max_workers:
+            job = self._pending.popleft()
+            if job.cancelled:
+                self._finish(job, CANCELLED)
+                continue
+            job.state = RUNNING
+            job.thread = threading.Thread(target=self._run, args=(job,),
+                                          name=f"job-{job.name}", daemon=True)
+            self._running.append(job)
+            job.thread.start()
+
+    def _run(self, job: Job):
+        """Worker thread: jalankan fungsi job dan kirim hasilnya ke queue"""
+        try:
+            job.check_cancelled()
+            result = job.func(job, *job.args, **job.kwargs)
+            if job.cancelled:
+                self._post(job, CANCELLED, None)
+            else:
+                self._post(job, DONE, result)
+        except JobCancelledError:
+            self._post(job, CANCELLED, None)
+        except Exception as e:
+            if job.cancelled:
+                # Error akibat proses isql yang di-kill dianggap pembatalan
+                logger.info(f"Job '{job.name}' stopped after cancel: {e}")
+                self._post(job, CANCELLED, None)
+            else:
+                logger.error(f"Job '{job.name}' failed: {e}")
+                self._post(job, FAILED, e)
+
+    def _post(self, job: Job, kind: str, payload: Any):
+        self._events.put((job, kind, payload))
+
+    def call_soon(self, func: Callable, *args):
+        """
+        Jadwalkan func(*args) di thread GUI; aman dipanggil dari thread mana pun
+        (dipakai log_message / update_progress saat dipanggil dari worker)
+        """
+        self._events.put((None, 'call', (func, args)))
+
+    def _schedule_poll(self):
+        try:
+            self._poll_id = self.root.after(self.poll_interval, self._poll_loop)
+        except Exception:
+            # Root sudah di-destroy
+            self._poll_id = None
+
+    def _poll_loop(self):
+        self.poll()
+        if not self._closed:
+            self._schedule_poll()
+
+    def poll(self) -> int:
+        """
+        Dispatch semua event yang sudah masuk queue (dipanggil di thread GUI)
+
+        Returns:
+            Jumlah event yang diproses
+        """
+        processed = 0
+        while True:
+            try:
+                job, kind, payload = self._events.get_nowait()
+            except queue.Empty:
+                break
+            processed += 1
+
+            if kind == 'call':
+                func, args = payload
+                try:
+                    func(*args)
+                except Exception as e:
+                    logger.error(f"GUI call {getattr(func, '__name__', func)} failed: {e}")
+            elif kind == 'progress':
+                if not job.cancelled:
+                    self._callback(job, 'progress', *payload)
+            elif kind == 'log':
+                self._callback(job, 'log', *payload)
+            else:
+                if job in self._running:
+                    self._running.remove(job)
+                if kind == DONE:
+                    job.result = payload
+                elif kind == FAILED:
+                    job.error = payload
+                self._finish(job, kind)
+
+        self._start_pending()
+        return processed
+
+    def _finish(self, job: Job, state: str):
+        job.state = state
+        if state == DONE:
+            self._callback(job, 'success', job.result)
+        elif state == FAILED:
+            self._callback(job, 'error', job.error)
+        else:
+            logger.info(f"Job '{job.name}' cancelled")
+            self._callback(job, 'cancel')
+        self._callback(job, 'finish', job)
+
+    def _callback(self, job: Job, kind: str, *args):
+        callback = job.callbacks.get(kind)
+        if callback is None:
+            return
+        try:
+            callback(*args)
+        except Exception as e:
+            logger.error(f"{kind} callback of job '{job.name}' failed: {e}")
+
+    def jobs(self, group: str = None) -> List[Job]:
+        """Job yang sedang berjalan atau antre (opsional per group)"""
+        active = list(self._running) + list(self._pending)
+        return [job for job in active if group is None or job.group == group]
+
+    def is_busy(self, group: str = None) -> bool:
+        return any(not job.cancelled for job in self.jobs(group))
+
+    def cancel_group(self, group: str):
+        """Batalkan semua job di group (job antre langsung dibuang)"""
+        for job in self.jobs(group):
+            job.cancel()
+        self._drop_cancelled_pending()
+
+    def cancel_all(self):
+        for job in self.jobs():
+            job.cancel()
+        self._drop_cancelled_pending()
+
+    def _drop_cancelled_pending(self):
+        cancelled = [job for job in self._pending if job.cancelled]
+        for job in cancelled:
+            self._pending.remove(job)
+            self._finish(job, CANCELLED)
+
+    def shutdown(self, wait: float = 0):
+        """
+        Batalkan semua job dan hentikan polling (panggil saat window ditutup)
+
+        Args:
+            wait: Detik maksimal menunggu worker thread selesai
+        """
+        self.cancel_all()
+        self._closed = True
+        if self._poll_id is not None and self.root is not None:
+            try:
+                self.root.after_cancel(self._poll_id)
+            except Exception:
+                pass
+            self._poll_id = None
+        if wait:
+            for job in list(self._running):
+                if job.thread is not None:
+                    job.thread.join(wait)
@@ -0,0 +1,70 @@
+"""
+Sheet Extents - rentang kolom terpakai per row worksheet openpyxl
+
+Loop render per row hanya mengunjungi kolom yang berisi value atau style pada
+row template, bukan seluruh max_column sheet. Extents dihitung sekali per
+template lalu digeser saat row disisipkan/dihapus.
+
+Scan membaca mapping Worksheet._cells (hanya cell yang tersimpan), bukan
+iter_rows: iter_rows membuat cell kosong untuk seluruh used range, sehingga
+satu cell berformat jauh di kanan-bawah membuat jutaan cell baru.
+"""
+
+from typing import Dict, Tuple
+
+
+def compute_row_extents(sheet) -> Dict[int, Tuple[int, int]]:
+    """
+    Hitung rentang kolom (first, last) yang berisi value atau style untuk setiap row
+
+    Args:
+        sheet: Worksheet openpyxl
+
+    Returns:
+        Dict: row -> (first_column, last_column); row tanpa value/style tidak ada
+    """
+    cells = getattr(sheet, '_cells', None)
+    if cells is None:
+        # ReadOnlyWorksheet tidak punya _cells; iter_rows di mode read-only
+        # di-stream dari file tanpa membuat cell baru
+        cells = {(cell.row, cell.column): cell
+                 for row in sheet.iter_rows() for cell in row
+                 if getattr(cell, 'row', None) is not None}
+
+    extents = {}
+    for (row, col), cell in cells.items():
+        if cell.value is None and not cell.has_style:
+            continue
+
+        current = extents.get(row)
+        if current is None:
+            extents[row] = (col, col)
+        elif col < current[0] or col > current[1]:
+            extents[row] = (min(current[0], col), max(current[1], col))
+
+    return extents
+
+
+def shift_row_extents(extents: Dict[int, Tuple[int, int]], from_row: int, amount: int) -> Dict[int, Tuple[int, int]]:
+    """
+    Geser row extents setelah insert_rows (amount > 0) atau delete_rows (amount < 0)
+
+    Args:
+        extents: Row extents hasil compute_row_extents
+        from_row: Row pertama yang ikut bergeser
+        amount: Jumlah row yang disisipkan/dihapus
+
+    Returns:
+        Dict: row extents baru
+    """
+    if not amount:
+        return extents
+
+    shifted = {}
+    for row, extent in extents.items():
+        if row < from_row:
+            shifted[row] = extent
+        elif amount > 0 or row >= from_row - amount:
+            shifted[row + amount] = extent
+
+    return shifted
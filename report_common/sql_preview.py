@@ -0,0 +1,517 @@
+#!/usr/bin/env python3
+"""
+SQL Preview - Rewrite Query untuk Preview Cepat
+==============================================
+
+Preview tidak perlu membaca seluruh tabel. Modul ini menulis ulang SQL Firebird
+supaya:
+- FIRST n dipasang di projection terluar (bukan di SELECT pertama yang ditemukan,
+  yang bisa saja ada di subquery atau CTE)
+- Query agregasi (GROUP BY / SUM / COUNT ...) dihitung dari sampel tabel sumber,
+  bukan dari seluruh tabel
+- Kondisi WHERE terluar milik tabel sumber (mis. rentang TRANSDATE) ikut dipasang
+  di dalam sampel, sehingga sampel diambil dari periode yang diminta
+- Rentang tanggal dipecah per partisi bulanan (FFBSCANNERDATA01..12) sehingga
+  setiap bulan ikut tersampel
+
+Derived table (sampel, pembungkus UNION) baru ada di Firebird 2.0. Untuk server
+Firebird 1.5 (atau versi tidak diketahui) preview memakai FIRST n biasa saja; lihat
+engine_version() dan connector_supports_derived_tables().
+
+Scanner di sini hanya mengenali kedalaman kurung, string dan komentar; cukup
+untuk menemukan klausa level terluar tanpa parser SQL lengkap.
+
+Version: 1.0.0
+"""
+
+import re
+import calendar
+from datetime import datetime, date
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from report_common.table_statistics import query_records
+
+# Sampel tabel sumber untuk preview agregasi = limit x faktor ini
+DEFAULT_SAMPLE_FACTOR = 100
+
+AGGREGATE_FUNCTIONS = {'SUM', 'COUNT', 'AVG', 'MIN', 'MAX', 'LIST'}
+
+# Kata kunci yang bisa mengikuti nama tabel di klausa FROM (bukan alias)
+FROM_TERMINATORS = {
+    'WHERE', 'JOIN', 'INNER', 'LEFT', 'RIGHT', 'FULL', 'CROSS', 'NATURAL', 'ON',
+    'GROUP', 'ORDER', 'HAVING', 'UNION', 'PLAN', 'ROWS', 'FOR', 'WITH'
+}
+
+# Versi engine server; RDB$GET_CONTEXT belum ada di Firebird 1.5 sehingga query ini gagal di sana
+ENGINE_VERSION_SQL = "SELECT RDB$GET_CONTEXT('SYSTEM', 'ENGINE_VERSION') AS ENGINE_VERSION FROM RDB$DATABASE"
+ENGINE_VERSION_PATTERN = re.compile(r'(\d+)\.(\d+)')
+
+# Versi minimal untuk derived table (SELECT ... FROM (SELECT ...) alias)
+DERIVED_TABLE_VERSION = (2, 0)
+
+# Word yang boleh ada di kondisi yang dipindah ke sampel tabel sumber pada query JOIN
+CONDITION_KEYWORDS = {
+    'AND', 'OR', 'NOT', 'BETWEEN', 'IN', 'IS', 'NULL', 'LIKE', 'STARTING', 'WITH',
+    'CONTAINING', 'ESCAPE', 'TRUE', 'FALSE'
+}
+
+WORD_PATTERN = re.compile(r'[A-Za-z_][\w$]*')
+NUMBER_PATTERN = re.compile(r'\d+')
+
+
+def _tokens(sql: str) -> List[Tuple[int, int, str, int]]:
+    """
+    Tokenisasi sederhana: (start, end, text, depth) untuk word, angka, placeholder
+    {param}, string literal dan tanda baca. Komentar dilewati; text word dalam
+    huruf besar, string literal apa adanya (termasuk quote).
+    """
+    tokens = []
+    depth = 0
+    i = 0
+    length = len(sql)
+
+    while i < length:
+        char = sql[i]
+
+        if char == "'":
+            # String literal ('' = quote di dalam string)
+            start = i
+            i += 1
+            while i < length:
+                if sql[i] == "'":
+                    if i + 1 < length and sql[i + 1] == "'":
+                        i += 2
+                        continue
+                    break
+                i += 1
+            i = min(i + 1, length)
+            tokens.append((start, i, sql[start:i], depth))
+            continue
+
+        if sql.startswith('--', i):
+            newline = sql.find('\n', i)
+            i = length if newline < 0 else newline + 1
+            continue
+
+        if sql.startswith('/*', i):
+            close = sql.find('*/', i + 2)
+            i = length if close < 0 else close + 2
+            continue
+
+        if char == '{':
+            # Placeholder parameter ({table_name}) diperlakukan sebagai identifier
+            close = sql.find('}', i + 1)
+            end = length if close < 0 else close + 1
+            tokens.append((i, end, sql[i:end], depth))
+            i = end
+            continue
+
+        if char == '"':
+            close = sql.find('"', i + 1)
+            end = length if close < 0 else close + 1
+            tokens.append((i, end, sql[i:end], depth))
+            i = end
+            continue
+
+        if char == '(':
+            tokens.append((i, i + 1, char, depth))
+            depth += 1
+            i += 1
+            continue
+
+        if char == ')':
+            depth -= 1
+            tokens.append((i, i + 1, char, depth))
+            i += 1
+            continue
+
+        match = WORD_PATTERN.match(sql, i) or NUMBER_PATTERN.match(sql, i)
+        if match:
+            tokens.append((i, match.end(), match.group().upper(), depth))
+            i = match.end()
+            continue
+
+        if not char.isspace():
+            tokens.append((i, i + 1, char, depth))
+        i += 1
+
+    return tokens
+
+
+def _outer_select_index(tokens: List[Tuple[int, int, str, int]]) -> Optional[int]:
+    """Index token SELECT terluar (SELECT di dalam CTE/subquery berada di depth > 0)"""
+    for index, (_, _, text, depth) in enumerate(tokens):
+        if depth == 0 and text == 'SELECT':
+            return index
+    return None
+
+
+def _outer_from_index(tokens: List[Tuple[int, int, str, int]], select_index: int) -> Optional[int]:
+    """Index token FROM milik SELECT terluar"""
+    for index in range(select_index + 1, len(tokens)):
+        _, _, text, depth = tokens[index]
+        if depth == 0 and text == 'FROM':
+            return index
+        if depth == 0 and text == 'UNION':
+            return None
+    return None
+
+
+# Klausa yang mengakhiri WHERE terluar
+WHERE_TERMINATORS = {'GROUP', 'HAVING', 'ORDER', 'PLAN', 'ROWS', 'UNION', 'FOR'}
+
+
+def _is_identifier(text: str) -> bool:
+    return text.startswith('{') or bool(WORD_PATTERN.fullmatch(text))
+
+
+def _strip_terminator(sql: str) -> str:
+    return sql.strip().rstrip(';').rstrip()
+
+
+def has_top_level(sql: str, keyword: str) -> bool:
+    """True jika keyword muncul di level terluar query"""
+    keyword = keyword.upper()
+    return any(depth == 0 and text == keyword for _, _, text, depth in _tokens(sql))
+
+
+def add_where_predicate(sql: str, predicate: str) -> Optional[str]:
+    """
+    Tambahkan predicate ke WHERE level terluar (AND dengan kondisi yang sudah ada)
+
+    WHERE/GROUP BY/ORDER BY di dalam subquery, CTE, string atau komentar tidak
+    dianggap. Kondisi lama dibungkus kurung supaya OR di dalamnya tidak mengubah
+    arti predicate baru.
+
+    Args:
+        sql: SQL Firebird
+        predicate: Kondisi SQL (mis. "a.TRANSDATE BETWEEN '{start_date}' AND '{end_date}'")
+
+    Returns:
+        SQL dengan predicate, atau None jika tidak bisa disisipkan dengan aman
+        (bukan SELECT atau UNION terluar)
+    """
+    sql = _strip_terminator(sql)
+    tokens = _tokens(sql)
+    select_index = _outer_select_index(tokens)
+    if select_index is None or has_top_level(sql, 'UNION'):
+        return None
+
+    where_index = None
+    # Komentar di akhir SQL tidak boleh menelan predicate
+    clause_end = tokens[-1][1]
+    for index in range(select_index + 1, len(tokens)):
+        start, _, text, depth = tokens[index]
+        if depth != 0:
+            continue
+        if text == 'WHERE' and where_index is None:
+            where_index = index
+        elif text in WHERE_TERMINATORS:
+            clause_end = start
+            break
+
+    head, tail = sql[:clause_end].rstrip(), sql[clause_end:]
+    if tail and not tail[0].isspace():
+        tail = f" {tail}"
+    if where_index is None:
+        return f"{head} WHERE {predicate}{tail}"
+
+    condition_start = tokens[where_index][1]
+    condition = head[condition_start:].strip()
+    return f"{head[:condition_start]} ({condition}) AND {predicate}{tail}"
+
+
+def engine_version(run_query: Callable[[str], Any]) -> Optional[Tuple[int, int]]:
+    """
+    Versi engine Firebird (major, minor) lewat ENGINE_VERSION_SQL
+
+    Args:
+        run_query: Fungsi eksekusi SQL (hasil format connector atau list of dict)
+
+    Returns:
+        (major, minor), atau None jika versi tidak terbaca. Error query (Firebird 1.5
+        menolak RDB$GET_CONTEXT) diteruskan ke pemanggil.
+    """
+    for record in query_records(run_query(ENGINE_VERSION_SQL)):
+        for value in record.values():
+            match = ENGINE_VERSION_PATTERN.search(str(value or ''))
+            if match:
+                return int(match.group(1)), int(match.group(2))
+    return None
+
+
+def supports_derived_tables(version: Optional[Tuple[int, int]]) -> bool:
+    """True jika versi engine mendukung derived table (Firebird 2.0+)"""
+    return version is not None and tuple(version) >= DERIVED_TABLE_VERSION
+
+
+def connector_supports_derived_tables(connector: Any) -> bool:
+    """
+    True jika server connector Firebird 2.0+ (connector.server_version()); connector
+    tanpa server_version() diperlakukan sebagai Firebird 1.5
+    """
+    server_version = getattr(connector, 'server_version', None)
+    return supports_derived_tables(server_version() if callable(server_version) else None)
+
+
+def is_aggregate_query(sql: str) -> bool:
+    """
+    True jika projection terluar melakukan agregasi (GROUP BY atau fungsi agregat)
+    """
+    tokens = _tokens(sql)
+    select_index = _outer_select_index(tokens)
+    if select_index is None:
+        return False
+
+    for index in range(select_index + 1, len(tokens) - 1):
+        _, _, text, depth = tokens[index]
+        if depth != 0:
+            continue
+        if text == 'GROUP' and tokens[index + 1][2] == 'BY':
+            return True
+        if text in AGGREGATE_FUNCTIONS and tokens[index + 1][2] == '(':
+            return True
+        if text == 'UNION':
+            break
+    return False
+
+
+def _limit_rows(sql: str, tokens: List[Tuple[int, int, str, int]], rows_index: int, limit: int) -> str:
+    """
+    Batasi klausa ROWS m [TO n] terluar (Firebird menolak FIRST dan ROWS bersamaan)
+
+    ROWS m menjadi ROWS min(m, limit); ROWS m TO n menjadi ROWS m TO min(n, m + limit - 1).
+    ROWS dengan nilai bukan angka (parameter/ekspresi) dibiarkan apa adanya.
+    """
+    if rows_index + 1 >= len(tokens) or not tokens[rows_index + 1][2].isdigit():
+        return sql
+
+    start, end, text, _ = tokens[rows_index + 1]
+    first_row = int(text)
+    if rows_index + 2 < len(tokens) and tokens[rows_index + 2][2] == 'TO':
+        if rows_index + 3 >= len(tokens) or not tokens[rows_index + 3][2].isdigit():
+            return sql
+        start, end, text, _ = tokens[rows_index + 3]
+        new_value = min(int(text), first_row + limit - 1)
+    else:
+        new_value = min(first_row, limit)
+
+    return f"{sql[:start]}{new_value}{sql[end:]}"
+
+
+def limit_select(sql: str, limit: int, derived_tables: bool = True) -> str:
+    """
+    Pasang FIRST n pada projection terluar
+
+    - FIRST yang sudah ada dipertahankan jika lebih kecil dari limit
+    - Query dengan klausa ROWS terluar tidak diberi FIRST; ROWS-nya yang dibatasi
+    - Query UNION dibungkus derived table agar limit berlaku untuk hasil gabungan
+      (tanpa derived table: FIRST n biasa, yang di Firebird 1.5 membatasi SELECT pertama)
+
+    Args:
+        sql: SQL Firebird
+        limit: Jumlah row maksimal
+        derived_tables: False untuk server tanpa derived table (Firebird 1.5)
+
+    Returns:
+        SQL dengan limit (SQL asli jika bukan SELECT)
+    """
+    sql = _strip_terminator(sql)
+    tokens = _tokens(sql)
+    select_index = _outer_select_index(tokens)
+    if select_index is None:
+        return sql
+
+    if derived_tables and has_top_level(sql, 'UNION') and tokens[0][2] != 'WITH':
+        return f"SELECT FIRST {limit} * FROM ({sql}) PREVIEW_ROWS"
+
+    for index in range(select_index + 1, len(tokens)):
+        if tokens[index][3] == 0 and tokens[index][2] == 'ROWS':
+            return _limit_rows(sql, tokens, index, limit)
+
+    select_end = tokens[select_index][1]
+    if select_index + 1 < len(tokens) and tokens[select_index + 1][2] == 'FIRST':
+        if select_index + 2 < len(tokens) and tokens[select_index + 2][2].isdigit():
+            start, end, text, _ = tokens[select_index + 2]
+            if int(text) > limit:
+                return f"{sql[:start]}{limit}{sql[end:]}"
+        return sql
+
+    return f"{sql[:select_end]} FIRST {limit}{sql[select_end:]}"
+
+
+def _outer_where_condition(tokens: List[Tuple[int, int, str, int]], select_index: int) -> Optional[Tuple[int, int]]:
+    """Range index token (awal, akhir eksklusif) kondisi WHERE terluar; None jika tidak ada WHERE"""
+    start = None
+    for index in range(select_index + 1, len(tokens)):
+        _, _, text, depth = tokens[index]
+        if depth != 0:
+            continue
+        if text == 'WHERE' and start is None:
+            start = index + 1
+        elif text in WHERE_TERMINATORS:
+            return (start, index) if start is not None else None
+    return (start, len(tokens)) if start is not None else None
+
+
+def _split_conjuncts(tokens: List[Tuple[int, int, str, int]], start: int, end: int) -> List[Tuple[int, int]]:
+    """Pecah kondisi di AND level terluar (AND milik BETWEEN tidak dihitung)"""
+    conjuncts = []
+    conjunct_start = start
+    between = False
+    for index in range(start, end):
+        _, _, text, depth = tokens[index]
+        if depth != 0:
+            continue
+        if text == 'BETWEEN':
+            between = True
+        elif text == 'AND':
+            if between:
+                between = False
+            else:
+                conjuncts.append((conjunct_start, index))
+                conjunct_start = index + 1
+    conjuncts.append((conjunct_start, end))
+    return [(first, last) for first, last in conjuncts if first < last]
+
+
+def _only_references(tokens: List[Tuple[int, int, str, int]], start: int, end: int, alias: str) -> bool:
+    """
+    True jika kondisi hanya memakai kolom alias.KOLOM (tanpa subquery), sehingga aman
+    dievaluasi di dalam sampel tabel sumber walaupun query punya JOIN
+    """
+    alias = alias.upper()
+    references = 0
+    for index in range(start, end):
+        text = tokens[index][2]
+        previous = tokens[index - 1][2] if index > start else None
+        following = tokens[index + 1][2] if index + 1 < end else None
+        if text == 'SELECT':
+            return False
+        if not (WORD_PATTERN.fullmatch(text) or text.startswith('"')) or text in CONDITION_KEYWORDS:
+            continue
+        if following == '.':
+            if text.strip('"').upper() != alias:
+                return False
+            references += 1
+        elif previous != '.' and following != '(':
+            # Kolom tanpa qualifier bisa milik tabel yang di-JOIN
+            return False
+    return references > 0
+
+
+def sample_source(sql: str, sample_size: int) -> str:
+    """
+    Ganti tabel sumber pertama di FROM terluar dengan sampel
+    "(SELECT FIRST n * FROM TABEL alias WHERE ...) alias". Tabel yang di-JOIN (dimensi)
+    tidak disampel.
+
+    FIRST n di dalam sampel berjalan sebelum WHERE luar, jadi kondisi WHERE terluar
+    yang hanya menyangkut tabel sumber (mis. rentang TRANSDATE) ikut dipasang di dalam
+    sampel; WHERE luar tetap dipertahankan. Tanpa JOIN semua kondisi ikut; dengan JOIN
+    hanya kondisi yang seluruh kolomnya memakai alias tabel sumber.
+
+    Args:
+        sql: SQL Firebird
+        sample_size: Jumlah row sampel dari tabel sumber
+
+    Returns:
+        SQL dengan tabel sumber tersampel (SQL asli jika FROM bukan tabel biasa)
+    """
+    sql = _strip_terminator(sql)
+    tokens = _tokens(sql)
+    select_index = _outer_select_index(tokens)
+    if select_index is None:
+        return sql
+
+    from_index = _outer_from_index(tokens, select_index)
+    if from_index is None or from_index + 1 >= len(tokens):
+        return sql
+
+    table_start, table_end, table, _ = tokens[from_index + 1]
+    if not _is_identifier(table) or table in FROM_TERMINATORS:
+        return sql
+
+    source = sql[table_start:table_end]
+    alias = None
+    replace_end = table_end
+    next_index = from_index + 2
+    if next_index < len(tokens) and tokens[next_index][2] == 'AS':
+        next_index += 1
+    if next_index < len(tokens):
+        _, alias_end, candidate, _ = tokens[next_index]
+        if WORD_PATTERN.fullmatch(candidate) and candidate not in FROM_TERMINATORS:
+            alias = sql[tokens[next_index][0]:alias_end]
+            replace_end = alias_end
+
+    conditions = []
+    where = _outer_where_condition(tokens, select_index)
+    if where is not None:
+        joined = any(
+            depth == 0 and (text in {'JOIN', ','})
+            for _, _, text, depth in tokens[from_index + 1:where[0] - 1]
+        )
+        for first, last in _split_conjuncts(tokens, *where):
+            if not joined or _only_references(tokens, first, last, alias or source):
+                conditions.append(sql[tokens[first][0]:tokens[last - 1][1]])
+
+    if alias is None:
+        # Tanpa alias: nama tabel dipakai sebagai alias (placeholder diberi alias tetap)
+        alias = 'PREVIEW_SOURCE' if source.startswith('{') else source
+
+    inner_source = source
+    if conditions:
+        # Alias asli dipakai juga di dalam sampel supaya kondisi a.KOLOM tetap valid
+        inner_source = f"{source}{sql[table_end:replace_end]} WHERE " + \
+            ' AND '.join(f"({condition})" for condition in conditions)
+    sampled = f"(SELECT FIRST {sample_size} * FROM {inner_source}) {alias}"
+    return f"{sql[:table_start]}{sampled}{sql[replace_end:]}"
+
+
+def preview_sql(sql: str, limit: int, sample_size: int = None, derived_tables: bool = True) -> str:
+    """
+    SQL untuk preview: agregasi dihitung dari sampel, hasil dibatasi FIRST n
+
+    Args:
+        sql: SQL Firebird
+        limit: Jumlah row hasil maksimal
+        sample_size: Row sampel tabel sumber untuk query agregasi
+                     (default limit x DEFAULT_SAMPLE_FACTOR)
+        derived_tables: False untuk server tanpa derived table (Firebird 1.5):
+                        agregasi tidak disampel, hanya FIRST n biasa
+
+    Returns:
+        SQL preview
+    """
+    if derived_tables and is_aggregate_query(sql):
+        sql = sample_source(sql, sample_size or limit * DEFAULT_SAMPLE_FACTOR)
+    return limit_select(sql, limit, derived_tables)
+
+
+def month_partitions(start_date: str, end_date: str) -> List[Dict[str, str]]:
+    """
+    Pecah rentang tanggal per bulan (partisi FFBSCANNERDATA{month:02d})
+
+    Returns:
+        List dict start_date, end_date (dipotong ke batas bulan) dan month ('01'..'12');
+        list kosong jika tanggal tidak valid
+    """
+    try:
+        start = datetime.strptime(str(start_date).strip("'\" ")[:10], '%Y-%m-%d').date()
+        end = datetime.strptime(str(end_date).strip("'\" ")[:10], '%Y-%m-%d').date()
+    except ValueError:
+        return []
+
+    partitions = []
+    current = start
+    while current <= end:
+        last_day = calendar.monthrange(current.year, current.month)[1]
+        month_end = min(date(current.year, current.month, last_day), end)
+        partitions.append({
+            'start_date': current.isoformat(),
+            'end_date': month_end.isoformat(),
+            'month': f"{current.month:02d}"
+        })
+        current = month_end.replace(day=1)
+        current = date(current.year + (current.month == 12), current.month % 12 + 1, 1)
+    return partitions
@@ -0,0 +1,366 @@
+#!/usr/bin/env python3
+"""
+Table Statistics - estimasi row count tabel tanpa COUNT(*) full scan
+READ-ONLY ACCESS - No data modification
+
+Firebird tidak menyimpan jumlah row per tabel; COUNT(*) selalu membaca seluruh
+tabel. Layar validasi / database health cukup memakai estimasi:
+- Exact count yang sudah pernah dihitung untuk snapshot database yang sama
+  (fingerprint: path, ukuran, mtime) dipakai ulang tanpa query
+- Selectivity index unik (RDB$INDICES.RDB$STATISTICS = 1 / jumlah row saat
+  statistik terakhir dihitung) dibaca untuk semua tabel dalam SATU query metadata
+- Exact count dari snapshot lama database yang sama dipakai sebagai estimasi
+- Tabel tanpa estimasi dicek dengan EXISTS (berhenti di row pertama) sehingga
+  tabel kosong tetap diketahui pasti 0
+
+Exact count tetap tersedia on demand (exact_row_counts), dihitung dalam satu
+statement per batch tabel dan di-cache per fingerprint.
+
+    statistics = get_table_statistics(db_path)
+    estimates = statistics.estimate_row_counts(tables, run_query)
+    # {'FFBSCANNERDATA04': {'rows': 120345, 'exact': False, 'source': 'index_statistics'}}
+    counts = statistics.exact_row_counts(['FFBSCANNERDATA04'], run_query)
+
+Version: 1.0.0
+"""
+
+import os
+import re
+import json
+import hashlib
+import logging
+import threading
+from collections.abc import Mapping
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+DEFAULT_CACHE_DIR = Path(__file__).parent / 'cache' / 'table_statistics'
+
+# Jumlah subquery per statement batch (batas panjang statement Firebird 64KB)
+BATCH_SIZE = 50
+
+# Sumber estimasi
+SOURCE_COUNT = 'count'                      # exact, snapshot saat ini
+SOURCE_EMPTY = 'empty'                      # exact 0 dari cek EXISTS
+SOURCE_INDEX_STATISTICS = 'index_statistics'
+SOURCE_STALE_COUNT = 'stale_count'          # exact count snapshot lama
+SOURCE_EXISTS = 'exists'                    # berisi data, jumlah tidak diketahui
+SOURCE_UNKNOWN = 'unknown'
+
+INDEX_STATISTICS_SQL = """
+SELECT TRIM(I.RDB$RELATION_NAME) AS TABLE_NAME, MIN(I.RDB$STATISTICS) AS SELECTIVITY
+FROM RDB$INDICES I
+JOIN RDB$RELATIONS R ON R.RDB$RELATION_NAME = I.RDB$RELATION_NAME
+WHERE I.RDB$UNIQUE_FLAG = 1
+  AND I.RDB$STATISTICS > 0
+  AND (R.RDB$SYSTEM_FLAG = 0 OR R.RDB$SYSTEM_FLAG IS NULL)
+GROUP BY I.RDB$RELATION_NAME
+"""
+
+TABLE_NAME_PATTERN = re.compile(r'^[A-Za-z][\w$]*$')
+
+_PROVIDERS = {}
+_PROVIDERS_LOCK = threading.Lock()
+
+logger = logging.getLogger(__name__)
+
+
+def get_table_statistics(db_path: Optional[str], cache_dir: Optional[str] = None) -> Optional['TableStatistics']:
+    """TableStatistics bersama per database (None jika file database tidak ada)"""
+    if not db_path or not os.path.exists(db_path):
+        return None
+
+    key = (os.path.abspath(db_path), str(cache_dir or DEFAULT_CACHE_DIR))
+    with _PROVIDERS_LOCK:
+        if key not in _PROVIDERS:
+            _PROVIDERS[key] = TableStatistics(db_path, cache_dir)
+        return _PROVIDERS[key]
+
+
+def database_fingerprint(db_path: str) -> str:
+    """Fingerprint snapshot database (sama dengan dimension_cache.database_fingerprint)"""
+    stat = os.stat(db_path)
+    raw = f"{os.path.abspath(db_path)}|{stat.st_size}|{stat.st_mtime_ns}"
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+def query_records(result: Any) -> List[Dict[str, Any]]:
+    """Row hasil execute_query (format [{'headers', 'rows'}] atau list of dict)"""
+    if not result:
+        return []
+    first = result[0]
+    rows = first['rows'] if isinstance(first, dict) and 'rows' in first and 'headers' in first else result
+    return [dict(row) for row in rows or [] if isinstance(row, Mapping)]
+
+
+def format_row_count(rows: Optional[int], exact: bool = True) -> str:
+    """Teks row count untuk tampilan: '12,345', '~12,345' (estimasi) atau 'has data'"""
+    if rows is None:
+        return 'has data'
+    return f"{rows:,}" if exact else f"~{rows:,}"
+
+
+def _to_int(value: Any) -> Optional[int]:
+    try:
+        return int(float(str(value).strip()))
+    except (TypeError, ValueError):
+        return None
+
+
+def _valid_tables(tables: Iterable[str]) -> List[str]:
+    """Nama tabel (upper, unik, urutan tetap); nama yang tidak aman dilewati"""
+    valid = []
+    for table in tables:
+        name = str(table).strip().upper()
+        if not TABLE_NAME_PATTERN.match(name):
+            logger.warning(f"Skipping invalid table name: {table!r}")
+            continue
+        if name not in valid:
+            valid.append(name)
+    return valid
+
+
+def _batches(items: List[str], size: int = BATCH_SIZE):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+class TableStatistics:
+    """
+    Estimasi dan exact row count tabel untuk satu database
+    """
+
+    def __init__(self, db_path: str, cache_dir: Optional[str] = None):
+        """
+        Args:
+            db_path: Path file database (.FDB)
+            cache_dir: Folder penyimpanan cache (default: cache/table_statistics)
+        """
+        self.db_path = db_path
+        self.cache_dir = Path(cache_dir) if cache_dir else DEFAULT_CACHE_DIR
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+
+        self.fingerprint = None
+        self.counts = {}            # tabel -> {'rows', 'fingerprint', 'counted_at'}
+        self.index_rows = None      # tabel -> row (snapshot saat ini; None = belum dibaca)
+        self.has_rows = {}          # tabel -> bool (snapshot saat ini)
+        self._loaded = False
+
+    @property
+    def cache_file(self) -> Path:
+        """Satu file per database; exact count snapshot lama tetap disimpan sebagai estimasi"""
+        path_hash = hashlib.sha1(os.path.abspath(self.db_path).encode('utf-8')).hexdigest()[:8]
+        return self.cache_dir / f"{Path(self.db_path).stem}_{path_hash}.json"
+
+    def _check_snapshot(self):
+        """Muat cache sekali; reset statistik snapshot jika database berubah (panggil dengan lock)"""
+        try:
+            fingerprint = database_fingerprint(self.db_path)
+        except OSError:
+            fingerprint = None
+
+        if not self._loaded:
+            self._loaded = True
+            self._load(fingerprint)
+
+        if fingerprint != self.fingerprint:
+            self.fingerprint = fingerprint
+            self.index_rows = None
+            self.has_rows = {}
+
+    def _load(self, fingerprint: Optional[str]):
+        try:
+            if not self.cache_file.exists():
+                return
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                payload = json.load(f)
+            self.counts = payload.get('counts', {})
+            snapshot = payload.get('snapshot') or {}
+            if fingerprint and snapshot.get('fingerprint') == fingerprint:
+                self.fingerprint = fingerprint
+                self.index_rows = snapshot.get('index_rows')
+                self.has_rows = snapshot.get('has_rows', {})
+        except Exception as e:
+            self.logger.warning(f"Could not read table statistics {self.cache_file}: {e}")
+            self.counts = {}
+
+    def _save(self):
+        """Simpan cache (tulis ke file sementara lalu rename; panggil dengan lock)"""
+        if not self.fingerprint:
+            return
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            payload = {
+                'database': os.path.abspath(self.db_path),
+                'saved_at': datetime.now().isoformat(),
+                'counts': self.counts,
+                'snapshot': {
+                    'fingerprint': self.fingerprint,
+                    'index_rows': self.index_rows,
+                    'has_rows': self.has_rows
+                }
+            }
+            temp_path = self.cache_file.with_name(self.cache_file.name + '.tmp')
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(payload, f, indent=2, default=str)
+            os.replace(temp_path, self.cache_file)
+        except Exception as e:
+            self.logger.warning(f"Could not save table statistics {self.cache_file}: {e}")
+
+    # ------------------------------------------------------------- queries
+
+    def _read_index_rows(self, run_query: Callable[[str], Any]) -> Dict[str, int]:
+        """Estimasi row semua tabel dari selectivity index unik (satu query metadata)"""
+        rows = {}
+        for record in query_records(run_query(INDEX_STATISTICS_SQL)):
+            values = list(record.values())
+            if len(values) < 2:
+                continue
+            table = str(values[0]).strip().upper()
+            try:
+                selectivity = float(str(values[1]).strip())
+            except ValueError:
+                continue
+            if table and selectivity > 0:
+                rows[table] = int(round(1.0 / selectivity))
+        return rows
+
+    def _batch_scalars(self, tables: List[str], expression: str,
+                       run_query: Callable[[str], Any]) -> Dict[str, Optional[int]]:
+        """
+        Satu nilai per tabel dalam satu statement per batch:
+        SELECT <expr T1> AS C0, <expr T2> AS C1, ... FROM RDB$DATABASE
+        """
+        values = {}
+        for batch in _batches(tables):
+            columns = ",\n       ".join(f"{expression.format(table=table)} AS C{index}"
+                                        for index, table in enumerate(batch))
+            records = query_records(run_query(f"SELECT {columns}\nFROM RDB$DATABASE"))
+            record = records[0] if records else {}
+            for index, table in enumerate(batch):
+                values[table] = _to_int(record.get(f"C{index}"))
+        return values
+
+    # --------------------------------------------------------------- public
+
+    def estimate_row_counts(self, tables: Iterable[str], run_query: Callable[[str], Any],
+                            check_empty: bool = True) -> Dict[str, Dict[str, Any]]:
+        """
+        Estimasi row count tanpa COUNT(*)
+
+        Args:
+            tables: Nama tabel
+            run_query: Fungsi eksekusi SQL (connector.execute_query)
+            check_empty: Cek EXISTS untuk tabel tanpa estimasi (tabel kosong = exact 0)
+
+        Returns:
+            {tabel: {'rows': int atau None, 'exact': bool, 'source': str}};
+            rows None berarti tabel berisi data tetapi jumlahnya tidak diketahui
+            (source 'exists') atau tidak bisa dicek (source 'unknown')
+        """
+        tables = _valid_tables(tables)
+        with self._lock:
+            self._check_snapshot()
+            need_index = self.index_rows is None
+
+        if need_index:
+            try:
+                index_rows = self._read_index_rows(run_query)
+            except Exception as e:
+                self.logger.warning(f"Could not read index statistics for {self.db_path}: {e}")
+                index_rows = {}
+            with self._lock:
+                self.index_rows = index_rows
+                self._save()
+
+        with self._lock:
+            estimates = {table: self._estimate(table) for table in tables}
+
+        unresolved = [table for table, estimate in estimates.items()
+                      if estimate['source'] == SOURCE_UNKNOWN]
+        if check_empty and unresolved:
+            try:
+                found = self._batch_scalars(
+                    unresolved, "CASE WHEN EXISTS (SELECT 1 FROM {table}) THEN 1 ELSE 0 END", run_query)
+            except Exception as e:
+                self.logger.warning(f"Could not check empty tables in {self.db_path}: {e}")
+                found = {}
+            with self._lock:
+                for table, value in found.items():
+                    if value is None:
+                        continue
+                    self.has_rows[table] = bool(value)
+                    if not value:
+                        self._store_count(table, 0)
+                    estimates[table] = self._estimate(table)
+                self._save()
+
+        return estimates
+
+    def _estimate(self, table: str) -> Dict[str, Any]:
+        """Estimasi terbaik dari cache (panggil dengan lock)"""
+        count = self.counts.get(table)
+        if count and self.fingerprint and count.get('fingerprint') == self.fingerprint:
+            source = SOURCE_EMPTY if count.get('source') == SOURCE_EMPTY else SOURCE_COUNT
+            return {'rows': count['rows'], 'exact': True, 'source': source}
+        if self.index_rows and table in self.index_rows:
+            return {'rows': self.index_rows[table], 'exact': False, 'source': SOURCE_INDEX_STATISTICS}
+        if count and count['rows'] > 0:
+            # Tabel yang dulu kosong dicek ulang (EXISTS), mungkin sekarang berisi data
+            return {'rows': count['rows'], 'exact': False, 'source': SOURCE_STALE_COUNT}
+        if self.has_rows.get(table):
+            return {'rows': None, 'exact': False, 'source': SOURCE_EXISTS}
+        return {'rows': None, 'exact': False, 'source': SOURCE_UNKNOWN}
+
+    def _store_count(self, table: str, rows: int):
+        """Simpan exact count untuk snapshot saat ini (panggil dengan lock)"""
+        entry = {'rows': rows, 'fingerprint': self.fingerprint, 'counted_at': datetime.now().isoformat()}
+        if rows == 0 and self.has_rows.get(table) is False:
+            entry['source'] = SOURCE_EMPTY
+        self.counts[table] = entry
+        self.has_rows[table] = rows > 0
+
+    def exact_row_counts(self, tables: Iterable[str], run_query: Callable[[str], Any],
+                         refresh: bool = False) -> Dict[str, int]:
+        """
+        Exact row count (COUNT(*)); hasil snapshot saat ini dipakai ulang kecuali refresh
+
+        Args:
+            tables: Nama tabel
+            run_query: Fungsi eksekusi SQL (connector.execute_query)
+            refresh: Hitung ulang walaupun sudah ada count untuk snapshot ini
+
+        Returns:
+            {tabel: row}; tabel yang gagal dihitung tidak ada di hasil
+        """
+        tables = _valid_tables(tables)
+        counts = {}
+        with self._lock:
+            self._check_snapshot()
+            for table in tables:
+                estimate = self._estimate(table)
+                if not refresh and estimate['exact']:
+                    counts[table] = estimate['rows']
+
+        todo = [table for table in tables if table not in counts]
+        if todo:
+            self.logger.info(f"Counting rows of {len(todo)} tables in {os.path.basename(self.db_path)}")
+            fresh = self._batch_scalars(todo, "(SELECT COUNT(*) FROM {table})", run_query)
+            with self._lock:
+                for table, rows in fresh.items():
+                    if rows is None:
+                        continue
+                    self._store_count(table, rows)
+                    counts[table] = rows
+                self._save()
+
+        return {table: counts[table] for table in tables if table in counts}
+
+    def invalidate(self):
+        """Lupakan statistik snapshot saat ini (exact count tetap sebagai stale estimate)"""
+        with self._lock:
+            self.index_rows = None
+            self.has_rows = {}
+            self._save()
@@ -0,0 +1,3 @@
+"""
+Test modules for report_common
+"""
@@ -0,0 +1,134 @@
+"""
+ETL Artifacts Tests
+Test writing a run, reading it back (replay) and retention
+"""
+
+import unittest
+import os
+import sys
+import shutil
+import tempfile
+
+import pandas as pd
+
+# Add repository root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from report_common.etl_artifacts import (
+    FORMAT_NDJSON, FORMAT_PARQUET, PARQUET_AVAILABLE, ArtifactStore, RetentionPolicy,
+    extraction_fingerprint, load_artifact, read_manifest
+)
+
+NO_RETENTION = RetentionPolicy(max_runs_per_estate=None, max_age_days=None, max_total_mb=None)
+
+
+class TestArtifactRoundTrip(unittest.TestCase):
+    """Test that load_artifact returns the query results that were written"""
+
+    storage_format = FORMAT_NDJSON
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.store = ArtifactStore(self.test_dir, storage_format=self.storage_format, retention=NO_RETENTION)
+        self.parameters = {'estate_name': 'PGE 2B', 'start_date': '2025-01-01', 'end_date': '2025-01-31'}
+        self.frame = pd.DataFrame({
+            'FIELDNO': ['001', '002', None],
+            'RIPEBCH': [10, 20, 30],
+            'WEIGHT': [1.5, None, 3.25],
+            'TRANSDATE': pd.to_datetime(['2025-01-01', '2025-01-02', '2025-01-03'])
+        })
+        self.query_results = {
+            'ffb_frame': self.frame,
+            'ffb_records': [{'SCANUSERID': 'A1', 'TOTAL': 5}, {'SCANUSERID': 'B2', 'TOTAL': None}],
+            'ffb_isql': [{'headers': ['DIVNAME', 'ROWS_'], 'rows': [{'DIVNAME': 'DIV I', 'ROWS_': 7}]}],
+            'empty_records': [],
+            'estate_name': 'PGE 2B',
+            'row_total': 42
+        }
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def test_round_trip_keeps_shapes_and_values(self):
+        run_dir = self.store.write_run(self.query_results, self.parameters,
+                                       timings={'extract': 1.5}, summary_text='summary')
+        loaded = load_artifact(run_dir)
+        results = loaded['query_results']
+
+        self.assertEqual(list(results), list(self.query_results))
+        pd.testing.assert_frame_equal(results['ffb_frame'], self.frame, check_dtype=False)
+        self.assertEqual(results['ffb_frame']['RIPEBCH'].dtype, self.frame['RIPEBCH'].dtype)
+        self.assertEqual(results['ffb_records'], self.query_results['ffb_records'])
+        self.assertEqual(results['ffb_isql'], self.query_results['ffb_isql'])
+        self.assertEqual(results['empty_records'], [])
+        self.assertEqual(results['estate_name'], 'PGE 2B')
+        self.assertEqual(results['row_total'], 42)
+        self.assertEqual(loaded['parameters'], self.parameters)
+        self.assertEqual(loaded['timings'], {'extract': 1.5})
+        self.assertTrue((run_dir / 'summary.txt').exists())
+
+    def test_as_records_converts_frames(self):
+        run_dir = self.store.write_run({'ffb_frame': self.frame}, self.parameters)
+        records = load_artifact(run_dir / 'manifest.json', as_records=True)['query_results']['ffb_frame']
+        self.assertEqual(len(records), 3)
+        self.assertIsNone(records[2]['FIELDNO'])
+        self.assertEqual(records[0]['RIPEBCH'], 10)
+
+    def test_missing_manifest_raises(self):
+        with self.assertRaises(FileNotFoundError):
+            load_artifact(self.test_dir)
+
+
+@unittest.skipUnless(PARQUET_AVAILABLE, "pyarrow not installed")
+class TestParquetRoundTrip(TestArtifactRoundTrip):
+    """Same round trip with Parquet storage"""
+
+    storage_format = FORMAT_PARQUET
+
+
+class TestArtifactStore(unittest.TestCase):
+    """Test run lookup and retention"""
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.store = ArtifactStore(self.test_dir, storage_format=FORMAT_NDJSON, retention=NO_RETENTION)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def _write(self, estate, start_date, mode='run'):
+        parameters = {'estate_name': estate, 'start_date': start_date}
+        return self.store.write_run({'rows': [{'A': 1}]}, parameters, mode=mode)
+
+    def test_find_and_latest_run(self):
+        january = self._write('PGE 1A', '2025-01-01')
+        february = self._write('PGE 1A', '2025-02-01')
+        preview = self._write('PGE 1A', '2025-02-01', mode='preview')
+
+        self.assertEqual(self.store.latest_run('PGE 1A'), str(preview))
+        self.assertEqual(self.store.latest_run('PGE 1A', mode='run'), str(february))
+        self.assertEqual(self.store.latest_run('PGE 1A', start_date='2025-01-01'), str(january))
+        self.assertIsNone(self.store.latest_run('PGE 2A'))
+
+        fingerprint = read_manifest(january)['fingerprint']
+        self.assertEqual(fingerprint, extraction_fingerprint({'estate_name': 'PGE 1A', 'start_date': '2025-01-01'}))
+        self.assertEqual(self.store.find_run(fingerprint), str(january))
+
+    def test_retention_keeps_newest_runs_per_estate(self):
+        runs = [self._write('PGE 1A', f"2025-0{month}-01") for month in (1, 2, 3)]
+        other = self._write('PGE 2A', '2025-01-01')
+        for age, run_dir in enumerate(reversed(runs)):
+            mtime = 1_700_000_000 - age * 60
+            os.utime(run_dir, (mtime, mtime))
+        os.utime(other, (1_600_000_000, 1_600_000_000))
+
+        self.store.retention = RetentionPolicy(max_runs_per_estate=2, max_age_days=None, max_total_mb=None)
+        removed = self.store.apply_retention()
+
+        self.assertEqual(removed, [str(runs[0])])
+        self.assertEqual(len(self.store.list_runs('PGE 1A')), 2)
+        self.assertEqual(len(self.store.list_runs('PGE 2A')), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+"""
+ISQL Policy Tests
+Test adaptive timeouts, retries, history keys and cache persistence
+"""
+
+import unittest
+import os
+import sys
+import shutil
+import tempfile
+import subprocess
+from unittest import mock
+
+# Add repository root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from report_common import isql_policy
+from report_common.isql_policy import ExecutionPolicy, query_key
+
+MONTH_SQL = "SELECT * FROM FFBSCANNERDATA01 WHERE TRANSDATE BETWEEN '2025-01-01' AND '2025-01-31'"
+
+
+class TestIsqlPolicy(unittest.TestCase):
+    """Test ExecutionPolicy"""
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.policy = ExecutionPolicy('/opt/firebird/bin/isql', self.test_dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def _seed(self, sql, seconds, samples=isql_policy.MIN_SAMPLES):
+        for _ in range(samples):
+            self.policy.record_latency(sql, seconds)
+
+    def test_query_key_ignores_literals_but_not_date_span(self):
+        other_month = MONTH_SQL.replace("'2025-01-01' AND '2025-01-31'", "'2025-03-01' AND '2025-03-31'")
+        one_day = MONTH_SQL.replace("'2025-01-31'", "'2025-01-01'")
+        other_table = MONTH_SQL.replace('FFBSCANNERDATA01', 'FFBSCANNERDATA02')
+        self.assertEqual(query_key(MONTH_SQL), query_key(other_month))
+        self.assertNotEqual(query_key(MONTH_SQL), query_key(one_day))
+        self.assertNotEqual(query_key(MONTH_SQL), query_key(other_table))
+
+    def test_without_history_first_attempt_uses_max_timeout(self):
+        self.assertEqual(self.policy.attempt_timeouts(MONTH_SQL), [isql_policy.MAX_TIMEOUT])
+        self.assertEqual(self.policy.attempt_timeouts(MONTH_SQL, max_timeout=90), [90])
+
+    def test_last_attempt_reaches_max_timeout(self):
+        self._seed(MONTH_SQL, 2.0)
+        self.assertEqual(self.policy.attempt_timeouts(MONTH_SQL), [30, 60, 300])
+
+    def test_timeout_follows_latency_history(self):
+        self._seed(MONTH_SQL, 25.0)
+        self.assertEqual(self.policy.timeout_for(MONTH_SQL), 100)
+        self.assertEqual(self.policy.attempt_timeouts(MONTH_SQL), [100, 200, 300])
+
+    def test_run_with_retries_escalates_until_success(self):
+        self._seed(MONTH_SQL, 2.0)
+        seen = []
+
+        def run(timeout):
+            seen.append(timeout)
+            if len(seen) < 3:
+                raise subprocess.TimeoutExpired('isql', timeout)
+            return 'rows'
+
+        with mock.patch.object(isql_policy.time, 'sleep') as sleep:
+            self.assertEqual(self.policy.run_with_retries(MONTH_SQL, run), 'rows')
+        self.assertEqual(seen, [30, 60, 300])
+        self.assertEqual(sleep.call_count, 2)
+        # Batas yang sudah terlewati langsung dinaikkan untuk query yang sama
+        self.assertEqual(self.policy.timeout_for(MONTH_SQL), 60 * isql_policy.BACKOFF_FACTOR)
+
+    def test_run_with_retries_raises_after_last_attempt(self):
+        self._seed(MONTH_SQL, 2.0)
+
+        def run(timeout):
+            raise subprocess.TimeoutExpired('isql', timeout)
+
+        with mock.patch.object(isql_policy.time, 'sleep'):
+            with self.assertRaises(subprocess.TimeoutExpired):
+                self.policy.run_with_retries(MONTH_SQL, run)
+
+    def test_latency_save_is_deferred_until_flush(self):
+        self._seed(MONTH_SQL, 2.0)
+        self.assertFalse(self.policy.cache_file.exists())
+
+        self.policy.flush()
+        self.assertTrue(self.policy.cache_file.exists())
+        reloaded = ExecutionPolicy('/opt/firebird/bin/isql', self.test_dir)
+        self.assertEqual(reloaded.attempt_timeouts(MONTH_SQL), [30, 60, 300])
+
+    def test_latency_is_saved_after_save_interval(self):
+        with mock.patch.object(isql_policy, 'SAVE_INTERVAL', 0):
+            self.policy.record_latency(MONTH_SQL, 1.0)
+        self.assertTrue(self.policy.cache_file.exists())
+
+    def test_forms_prefer_verified_form(self):
+        available = ('stdin', 'input_file')
+        self.assertEqual(self.policy.forms(available), ['stdin', 'input_file'])
+        self.assertFalse(self.policy.form_verified)
+
+        self.policy.record_form('input_file', failed_forms=['stdin'])
+        self.assertEqual(self.policy.forms(available), ['input_file'])
+
+        reloaded = ExecutionPolicy('/opt/firebird/bin/isql', self.test_dir)
+        self.assertTrue(reloaded.form_verified)
+        self.assertEqual(reloaded.forms(('stdin', 'input_file', 'other')), ['input_file'])
+
+
+if __name__ == '__main__':
+    unittest.main()
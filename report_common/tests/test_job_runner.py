@@ -0,0 +1,147 @@
+"""
+Job Runner Tests
+Test background jobs, GUI-thread dispatch, concurrency limit and cancellation
+"""
+
+import unittest
+import os
+import sys
+import time
+import threading
+
+# Add repository root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from report_common.job_runner import CANCELLED, DONE, FAILED, JobRunner, gui_thread
+
+
+def wait_for(runner, jobs, timeout=5.0):
+    """Poll runner (seperti root.after) sampai semua job selesai"""
+    deadline = time.monotonic() + timeout
+    while not all(job.finished for job in jobs):
+        if time.monotonic() > deadline:
+            raise AssertionError("jobs did not finish in time")
+        runner.poll()
+        time.sleep(0.01)
+
+
+class TestJobRunner(unittest.TestCase):
+    """Test JobRunner without a Tk root (poll() called manually)"""
+
+    def setUp(self):
+        self.runner = JobRunner(max_workers=2)
+
+    def tearDown(self):
+        self.runner.shutdown(wait=1)
+
+    def test_callbacks_run_on_polling_thread(self):
+        events = []
+        callback_threads = set()
+
+        def work(job, value):
+            job.progress(50, 'half')
+            job.log('working')
+            return value * 2
+
+        def record(kind):
+            def callback(*args):
+                callback_threads.add(threading.current_thread())
+                events.append((kind,) + args)
+            return callback
+
+        job = self.runner.submit(work, 21, on_success=record('success'), on_progress=record('progress'),
+                                 on_log=record('log'), on_finish=lambda job: events.append(('finish', job.state)))
+        wait_for(self.runner, [job])
+
+        self.assertEqual(job.state, DONE)
+        self.assertEqual(job.result, 42)
+        self.assertEqual(events, [('progress', 50, 'half'), ('log', 'working', 'info'),
+                                  ('success', 42), ('finish', DONE)])
+        self.assertEqual(callback_threads, {threading.current_thread()})
+
+    def test_error_is_reported(self):
+        errors = []
+
+        def work(job):
+            raise ValueError('boom')
+
+        job = self.runner.submit(work, on_error=errors.append)
+        wait_for(self.runner, [job])
+        self.assertEqual(job.state, FAILED)
+        self.assertEqual(str(errors[0]), 'boom')
+
+    def test_max_workers_limits_running_jobs(self):
+        release = threading.Event()
+        running = []
+        lock = threading.Lock()
+        peak = []
+
+        def work(job):
+            with lock:
+                running.append(job)
+                peak.append(len(running))
+            release.wait(5)
+            with lock:
+                running.remove(job)
+
+        jobs = [self.runner.submit(work) for _ in range(4)]
+        time.sleep(0.1)
+        self.assertEqual(len(self.runner.jobs()), 4)
+        release.set()
+        wait_for(self.runner, jobs)
+        self.assertLessEqual(max(peak), 2)
+        self.assertTrue(all(job.state == DONE for job in jobs))
+
+    def test_replace_cancels_previous_job_in_group(self):
+        started = threading.Event()
+        killed = []
+
+        def slow(job):
+            job.add_cancel_callback(lambda: killed.append(job.name))
+            started.set()
+            while True:
+                job.check_cancelled()
+                time.sleep(0.01)
+
+        cancelled = []
+        first = self.runner.submit(slow, name='old', group='preview', on_cancel=lambda: cancelled.append('old'))
+        started.wait(5)
+        second = self.runner.submit(lambda job: 'new', name='new', group='preview', replace=True)
+        wait_for(self.runner, [first, second])
+
+        self.assertEqual(first.state, CANCELLED)
+        self.assertEqual(killed, ['old'])
+        self.assertEqual(cancelled, ['old'])
+        self.assertEqual(second.result, 'new')
+        self.assertFalse(self.runner.is_busy('preview'))
+
+    def test_gui_thread_decorator_defers_worker_calls(self):
+        calls = []
+
+        class Window:
+            job_runner = self.runner
+
+            @gui_thread
+            def log_message(self, message):
+                calls.append((message, threading.current_thread()))
+                return message
+
+        window = Window()
+        self.assertEqual(window.log_message('direct'), 'direct')
+
+        worker = threading.Thread(target=lambda: calls.append(('returned', window.log_message('from worker'))))
+        worker.start()
+        worker.join()
+        self.runner.poll()
+
+        self.assertEqual(calls[1], ('returned', None))
+        self.assertEqual(calls[2], ('from worker', threading.main_thread()))
+
+    def test_submit_after_shutdown_raises(self):
+        self.runner.shutdown()
+        with self.assertRaises(RuntimeError):
+            self.runner.submit(lambda job: None)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+"""
+Sheet Extents Tests
+Test per-row column extents and shifting after row insert/delete
+"""
+
+import unittest
+import os
+import sys
+import shutil
+import tempfile
+
+from openpyxl import Workbook, load_workbook
+from openpyxl.styles import Font
+
+# Add repository root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from report_common.sheet_extents import compute_row_extents, shift_row_extents
+
+
+class TestComputeRowExtents(unittest.TestCase):
+    """Test compute_row_extents on regular and read-only worksheets"""
+
+    def setUp(self):
+        self.workbook = Workbook()
+        self.sheet = self.workbook.active
+        self.sheet['B2'] = 'Header'
+        self.sheet['E2'] = '{{data.NAME}}'
+        self.sheet['C4'].font = Font(bold=True)
+
+    def test_value_and_style_cells(self):
+        """Rows with values or styles get (first, last); empty rows are absent"""
+        self.assertEqual(compute_row_extents(self.sheet), {2: (2, 5), 4: (3, 3)})
+
+    def test_does_not_create_cells_across_used_range(self):
+        """A far-away formatted cell must not make the scan fill the used range"""
+        self.sheet.cell(row=2000, column=500).font = Font(italic=True)
+        stored_before = len(self.sheet._cells)
+
+        extents = compute_row_extents(self.sheet)
+
+        self.assertEqual(len(self.sheet._cells), stored_before)
+        self.assertEqual(extents[2000], (500, 500))
+        self.assertEqual(len(extents), 3)
+
+    def test_read_only_worksheet(self):
+        """Read-only worksheets have no _cells mapping and are streamed instead"""
+        test_dir = tempfile.mkdtemp()
+        try:
+            path = os.path.join(test_dir, 'template.xlsx')
+            self.workbook.save(path)
+            read_only = load_workbook(path, read_only=True)
+            try:
+                self.assertEqual(compute_row_extents(read_only.active), {2: (2, 5), 4: (3, 3)})
+            finally:
+                read_only.close()
+        finally:
+            shutil.rmtree(test_dir)
+
+
+class TestShiftRowExtents(unittest.TestCase):
+    """Test shift_row_extents after insert_rows/delete_rows"""
+
+    def setUp(self):
+        self.extents = {1: (1, 3), 5: (2, 4), 6: (1, 1)}
+
+    def test_insert_shifts_rows_from_insert_point(self):
+        self.assertEqual(shift_row_extents(self.extents, 5, 2), {1: (1, 3), 7: (2, 4), 8: (1, 1)})
+
+    def test_delete_drops_removed_rows(self):
+        self.assertEqual(shift_row_extents(self.extents, 5, -1), {1: (1, 3), 5: (1, 1)})
+
+    def test_zero_amount_is_noop(self):
+        self.assertIs(shift_row_extents(self.extents, 5, 0), self.extents)
+
+
+if __name__ == '__main__':
+    unittest.main()
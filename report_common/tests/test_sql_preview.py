@@ -0,0 +1,166 @@
+"""
+SQL Preview Tests
+Test preview SQL rewriting (FIRST/ROWS, sampled aggregates, month partitions)
+"""
+
+import unittest
+import os
+import sys
+
+# Add repository root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from report_common.sql_preview import (
+    connector_supports_derived_tables, engine_version, has_top_level, is_aggregate_query, limit_select,
+    month_partitions, preview_sql, sample_source, supports_derived_tables
+)
+
+
+class TestLimitSelect(unittest.TestCase):
+    """Test FIRST n placement on the outer projection"""
+
+    def test_adds_first_to_outer_select(self):
+        self.assertEqual(limit_select("SELECT * FROM FFBSCANNERDATA01;", 10),
+                         "SELECT FIRST 10 * FROM FFBSCANNERDATA01")
+
+    def test_subquery_select_is_not_limited(self):
+        sql = "SELECT A FROM T WHERE B IN (SELECT B FROM U)"
+        self.assertEqual(limit_select(sql, 5),
+                         "SELECT FIRST 5 A FROM T WHERE B IN (SELECT B FROM U)")
+
+    def test_cte_limits_main_query(self):
+        sql = "WITH X AS (SELECT * FROM T) SELECT * FROM X"
+        self.assertEqual(limit_select(sql, 5),
+                         "WITH X AS (SELECT * FROM T) SELECT FIRST 5 * FROM X")
+
+    def test_existing_first_is_lowered_not_raised(self):
+        self.assertEqual(limit_select("SELECT FIRST 100 * FROM T", 5), "SELECT FIRST 5 * FROM T")
+        self.assertEqual(limit_select("SELECT FIRST 3 * FROM T", 5), "SELECT FIRST 3 * FROM T")
+
+    def test_union_is_wrapped(self):
+        sql = "SELECT A FROM T UNION ALL SELECT A FROM U"
+        self.assertEqual(limit_select(sql, 5), f"SELECT FIRST 5 * FROM ({sql}) PREVIEW_ROWS")
+
+    def test_rows_clause_is_rewritten_instead_of_adding_first(self):
+        self.assertEqual(limit_select("SELECT * FROM T ROWS 100", 5), "SELECT * FROM T ROWS 5")
+        self.assertEqual(limit_select("SELECT * FROM T ROWS 3", 5), "SELECT * FROM T ROWS 3")
+        self.assertEqual(limit_select("SELECT * FROM T ORDER BY A ROWS 11 TO 200", 5),
+                         "SELECT * FROM T ORDER BY A ROWS 11 TO 15")
+
+    def test_non_literal_rows_is_left_alone(self):
+        self.assertEqual(limit_select("SELECT * FROM T ROWS :N", 5), "SELECT * FROM T ROWS :N")
+
+    def test_rows_in_subquery_does_not_block_first(self):
+        sql = "SELECT A FROM T WHERE B IN (SELECT B FROM U ROWS 10)"
+        self.assertTrue(limit_select(sql, 5).startswith("SELECT FIRST 5 A"))
+
+    def test_keywords_in_strings_and_comments_are_ignored(self):
+        sql = "SELECT 'UNION ROWS' AS A FROM T -- ROWS 3\n"
+        self.assertEqual(limit_select(sql, 5), "SELECT FIRST 5 'UNION ROWS' AS A FROM T -- ROWS 3")
+
+    def test_non_select_is_unchanged(self):
+        self.assertEqual(limit_select("SHOW TABLES", 5), "SHOW TABLES")
+
+
+class TestAggregatePreview(unittest.TestCase):
+    """Test sampling of the source table for aggregate previews"""
+
+    def test_is_aggregate_query(self):
+        self.assertTrue(is_aggregate_query("SELECT A, SUM(B) FROM T GROUP BY A"))
+        self.assertTrue(is_aggregate_query("SELECT COUNT(*) FROM T"))
+        self.assertFalse(is_aggregate_query("SELECT A FROM T WHERE B IN (SELECT MAX(B) FROM U)"))
+
+    def test_sample_source_keeps_alias_and_joins(self):
+        sql = "SELECT A.X, SUM(B.Y) FROM FFBSCANNERDATA01 A JOIN OCFIELD B ON A.F = B.ID GROUP BY A.X"
+        self.assertEqual(
+            sample_source(sql, 500),
+            "SELECT A.X, SUM(B.Y) FROM (SELECT FIRST 500 * FROM FFBSCANNERDATA01) A "
+            "JOIN OCFIELD B ON A.F = B.ID GROUP BY A.X")
+
+    def test_sample_source_placeholder_gets_alias(self):
+        self.assertEqual(sample_source("SELECT COUNT(*) FROM {table_name} WHERE A = 1", 10),
+                         "SELECT COUNT(*) FROM (SELECT FIRST 10 * FROM {table_name} WHERE (A = 1)) PREVIEW_SOURCE "
+                         "WHERE A = 1")
+
+    def test_sample_source_pushes_date_range_into_sample(self):
+        """FIRST n runs before the outer WHERE, so the sample must already be filtered"""
+        sql = ("SELECT a.TRANSDATE, COUNT(*) FROM FFBSCANNERDATA01 a "
+               "WHERE a.TRANSDATE BETWEEN '{start_date}' AND '{end_date}' AND a.RECORDTAG = 'PM' "
+               "GROUP BY a.TRANSDATE")
+        self.assertEqual(
+            sample_source(sql, 50),
+            "SELECT a.TRANSDATE, COUNT(*) FROM (SELECT FIRST 50 * FROM FFBSCANNERDATA01 a "
+            "WHERE (a.TRANSDATE BETWEEN '{start_date}' AND '{end_date}') AND (a.RECORDTAG = 'PM')) a "
+            "WHERE a.TRANSDATE BETWEEN '{start_date}' AND '{end_date}' AND a.RECORDTAG = 'PM' "
+            "GROUP BY a.TRANSDATE")
+
+    def test_sample_source_with_join_pushes_source_conditions_only(self):
+        sql = ("SELECT b.NAME, SUM(a.RIPEBCH) FROM FFBSCANNERDATA01 a JOIN OCFIELD b ON a.FIELDID = b.ID "
+               "WHERE a.TRANSDATE BETWEEN '{start_date}' AND '{end_date}' AND b.DIVID = 3 AND STATUS = 1 "
+               "GROUP BY b.NAME")
+        self.assertIn(
+            "FROM (SELECT FIRST 50 * FROM FFBSCANNERDATA01 a "
+            "WHERE (a.TRANSDATE BETWEEN '{start_date}' AND '{end_date}')) a JOIN OCFIELD b",
+            sample_source(sql, 50))
+
+    def test_preview_sql_samples_aggregates_only(self):
+        self.assertEqual(preview_sql("SELECT * FROM T", 5), "SELECT FIRST 5 * FROM T")
+        self.assertEqual(preview_sql("SELECT A, COUNT(*) FROM T GROUP BY A", 5, sample_size=50),
+                         "SELECT FIRST 5 A, COUNT(*) FROM (SELECT FIRST 50 * FROM T) T GROUP BY A")
+
+    def test_without_derived_tables_uses_plain_first(self):
+        """Firebird 1.5: no sampled derived table and no UNION wrapper"""
+        self.assertEqual(preview_sql("SELECT A, COUNT(*) FROM T GROUP BY A", 5, 50, derived_tables=False),
+                         "SELECT FIRST 5 A, COUNT(*) FROM T GROUP BY A")
+        self.assertEqual(limit_select("SELECT A FROM T UNION SELECT A FROM U", 5, derived_tables=False),
+                         "SELECT FIRST 5 A FROM T UNION SELECT A FROM U")
+
+    def test_has_top_level(self):
+        self.assertTrue(has_top_level("SELECT A FROM T UNION SELECT A FROM U", 'union'))
+        self.assertFalse(has_top_level("SELECT * FROM (SELECT A FROM T UNION SELECT A FROM U) X", 'UNION'))
+
+
+class TestEngineVersion(unittest.TestCase):
+    """Test server version detection for derived-table support"""
+
+    def test_version_from_connector_rows(self):
+        result = [{'headers': ['ENGINE_VERSION'], 'rows': [{'ENGINE_VERSION': '2.5.9'}]}]
+        self.assertEqual(engine_version(lambda sql: result), (2, 5))
+        self.assertEqual(engine_version(lambda sql: [{'ENGINE_VERSION': '3.0.10'}]), (3, 0))
+        self.assertIsNone(engine_version(lambda sql: []))
+
+    def test_supports_derived_tables(self):
+        self.assertTrue(supports_derived_tables((2, 0)))
+        self.assertFalse(supports_derived_tables((1, 5)))
+        self.assertFalse(supports_derived_tables(None))
+
+    def test_connector_without_server_version_is_legacy(self):
+        class Connector:
+            def server_version(self):
+                return (2, 5)
+
+        self.assertTrue(connector_supports_derived_tables(Connector()))
+        self.assertFalse(connector_supports_derived_tables(object()))
+        self.assertFalse(connector_supports_derived_tables(None))
+
+
+class TestMonthPartitions(unittest.TestCase):
+    """Test splitting a date range per monthly partition"""
+
+    def test_range_is_cut_at_month_boundaries(self):
+        self.assertEqual(month_partitions('2025-01-20', '2025-03-05'), [
+            {'start_date': '2025-01-20', 'end_date': '2025-01-31', 'month': '01'},
+            {'start_date': '2025-02-01', 'end_date': '2025-02-28', 'month': '02'},
+            {'start_date': '2025-03-01', 'end_date': '2025-03-05', 'month': '03'},
+        ])
+
+    def test_year_rollover(self):
+        months = [partition['month'] for partition in month_partitions("'2024-12-15'", "'2025-01-02'")]
+        self.assertEqual(months, ['12', '01'])
+
+    def test_invalid_dates(self):
+        self.assertEqual(month_partitions('bad', '2025-01-01'), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
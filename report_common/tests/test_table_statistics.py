@@ -0,0 +1,125 @@
+"""
+Table Statistics Tests
+Test row-count estimates, batched exact counts and snapshot caching
+"""
+
+import unittest
+import os
+import re
+import sys
+import shutil
+import tempfile
+
+# Add repository root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from report_common import table_statistics
+from report_common.table_statistics import (
+    INDEX_STATISTICS_SQL, SOURCE_COUNT, SOURCE_EMPTY, SOURCE_EXISTS, SOURCE_INDEX_STATISTICS,
+    SOURCE_STALE_COUNT, TableStatistics, format_row_count, query_records
+)
+
+SCALAR_PATTERN = re.compile(r'FROM (\w+)\)(?: THEN 1 ELSE 0 END)? AS (C\d+)')
+
+
+class FakeDatabase:
+    """run_query palsu: index statistics, cek EXISTS dan COUNT(*) per tabel"""
+
+    def __init__(self, rows, selectivity=None):
+        self.rows = rows
+        self.selectivity = selectivity or {}
+        self.queries = []
+
+    def run_query(self, sql):
+        self.queries.append(sql)
+        if sql == INDEX_STATISTICS_SQL:
+            return [{'headers': ['TABLE_NAME', 'SELECTIVITY'],
+                     'rows': [{'TABLE_NAME': table, 'SELECTIVITY': str(value)}
+                              for table, value in self.selectivity.items()]}]
+        exists = 'EXISTS' in sql
+        record = {}
+        for table, column in SCALAR_PATTERN.findall(sql):
+            rows = self.rows[table]
+            record[column] = str(int(rows > 0) if exists else rows)
+        return [{'headers': list(record), 'rows': [record]}]
+
+
+class TestTableStatistics(unittest.TestCase):
+    """Test TableStatistics against a fake database"""
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.test_dir, 'PTRJ_P2B.FDB')
+        with open(self.db_path, 'wb') as f:
+            f.write(b'snapshot-1')
+        self.cache_dir = os.path.join(self.test_dir, 'cache')
+        self.database = FakeDatabase(
+            {'FFBSCANNERDATA01': 1200, 'FFBSCANNERDATA02': 0, 'FFBSCANNERDATA03': 50, 'OCFIELD': 80},
+            selectivity={'OCFIELD': 0.0125})
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def _change_database(self):
+        with open(self.db_path, 'wb') as f:
+            f.write(b'snapshot-2 with more data')
+
+    def test_estimates_use_index_statistics_and_exists(self):
+        statistics = TableStatistics(self.db_path, self.cache_dir)
+        estimates = statistics.estimate_row_counts(
+            ['OCFIELD', 'FFBSCANNERDATA01', 'ffbscannerdata02', 'BAD NAME;'], self.database.run_query)
+
+        self.assertEqual(list(estimates), ['OCFIELD', 'FFBSCANNERDATA01', 'FFBSCANNERDATA02'])
+        self.assertEqual(estimates['OCFIELD'], {'rows': 80, 'exact': False, 'source': SOURCE_INDEX_STATISTICS})
+        self.assertEqual(estimates['FFBSCANNERDATA01'], {'rows': None, 'exact': False, 'source': SOURCE_EXISTS})
+        self.assertEqual(estimates['FFBSCANNERDATA02'], {'rows': 0, 'exact': True, 'source': SOURCE_EMPTY})
+        # Satu query metadata + satu batch EXISTS, tanpa COUNT(*)
+        self.assertEqual(len(self.database.queries), 2)
+        self.assertNotIn('COUNT(*)', ''.join(self.database.queries))
+
+    def test_exact_counts_are_batched_and_reused(self):
+        statistics = TableStatistics(self.db_path, self.cache_dir)
+        tables = ['FFBSCANNERDATA01', 'FFBSCANNERDATA03']
+        self.assertEqual(statistics.exact_row_counts(tables, self.database.run_query),
+                         {'FFBSCANNERDATA01': 1200, 'FFBSCANNERDATA03': 50})
+        self.assertEqual(len(self.database.queries), 1)
+
+        reloaded = TableStatistics(self.db_path, self.cache_dir)
+        self.assertEqual(reloaded.exact_row_counts(tables, self.database.run_query),
+                         {'FFBSCANNERDATA01': 1200, 'FFBSCANNERDATA03': 50})
+        self.assertEqual(len(self.database.queries), 1)
+
+        estimate = reloaded.estimate_row_counts(['FFBSCANNERDATA01'], self.database.run_query)
+        self.assertEqual(estimate['FFBSCANNERDATA01']['source'], SOURCE_COUNT)
+
+    def test_changed_database_turns_counts_into_stale_estimates(self):
+        statistics = TableStatistics(self.db_path, self.cache_dir)
+        statistics.exact_row_counts(['FFBSCANNERDATA01'], self.database.run_query)
+        self._change_database()
+
+        estimate = statistics.estimate_row_counts(['FFBSCANNERDATA01'], self.database.run_query)
+        self.assertEqual(estimate['FFBSCANNERDATA01'], {'rows': 1200, 'exact': False, 'source': SOURCE_STALE_COUNT})
+
+        self.database.rows['FFBSCANNERDATA01'] = 1500
+        self.assertEqual(statistics.exact_row_counts(['FFBSCANNERDATA01'], self.database.run_query),
+                         {'FFBSCANNERDATA01': 1500})
+
+    def test_large_table_lists_are_split_in_batches(self):
+        tables = [f"T{index}" for index in range(table_statistics.BATCH_SIZE + 5)]
+        self.database.rows.update({table: 1 for table in tables})
+        statistics = TableStatistics(self.db_path, self.cache_dir)
+        counts = statistics.exact_row_counts(tables, self.database.run_query)
+        self.assertEqual(len(counts), len(tables))
+        self.assertEqual(len(self.database.queries), 2)
+
+    def test_helpers(self):
+        self.assertEqual(format_row_count(12345), '12,345')
+        self.assertEqual(format_row_count(12345, exact=False), '~12,345')
+        self.assertEqual(format_row_count(None), 'has data')
+        self.assertEqual(query_records([{'A': 1}]), [{'A': 1}])
+        self.assertEqual(query_records([{'headers': ['A'], 'rows': [{'A': 1}]}]), [{'A': 1}])
+        self.assertEqual(query_records(None), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
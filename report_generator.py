@@ -15,6 +15,7 @@ from openpyxl.utils import get_column_letter
 from openpyxl.worksheet.worksheet import Worksheet
 
 from template_processor import TemplateProcessor
+from report_common.sheet_extents import compute_row_extents, shift_row_extents
 from formula_engine import FormulaEngine
 from firebird_connector import FirebirdConnector
 
@@ -86,6 +87,7 @@ class ReportGenerator:
         self.workbook = None
         self.variables = {}
         self.repeating_data = {}
+        self.row_extents = {}
         
         init_time = time.time() - start_time
         logger.info(f"Report Generator initialized successfully in {init_time:.3f} seconds")
@@ -201,12 +203,15 @@ class ReportGenerator:
             logger.info(f"Template loaded successfully: {sheet_count} sheets")
             logger.debug(f"Sheet names: {self.workbook.sheetnames}")
             
-            # Log sheet details
+            # Log sheet details dan hitung rentang kolom terpakai per row
+            self.row_extents = {}
             for sheet_name in self.workbook.sheetnames:
                 sheet = self.workbook[sheet_name]
                 max_row = sheet.max_row
                 max_col = sheet.max_column
-                logger.debug(f"  Sheet '{sheet_name}': {max_row} rows x {max_col} columns")
+                self.row_extents[sheet_name] = compute_row_extents(sheet)
+                logger.debug(f"  Sheet '{sheet_name}': {max_row} rows x {max_col} columns, "
+                             f"{len(self.row_extents[sheet_name])} used rows")
                 
         except Exception as e:
             logger.error(f"Failed to load template: {e}")
@@ -379,6 +384,9 @@ class ReportGenerator:
                 rows_to_insert = rows_needed - current_rows
                 logger.debug(f"Inserting {rows_to_insert} rows at position {start_row + current_rows}")
                 worksheet.insert_rows(start_row + current_rows, rows_to_insert)
+                self.row_extents[worksheet.title] = shift_row_extents(
+                    self.row_extents.get(worksheet.title, {}), start_row + current_rows, rows_to_insert
+                )
                 
                 # Copy formatting dari template rows
                 logger.debug("Copying template formatting to new rows...")
@@ -437,14 +445,20 @@ class ReportGenerator:
         try:
             # Get template range
             template_end_row = start_row + template_rows - 1
+            row_extents = self.row_extents.setdefault(worksheet.title, {})
             
             # Copy formatting untuk setiap row yang diinsert
             for i in range(rows_to_insert):
                 source_row = start_row + (i % template_rows)
                 target_row = template_end_row + 1 + i
                 
-                # Copy formatting untuk setiap column yang ada data
-                for col in range(1, worksheet.max_column + 1):
+                # Hanya column dalam rentang terpakai template row yang perlu dicopy
+                extent = row_extents.get(source_row)
+                if not extent:
+                    continue
+                row_extents[target_row] = extent
+                
+                for col in range(extent[0], extent[1] + 1):
                     source_cell = worksheet.cell(row=source_row, column=col)
                     target_cell = worksheet.cell(row=target_row, column=col)
                     
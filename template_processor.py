@@ -5,6 +5,11 @@ Menangani pemrosesan template Excel dengan placeholder dan formula
 
 import openpyxl
 from openpyxl.styles import PatternFill, Border, Side, Alignment, Font
+from openpyxl.cell.cell import MergedCell
+from openpyxl.formula.translate import Translator
+from openpyxl.utils import column_index_from_string, quote_sheetname
+from concurrent.futures import ProcessPoolExecutor
+from copy import copy
 import re
 import json
 import os
@@ -14,18 +19,54 @@ import logging
 import time
 from datetime import datetime
 
+from report_common.sheet_extents import compute_row_extents, shift_row_extents
+
+
+def is_native_number(value: Any) -> bool:
+    """Cek apakah value bisa ditulis sebagai angka native Excel (bool tidak termasuk)"""
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def default_number_format(value: Any) -> str:
+    """Number format default untuk angka native: integer tanpa desimal, float 2 desimal"""
+    return '#,##0' if isinstance(value, int) else '#,##0.00'
+
+
+# TemplateProcessor milik worker process, dibuat sekali oleh _init_render_worker
+_WORKER_PROCESSOR = None
+
+
+def _init_render_worker(template_path: str, formula_path: str, output_mode: str):
+    """Initializer ProcessPoolExecutor: load template dan formula sekali per worker"""
+    global _WORKER_PROCESSOR
+    _WORKER_PROCESSOR = TemplateProcessor(template_path, formula_path, output_mode=output_mode, workers=1)
+
+
+def _render_sheet_payload(sheet_name: str, data_context: Dict[str, Any]) -> Dict[str, Any]:
+    """Entry point worker process untuk render satu sheet menjadi cell payload"""
+    return _WORKER_PROCESSOR.render_sheet_payload(sheet_name, data_context)
+
+
 class TemplateProcessor:
     """
     Kelas untuk memproses template Excel dengan placeholder dan formula
     """
     
-    def __init__(self, template_path: str, formula_path: str):
+    OUTPUT_MODES = ('text', 'native')
+    
+    def __init__(self, template_path: str, formula_path: str, output_mode: Optional[str] = None,
+                 workers: Optional[int] = None):
         """
         Inisialisasi TemplateProcessor
         
         Args:
             template_path: Path ke file template Excel
             formula_path: Path ke file definisi formula JSON
+            output_mode: 'text' (default, placeholder diganti string) atau 'native'
+                (angka ditulis sebagai number dengan number_format, total dan rasio
+                sebagai formula Excel). Jika None, diambil dari key 'output_mode' di formula JSON.
+            workers: Default jumlah worker process untuk process_template. Jika None,
+                diambil dari key 'render_workers' di formula JSON (default 1 = sequential).
         """
         # Setup logging
         self.logger = logging.getLogger(__name__)
@@ -46,12 +87,30 @@ class TemplateProcessor:
         self.template_wb = None
         self.formulas = {}
         self.placeholders = {}
+        self.row_extents = {}
+        
+        # State untuk native output mode (di-reset setiap process_template)
+        self._native_cells = {}       # (sheet, variable) -> cell
+        self._section_ranges = {}
+        self._pending_formulas = []
+        self._sheet_extents = {}      # sheet -> row extents sheet hasil render
+        self._row_shifts = {}         # sheet -> [(from_row, amount)] dari insert_rows
         
         # Load template dan formula
         start_time = time.time()
         self._load_template()
         self._load_formulas()
         self._scan_placeholders()
+        self._scan_row_extents()
+        
+        self.output_mode = output_mode or self.formulas.get('output_mode', 'text')
+        if self.output_mode not in self.OUTPUT_MODES:
+            self.logger.warning(f"Unknown output mode '{self.output_mode}', falling back to 'text'")
+            self.output_mode = 'text'
+        self.logger.info(f"Output mode: {self.output_mode}")
+        
+        self.workers = max(1, int(workers or self.formulas.get('render_workers', 1) or 1))
+        self.logger.info(f"Render workers: {self.workers}")
         
         load_time = time.time() - start_time
         self.logger.info(f"Template processor initialization completed in {load_time:.3f} seconds")
@@ -178,6 +237,25 @@ class TemplateProcessor:
             unique_placeholders = list(sheet_placeholders.keys())
             self.logger.debug(f"Sheet '{sheet_name}' placeholders: {unique_placeholders}")
     
+    def _scan_row_extents(self):
+        """Hitung rentang kolom terpakai per row untuk setiap sheet (sekali saat load)"""
+        start_time = time.time()
+        self.row_extents = {}
+        
+        for sheet_name in self.template_wb.sheetnames:
+            extents = compute_row_extents(self.template_wb[sheet_name])
+            self.row_extents[sheet_name] = extents
+            
+            used_cells = sum(last - first + 1 for first, last in extents.values())
+            self.logger.debug(f"Sheet '{sheet_name}': {len(extents)} used rows, {used_cells} cells in row extents")
+        
+        scan_time = time.time() - start_time
+        self.logger.debug(f"Row extent scanning completed in {scan_time:.3f} seconds")
+    
+    def get_row_extents(self, sheet_name: str) -> Dict[int, Tuple[int, int]]:
+        """Mendapatkan rentang kolom (first, last) per row untuk sheet tertentu"""
+        return self.row_extents.get(sheet_name, {})
+    
     def get_placeholder_info(self) -> Dict:
         """Mendapatkan informasi placeholder yang ditemukan"""
         return self.placeholders
@@ -186,12 +264,20 @@ class TemplateProcessor:
         """Mendapatkan definisi formula yang dimuat"""
         return self.formulas
     
-    def process_template(self, data_context: Dict[str, Any]) -> openpyxl.Workbook:
+    def is_native_mode(self) -> bool:
+        """Cek apakah output ditulis sebagai angka/formula native Excel"""
+        return self.output_mode == 'native'
+    
+    def process_template(self, data_context: Dict[str, Any], workers: Optional[int] = None) -> openpyxl.Workbook:
         """
         Proses template dengan data context yang diberikan
         
         Args:
             data_context: Dictionary berisi data untuk mengisi placeholder
+            workers: Jumlah worker process untuk render sheet secara paralel.
+                None = self.workers (render_workers di formula JSON), 1 = sequential.
+                Setiap worker me-render satu sheet menjadi cell payload, lalu workbook
+                dirakit di proses utama.
             
         Returns:
             openpyxl.Workbook: Workbook yang sudah diproses
@@ -212,42 +298,274 @@ class TemplateProcessor:
         processed_wb = openpyxl.Workbook()
         processed_wb.remove(processed_wb.active)  # Remove default sheet
         
-        # Process setiap sheet
-        for sheet_name in self.template_wb.sheetnames:
-            self.logger.info(f"Processing sheet: {sheet_name}")
-            sheet_start_time = time.time()
+        self._reset_render_state()
+        
+        sheet_names = self.template_wb.sheetnames
+        workers = workers or self.workers
+        payloads = None
+        if workers > 1 and len(sheet_names) > 1:
+            payloads = self._render_payloads_parallel(sheet_names, data_context, workers)
+        
+        if payloads is not None:
+            # Rakit workbook dari payload worker (urutan sheet tetap sama)
+            for sheet_name in sheet_names:
+                target_sheet = processed_wb.create_sheet(title=sheet_name)
+                self._apply_sheet_payload(target_sheet, payloads[sheet_name])
+        else:
+            # Process setiap sheet
+            for sheet_name in sheet_names:
+                target_sheet = processed_wb.create_sheet(title=sheet_name)
+                self._render_sheet(sheet_name, target_sheet, data_context)
+        
+        # Formula Excel ditulis setelah semua sheet selesai agar referensi
+        # ke cell/section di sheet lain sudah final (termasuk setelah insert_rows)
+        if self._pending_formulas:
+            self._apply_excel_formulas(data_context)
+        
+        total_time = time.time() - start_time
+        self.logger.info(f"Template processing completed in {total_time:.3f} seconds")
+        
+        return processed_wb
+    
+    def _reset_render_state(self):
+        """Reset state native output mode sebelum render baru"""
+        self._native_cells = {}
+        self._section_ranges = {}
+        self._pending_formulas = []
+        self._sheet_extents = {}
+        self._row_shifts = {}
+    
+    def _get_sheet_extents(self, sheet_title: str) -> Dict[int, Tuple[int, int]]:
+        """Row extents sheet hasil render (salinan extents template, ikut bergeser saat insert)"""
+        if sheet_title not in self._sheet_extents:
+            self._sheet_extents[sheet_title] = dict(self.row_extents.get(sheet_title, {}))
+        return self._sheet_extents[sheet_title]
+    
+    def _shifted_row(self, sheet_title: str, template_row: int) -> int:
+        """Posisi row template di sheet hasil render setelah row disisipkan"""
+        row = template_row
+        for from_row, amount in self._row_shifts.get(sheet_title, []):
+            if row >= from_row:
+                row += amount
+        return row
+    
+    def _insert_sheet_rows(self, sheet, row: int, amount: int):
+        """
+        insert_rows yang juga menggeser row extents dan merged ranges
+        
+        openpyxl hanya memindahkan cell; merged range di bawah row sisipan
+        tetap di posisi lama sehingga menimpa konten yang sudah bergeser.
+        """
+        sheet.insert_rows(row, amount)
+        
+        for merged_range in sheet.merged_cells.ranges:
+            if merged_range.min_row >= row:
+                merged_range.shift(row_shift=amount)
+            elif merged_range.max_row >= row:
+                merged_range.expand(down=amount)
+        # Set range di-hash dari koordinat, jadi dibangun ulang setelah digeser
+        sheet.merged_cells.ranges = set(sheet.merged_cells.ranges)
+        
+        self._sheet_extents[sheet.title] = shift_row_extents(self._get_sheet_extents(sheet.title), row, amount)
+        self._row_shifts.setdefault(sheet.title, []).append((row, amount))
+    
+    def _render_sheet(self, sheet_name: str, target_sheet, data_context: Dict[str, Any]):
+        """Render satu sheet template ke target_sheet"""
+        self.logger.info(f"Processing sheet: {sheet_name}")
+        sheet_start_time = time.time()
+        
+        source_sheet = self.template_wb[sheet_name]
+        
+        # Copy struktur sheet
+        self.logger.debug(f"Copying sheet structure for: {sheet_name}")
+        self._copy_sheet_structure(source_sheet, target_sheet)
+        
+        # Process placeholders
+        self.logger.debug(f"Processing placeholders for: {sheet_name}")
+        self._process_sheet_placeholders(target_sheet, sheet_name, data_context)
+        
+        # Process repeating sections
+        self.logger.debug(f"Processing repeating sections for: {sheet_name}")
+        self._process_repeating_sections(target_sheet, sheet_name, data_context)
+        
+        sheet_time = time.time() - sheet_start_time
+        self.logger.info(f"Sheet '{sheet_name}' processed in {sheet_time:.3f} seconds")
+    
+    def _render_payloads_parallel(self, sheet_names: List[str], data_context: Dict[str, Any],
+                                  workers: int) -> Optional[Dict[str, Dict[str, Any]]]:
+        """
+        Render setiap sheet di worker process
+        
+        Returns:
+            Dict sheet_name -> payload, atau None jika parallel render gagal
+            (caller kembali ke render sequential)
+        """
+        max_workers = min(workers, len(sheet_names))
+        self.logger.info(f"Rendering {len(sheet_names)} sheets in parallel with {max_workers} workers")
+        start_time = time.time()
+        
+        try:
+            with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_render_worker,
+                                     initargs=(self.template_path, self.formula_path, self.output_mode)) as executor:
+                # Setiap sheet hanya menerima key data_context yang dipakainya,
+                # bukan seluruh hasil query yang di-pickle ulang per sheet
+                futures = {
+                    sheet_name: executor.submit(
+                        _render_sheet_payload, sheet_name, self.sheet_data_context(sheet_name, data_context)
+                    )
+                    for sheet_name in sheet_names
+                }
+                payloads = {sheet_name: future.result() for sheet_name, future in futures.items()}
             
-            source_sheet = self.template_wb[sheet_name]
-            target_sheet = processed_wb.create_sheet(title=sheet_name)
+            render_time = time.time() - start_time
+            self.logger.info(f"Parallel sheet rendering completed in {render_time:.3f} seconds")
+            return payloads
             
-            # Copy struktur sheet
-            self.logger.debug(f"Copying sheet structure for: {sheet_name}")
-            self._copy_sheet_structure(source_sheet, target_sheet)
+        except Exception as e:
+            self.logger.error(f"Parallel sheet rendering failed, falling back to sequential: {str(e)}")
+            return None
+    
+    def sheet_data_context(self, sheet_name: str, data_context: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Subset data_context yang dibutuhkan untuk me-render satu sheet
+        
+        Key yang dipakai: placeholder di sheet (dan key pertama dot notation),
+        source/token {key} dari formula variable placeholder tersebut, serta
+        data_source repeating section sheet.
+        """
+        variables = self.formulas.get('variables', {})
+        token_pattern = re.compile(r'\{([^{}]+)\}')
+        keys = set()
+        
+        for placeholder_key in self.placeholders.get(sheet_name, {}):
+            keys.add(placeholder_key)
+            keys.add(placeholder_key.split('.', 1)[0])
             
-            # Process placeholders
-            self.logger.debug(f"Processing placeholders for: {sheet_name}")
-            self._process_sheet_placeholders(target_sheet, sheet_name, data_context)
+            formula_def = variables.get(placeholder_key)
+            if not formula_def:
+                continue
             
-            # Process repeating sections
-            self.logger.debug(f"Processing repeating sections for: {sheet_name}")
-            self._process_repeating_sections(target_sheet, sheet_name, data_context)
+            keys.add(formula_def.get('source', ''))
+            for field in ('expression', 'format', 'excel_formula'):
+                value = formula_def.get(field)
+                if isinstance(value, str):
+                    keys.update(token.strip() for token in token_pattern.findall(value))
+        
+        for config in self.formulas.get('repeating_sections', {}).get(sheet_name, {}).values():
+            keys.add(config.get('data_source', ''))
+        
+        return {key: value for key, value in data_context.items() if key in keys}
+    
+    def render_sheet_payload(self, sheet_name: str, data_context: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Render satu sheet dan kembalikan hasilnya sebagai payload yang bisa di-pickle
+        
+        Payload berisi cell (row, column, value, style index), tabel style unik,
+        merged ranges, serta metadata native mode (koordinat, bukan object cell)
+        untuk dirakit ulang oleh _apply_sheet_payload.
+        """
+        render_wb = openpyxl.Workbook()
+        render_wb.remove(render_wb.active)
+        target_sheet = render_wb.create_sheet(title=sheet_name)
+        
+        self._reset_render_state()
+        self._render_sheet(sheet_name, target_sheet, data_context)
+        
+        # Style index di StyleArray hanya berlaku di workbook ini, jadi yang dikirim
+        # adalah object style-nya (di-dedupe per kombinasi). cell.font dkk adalah
+        # StyleProxy yang tidak bisa di-unpickle, jadi dikirim salinan object aslinya
+        styles = []
+        style_index = {}
+        cells = []
+        for (row, col), cell in target_sheet._cells.items():
+            if isinstance(cell, MergedCell):
+                # Dibuat ulang oleh merge_cells dari merged_ranges
+                continue
             
-            sheet_time = time.time() - sheet_start_time
-            self.logger.info(f"Sheet '{sheet_name}' processed in {sheet_time:.3f} seconds")
+            if cell._style is None:
+                # Cell tanpa style (StyleArray belum dibuat openpyxl)
+                cells.append((row, col, cell.value, None))
+                continue
+            
+            style_key = tuple(cell._style)
+            idx = style_index.get(style_key)
+            if idx is None:
+                idx = len(styles)
+                style_index[style_key] = idx
+                styles.append((copy(cell.font), copy(cell.fill), copy(cell.border),
+                               copy(cell.alignment), cell.number_format))
+            cells.append((row, col, cell.value, idx))
         
-        total_time = time.time() - start_time
-        self.logger.info(f"Template processing completed in {total_time:.3f} seconds")
+        return {
+            'sheet_name': sheet_name,
+            'cells': cells,
+            'styles': styles,
+            'merged_ranges': [str(merged_range) for merged_range in target_sheet.merged_cells.ranges],
+            'native_cells': {key: cell.coordinate for (_, key), cell in self._native_cells.items()},
+            'section_ranges': {
+                name: (first_cell.coordinate, last_cell.coordinate)
+                for name, (_, first_cell, last_cell) in self._section_ranges.items()
+            },
+            'pending_formulas': [
+                (cell.coordinate, placeholder_key, value)
+                for _, cell, placeholder_key, value in self._pending_formulas
+            ]
+        }
+    
+    def _apply_sheet_payload(self, target_sheet, payload: Dict[str, Any]):
+        """Tulis payload hasil render_sheet_payload ke target_sheet"""
+        styles = payload['styles']
         
-        return processed_wb
+        # Style di-assign sekali per kombinasi, sisanya cukup copy StyleArray
+        applied_styles = {}
+        for row, col, value, style_idx in payload['cells']:
+            cell = target_sheet.cell(row=row, column=col)
+            cell.value = value
+            if style_idx is None:
+                continue
+            
+            style_array = applied_styles.get(style_idx)
+            if style_array is not None:
+                cell._style = copy(style_array)
+                continue
+            
+            font, fill, border, alignment, number_format = styles[style_idx]
+            cell.font = font
+            cell.fill = fill
+            cell.border = border
+            cell.alignment = alignment
+            cell.number_format = number_format
+            applied_styles[style_idx] = copy(cell._style)
+        
+        for merged_range in payload['merged_ranges']:
+            target_sheet.merge_cells(merged_range)
+        
+        sheet_title = target_sheet.title
+        for key, coordinate in payload['native_cells'].items():
+            self._native_cells[(sheet_title, key)] = target_sheet[coordinate]
+        
+        for name, (first, last) in payload['section_ranges'].items():
+            self._section_ranges[name] = (sheet_title, target_sheet[first], target_sheet[last])
+        
+        for coordinate, placeholder_key, value in payload['pending_formulas']:
+            self._pending_formulas.append((sheet_title, target_sheet[coordinate], placeholder_key, value))
+        
+        self.logger.debug(f"Assembled sheet '{sheet_title}' from payload: {len(payload['cells'])} cells, {len(styles)} styles")
     
     def _copy_sheet_structure(self, source_sheet, target_sheet):
         """Copy struktur sheet termasuk formatting"""
         self.logger.debug(f"Copying sheet structure from {source_sheet.title}")
         cells_copied = 0
         
-        # Copy semua cell values dan formatting
-        for row in source_sheet.iter_rows():
-            for cell in row:
+        # Copy cell values dan formatting, hanya dalam rentang kolom terpakai per row
+        row_extents = self.row_extents.get(source_sheet.title)
+        if row_extents is None:
+            row_extents = compute_row_extents(source_sheet)
+        
+        for row_idx in sorted(row_extents):
+            first_col, last_col = row_extents[row_idx]
+            for col_idx in range(first_col, last_col + 1):
+                cell = source_sheet.cell(row=row_idx, column=col_idx)
                 target_cell = target_sheet.cell(row=cell.row, column=cell.column)
                 target_cell.value = cell.value
                 cells_copied += 1
@@ -304,9 +622,18 @@ class TemplateProcessor:
         
         processed_count = 0
         failed_count = 0
+        native_mode = self.is_native_mode()
+        variables = self.formulas.get('variables', {})
+        
+        # Placeholder di template row repeating section diisi per item, bukan di sini
+        section_rows = set()
+        for config in self.formulas.get('repeating_sections', {}).get(sheet_name, {}).values():
+            start_row = config.get('start_row', 1)
+            section_rows.update(range(start_row, start_row + config.get('template_rows', 1)))
         
         for placeholder_key, locations in placeholders.items():
             self.logger.debug(f"Processing placeholder: {placeholder_key}")
+            formula_def = variables.get(placeholder_key, {})
             
             # Dapatkan nilai untuk placeholder ini
             start_time = time.time()
@@ -317,12 +644,30 @@ class TemplateProcessor:
             
             # Update semua lokasi placeholder ini
             for location in locations:
+                if location['row'] in section_rows:
+                    continue
+                
                 try:
                     cell = sheet[location['cell']]
                     original_value = location['original_value']
                     
+                    token = f"{{{{{placeholder_key}}}}}"
+                    whole_cell = isinstance(original_value, str) and original_value.strip() == token
+                    
+                    if native_mode and whole_cell and formula_def.get('excel_formula'):
+                        # Ditulis sebagai formula setelah semua sheet diproses
+                        self._pending_formulas.append((sheet_name, cell, placeholder_key, value))
+                        self._native_cells[(sheet_name, placeholder_key)] = cell
+                        processed_count += 1
+                    elif native_mode and whole_cell and is_native_number(value):
+                        cell.value = value
+                        cell.number_format = formula_def.get('number_format') or default_number_format(value)
+                        self._native_cells[(sheet_name, placeholder_key)] = cell
+                        processed_count += 1
+                        
+                        self.logger.debug(f"Updated {location['cell']} with native number: {value}")
                     # Replace placeholder dengan nilai
-                    if isinstance(original_value, str):
+                    elif isinstance(original_value, str):
                         new_value = original_value.replace(f"{{{{{placeholder_key}}}}}", str(value))
                         cell.value = new_value
                         processed_count += 1
@@ -540,16 +885,17 @@ class TemplateProcessor:
             start_time = time.time()
             
             try:
-                self._process_single_repeating_section(sheet, config, data_context)
+                self._process_single_repeating_section(sheet, config, data_context, section_name)
                 section_time = time.time() - start_time
                 self.logger.debug(f"Repeating section '{section_name}' processed in {section_time:.3f}s")
                 
             except Exception as e:
                 self.logger.error(f"Error processing repeating section '{section_name}': {str(e)}")
     
-    def _process_single_repeating_section(self, sheet, config: Dict, data_context: Dict[str, Any]):
+    def _process_single_repeating_section(self, sheet, config: Dict, data_context: Dict[str, Any], section_name: str = ''):
         """Proses satu repeating section"""
-        start_row = config.get('start_row', 1)
+        # start_row di config mengacu ke template; section lain di atasnya bisa sudah menyisipkan row
+        start_row = self._shifted_row(sheet.title, config.get('start_row', 1))
         template_rows = config.get('template_rows', 1)
         data_source = config.get('data_source', '')
         
@@ -568,6 +914,34 @@ class TemplateProcessor:
         
         self.logger.info(f"Processing repeating section with {len(repeat_data)} data items")
         
+        row_extents = self._get_sheet_extents(sheet.title)
+        native_mode = self.is_native_mode()
+        placeholder_pattern = re.compile(r'\{\{([^}]+)\}\}')
+        
+        # Number format per kolom dari konfigurasi 'columns' (cell_format.number_format)
+        column_formats = {}
+        for column_def in config.get('columns', {}).values():
+            column_letter = column_def.get('column')
+            number_format = column_def.get('cell_format', {}).get('number_format')
+            if column_letter and number_format:
+                column_formats[column_index_from_string(column_letter)] = number_format
+        
+        # Snapshot template rows sebelum diisi; row hasil insert masih kosong,
+        # jadi setiap item diisi dari snapshot ini (value + style)
+        template_cells = {}
+        for template_row_idx in range(template_rows):
+            template_row = start_row + template_row_idx
+            extent = row_extents.get(template_row)
+            if not extent:
+                continue
+            
+            template_cells[template_row_idx] = []
+            for col in range(extent[0], extent[1] + 1):
+                template_cell = sheet.cell(row=template_row, column=col)
+                template_cells[template_row_idx].append(
+                    (col, template_cell.value, copy(template_cell._style), template_cell.coordinate)
+                )
+        
         # Insert rows untuk data tambahan
         rows_needed = len(repeat_data) * template_rows
         current_rows = template_rows
@@ -575,10 +949,7 @@ class TemplateProcessor:
         if rows_needed > current_rows:
             rows_to_insert = rows_needed - current_rows
             self.logger.debug(f"Inserting {rows_to_insert} additional rows")
-            
-            # Insert additional rows
-            for i in range(rows_to_insert):
-                sheet.insert_rows(start_row + current_rows + i)
+            self._insert_sheet_rows(sheet, start_row + current_rows, rows_to_insert)
         
         # Fill data untuk setiap item
         processed_items = 0
@@ -591,32 +962,157 @@ class TemplateProcessor:
             for template_row_idx in range(template_rows):
                 current_row = start_row + row_offset + template_row_idx
                 
+                # Hanya kunjungi kolom yang berisi konten/style pada template row
+                cells = template_cells.get(template_row_idx)
+                if not cells:
+                    continue
+                
                 # Process placeholders dalam row ini
                 cells_processed = 0
-                for col in range(1, sheet.max_column + 1):
+                for col, template_value, template_style, template_coordinate in cells:
                     cell = sheet.cell(row=current_row, column=col)
-                    if cell.value and isinstance(cell.value, str):
-                        original_value = cell.value
-                        cell_value = cell.value
-                        
-                        # Replace placeholders dengan data item
-                        if isinstance(item_data, dict):
-                            for key, value in item_data.items():
-                                placeholder = f"{{{{{key}}}}}"
-                                if placeholder in cell_value:
-                                    cell_value = cell_value.replace(placeholder, str(value))
-                                    cells_processed += 1
-                        
-                        if cell_value != original_value:
-                            cell.value = cell_value
-                            self.logger.debug(f"Updated repeat cell {cell.coordinate}: '{original_value}' -> '{cell_value}'")
+                    if idx > 0:
+                        cell._style = copy(template_style)
+                    
+                    if not isinstance(template_value, str):
+                        if idx > 0:
+                            cell.value = template_value
+                        continue
+                    
+                    if template_value.startswith('=') and idx > 0:
+                        # Formula per-row di template ikut digeser ke row item ini
+                        cell.value = Translator(template_value, origin=template_coordinate).translate_formula(cell.coordinate)
+                        continue
+                    
+                    # Placeholder tunggal + angka -> tulis sebagai number native
+                    match = placeholder_pattern.fullmatch(template_value.strip())
+                    if native_mode and match and isinstance(item_data, dict):
+                        value = item_data.get(match.group(1).strip())
+                        if is_native_number(value):
+                            cell.value = value
+                            cell.number_format = column_formats.get(col) or default_number_format(value)
+                            cells_processed += 1
+                            continue
+                    
+                    cell_value = template_value
+                    
+                    # Replace placeholders dengan data item
+                    if isinstance(item_data, dict):
+                        for key, value in item_data.items():
+                            placeholder = f"{{{{{key}}}}}"
+                            if placeholder in cell_value:
+                                cell_value = cell_value.replace(placeholder, str(value))
+                                cells_processed += 1
+                    
+                    if cell_value != cell.value:
+                        cell.value = cell_value
+                        self.logger.debug(f"Updated repeat cell {cell.coordinate}: '{template_value}' -> '{cell_value}'")
                 
                 self.logger.debug(f"Processed {cells_processed} placeholders in row {current_row}")
             
             processed_items += 1
         
+        last_row = start_row + max(rows_needed, template_rows) - 1
+        
+        # Simpan cell anchor (bukan nomor row) supaya range tetap benar jika
+        # section lain di sheet yang sama menyisipkan row di atasnya
+        if section_name and template_cells:
+            anchor_col = min(cells[0][0] for cells in template_cells.values())
+            self._section_ranges[section_name] = (
+                sheet.title,
+                sheet.cell(row=start_row, column=anchor_col),
+                sheet.cell(row=last_row, column=anchor_col)
+            )
+        
+        if native_mode and config.get('totals'):
+            self._write_section_totals(sheet, config['totals'], start_row, last_row, column_formats)
+        
         self.logger.info(f"Repeating section completed: {processed_items} items processed")
     
+    def _write_section_totals(self, sheet, totals_config: Dict, first_row: int, last_row: int,
+                              column_formats: Dict[int, str]):
+        """
+        Tulis baris total sebagai formula Excel di bawah row yang di-emit
+        
+        Config contoh: {"row_offset": 0, "label_column": "A", "label": "TOTAL",
+                        "columns": {"C": "SUM", "E": "AVERAGE"}}
+        """
+        total_row = last_row + 1 + totals_config.get('row_offset', 0)
+        
+        # Sisipkan row baru supaya konten template di bawah section ikut bergeser
+        self._insert_sheet_rows(sheet, total_row, 1)
+        
+        label_column = totals_config.get('label_column')
+        if label_column:
+            sheet[f"{label_column}{total_row}"].value = totals_config.get('label', 'TOTAL')
+        
+        for column_letter, function_name in totals_config.get('columns', {}).items():
+            cell = sheet[f"{column_letter}{total_row}"]
+            cell.value = f"={function_name.upper()}({column_letter}{first_row}:{column_letter}{last_row})"
+            cell.number_format = column_formats.get(column_index_from_string(column_letter), '#,##0.00')
+            self.logger.debug(f"Section total {cell.coordinate}: {cell.value}")
+    
+    def _resolve_formula_reference(self, name: str, target_sheet: str, data_context: Dict[str, Any]) -> Optional[str]:
+        """
+        Resolve token {name} dalam excel_formula menjadi referensi Excel
+        
+        - {section.COL}: range kolom COL dari repeating section yang sudah di-emit
+        - {variable}: cell tempat variable ditulis (native), atau nilai numeriknya
+        """
+        def prefix_for(sheet_title: str) -> str:
+            return '' if sheet_title == target_sheet else f"{quote_sheetname(sheet_title)}!"
+        
+        if '.' in name:
+            section_name, column_letter = name.rsplit('.', 1)
+            if section_name in self._section_ranges:
+                sheet_title, first_cell, last_cell = self._section_ranges[section_name]
+                return f"{prefix_for(sheet_title)}{column_letter}{first_cell.row}:{column_letter}{last_cell.row}"
+        
+        # Cell di sheet formula itu sendiri lebih dulu, baru sheet lain (urutan render)
+        if (target_sheet, name) in self._native_cells:
+            return self._native_cells[(target_sheet, name)].coordinate
+        for (sheet_title, variable), cell in self._native_cells.items():
+            if variable == name:
+                return f"{prefix_for(sheet_title)}{cell.coordinate}"
+        
+        value = self._get_placeholder_value(name, data_context)
+        if is_native_number(value):
+            return str(value)
+        
+        return None
+    
+    def _apply_excel_formulas(self, data_context: Dict[str, Any]):
+        """Tulis variable yang punya 'excel_formula' sebagai formula Excel"""
+        variables = self.formulas.get('variables', {})
+        token_pattern = re.compile(r'\{([^{}]+)\}')
+        
+        for sheet_name, cell, placeholder_key, fallback_value in self._pending_formulas:
+            formula_def = variables.get(placeholder_key, {})
+            formula = formula_def['excel_formula']
+            unresolved = []
+            
+            def substitute(match):
+                reference = self._resolve_formula_reference(match.group(1).strip(), sheet_name, data_context)
+                if reference is None:
+                    unresolved.append(match.group(1))
+                    return match.group(0)
+                return reference
+            
+            resolved = token_pattern.sub(substitute, formula)
+            
+            if unresolved:
+                # Tidak bisa dibentuk formula yang valid, pakai nilai hasil Python
+                self.logger.warning(f"Unresolved references {unresolved} in excel_formula for '{placeholder_key}', writing computed value")
+                cell.value = fallback_value if is_native_number(fallback_value) else str(fallback_value)
+                continue
+            
+            if not resolved.startswith('='):
+                resolved = f"={resolved}"
+            
+            cell.value = resolved
+            cell.number_format = formula_def.get('number_format', '#,##0.00')
+            self.logger.debug(f"Formula for '{placeholder_key}' in {sheet_name}!{cell.coordinate}: {resolved}")
+    
     def save_processed_template(self, processed_wb: openpyxl.Workbook, output_path: str):
         """Simpan template yang sudah diproses"""
         self.logger.info(f"Saving processed template to: {output_path}")
@@ -643,4 +1139,32 @@ class TemplateProcessor:
                 
         except Exception as e:
             self.logger.error(f"Error saving processed template: {str(e)}")
-            raise
\ No newline at end of file
+            raise
+
+
+def main():
+    """Render template dari command line: data context dibaca dari file JSON"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Render Excel template dengan data context JSON")
+    parser.add_argument('template', help="Path template Excel")
+    parser.add_argument('formula', help="Path formula definition JSON")
+    parser.add_argument('data', help="Path data context JSON")
+    parser.add_argument('output', help="Path file Excel hasil")
+    parser.add_argument('--output-mode', choices=TemplateProcessor.OUTPUT_MODES, default=None,
+                        help="Override 'output_mode' di formula JSON")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Jumlah worker process render sheet (override 'render_workers')")
+    args = parser.parse_args()
+    
+    with open(args.data, 'r', encoding='utf-8') as f:
+        data_context = json.load(f)
+    
+    processor = TemplateProcessor(args.template, args.formula, output_mode=args.output_mode,
+                                  workers=args.workers)
+    processed_wb = processor.process_template(data_context)
+    processor.save_processed_template(processed_wb, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+"""Tests for the root-level report modules"""
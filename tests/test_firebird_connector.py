@@ -0,0 +1,100 @@
+"""
+Firebird Connector Tests
+Test sending isql scripts over stdin and the temp-file fallback through a fake isql
+"""
+
+import unittest
+import os
+import sys
+import json
+import shutil
+import tempfile
+from contextlib import redirect_stdout
+from io import StringIO
+
+# Add repository root to path
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from firebird_connector import FirebirdConnector
+
+# isql palsu: mode 'stdin' membaca script dari stdin (dengan prompt SQL>), mode
+# 'files' hanya mengerti -i/-o seperti isql lama; setiap argv dicatat ke log
+FAKE_ISQL = """#!{python}
+import sys
+import json
+
+argv = sys.argv[1:]
+with open({log!r}, 'a') as log:
+    log.write(json.dumps(argv) + '\\n')
+
+table = "ID     NAME\\n====== ==========\\n\\n     1 BUDI\\n     2 SITI\\n"
+if '-i' in argv:
+    with open(argv[argv.index('-i') + 1]) as f:
+        script = f.read()
+    with open(argv[argv.index('-o') + 1], 'w') as f:
+        f.write("\\n" + table + "\\n")
+elif {mode!r} == 'stdin':
+    script = sys.stdin.read()
+    sys.stdout.write("SQL> SQL> \\n" + table + "SQL> \\n")
+"""
+
+
+class TestFirebirdConnectorIsql(unittest.TestCase):
+    """Test FirebirdConnector.execute_query against a fake isql"""
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.test_dir, 'PTRJ_P2B.FDB')
+        open(self.db_path, 'w').close()
+        self.log_path = os.path.join(self.test_dir, 'isql_calls.log')
+
+        # File sementara connector masuk ke folder ini
+        self.scratch_dir = os.path.join(self.test_dir, 'tmp')
+        os.mkdir(self.scratch_dir)
+        self.original_tempdir = tempfile.tempdir
+        tempfile.tempdir = self.scratch_dir
+
+    def tearDown(self):
+        tempfile.tempdir = self.original_tempdir
+        shutil.rmtree(self.test_dir)
+
+    def connector(self, mode):
+        isql_path = os.path.join(self.test_dir, f'isql_{mode}')
+        with open(isql_path, 'w') as f:
+            f.write(FAKE_ISQL.format(python=sys.executable, log=self.log_path, mode=mode))
+        os.chmod(isql_path, 0o755)
+        return FirebirdConnector(db_path=self.db_path, isql_path=isql_path)
+
+    def query(self, connector):
+        with redirect_stdout(StringIO()):
+            return connector.execute_query("SELECT ID, NAME FROM EMP")
+
+    def calls(self):
+        with open(self.log_path) as f:
+            return [json.loads(line) for line in f]
+
+    def test_script_goes_over_stdin_without_temp_files(self):
+        connector = self.connector('stdin')
+        rows = self.query(connector)
+
+        self.assertEqual([row['NAME'] for row in rows], ['BUDI', 'SITI'])
+        self.assertTrue(connector.stdin_io)
+        self.assertEqual(len(self.calls()), 1)
+        self.assertNotIn('-i', self.calls()[0])
+        self.assertEqual(os.listdir(self.scratch_dir), [])
+
+    def test_isql_without_stdin_falls_back_to_files_once(self):
+        connector = self.connector('files')
+        self.assertEqual(len(self.query(connector)), 2)
+        self.assertIs(connector.stdin_io, False)
+
+        # Query berikutnya langsung memakai file, tanpa mencoba stdin lagi
+        self.assertEqual(len(self.query(connector)), 2)
+        calls = self.calls()
+        self.assertEqual(['-i' in argv for argv in calls], [False, True, True])
+        self.assertEqual(os.listdir(self.scratch_dir), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,173 @@
+"""
+Template Processor Tests
+Test row insertion, section totals and parallel sheet rendering
+"""
+
+import unittest
+import os
+import sys
+import json
+import shutil
+import tempfile
+
+from openpyxl import Workbook
+
+# Add repository root to path
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from template_processor import TemplateProcessor
+
+TEMPLATE_PATH = os.path.join(REPO_ROOT, 'sample_template.xlsx')
+FORMULA_PATH = os.path.join(REPO_ROOT, 'sample_formula.json')
+
+
+def daily_rows(count):
+    return [
+        {'TANGGAL': f'2025-01-0{day}', 'TOTAL_BRUTO': 100.0 * day, 'TOTAL_NETTO': 90.0 * day,
+         'TOTAL_NILAI': 1000 * day, 'JUMLAH_TRIP': day}
+        for day in range(1, count + 1)
+    ]
+
+
+class TestSectionTotals(unittest.TestCase):
+    """Test the totals row configured for Summary.daily_data in sample_formula.json"""
+
+    def setUp(self):
+        self.processor = TemplateProcessor(TEMPLATE_PATH, FORMULA_PATH, output_mode='native', workers=1)
+        self.data_context = {'daily_summary': daily_rows(3), 'ffb_data': [], 'jenis_buah_summary': []}
+
+    def test_sample_formula_declares_totals(self):
+        section = self.processor.formulas['repeating_sections']['Summary']['daily_data']
+        self.assertEqual(section['totals']['columns']['B'], 'SUM')
+
+    def test_totals_row_formula_and_content_below(self):
+        sheet = self.processor.process_template(self.data_context)['Summary']
+
+        # 3 item mulai row 10 -> data di row 10-12, total di row 13
+        self.assertEqual(sheet['A13'].value, 'TOTAL')
+        self.assertEqual(sheet['B13'].value, '=SUM(B10:B12)')
+        self.assertEqual(sheet['E13'].value, '=SUM(E10:E12)')
+
+        # Footer template (A15 'TOTAL KESELURUHAN', merged A15:B15) bergeser 2 + 1 row
+        self.assertIsNone(sheet['A15'].value)
+        self.assertEqual(sheet['A18'].value, 'TOTAL KESELURUHAN')
+        self.assertEqual(sheet['A20'].value, 'Total Berat Bruto:')
+        merged = {str(merged_range) for merged_range in sheet.merged_cells.ranges}
+        self.assertIn('A18:B18', merged)
+        self.assertNotIn('A15:B15', merged)
+        self.assertIn('A1:E1', merged)
+
+    def test_second_section_follows_inserted_rows(self):
+        """A section below another on the same sheet starts at its shifted row"""
+        self.data_context['ffb_data'] = [{'TANGGAL': '2025-01-01'}] * 3
+        self.data_context['jenis_buah_summary'] = [{'JENIS_BUAH': 'TBS'}] * 2
+
+        sheet = self.processor.process_template(self.data_context)['Detail']
+
+        # ffb_data menyisipkan 2 row, jadi header ringkasan (A23) pindah ke A25
+        self.assertEqual(sheet['A25'].value, 'RINGKASAN PER JENIS BUAH')
+        self.assertIn('A25:E25', {str(merged_range) for merged_range in sheet.merged_cells.ranges})
+        self.assertEqual(sheet['A26'].value, 'Jenis Buah')
+        self.assertEqual(sheet['A27'].value, 'Template Fruit')
+        self.assertEqual(sheet['A28'].value, 'Template Fruit')
+        self.assertIsNone(sheet['A29'].value)
+
+    def test_repeated_render_starts_from_template_rows(self):
+        """Row shifts of one render do not leak into the next"""
+        self.processor.process_template(self.data_context)
+        sheet = self.processor.process_template(self.data_context)['Summary']
+        self.assertEqual(sheet['B13'].value, '=SUM(B10:B12)')
+
+
+class TestParallelRender(unittest.TestCase):
+    """Test that worker-process rendering matches sequential rendering"""
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.template_path = os.path.join(self.test_dir, 'template.xlsx')
+        self.formula_path = os.path.join(self.test_dir, 'formula.json')
+
+        workbook = Workbook()
+        summary = workbook.active
+        summary.title = 'Summary'
+        summary['A1'] = '{{report_title}}'
+        summary.merge_cells('A1:C1')
+        summary['A2'] = 'Netto'
+        summary['B2'] = '{{total_netto}}'
+        summary['A3'] = 'Rasio'
+        summary['B3'] = '{{rasio}}'
+        summary['A5'] = '{{TANGGAL}}'
+        summary['B5'] = '{{NETTO}}'
+        summary['A7'] = 'Footer'
+        detail = workbook.create_sheet('Detail')
+        detail['A1'] = 'Estate: {{estate.NAME}}'
+        detail['A3'] = '{{FIELDNO}}'
+        detail['B3'] = '{{RIPEBCH}}'
+        workbook.save(self.template_path)
+
+        formulas = {
+            'output_mode': 'native',
+            'variables': {
+                'report_title': {'type': 'direct', 'source': 'title', 'default': ''},
+                'total_netto': {'type': 'direct', 'source': 'netto', 'default': 0},
+                'rasio': {'type': 'calculation', 'expression': '{netto} / {bruto}',
+                          'excel_formula': '=IF({bruto}=0,0,{total_netto}/{bruto})', 'default': 0}
+            },
+            'repeating_sections': {
+                'Summary': {'daily': {
+                    'data_source': 'daily', 'start_row': 5, 'template_rows': 1,
+                    'totals': {'label_column': 'A', 'columns': {'B': 'SUM'}}
+                }},
+                'Detail': {'blocks': {'data_source': 'blocks', 'start_row': 3, 'template_rows': 1}}
+            }
+        }
+        with open(self.formula_path, 'w', encoding='utf-8') as f:
+            json.dump(formulas, f)
+
+        self.data_context = {
+            'title': 'Laporan FFB', 'netto': 900.0, 'bruto': 1000.0, 'unused_rows': list(range(1000)),
+            'estate': {'NAME': 'PGE 2B'},
+            'daily': [{'TANGGAL': f'2025-01-0{day}', 'NETTO': 300.0} for day in (1, 2, 3)],
+            'blocks': [{'FIELDNO': f'F{n:03d}', 'RIPEBCH': n} for n in range(1, 6)]
+        }
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def sheet_snapshot(self, workbook):
+        return {
+            sheet.title: (
+                {cell.coordinate: (cell.value, cell.number_format)
+                 for row in sheet.iter_rows() for cell in row if cell.value is not None},
+                sorted(str(merged_range) for merged_range in sheet.merged_cells.ranges)
+            )
+            for sheet in workbook.worksheets
+        }
+
+    def test_sheet_data_context_only_has_referenced_keys(self):
+        processor = TemplateProcessor(self.template_path, self.formula_path, workers=1)
+
+        self.assertEqual(set(processor.sheet_data_context('Summary', self.data_context)),
+                         {'title', 'netto', 'bruto', 'daily'})
+        self.assertEqual(set(processor.sheet_data_context('Detail', self.data_context)),
+                         {'estate', 'blocks'})
+
+    def test_parallel_output_matches_serial(self):
+        processor = TemplateProcessor(self.template_path, self.formula_path, workers=1)
+        serial = self.sheet_snapshot(processor.process_template(self.data_context))
+
+        # Pastikan jalur worker benar-benar dipakai, bukan fallback sequential
+        payloads = processor._render_payloads_parallel(['Summary', 'Detail'], self.data_context, 2)
+        self.assertIsNotNone(payloads)
+
+        parallel = self.sheet_snapshot(processor.process_template(self.data_context, workers=2))
+
+        self.assertEqual(parallel, serial)
+        self.assertEqual(serial['Summary'][0]['B3'][0], '=IF(1000.0=0,0,B2/1000.0)')
+        self.assertEqual(serial['Summary'][0]['B8'][0], '=SUM(B5:B7)')
+        self.assertEqual(serial['Detail'][0]['A7'][0], 'F005')
+
+
+if __name__ == '__main__':
+    unittest.main()